@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 from app.api import session, characters, combat, dice, persistence, templates, maps, users
-from app.api import user_characters, user_maps
+from app.api import user_characters, user_maps, uploads, avatar_jobs
 
 api_router = APIRouter(prefix="/api")
 
@@ -14,3 +14,5 @@ api_router.include_router(maps.router, tags=["maps"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(user_characters.router, prefix="/me/characters", tags=["user-characters"])
 api_router.include_router(user_maps.router, prefix="/me/maps", tags=["user-maps"])
+api_router.include_router(uploads.router, prefix="/uploads", tags=["uploads"])
+api_router.include_router(avatar_jobs.router, prefix="/avatar-jobs", tags=["avatar-jobs"])
@@ -0,0 +1,15 @@
+from fastapi import APIRouter, HTTPException
+
+from app.schemas.avatar_job import AvatarJobResponse
+from app.services.avatar_jobs import avatar_queue
+
+router = APIRouter()
+
+
+@router.get("/{job_id}", response_model=AvatarJobResponse)
+def get_avatar_job(job_id: str):
+    """Status of an avatar generation job (ids are random, no auth needed)."""
+    job = avatar_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -6,8 +6,14 @@ from app.database import get_db
 from app.models.player import Player
 from app.models.character import Character
 from app.schemas.character import CharacterCreate, CharacterUpdate, CharacterResponse
+from app.schemas.avatar_job import AvatarJobResponse
+from app.services.avatar_jobs import (
+    DONE, AvatarQueueFull, apply_avatar, avatar_queue, notify_session_characters,
+)
 from app.websocket.manager import manager
+from app.services.initiative import initiative_indexes
 from app.core.auth import get_current_player
+from app.core.fast_json import FastJSONResponse, serialize_many
 
 router = APIRouter()
 
@@ -27,7 +33,7 @@ def list_characters(
         .filter(Player.session_id == current_player.session_id)
         .all()
     )
-    return characters
+    return FastJSONResponse(serialize_many(CharacterResponse, characters))
 
 
 @router.post("", response_model=CharacterResponse)
@@ -58,6 +64,7 @@ async def create_character(
     db.add(character)
     db.commit()
     db.refresh(character)
+    initiative_indexes.invalidate_session(current_player.session_id)
 
     # Broadcast character creation
     await manager.broadcast_event("character_created", {
@@ -127,6 +134,8 @@ async def update_character(
 
     db.commit()
     db.refresh(character)
+    if "name" in update_data:
+        initiative_indexes.invalidate_session(current_player.session_id)
 
     # Broadcast character update
     await manager.broadcast_event("character_updated", {
@@ -145,13 +154,17 @@ async def update_character(
     return character
 
 
-@router.post("/{character_id}/generate-avatar", response_model=CharacterResponse)
+@router.post("/{character_id}/generate-avatar", response_model=AvatarJobResponse, status_code=202)
 async def generate_character_avatar(
     character_id: int,
     current_player: Player = Depends(get_current_player),
     db: DBSession = Depends(get_db)
 ):
-    """Generate avatar for a session character. Owner or GM only."""
+    """Queue avatar generation for a session character. Owner or GM only.
+
+    Returns the job; when it finishes the character is broadcast with
+    ``character_updated`` and ``avatar_ready``.
+    """
     character = (
         db.query(Character)
         .join(Player)
@@ -170,23 +183,19 @@ async def generate_character_avatar(
     if not character.appearance:
         raise HTTPException(status_code=400, detail="Character has no appearance description")
 
-    from app.services.avatar import generate_avatar
     try:
-        avatar_url = await generate_avatar(character.appearance)
-    except ValueError as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Avatar generation failed: {e}")
-
-    character.avatar_url = avatar_url
-    db.commit()
-    db.refresh(character)
+        job = avatar_queue.submit(character.appearance, "character", character.id)
+    except AvatarQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
 
-    await manager.broadcast_event("character_updated", {
-        "character": CharacterResponse.model_validate(character).model_dump()
-    })
+    # Cached result for the same description: apply right away
+    if job.status == DONE:
+        apply_avatar(db, job.avatar_url, job.targets)
+        db.commit()
+        db.refresh(character)
+        await notify_session_characters(job, [CharacterResponse.model_validate(character).model_dump()])
 
-    return character
+    return job
 
 
 @router.delete("/{character_id}")
@@ -216,6 +225,7 @@ async def delete_character(
 
     db.delete(character)
     db.commit()
+    initiative_indexes.invalidate_session(current_player.session_id)
 
     # Broadcast character deletion
     await manager.broadcast_event("character_deleted", {
@@ -1,6 +1,6 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session as DBSession
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session as DBSession, selectinload
 
 from app.database import get_db
 from app.models.player import Player
@@ -8,11 +8,20 @@ from app.models.character import Character
 from app.models.combat import Combat, CombatParticipant, InitiativeRoll
 from app.schemas.combat import (
     CombatResponse, CombatParticipantResponse, CombatAction,
-    InitiativeEntry, InitiativeListResponse, InitiativeRollResponse
+    InitiativeEntry, InitiativeListResponse, InitiativeRollResponse,
+    EncounterSimulationRequest, EncounterSimulationResponse, CombatantOutcome,
 )
 from app.services.combat import CombatService
+from app.services.combat_journal import (
+    CombatJournal, INITIATIVE_ROLLED, roll_state, event_to_dict,
+)
 from app.services.dice import DiceService
 from app.services.modifiers import ModifierService
+from app.services.initiative import initiative_indexes
+from app.services.encounter import (
+    Combatant, PARTY, ENEMIES, combatant_from_character, simulate_encounter,
+)
+from app.config import get_settings
 from app.websocket.manager import manager
 from app.core.auth import get_current_player
 
@@ -68,51 +77,8 @@ def build_combat_response(combat: Combat) -> dict:
 
 
 def build_initiative_list(db: DBSession, combat: Combat) -> List[InitiativeEntry]:
-    """Build sorted initiative list for combat (players + NPCs)."""
-    entries = []
-
-    # Get all players in session (non-GM)
-    players = db.query(Player).filter(
-        Player.session_id == combat.session_id,
-        Player.is_gm == False
-    ).all()
-
-    # Get player initiative rolls (those with player_id)
-    player_rolls = {r.player_id: r.roll for r in combat.initiative_rolls if r.player_id}
-
-    # Add player entries
-    for player in players:
-        character = db.query(Character).filter(
-            Character.player_id == player.id
-        ).first()
-
-        entries.append(InitiativeEntry(
-            player_id=player.id,
-            player_name=player.name,
-            character_id=character.id if character else None,
-            character_name=character.name if character else None,
-            roll=player_rolls.get(player.id),
-            is_npc=False
-        ))
-
-    # Get NPC initiative rolls (those with character_id)
-    npc_rolls = [r for r in combat.initiative_rolls if r.character_id]
-
-    # Add NPC entries
-    for roll in npc_rolls:
-        character = roll.character
-        entries.append(InitiativeEntry(
-            player_id=0,  # Sentinel value for NPCs
-            player_name="NPC",
-            character_id=character.id,
-            character_name=character.name,
-            roll=roll.roll,
-            is_npc=True
-        ))
-
-    # Sort: entries with rolls first (descending by roll), then entries without rolls
-    entries.sort(key=lambda e: (e.roll is None, -(e.roll or 0)))
-    return entries
+    """Sorted initiative list for combat (players + NPCs) from the cached index."""
+    return initiative_indexes.get(db, combat).entries()
 
 
 @router.post("/start")
@@ -159,6 +125,7 @@ async def end_combat(
 
     combat = get_active_combat(db, current_player.session_id)
     CombatService.end_combat(db, combat)
+    initiative_indexes.discard(combat.id)
 
     # Broadcast combat ended
     await manager.broadcast_event("combat_ended", {})
@@ -186,6 +153,14 @@ async def roll_initiative(
     if existing:
         raise HTTPException(status_code=400, detail="Already rolled initiative")
 
+    index = initiative_indexes.get(db, combat)
+    if not index.has_player(current_player.id):
+        # Built before this player joined: rebuild once before giving up
+        initiative_indexes.discard(combat.id)
+        index = initiative_indexes.get(db, combat)
+        if not index.has_player(current_player.id):
+            raise HTTPException(status_code=404, detail="Player is not in the initiative order")
+
     # Roll d20
     roll = DiceService.roll_initiative()
 
@@ -196,8 +171,22 @@ async def roll_initiative(
         roll=roll
     )
     db.add(initiative_roll)
+    db.flush()
+    CombatJournal.record(db, combat, INITIATIVE_ROLLED, {
+        "initiative_roll": roll_state(initiative_roll),
+    })
     db.commit()
 
+    try:
+        rank, entry = index.roll_player(current_player.id, roll)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Player is not in the initiative order")
+    await manager.broadcast_event("initiative_inserted", {
+        "combat_id": combat.id,
+        "rank": rank,
+        "entry": entry.model_dump(),
+    })
+
     # Send to GM only
     gm_token = get_gm_token(db, current_player.session_id)
     if gm_token:
@@ -255,8 +244,27 @@ async def roll_initiative_for_npc(
         roll=total_roll
     )
     db.add(initiative_roll)
+    db.flush()
+    CombatJournal.record(db, combat, INITIATIVE_ROLLED, {
+        "initiative_roll": roll_state(initiative_roll),
+    })
     db.commit()
 
+    entry = InitiativeEntry(
+        player_id=0,  # Sentinel value for NPCs
+        player_name="NPC",
+        character_id=character_id,
+        character_name=character.name,
+        roll=total_roll,
+        is_npc=True,
+    )
+    rank = initiative_indexes.get(db, combat).insert(entry, initiative_roll.id)
+    await manager.broadcast_event("initiative_inserted", {
+        "combat_id": combat.id,
+        "rank": rank,
+        "entry": entry.model_dump(),
+    })
+
     # Broadcast to all players
     await manager.broadcast_event("initiative_rolled", {
         "character_id": character_id,
@@ -357,6 +365,75 @@ async def combat_action(
     return result
 
 
+@router.delete("/participants/{participant_id}")
+async def remove_participant(
+    participant_id: int,
+    current_player: Player = Depends(get_current_player),
+    db: DBSession = Depends(get_db)
+):
+    """Remove a participant from the active combat. GM only."""
+    require_gm(current_player)
+
+    combat = get_active_combat(db, current_player.session_id)
+    participant = db.query(CombatParticipant).filter(
+        CombatParticipant.id == participant_id,
+        CombatParticipant.combat_id == combat.id
+    ).first()
+    if not participant:
+        raise HTTPException(status_code=404, detail="Participant not found")
+
+    character_id = participant.character_id
+    CombatService.remove_participant(db, combat, participant)
+
+    await manager.broadcast_event("participant_removed", {
+        "participant_id": participant_id,
+        "character_id": character_id,
+    })
+
+    return build_combat_response(combat)
+
+
+@router.get("/log")
+def get_combat_log(
+    after_seq: int = Query(0, ge=0),
+    limit: int = Query(200, ge=1, le=1000),
+    current_player: Player = Depends(get_current_player),
+    db: DBSession = Depends(get_db)
+):
+    """Get combat journal events after the given sequence number."""
+    combat = get_active_combat(db, current_player.session_id)
+    events = CombatJournal.history(db, combat, after_seq=after_seq, limit=limit)
+    return {
+        "combat_id": combat.id,
+        "last_seq": combat.event_seq,
+        "events": [event_to_dict(e) for e in events],
+    }
+
+
+@router.post("/undo")
+async def undo_last_action(
+    current_player: Player = Depends(get_current_player),
+    db: DBSession = Depends(get_db)
+):
+    """Undo the last combat action. GM only."""
+    require_gm(current_player)
+
+    combat = get_active_combat(db, current_player.session_id)
+    try:
+        undone = CombatJournal.undo_last(db, combat)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    initiative_indexes.discard(combat.id)
+
+    response = build_combat_response(combat)
+    await manager.broadcast_event("combat_undone", {
+        "undone": undone,
+        "combat": response,
+    })
+
+    return response
+
+
 @router.get("", response_model=None)
 def get_combat_state(
     current_player: Player = Depends(get_current_player),
@@ -375,3 +452,78 @@ def get_combat_state(
     response = build_combat_response(combat)
     response["initiative_list"] = [e.model_dump() for e in build_initiative_list(db, combat)]
     return response
+
+
+@router.post("/simulate", response_model=EncounterSimulationResponse)
+def simulate_encounter_endpoint(
+    request: EncounterSimulationRequest,
+    current_player: Player = Depends(get_current_player),
+    db: DBSession = Depends(get_db)
+):
+    """Estimate encounter outcome with a Monte Carlo simulation. GM only."""
+    require_gm(current_player)
+
+    characters = (
+        db.query(Character)
+        .join(Player)
+        .filter(Player.session_id == current_player.session_id)
+        .options(selectinload(Character.spells), selectinload(Character.items))
+        .all()
+    )
+    by_id = {c.id: c for c in characters}
+
+    if request.party_character_ids is None:
+        party = [c for c in characters if not c.player.is_gm]
+    else:
+        missing = [cid for cid in request.party_character_ids if cid not in by_id]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Characters not found: {missing}")
+        party = [by_id[cid] for cid in request.party_character_ids]
+
+    missing = [cid for cid in request.npc_character_ids if cid not in by_id]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Characters not found: {missing}")
+
+    combatants = [combatant_from_character(c, PARTY) for c in party]
+    combatants += [combatant_from_character(by_id[cid], ENEMIES) for cid in request.npc_character_ids]
+    combatants += [
+        Combatant(
+            name=npc.name,
+            side=ENEMIES,
+            max_hp=npc.max_hp,
+            armor_class=npc.armor_class,
+            attack_bonus=npc.attack_bonus,
+            damage_dice=npc.damage_dice,
+            initiative_bonus=npc.initiative_bonus,
+        )
+        for npc in request.npcs
+    ]
+
+    try:
+        estimate = simulate_encounter(
+            combatants,
+            iterations=request.iterations,
+            time_budget=request.time_budget,
+            workers=get_settings().encounter_sim_workers,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except TimeoutError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    return EncounterSimulationResponse(
+        iterations=estimate.iterations,
+        win_probability=estimate.win_probability,
+        draw_probability=estimate.draw_probability,
+        expected_rounds=estimate.expected_rounds,
+        budget_exhausted=estimate.budget_exhausted,
+        combatants=[
+            CombatantOutcome(
+                name=c.name,
+                side=c.side,
+                character_id=c.character_id,
+                death_probability=p,
+            )
+            for c, p in zip(combatants, estimate.death_probability)
+        ],
+    )
@@ -1,29 +1,150 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
-from sqlalchemy.orm import Session as DBSession
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Body, Query
+from sqlalchemy import func
+from sqlalchemy.orm import Session as DBSession, selectinload
+from typing import List, Optional, Set, Tuple
 
 from app.database import get_db
 from app.models.player import Player
 from app.models.character import Character
-from app.models.map import Map, MapToken
+from app.models.map import Map, MapToken, MapWall
 from app.models.user_map import UserMap, UserMapToken
 from app.schemas.map import (
     MapCreate, MapResponse, MapUpdate,
-    MapTokenCreate, MapTokenUpdate, MapTokenResponse
+    MapTokenCreate, MapTokenUpdate, MapTokenResponse,
+    MapSummaryResponse, MapViewportResponse,
+    MapWallCreate, MapWallResponse, FogSettings, VisibilityResponse,
+    TerrainResponse, TerrainUpdate, PathResponse, ReachableResponse,
+    AoeTemplate, AoeResult,
 )
 from app.core.auth import get_current_player
+from app.core.fast_json import FastJSONResponse, serialize_many
 from app.websocket.manager import manager
+from app.services.spatial import (
+    spatial_indexes, feet_to_pixels, token_radius, DEFAULT_VIEWPORT_MARGIN,
+    MAX_VIEWPORT_SIZE, MAX_VIEWPORT_MARGIN,
+)
+from app.services.visibility import MapFog, fog_states, encode_mask
+from app.services.pathfinding import CostGrid, cost_grids, DIFFICULT_COST
 
 router = APIRouter()
 
+
+def _session_players(db: DBSession, session_id: int) -> Tuple[Set[int], Set[int]]:
+    """(GM player ids, other player ids) of a session."""
+    rows = db.query(Player.id, Player.is_gm).filter(Player.session_id == session_id).all()
+    return {pid for pid, is_gm in rows if is_gm}, {pid for pid, is_gm in rows if not is_gm}
+
+
+def _token_owner(db: DBSession, token: MapToken) -> Optional[int]:
+    """Player whose character the token represents (gives them sight)."""
+    if token.character_id is None:
+        return None
+    return db.query(Character.player_id).filter(Character.id == token.character_id).scalar()
+
+
+def _token_payload(token: MapToken) -> dict:
+    return MapTokenResponse.model_validate(token).model_dump()
+
+
+def _map_for_player(db: DBSession, map_obj: Map, player: Player):
+    """Map with only the tokens the player can see through the fog."""
+    if player.is_gm or not map_obj.fog_enabled:
+        return map_obj
+    fog = fog_states.get(db, map_obj)
+    response = MapResponse.model_validate(map_obj)
+    response.tokens = [t for t in response.tokens if fog.can_see(player.id, t.x, t.y, t.layer)]
+    return response
+
+
+async def _send_fog_update(db: DBSession, map_obj: Map, fog: MapFog, player_id: int, before: Set[str]):
+    """Tell a player which tokens appeared/disappeared after their view changed."""
+    after = fog.visible_token_ids(player_id, spatial_indexes.get(db, map_obj).tokens())
+    shown, hidden = after - before, before - after
+    if not shown and not hidden:
+        return
+    tokens = db.query(MapToken).filter(MapToken.id.in_(shown)).all() if shown else []
+    await manager.broadcast_filtered(
+        {
+            "type": "fog_updated",
+            "payload": {
+                "map_id": map_obj.id,
+                "tokens": [_token_payload(t) for t in tokens],
+                "hidden_token_ids": sorted(hidden),
+            },
+        },
+        lambda t: manager.get_player_id(t) == player_id,
+    )
+
+
+async def _broadcast_fogged_add(db: DBSession, map_obj: Map, token: MapToken, current_player: Player):
+    """token_added on a fogged map: only to the GM and players who see it."""
+    fog = fog_states.get(db, map_obj)
+    gm_ids, player_ids = _session_players(db, map_obj.session_id)
+
+    owner_id = _token_owner(db, token)
+    owner_saw = None
+    if owner_id is not None:
+        # build() may already have picked up the new token
+        fog.remove_viewer(token.id)
+        if owner_id in player_ids:
+            owner_saw = fog.visible_token_ids(owner_id, spatial_indexes.get(db, map_obj).tokens())
+        fog.update_viewer(token.id, owner_id, token.x, token.y)
+
+    sees = {pid for pid in player_ids if fog.can_see(pid, token.x, token.y, token.layer)}
+    await manager.broadcast_token_event(
+        "token_added",
+        {"map_id": map_obj.id, "token": _token_payload(token)},
+        map_id=map_obj.id,
+        points=[(token.x, token.y)],
+        radius=token_radius(token.scale),
+        exclude_token=current_player.token,
+        audience=gm_ids | sees
+    )
+    if owner_saw is not None:
+        await _send_fog_update(db, map_obj, fog, owner_id, owner_saw | {token.id})
+
 @router.get("/session/maps", response_model=List[MapResponse])
 def get_session_maps(
     current_player: Player = Depends(get_current_player),
     db: DBSession = Depends(get_db)
 ):
     """Get all maps for the current session."""
-    maps = db.query(Map).filter(Map.session_id == current_player.session_id).all()
-    return maps
+    maps = (
+        db.query(Map)
+        .options(selectinload(Map.tokens))
+        .filter(Map.session_id == current_player.session_id)
+        .all()
+    )
+    return FastJSONResponse(serialize_many(MapResponse, (_map_for_player(db, m, current_player) for m in maps)))
+
+@router.get("/session/maps/summary", response_model=List[MapSummaryResponse])
+def get_session_maps_summary(
+    current_player: Player = Depends(get_current_player),
+    db: DBSession = Depends(get_db)
+):
+    """Get all maps for the current session without tokens."""
+    rows = (
+        db.query(Map, func.count(MapToken.id))
+        .outerjoin(MapToken, MapToken.map_id == Map.id)
+        .filter(Map.session_id == current_player.session_id)
+        .group_by(Map.id)
+        .all()
+    )
+    return [
+        MapSummaryResponse(
+            id=m.id,
+            session_id=m.session_id,
+            name=m.name,
+            background_url=m.background_url,
+            width=m.width,
+            height=m.height,
+            grid_scale=m.grid_scale,
+            is_active=m.is_active,
+            fog_enabled=bool(m.fog_enabled),
+            token_count=token_count,
+        )
+        for m, token_count in rows
+    ]
 
 @router.post("/session/maps", response_model=MapResponse)
 async def create_map(
@@ -83,7 +204,51 @@ def get_map(
     if map_obj.session_id != current_player.session_id:
         raise HTTPException(status_code=403, detail="Access denied")
 
-    return map_obj
+    return _map_for_player(db, map_obj, current_player)
+
+@router.get("/maps/{map_id}/viewport", response_model=MapViewportResponse)
+def get_map_viewport(
+    map_id: str,
+    x: float = Query(..., allow_inf_nan=False),
+    y: float = Query(..., allow_inf_nan=False),
+    width: float = Query(..., gt=0, le=MAX_VIEWPORT_SIZE),
+    height: float = Query(..., gt=0, le=MAX_VIEWPORT_SIZE),
+    margin: float = Query(DEFAULT_VIEWPORT_MARGIN, ge=0, le=MAX_VIEWPORT_MARGIN),
+    current_player: Player = Depends(get_current_player),
+    db: DBSession = Depends(get_db)
+):
+    """Get tokens intersecting a rectangle of the map (plus margin)."""
+    map_obj = db.query(Map).filter(Map.id == map_id).first()
+    if not map_obj:
+        raise HTTPException(status_code=404, detail="Map not found")
+
+    if map_obj.session_id != current_player.session_id:
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    index = spatial_indexes.get(db, map_obj)
+    hits = index.query_rect(x - margin, y - margin, x + width + margin, y + height + margin)
+    if map_obj.fog_enabled and not current_player.is_gm:
+        fog = fog_states.get(db, map_obj)
+        hits = [t for t in hits if fog.can_see(current_player.id, t.x, t.y, t.layer)]
+
+    tokens = []
+    if hits:
+        tokens = (
+            db.query(MapToken)
+            .filter(MapToken.id.in_([t.id for t in hits]))
+            .order_by(MapToken.id)
+            .all()
+        )
+
+    return MapViewportResponse(
+        map_id=map_obj.id,
+        x=x,
+        y=y,
+        width=width,
+        height=height,
+        margin=margin,
+        tokens=[MapTokenResponse.model_validate(t) for t in tokens],
+    )
 
 @router.put("/maps/{map_id}/active", response_model=MapResponse)
 async def set_active_map(
@@ -160,10 +325,16 @@ async def add_token(
     db.add(new_token)
     db.commit()
     db.refresh(new_token)
+    spatial_indexes.upsert(new_token)
+    cost_grids.upsert_token(new_token)
+
+    if map_obj.fog_enabled:
+        await _broadcast_fogged_add(db, map_obj, new_token, current_player)
+        return new_token
 
-    # Broadcast token_added with complete token data
+    # Broadcast token_added with complete token data to clients that see it
     # Exclude the creator to avoid race condition with their REST response
-    await manager.broadcast_event(
+    await manager.broadcast_token_event(
         "token_added",
         {
             "map_id": map_id,
@@ -182,6 +353,9 @@ async def add_token(
                 "icon": new_token.icon
             }
         },
+        map_id=map_id,
+        points=[(new_token.x, new_token.y)],
+        radius=token_radius(new_token.scale),
         exclude_token=current_player.token
     )
 
@@ -214,6 +388,19 @@ async def update_token(
         if not current_player.can_move:
             raise HTTPException(status_code=403, detail="Movement not allowed by GM")
 
+    old_position = (token.x, token.y)
+    old_radius = token_radius(token.scale)
+
+    fog = None
+    if map_obj.fog_enabled:
+        fog = fog_states.get(db, map_obj)
+        gm_ids, player_ids = _session_players(db, map_obj.session_id)
+        owner_id = _token_owner(db, token)
+        saw = {pid for pid in player_ids if fog.can_see(pid, token.x, token.y, token.layer)}
+        owner_saw = None
+        if owner_id in player_ids:
+            owner_saw = fog.visible_token_ids(owner_id, spatial_indexes.get(db, map_obj).tokens())
+
     # Update fields
     # Using exclude_unset=True in Pydantic would be better, but here we do manual check
     if token_data.x is not None: token.x = token_data.x
@@ -227,16 +414,58 @@ async def update_token(
 
     db.commit()
     db.refresh(token)
-
-    # Broadcast token_updated
-    # We broadcast everything that might have changed
-    await manager.broadcast_event(
-        "token_updated",
+    spatial_indexes.upsert(token)
+    cost_grids.upsert_token(token)
+
+    if fog is not None:
+        if owner_id is not None:
+            fog.update_viewer(token.id, owner_id, token.x, token.y)
+        sees = {pid for pid in player_ids if fog.can_see(pid, token.x, token.y, token.layer)}
+        points = [old_position, (token.x, token.y)]
+        radius = max(old_radius, token_radius(token.scale))
+
+        await manager.broadcast_token_moved(
+            {
+                "map_id": token.map_id,
+                "token_id": token.id,
+                "changes": token_data.dict(exclude_unset=True)
+            },
+            _token_payload(token),
+            map_id=token.map_id,
+            old=(*old_position, old_radius),
+            new=(token.x, token.y, token_radius(token.scale)),
+            exclude_token=current_player.token, audience=gm_ids | (saw & sees)
+        )
+        # Players for whom the token came into / went out of sight
+        if sees - saw:
+            await manager.broadcast_token_event(
+                "token_added",
+                {"map_id": token.map_id, "token": _token_payload(token)},
+                map_id=token.map_id, points=[(token.x, token.y)],
+                radius=token_radius(token.scale), audience=sees - saw
+            )
+        if saw - sees:
+            await manager.broadcast_token_event(
+                "token_removed",
+                {"map_id": token.map_id, "token_id": token.id},
+                map_id=token.map_id, points=points, radius=radius, audience=saw - sees
+            )
+        if owner_saw is not None:
+            await _send_fog_update(db, map_obj, fog, owner_id, owner_saw)
+        return token
+
+    # token_updated to clients that see the old and new position;
+    # token_added / token_removed to those whose viewport it entered / left
+    await manager.broadcast_token_moved(
         {
             "map_id": token.map_id,
             "token_id": token.id,
             "changes": token_data.dict(exclude_unset=True)
         },
+        _token_payload(token),
+        map_id=token.map_id,
+        old=(*old_position, old_radius),
+        new=(token.x, token.y, token_radius(token.scale)),
         exclude_token=current_player.token # Don't echo back to sender if possible (frontend handles optimistic update)
     )
 
@@ -260,17 +489,380 @@ async def delete_token(
     if map_obj.session_id != current_player.session_id:
         raise HTTPException(status_code=403, detail="Access denied")
 
+    position = (token.x, token.y)
+    radius = token_radius(token.scale)
+
+    audience = None
+    owner_saw = None
+    if map_obj.fog_enabled:
+        fog = fog_states.get(db, map_obj)
+        gm_ids, player_ids = _session_players(db, map_obj.session_id)
+        audience = gm_ids | {pid for pid in player_ids if fog.can_see(pid, token.x, token.y, token.layer)}
+        owner_id = fog.viewers[token_id].player_id if token_id in fog.viewers else None
+        if owner_id in player_ids:
+            owner_saw = fog.visible_token_ids(owner_id, spatial_indexes.get(db, map_obj).tokens())
+
     db.delete(token)
     db.commit()
+    spatial_indexes.remove(map_obj.id, token_id)
+    cost_grids.remove_token(map_obj.id, token_id)
+    if map_obj.fog_enabled:
+        fog.remove_viewer(token_id)
 
-    await manager.broadcast_event(
+    await manager.broadcast_token_event(
         "token_removed",
-        {"map_id": map_obj.id, "token_id": token_id}
+        {"map_id": map_obj.id, "token_id": token_id},
+        map_id=map_obj.id,
+        points=[position],
+        radius=radius,
+        audience=audience
     )
+    if owner_saw is not None:
+        await _send_fog_update(db, map_obj, fog, owner_id, owner_saw - {token_id})
 
     return {"message": "Token deleted"}
 
 
+@router.post("/maps/{map_id}/aoe", response_model=AoeResult)
+def query_aoe(
+    map_id: str,
+    template: AoeTemplate,
+    current_player: Player = Depends(get_current_player),
+    db: DBSession = Depends(get_db)
+):
+    """Return ids of tokens touched by an area-of-effect template."""
+    map_obj = db.query(Map).filter(Map.id == map_id).first()
+    if not map_obj:
+        raise HTTPException(status_code=404, detail="Map not found")
+
+    if map_obj.session_id != current_player.session_id:
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    index = spatial_indexes.get(db, map_obj)
+    size = feet_to_pixels(template.size, map_obj.grid_scale)
+
+    if template.shape == "circle":
+        hits = index.query_radius(template.x, template.y, size)
+    elif template.shape == "rect":
+        height = feet_to_pixels(template.height, map_obj.grid_scale) if template.height else size
+        hits = index.query_rect(template.x, template.y, template.x + size, template.y + height)
+    else:
+        hits = index.query_cone(template.x, template.y, template.direction, size)
+
+    if not current_player.is_gm:
+        hits = [t for t in hits if t.layer != "hidden"]
+        if map_obj.fog_enabled:
+            fog = fog_states.get(db, map_obj)
+            hits = [t for t in hits if fog.can_see(current_player.id, t.x, t.y, t.layer)]
+
+    return AoeResult(token_ids=sorted(t.id for t in hits))
+
+
+@router.put("/maps/{map_id}/fog", response_model=MapResponse)
+async def set_map_fog(
+    map_id: str,
+    settings: FogSettings,
+    current_player: Player = Depends(get_current_player),
+    db: DBSession = Depends(get_db)
+):
+    """Enable or disable fog of war on a map. GM only."""
+    if not current_player.is_gm:
+        raise HTTPException(status_code=403, detail="Only GM can change fog of war")
+
+    map_obj = db.query(Map).filter(Map.id == map_id).first()
+    if not map_obj:
+        raise HTTPException(status_code=404, detail="Map not found")
+
+    if map_obj.session_id != current_player.session_id:
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    map_obj.fog_enabled = settings.fog_enabled
+    db.commit()
+    db.refresh(map_obj)
+    fog_states.discard(map_obj.id)
+
+    # Clients re-fetch the map: the set of visible tokens changed
+    await manager.broadcast_event(
+        "fog_changed",
+        {"map_id": map_obj.id, "fog_enabled": map_obj.fog_enabled}
+    )
+
+    return map_obj
+
+
+def _get_gm_map(db: DBSession, map_id: str, current_player: Player) -> Map:
+    if not current_player.is_gm:
+        raise HTTPException(status_code=403, detail="Only GM can edit walls")
+
+    map_obj = db.query(Map).filter(Map.id == map_id).first()
+    if not map_obj:
+        raise HTTPException(status_code=404, detail="Map not found")
+
+    if map_obj.session_id != current_player.session_id:
+        raise HTTPException(status_code=403, detail="Access denied")
+    return map_obj
+
+
+@router.get("/maps/{map_id}/walls", response_model=List[MapWallResponse])
+def get_walls(
+    map_id: str,
+    current_player: Player = Depends(get_current_player),
+    db: DBSession = Depends(get_db)
+):
+    """Get sight-blocking walls of a map. GM only."""
+    map_obj = _get_gm_map(db, map_id, current_player)
+    return db.query(MapWall).filter(MapWall.map_id == map_obj.id).all()
+
+
+@router.post("/maps/{map_id}/walls", response_model=MapWallResponse)
+async def add_wall(
+    map_id: str,
+    wall_data: MapWallCreate,
+    current_player: Player = Depends(get_current_player),
+    db: DBSession = Depends(get_db)
+):
+    """Add a sight-blocking wall segment. GM only."""
+    map_obj = _get_gm_map(db, map_id, current_player)
+    if (wall_data.x1, wall_data.y1) == (wall_data.x2, wall_data.y2):
+        raise HTTPException(status_code=400, detail="Wall must have non-zero length")
+
+    wall = MapWall(map_id=map_obj.id, **wall_data.model_dump())
+    db.add(wall)
+    db.commit()
+    db.refresh(wall)
+    fog_states.reload_walls(db, map_obj)
+    cost_grids.reload_walls(db, map_obj)
+
+    if map_obj.fog_enabled:
+        await manager.broadcast_event(
+            "fog_changed",
+            {"map_id": map_obj.id, "fog_enabled": True}
+        )
+
+    return wall
+
+
+@router.delete("/walls/{wall_id}")
+async def delete_wall(
+    wall_id: str,
+    current_player: Player = Depends(get_current_player),
+    db: DBSession = Depends(get_db)
+):
+    """Delete a wall. GM only."""
+    wall = db.query(MapWall).filter(MapWall.id == wall_id).first()
+    if not wall:
+        raise HTTPException(status_code=404, detail="Wall not found")
+
+    map_obj = _get_gm_map(db, wall.map_id, current_player)
+    db.delete(wall)
+    db.commit()
+    fog_states.reload_walls(db, map_obj)
+    cost_grids.reload_walls(db, map_obj)
+
+    if map_obj.fog_enabled:
+        await manager.broadcast_event(
+            "fog_changed",
+            {"map_id": map_obj.id, "fog_enabled": True}
+        )
+
+    return {"message": "Wall deleted"}
+
+
+@router.get("/maps/{map_id}/visibility", response_model=VisibilityResponse)
+def get_visibility(
+    map_id: str,
+    player_id: Optional[int] = Query(None),
+    current_player: Player = Depends(get_current_player),
+    db: DBSession = Depends(get_db)
+):
+    """What a player sees on the map. GM may pass player_id to look through a player's eyes."""
+    map_obj = db.query(Map).filter(Map.id == map_id).first()
+    if not map_obj:
+        raise HTTPException(status_code=404, detail="Map not found")
+
+    if map_obj.session_id != current_player.session_id:
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    target_id = current_player.id
+    if player_id is not None and player_id != current_player.id:
+        if not current_player.is_gm:
+            raise HTTPException(status_code=403, detail="Only GM can view other players' fog")
+        target = db.query(Player).filter(
+            Player.id == player_id, Player.session_id == current_player.session_id
+        ).first()
+        if not target:
+            raise HTTPException(status_code=404, detail="Player not found")
+        target_id = target.id
+
+    fog = fog_states.get(db, map_obj)
+    return VisibilityResponse(
+        map_id=map_obj.id,
+        player_id=target_id,
+        fog_enabled=bool(map_obj.fog_enabled),
+        cell_size=fog.cell_size,
+        rows=fog.rows,
+        cols=fog.cols,
+        visible=encode_mask(fog.visible(target_id)),
+        revealed=encode_mask(fog.revealed_mask(target_id)),
+        polygons={
+            token_id: [list(p) for p in points]
+            for token_id, points in fog.polygons(target_id).items()
+        },
+    )
+
+
+def _get_session_map(db: DBSession, map_id: str, current_player: Player) -> Map:
+    map_obj = db.query(Map).filter(Map.id == map_id).first()
+    if not map_obj:
+        raise HTTPException(status_code=404, detail="Map not found")
+
+    if map_obj.session_id != current_player.session_id:
+        raise HTTPException(status_code=403, detail="Access denied")
+    return map_obj
+
+
+def _unseen_cells(db: DBSession, map_obj: Map, player: Player, grid: CostGrid) -> Set[int]:
+    """Cells of tokens the player cannot see — they must not block (or leak)."""
+    if player.is_gm or not map_obj.fog_enabled:
+        return set()
+    fog = fog_states.get(db, map_obj)
+    return {
+        grid.cell_at(t.x, t.y)
+        for t in spatial_indexes.get(db, map_obj).tokens()
+        if not fog.can_see(player.id, t.x, t.y, t.layer)
+    }
+
+
+def _check_cells(grid: CostGrid, cells: List[List[int]]) -> List[Tuple[int, int]]:
+    result = []
+    for cell in cells:
+        if len(cell) != 2 or not grid.in_bounds(cell[0], cell[1]):
+            raise HTTPException(status_code=400, detail=f"Invalid cell {cell}")
+        result.append((cell[0], cell[1]))
+    return result
+
+
+@router.get("/maps/{map_id}/terrain", response_model=TerrainResponse)
+def get_terrain(
+    map_id: str,
+    current_player: Player = Depends(get_current_player),
+    db: DBSession = Depends(get_db)
+):
+    """Get difficult terrain cells of a map."""
+    map_obj = _get_session_map(db, map_id, current_player)
+    return TerrainResponse(map_id=map_obj.id, difficult=map_obj.difficult_terrain or [])
+
+
+@router.patch("/maps/{map_id}/terrain", response_model=TerrainResponse)
+async def update_terrain(
+    map_id: str,
+    terrain: TerrainUpdate,
+    current_player: Player = Depends(get_current_player),
+    db: DBSession = Depends(get_db)
+):
+    """Paint / erase difficult terrain cells. GM only."""
+    if not current_player.is_gm:
+        raise HTTPException(status_code=403, detail="Only GM can edit terrain")
+
+    map_obj = _get_session_map(db, map_id, current_player)
+    grid = cost_grids.get(db, map_obj)
+    add = _check_cells(grid, terrain.add)
+    remove = _check_cells(grid, terrain.remove)
+
+    cells = {tuple(c) for c in map_obj.difficult_terrain or []}
+    cells.difference_update(remove)
+    cells.update(add)
+    map_obj.difficult_terrain = [list(c) for c in sorted(cells)]
+    db.commit()
+
+    grid.set_terrain(remove, 1)
+    grid.set_terrain(add, DIFFICULT_COST)
+
+    await manager.broadcast_event(
+        "terrain_updated",
+        {"map_id": map_obj.id, "add": [list(c) for c in add], "remove": [list(c) for c in remove]},
+        exclude_token=current_player.token
+    )
+
+    return TerrainResponse(map_id=map_obj.id, difficult=map_obj.difficult_terrain)
+
+
+@router.get("/maps/{map_id}/path", response_model=PathResponse)
+def find_path(
+    map_id: str,
+    to_x: float = Query(..., allow_inf_nan=False),
+    to_y: float = Query(..., allow_inf_nan=False),
+    token_id: Optional[str] = Query(None),
+    from_x: Optional[float] = Query(None, allow_inf_nan=False),
+    from_y: Optional[float] = Query(None, allow_inf_nan=False),
+    speed: Optional[int] = Query(None, ge=0, le=1000),
+    current_player: Player = Depends(get_current_player),
+    db: DBSession = Depends(get_db)
+):
+    """Cheapest path to a point, from a token or from (from_x, from_y).
+
+    With ``speed`` (feet) only paths within it are searched; farther goals
+    are reported as not found without exploring the whole map.
+    """
+    map_obj = _get_session_map(db, map_id, current_player)
+    grid = cost_grids.get(db, map_obj)
+
+    if token_id is not None:
+        token = spatial_indexes.get(db, map_obj).get(token_id)
+        if token is None:
+            raise HTTPException(status_code=404, detail="Token not found")
+        start = grid.cell_at(token.x, token.y)
+    elif from_x is not None and from_y is not None:
+        start = grid.cell_at(from_x, from_y)
+    else:
+        raise HTTPException(status_code=400, detail="token_id or from_x/from_y required")
+
+    result = grid.find_path(
+        start, grid.cell_at(to_x, to_y),
+        token_id=token_id, free=_unseen_cells(db, map_obj, current_player, grid),
+        budget=speed,
+    )
+    if result is None:
+        return PathResponse(map_id=map_obj.id, found=False)
+
+    path, cost = result
+    return PathResponse(
+        map_id=map_obj.id,
+        found=True,
+        cost=cost,
+        cells=[list(grid.cell(i)) for i in path],
+        points=[list(grid.center(i)) for i in path],
+    )
+
+
+@router.get("/maps/{map_id}/reachable", response_model=ReachableResponse)
+def get_reachable(
+    map_id: str,
+    token_id: str = Query(...),
+    speed: int = Query(30, ge=0, le=1000),
+    current_player: Player = Depends(get_current_player),
+    db: DBSession = Depends(get_db)
+):
+    """Cells a token can reach this turn with the given speed (feet)."""
+    map_obj = _get_session_map(db, map_id, current_player)
+    grid = cost_grids.get(db, map_obj)
+
+    token = spatial_indexes.get(db, map_obj).get(token_id)
+    if token is None:
+        raise HTTPException(status_code=404, detail="Token not found")
+
+    costs = grid.reachable(
+        grid.cell_at(token.x, token.y), speed,
+        token_id=token_id, free=_unseen_cells(db, map_obj, current_player, grid),
+    )
+    return ReachableResponse(
+        map_id=map_obj.id,
+        token_id=token_id,
+        speed=speed,
+        cells=[[*grid.cell(idx), cost] for idx, cost in sorted(costs.items())],
+    )
+
+
 @router.post("/maps/{map_id}/save-to-library")
 def save_map_to_library(
     map_id: str,
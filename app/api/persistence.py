@@ -1,25 +1,61 @@
 """API endpoints для системы сохранения сессий."""
 
-import json
-from fastapi import APIRouter, Depends, HTTPException, Response
+from typing import List, Optional
+
+from pathlib import Path
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session as DBSession
 
+from app.config import get_settings
 from app.database import get_db
 from app.models.player import Player
+from app.models.session_snapshot import SessionSnapshot
+from app.models.user import User
 from app.schemas.persistence import (
+    AutosaveInfo,
+    AutosaveRestoreRequest,
     ExportRequest,
     ExportResponse,
     ImportRequest,
     ImportResponse,
+    SnapshotInfo,
+    SnapshotResponse,
+    SnapshotRestoreRequest,
     ValidationRequest,
     ValidationResponse,
 )
 from app.services.persistence import (
     export_session,
+    iter_export_binary,
+    iter_export_json,
     import_session,
+    import_session_stream,
     validate_import_data,
+    validate_import_stream,
+)
+from app.services.persistence import binary_format
+from app.services.persistence.compression import (
+    FILE_EXTENSIONS,
+    IDENTITY,
+    MEDIA_TYPES,
+    UnsupportedCompression,
+    check_encoding,
+    compress_stream,
+    decompress_stream,
+    negotiate_encoding,
 )
-from app.core.auth import get_current_player
+from app.services.persistence.autosave import latest_autosave, list_autosaves
+from app.services.persistence.snapshots import (
+    compact_snapshots,
+    export_session_delta,
+    list_snapshots,
+    restore_snapshot,
+    take_snapshot,
+)
+from app.services.persistence.streaming import read_chunks
+from app.core.auth import get_current_player, get_current_user
 
 router = APIRouter()
 
@@ -52,38 +88,62 @@ def export_session_endpoint(
 
 @router.post("/session/export/download")
 def export_session_download(
+    http_request: Request,
     request: ExportRequest = ExportRequest(),
     current_player: Player = Depends(get_current_player),
     db: DBSession = Depends(get_db),
 ):
-    """Скачать экспорт сессии как JSON файл.
+    """Скачать экспорт сессии как JSON файл (потоково).
 
+    ``format="msgpack"`` — бинарный контейнер (.msgpack), см. binary_format.py.
+    Сжатие: явное ``compression`` даёт сжатый файл (.json.gz / .json.zst),
+    иначе ответ сжимается при передаче по Accept-Encoding.
     Только для GM.
     """
     if not current_player.is_gm:
         raise HTTPException(status_code=403, detail="Only GM can perform this action")
 
     try:
-        data = export_session(
-            db=db,
-            session_id=current_player.session_id,
-            include_combat=request.include_combat,
-        )
+        if request.format == "msgpack":
+            chunks = iter_export_binary(
+                db=db,
+                session_id=current_player.session_id,
+                include_combat=request.include_combat,
+            )
+            extension, media_type = binary_format.FILE_EXTENSION, binary_format.MEDIA_TYPE
+        else:
+            chunks = iter_export_json(
+                db=db,
+                session_id=current_player.session_id,
+                include_combat=request.include_combat,
+            )
+            extension, media_type = ".json", "application/json"
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
 
-        session_code = data["session_info"]["code"]
-        filename = f"dnd_session_{session_code}.json"
+    filename = f"dnd_session_{current_player.session.code}{extension}"
+    headers = {}
 
-        json_content = json.dumps(data, ensure_ascii=False, indent=2)
+    if request.compression is not None:
+        try:
+            encoding = check_encoding(IDENTITY if request.compression == "none" else request.compression)
+        except UnsupportedCompression as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if encoding != IDENTITY:
+            filename += FILE_EXTENSIONS[encoding]
+            media_type = MEDIA_TYPES[encoding]
+    else:
+        encoding = negotiate_encoding(http_request.headers.get("accept-encoding"))
+        headers["Vary"] = "Accept-Encoding"
+        if encoding != IDENTITY:
+            headers["Content-Encoding"] = encoding
 
-        return Response(
-            content=json_content,
-            media_type="application/json",
-            headers={
-                "Content-Disposition": f'attachment; filename="{filename}"'
-            }
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return StreamingResponse(
+        compress_stream(chunks, encoding),
+        media_type=media_type,
+        headers=headers,
+    )
 
 
 @router.post("/session/import", response_model=ImportResponse)
@@ -120,6 +180,50 @@ def import_session_endpoint(
         )
 
 
+@router.post("/session/import/file", response_model=ImportResponse)
+def import_session_file_endpoint(
+    file: UploadFile = File(...),
+    new_session_code: Optional[str] = Form(None, min_length=4, max_length=10),
+    db: DBSession = Depends(get_db),
+):
+    """Импортировать сессию из загруженного файла (.json, .json.gz, .json.zst).
+
+    Файл разбирается потоково: записи проверяются и вставляются по мере
+    чтения, первая ошибка прерывает импорт. Не требует авторизации.
+    """
+    result = import_session_stream(
+        db=db,
+        chunks=decompress_stream(read_chunks(file.file)),
+        new_session_code=new_session_code,
+    )
+    return ImportResponse(
+        success=result.success,
+        session_id=result.session_id,
+        session_code=result.session_code,
+        gm_token=result.gm_token,
+        player_tokens=result.player_tokens,
+        entity_counts=result.entity_counts,
+        warnings=result.warnings,
+        errors=result.errors,
+    )
+
+
+@router.post("/session/validate/file", response_model=ValidationResponse)
+def validate_session_file_endpoint(file: UploadFile = File(...)):
+    """Потоково проверить загруженный файл импорта, не создавая записей.
+
+    Не требует авторизации.
+    """
+    result = validate_import_stream(decompress_stream(read_chunks(file.file)))
+    return ValidationResponse(
+        is_valid=result.is_valid,
+        format_version=result.format_version,
+        entity_counts=result.entity_counts,
+        warnings=result.warnings,
+        errors=result.errors,
+    )
+
+
 @router.post("/session/validate", response_model=ValidationResponse)
 def validate_session_endpoint(
     request: ValidationRequest,
@@ -145,3 +249,139 @@ def validate_session_endpoint(
             format_version="unknown",
             errors=[str(e)],
         )
+
+
+def _require_gm(player: Player) -> None:
+    if not player.is_gm:
+        raise HTTPException(status_code=403, detail="Only GM can perform this action")
+
+
+def _get_snapshot(db: DBSession, player: Player, snapshot_id: int) -> SessionSnapshot:
+    snapshot = db.query(SessionSnapshot).filter(
+        SessionSnapshot.id == snapshot_id,
+        SessionSnapshot.session_id == player.session_id,
+    ).first()
+    if not snapshot:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    return snapshot
+
+
+@router.post("/session/snapshots", response_model=SnapshotResponse)
+def create_snapshot_endpoint(
+    full: bool = False,
+    current_player: Player = Depends(get_current_player),
+    db: DBSession = Depends(get_db),
+):
+    """Сохранить снимок текущей сессии (дельту к предыдущему).
+
+    ``full=true`` — полный снимок. Если ничего не изменилось, снимок не
+    создаётся. Только для GM.
+    """
+    _require_gm(current_player)
+    snapshot = take_snapshot(db, current_player.session_id, full=full)
+    return SnapshotResponse(created=snapshot is not None, snapshot=snapshot)
+
+
+@router.get("/session/snapshots", response_model=List[SnapshotInfo])
+def list_snapshots_endpoint(
+    current_player: Player = Depends(get_current_player),
+    db: DBSession = Depends(get_db),
+):
+    """Снимки текущей сессии, от старых к новым. Только для GM."""
+    _require_gm(current_player)
+    return list_snapshots(db, current_player.session_id)
+
+
+@router.post("/session/snapshots/compact", response_model=SnapshotResponse)
+def compact_snapshots_endpoint(
+    current_player: Player = Depends(get_current_player),
+    db: DBSession = Depends(get_db),
+):
+    """Свернуть снимки в один полный (последний), удалив остальные. Только для GM."""
+    _require_gm(current_player)
+    snapshot = compact_snapshots(db, current_player.session_id)
+    return SnapshotResponse(created=False, snapshot=snapshot)
+
+
+@router.get("/session/snapshots/{snapshot_id}/delta")
+def snapshot_delta_endpoint(
+    snapshot_id: int,
+    current_player: Player = Depends(get_current_player),
+    db: DBSession = Depends(get_db),
+):
+    """Записи, изменённые, добавленные и удалённые после снимка. Только для GM."""
+    _require_gm(current_player)
+    base = _get_snapshot(db, current_player, snapshot_id)
+    return export_session_delta(db, current_player.session_id, base)
+
+
+@router.post("/session/snapshots/{snapshot_id}/restore", response_model=ImportResponse)
+def restore_snapshot_endpoint(
+    snapshot_id: int,
+    request: SnapshotRestoreRequest = SnapshotRestoreRequest(),
+    current_player: Player = Depends(get_current_player),
+    db: DBSession = Depends(get_db),
+):
+    """Восстановить снимок (база + дельты) в новую сессию. Только для GM."""
+    _require_gm(current_player)
+    snapshot = _get_snapshot(db, current_player, snapshot_id)
+    result = restore_snapshot(db, snapshot, request.new_session_code)
+    return ImportResponse(
+        success=result.success,
+        session_id=result.session_id,
+        session_code=result.session_code,
+        gm_token=result.gm_token,
+        player_tokens=result.player_tokens,
+        entity_counts=result.entity_counts,
+        warnings=result.warnings,
+        errors=result.errors,
+    )
+
+
+@router.get("/session/autosaves", response_model=List[AutosaveInfo])
+def list_autosaves_endpoint(current_user: User = Depends(get_current_user)):
+    """Автосохранения сессий, где пользователь — GM, новые первыми."""
+    return [
+        AutosaveInfo(code=f.code, file=f.path.name, saved_at=f.saved_at, size=f.size)
+        for f in list_autosaves(Path(get_settings().autosave_dir), current_user.id)
+    ]
+
+
+@router.post("/session/autosaves/{code}/restore-latest", response_model=ImportResponse)
+def restore_latest_autosave_endpoint(
+    code: str,
+    request: AutosaveRestoreRequest = AutosaveRestoreRequest(),
+    current_user: User = Depends(get_current_user),
+    db: DBSession = Depends(get_db),
+):
+    """Восстановить последнее автосохранение сессии ``code`` в новую сессию.
+
+    Работает и после потери базы: файлы лежат в ``autosave_dir``.
+    Доступно пользователю, который был GM сессии; он же становится GM
+    восстановленной.
+    """
+    autosave = latest_autosave(Path(get_settings().autosave_dir), current_user.id, code)
+    if autosave is None:
+        raise HTTPException(status_code=404, detail="No autosave found")
+
+    with open(autosave.path, "rb") as f:
+        result = import_session_stream(
+            db=db,
+            chunks=read_chunks(f),
+            new_session_code=request.new_session_code,
+        )
+    if result.success:
+        db.query(Player).filter(Player.token == result.gm_token).update(
+            {Player.user_id: current_user.id}
+        )
+        db.commit()
+    return ImportResponse(
+        success=result.success,
+        session_id=result.session_id,
+        session_code=result.session_code,
+        gm_token=result.gm_token,
+        player_tokens=result.player_tokens,
+        entity_counts=result.entity_counts,
+        warnings=result.warnings,
+        errors=result.errors,
+    )
@@ -2,8 +2,8 @@ import uuid
 import string
 import random
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session as DBSession
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.orm import Session as DBSession, selectinload
 
 from app.database import get_db
 from app.models.session import Session
@@ -17,11 +17,22 @@ from app.schemas.session import (
     SessionJoin,
     SessionJoinResponse,
     SessionState,
+    SessionBootstrapResponse,
     PlayerReadyRequest,
 )
 from app.models.map import Map, MapToken
+from app.models.combat import Combat
 from app.models.user_map import UserMap
 from app.schemas.player import PlayerResponse
+from app.schemas.map import MapResponse
+from app.api.combat import build_combat_response, build_initiative_list
+from app.core.compression import deflate_raw, gzip_prefixed
+from app.core.session_versions import SessionResponseCache
+from app.services.initiative import initiative_indexes
+from app.services.pathfinding import cost_grids
+from app.services.spatial import spatial_indexes
+from app.services.visibility import fog_states
+from app.websocket.manager import manager
 from app.core.auth import create_access_token, create_refresh_token, get_current_player, get_optional_current_user
 from app.schemas.auth import Token
 
@@ -219,6 +230,9 @@ async def join_session(
                 "character": CharacterResponse.model_validate(character).model_dump()
             })
 
+    # New player (and maybe character) changes the initiative list
+    initiative_indexes.invalidate_session(session.id)
+
     access_token = create_access_token(data={"sub": player_token})
     refresh_token = create_refresh_token(data={"sub": player_token})
 
@@ -316,6 +330,109 @@ def get_session_players(
     return players
 
 
+snapshot_cache = SessionResponseCache()
+
+
+def build_session_bootstrap(db: DBSession, current_player: Player) -> SessionBootstrapResponse:
+    """Session, players, characters, maps with tokens and combat in a fixed number of queries."""
+    event_seq = manager.event_seq
+    session = current_player.session
+
+    players = db.query(Player).filter(Player.session_id == session.id).all()
+    characters = (
+        db.query(Character)
+        .join(Player)
+        .filter(Player.session_id == session.id)
+        .all()
+    )
+    maps = (
+        db.query(Map)
+        .options(selectinload(Map.tokens))
+        .filter(Map.session_id == session.id)
+        .all()
+    )
+    # Participants' characters are already in the identity map
+    combat = (
+        db.query(Combat)
+        .options(selectinload(Combat.participants))
+        .filter(Combat.session_id == session.id, Combat.is_active == True)
+        .first()
+    )
+
+    map_responses = []
+    for map_obj in maps:
+        response = MapResponse.model_validate(map_obj)
+        if map_obj.fog_enabled and not current_player.is_gm:
+            fog = fog_states.get(db, map_obj)
+            response.tokens = [t for t in response.tokens if fog.can_see(current_player.id, t.x, t.y, t.layer)]
+        map_responses.append(response)
+
+    combat_state = {"active": False}
+    if combat:
+        combat_state = build_combat_response(combat)
+        combat_state["initiative_list"] = [e.model_dump() for e in build_initiative_list(db, combat)]
+
+    return SessionBootstrapResponse(
+        session=SessionState(
+            id=session.id,
+            code=session.code,
+            is_active=session.is_active,
+            session_started=session.session_started,
+            created_at=session.created_at,
+            player_count=len(players),
+            player_id=current_player.id,
+            is_gm=current_player.is_gm,
+        ),
+        players=[p for p in players if p.left_at is None],
+        characters=characters,
+        maps=map_responses,
+        combat=combat_state,
+        event_seq=event_seq,
+    )
+
+
+@router.get("/session/snapshot", response_model=SessionBootstrapResponse)
+def get_session_snapshot(
+    request: Request,
+    current_player: Player = Depends(get_current_player),
+    db: DBSession = Depends(get_db)
+):
+    """Everything the game view needs on join/reconnect in one request.
+
+    Replaces GET /session, /session/players, /characters, /session/maps and
+    /combat. The encoded body is cached until the session changes and is
+    gzipped when the client accepts it. After loading, apply only WebSocket
+    events with "seq" greater than ``event_seq``.
+
+    ``event_seq`` is global, so it is not part of the cached body: the
+    current value is put in front of it on every response. It is read
+    before the cache key; writes bump the session version before they
+    broadcast, so an event missing from a cached body always has a
+    greater seq.
+    """
+    event_seq = manager.event_seq
+    key = snapshot_cache.key(current_player.token, current_player.session_id)
+    entry = snapshot_cache.get(key)
+    if entry is None:
+        body = build_session_bootstrap(db, current_player).model_dump_json(exclude={"event_seq"}).encode()
+        # Everything after the opening brace, ready for the prefix
+        entry = {"identity": body[1:]}
+        snapshot_cache.set(key, entry)
+    prefix = b'{"event_seq":%d,' % event_seq
+
+    headers = {"Vary": "Accept-Encoding"}
+    if "gzip" not in request.headers.get("accept-encoding", ""):
+        return Response(prefix + entry["identity"], media_type="application/json", headers=headers)
+    if "deflate" not in entry:
+        entry["deflate"] = deflate_raw(entry["identity"])
+    headers["Content-Encoding"] = "gzip"
+    return Response(
+        gzip_prefixed(prefix, entry["identity"], entry["deflate"]),
+        media_type="application/json",
+        headers=headers,
+    )
+
+
 @router.post("/session/ready")
 async def set_player_ready(
     data: PlayerReadyRequest,
@@ -410,6 +527,13 @@ async def delete_session(
                 logger.error(f"Error closing websocket: {e}")
             await manager.disconnect(token)
 
+    # Drop in-memory map and initiative indexes of this session
+    for session_map in session.maps:
+        spatial_indexes.discard(session_map.id)
+        fog_states.discard(session_map.id)
+        cost_grids.discard(session_map.id)
+    initiative_indexes.invalidate_session(session.id)
+
     # Delete session (cascade deletes all)
     db.delete(session)
     db.commit()
@@ -23,6 +23,7 @@ from app.core.class_templates import (
     ClassTemplate,
 )
 from app.websocket.manager import manager
+from app.services.initiative import initiative_indexes
 from app.core.auth import get_current_player
 
 router = APIRouter()
@@ -159,6 +160,7 @@ async def create_character_from_template(
 
     db.commit()
     db.refresh(character)
+    initiative_indexes.invalidate_session(current_player.session_id)
 
     # Broadcast создание персонажа
     await manager.broadcast_event("character_created", {
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session as DBSession
+
+from app.database import get_db
+from app.models.upload_blob import UploadBlob
+from app.schemas.upload import UploadVariantsResponse
+from app.services import blobs
+
+router = APIRouter()
+
+
+@router.get("/{digest}/variants", response_model=UploadVariantsResponse)
+def get_upload_variants(digest: str, db: DBSession = Depends(get_db)):
+    """Original URL and built WebP variants of a stored upload (widest first)."""
+    blob = db.get(UploadBlob, digest.lower())
+    if not blob:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return UploadVariantsResponse(
+        url=blobs.blob_url(blob.sha256, blob.ext),
+        size=blob.size,
+        variants=blob.variants or [],
+    )
@@ -6,7 +6,9 @@ from app.database import get_db
 from app.models.user import User
 from app.models.user_character import UserCharacter
 from app.schemas.user_character import UserCharacterCreate, UserCharacterUpdate, UserCharacterResponse
+from app.schemas.avatar_job import AvatarJobResponse
 from app.core.auth import get_current_user
+from app.services.avatar_jobs import DONE, AvatarQueueFull, apply_avatar, avatar_queue
 
 router = APIRouter()
 
@@ -77,7 +79,7 @@ def update_user_character(
     return character
 
 
-@router.post("/{character_id}/generate-avatar", response_model=UserCharacterResponse)
+@router.post("/{character_id}/generate-avatar", response_model=AvatarJobResponse, status_code=202)
 async def generate_character_avatar(
     character_id: int,
     current_user: User = Depends(get_current_user),
@@ -93,18 +95,16 @@ async def generate_character_avatar(
     if not character.appearance:
         raise HTTPException(status_code=400, detail="Character has no appearance description")
 
-    from app.services.avatar import generate_avatar
     try:
-        avatar_url = await generate_avatar(character.appearance)
-    except ValueError as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Avatar generation failed: {e}")
-
-    character.avatar_url = avatar_url
-    db.commit()
-    db.refresh(character)
-    return character
+        job = avatar_queue.submit(character.appearance, "user_character", character.id)
+    except AvatarQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    # Cached result for the same description: apply right away
+    if job.status == DONE:
+        apply_avatar(db, job.avatar_url, job.targets)
+        db.commit()
+    return job
 
 
 @router.delete("/{character_id}", status_code=204)
@@ -1,10 +1,8 @@
-import io
+import hashlib
 import os
-import uuid as uuid_mod
 
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from sqlalchemy.orm import Session as DBSession
-from PIL import Image
+from sqlalchemy.orm import Session as DBSession, selectinload
 
 from app.database import get_db
 from app.models.user import User
@@ -14,10 +12,19 @@ from app.schemas.user_map import (
     UserMapTokenCreate, UserMapTokenUpdate, UserMapTokenResponse,
 )
 from app.core.auth import get_current_user
+from app.core.fast_json import FastJSONResponse, serialize_many
+from app.services import blobs
+from app.services.tiles import MANIFEST_NAME, schedule_pyramid
+from app.services.variants import MAP_WIDTHS, plan_variants, schedule_variants
+from app.services.uploads import (
+    UploadTooLarge, InvalidImage,
+    stream_to_temp, run_image_job, probe_image, discard,
+)
 
-UPLOAD_DIR = "uploads/maps"
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 ALLOWED_TYPES = {"image/jpeg", "image/png"}
+# Pillow format -> file extension
+ALLOWED_FORMATS = {"JPEG": "jpg", "PNG": "png"}
 
 router = APIRouter()
 
@@ -26,26 +33,52 @@ router = APIRouter()
 async def upload_map_background(
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user),
+    db: DBSession = Depends(get_db),
 ):
-    """Upload a background image for a map. Returns URL and image dimensions."""
+    """Upload a background image for a map. Returns URL and image dimensions.
+
+    Images are stored by content hash, so re-uploading the same file reuses
+    the stored original and its tile pyramid.
+    """
     if file.content_type not in ALLOWED_TYPES:
         raise HTTPException(status_code=400, detail="Only JPG/PNG files are allowed")
 
-    content = await file.read()
-    if len(content) > MAX_FILE_SIZE:
+    # Stream to a temp file in the store, hashing on the way; abort as soon as it is too big
+    hasher = hashlib.sha256()
+    try:
+        temp_path = await stream_to_temp(file, blobs.BLOB_DIR, MAX_FILE_SIZE, hasher)
+    except UploadTooLarge:
         raise HTTPException(status_code=400, detail="File too large (max 10MB)")
 
-    img = Image.open(io.BytesIO(content))
-    img_width, img_height = img.size
-
-    ext = "jpg" if file.content_type == "image/jpeg" else "png"
-    filename = f"{uuid_mod.uuid4()}.{ext}"
-    os.makedirs(UPLOAD_DIR, exist_ok=True)
-    filepath = os.path.join(UPLOAD_DIR, filename)
-    with open(filepath, "wb") as f:
-        f.write(content)
-
-    return {"url": f"/uploads/maps/{filename}", "width": img_width, "height": img_height}
+    try:
+        fmt, img_width, img_height = await run_image_job(probe_image, temp_path, set(ALLOWED_FORMATS))
+        blob = blobs.store_file(db, temp_path, hasher.hexdigest(), ALLOWED_FORMATS[fmt])
+        db.commit()
+    except InvalidImage as e:
+        discard(temp_path)
+        raise HTTPException(status_code=400, detail=str(e))
+    except BaseException:
+        discard(temp_path)
+        raise
+
+    # Tile pyramid + preview and WebP variants are built in the background
+    # next to the original (once per content)
+    digest = blob.sha256
+    tiles_dir = os.path.join(blobs.derived_dir(digest), "tiles")
+    if not os.path.isfile(os.path.join(tiles_dir, MANIFEST_NAME)):
+        schedule_pyramid(blobs.blob_path(digest, blob.ext), tiles_dir)
+    if blob.variants is None:
+        schedule_variants(digest, blob.ext, MAP_WIDTHS)
+
+    tiles_url = f"{blobs.derived_url(digest)}/tiles"
+    return {
+        "url": blobs.blob_url(digest, blob.ext),
+        "width": img_width,
+        "height": img_height,
+        "tiles_url": tiles_url,
+        "preview_url": f"{tiles_url}/preview.webp",
+        "variants": plan_variants(digest, img_width, img_height, MAP_WIDTHS),
+    }
 
 
 @router.get("", response_model=list[UserMapResponse])
@@ -53,9 +86,14 @@ def list_user_maps(
     current_user: User = Depends(get_current_user),
     db: DBSession = Depends(get_db)
 ):
-    return db.query(UserMap).filter(
-        UserMap.user_id == current_user.id
-    ).order_by(UserMap.created_at.desc()).all()
+    user_maps = (
+        db.query(UserMap)
+        .options(selectinload(UserMap.tokens))
+        .filter(UserMap.user_id == current_user.id)
+        .order_by(UserMap.created_at.desc())
+        .all()
+    )
+    return FastJSONResponse(serialize_many(UserMapResponse, user_maps))
 
 
 @router.post("", response_model=UserMapResponse, status_code=201)
@@ -16,6 +16,30 @@ class Settings(BaseSettings):
     access_token_expire_minutes: int = 30
     refresh_token_expire_days: int = 7
 
+    # Encounter simulator (0/1 = run inline, >1 = process pool size)
+    encounter_sim_workers: int = 2
+
+    # Pillow worker pool (upload validation, tile pyramids); caps concurrent image jobs
+    image_workers: int = 2
+
+    # Concurrent YandexART avatar generations (paid external calls)
+    avatar_workers: int = 2
+
+    # Session export: threads serializing independent entity types (items/spells).
+    # 0/1 = inline; serialization is pure Python, so >1 only pays off without the GIL
+    export_workers: int = 1
+
+    # Upload blob GC: sweep period and how long a fresh unreferenced blob is kept
+    blob_gc_interval_seconds: int = 3600
+    blob_gc_grace_seconds: int = 3600
+
+    # Autosave of sessions with live sockets: period (0 = off), on-disk directory,
+    # files kept per session, and sessions saved concurrently (low-priority threads)
+    autosave_interval_seconds: int = 300
+    autosave_dir: str = "./autosaves"
+    autosave_keep: int = 10
+    autosave_workers: int = 1
+
     class Config:
         env_file = ".env"
 
@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session as DBSession
 
 from app.database import get_db
 from app.config import get_settings
+from app.core.session_versions import token_sessions, write_scope
 from app.models.player import Player
 from app.models.user import User
 
@@ -46,6 +47,18 @@ def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
     return encoded_jwt
 
+def player_token_from_jwt(token: str) -> Optional[str]:
+    """Player token from an access JWT; None for invalid, refresh or user tokens."""
+    try:
+        payload = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
+    except JWTError:
+        return None
+    player_token = payload.get("sub")
+    if player_token is None or payload.get("type") != "access" or player_token.startswith("user:"):
+        return None
+    return player_token
+
+
 async def get_current_player(
     token: str = Depends(oauth2_scheme),
     db: DBSession = Depends(get_db)
@@ -75,6 +88,10 @@ async def get_current_player(
     if player is None:
         raise credentials_exception
 
+    token_sessions.set(player_token, player.session_id)
+    scope = write_scope.get()
+    if scope is not None:
+        scope.session_id = player.session_id
     return player
 
 
@@ -0,0 +1,181 @@
+import struct
+import zlib
+from typing import Iterable, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:  # brotli is optional (pip install brotli)
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+BR = "br"
+GZIP = "gzip"
+
+# Responses smaller than this are sent as is: headers would eat the gain
+MINIMUM_SIZE = 1024
+GZIP_LEVEL = 6
+# On-the-fly brotli: higher qualities cost far more CPU than they save bytes
+BROTLI_QUALITY = 5
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/x-ndjson",
+    "image/svg+xml",
+    "text/",
+)
+
+
+def available_encodings() -> List[str]:
+    """Supported encodings, preferred first."""
+    return ([BR] if brotli is not None else []) + [GZIP]
+
+
+def negotiate_encoding(accept_encoding: Optional[str], candidates: Optional[Iterable[str]] = None) -> Optional[str]:
+    """Best of ``candidates`` (default: all available) allowed by Accept-Encoding, or None."""
+    accepted = {}
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name] = q
+    for encoding in candidates if candidates is not None else available_encodings():
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def is_compressible(content_type: str) -> bool:
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+# mtime 0, no flags, unknown OS
+_GZIP_HEADER = b"\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff"
+
+
+def deflate_raw(data: bytes, level: int = GZIP_LEVEL) -> bytes:
+    """Complete raw deflate stream of ``data``, to pass to ``gzip_prefixed``."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def gzip_prefixed(prefix: bytes, body: bytes, body_deflated: bytes, level: int = GZIP_LEVEL) -> bytes:
+    """gzip of ``prefix + body`` reusing ``body_deflated = deflate_raw(body)``.
+
+    The prefix is compressed alone and sync-flushed to a byte boundary; the
+    body's stream never refers back into it, so the two raw streams join
+    into one valid deflate stream. Per call only the prefix is compressed
+    and the CRC computed.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    head = compressor.compress(prefix) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    crc = zlib.crc32(body, zlib.crc32(prefix))
+    trailer = struct.pack("<II", crc, (len(prefix) + len(body)) & 0xFFFFFFFF)
+    return b"".join([_GZIP_HEADER, head, body_deflated, trailer])
+
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        if encoding == BR:
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+            self._zlib = None
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.process(data)
+        return self._zlib.compress(data)
+
+    def finish(self) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+class CompressionMiddleware:
+    """Compress responses under ``prefixes`` with brotli or gzip.
+
+    Only compressible content types of at least ``minimum_size`` bytes;
+    responses that already carry Content-Encoding (e.g. the gzipped
+    session snapshot) are passed through. Strong ETags become weak, as
+    the compressed bytes differ from the ones the tag was computed for;
+    ConditionalGetMiddleware compares tags ignoring ``W/``.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = MINIMUM_SIZE, prefixes: Iterable[str] = ("/api/",)):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.prefixes = tuple(prefixes)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefixes):
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            if passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = Headers(raw=start["headers"])
+                if (
+                    "content-encoding" in headers
+                    or not is_compressible(headers.get("content-type", ""))
+                    or (not more_body and len(body) < self.minimum_size)
+                ):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+
+                compressor = _Compressor(encoding)
+                headers = MutableHeaders(raw=start["headers"])
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = f"W/{etag}"
+                del headers["Content-Length"]
+                if not more_body:
+                    body = compressor.compress(body) + compressor.finish()
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send(start)
+
+            body = compressor.compress(body)
+            if not more_body:
+                body += compressor.finish()
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,113 @@
+import hashlib
+from typing import Iterable, Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.auth import player_token_from_jwt
+from app.core.session_versions import BOOT_NONCE, WriteScope, session_versions, token_sessions, write_scope
+
+MUTATING_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(session_id: int, player_token: str, path: str, query: bytes) -> str:
+    """Strong ETag for one player's view of a session endpoint at its current version."""
+    epoch, version = session_versions.get(session_id)
+    view = hashlib.blake2b(
+        b"\0".join([player_token.encode(), path.encode(), query]), digest_size=8
+    ).hexdigest()
+    return f'"{BOOT_NONCE}-{epoch}-{session_id}-{version}-{view}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def _player_token(headers: Headers) -> Optional[str]:
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    return player_token_from_jwt(token)
+
+
+class ConditionalGetMiddleware:
+    """ETags and 304s for read-heavy session endpoints; version bumps on writes.
+
+    GET on one of ``paths``: when the player's session is already known
+    (cached by get_current_player, evicted when the player row is
+    deleted), the ETag is computed from the session version before the
+    endpoint runs, and a matching If-None-Match is answered with 304
+    without calling it (no DB work). The first request of a token is
+    served normally, without an ETag.
+
+    A POST/PUT/PATCH/DELETE under /api bumps the requester's session
+    version on its first DB commit with changes (see WriteScope), i.e.
+    before anything it broadcasts; if the requester is not a known
+    player, every ETag is invalidated. A successful request that did not
+    commit still bumps when its response starts.
+    """
+
+    def __init__(self, app: ASGIApp, paths: Iterable[str]):
+        self.app = app
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        path = scope["path"].rstrip("/") or "/"
+        if method == "GET" and path in self.paths:
+            await self._conditional_get(scope, receive, send, path)
+        elif method in MUTATING_METHODS and path.startswith("/api/"):
+            await self._mutation(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
+
+    async def _conditional_get(self, scope: Scope, receive: Receive, send: Send, path: str):
+        headers = Headers(scope=scope)
+        player_token = _player_token(headers)
+        session_id = token_sessions.get(player_token) if player_token else None
+        if session_id is None:
+            await self.app(scope, receive, send)
+            return
+
+        etag = make_etag(session_id, player_token, path, scope.get("query_string", b""))
+        if_none_match = headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, etag):
+            response = Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+            await response(scope, receive, send)
+            return
+
+        async def send_with_etag(message: Message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"etag", etag.encode("latin-1")),
+                    (b"cache-control", CACHE_CONTROL.encode("latin-1")),
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
+
+    async def _mutation(self, scope: Scope, receive: Receive, send: Send):
+        writes = WriteScope()
+        player_token = _player_token(Headers(scope=scope))
+        writes.session_id = token_sessions.get(player_token) if player_token else None
+
+        async def send_and_bump(message: Message):
+            if message["type"] == "http.response.start" and message["status"] < 400 and not writes.bumped:
+                writes.bump()
+            await send(message)
+
+        reset = write_scope.set(writes)
+        try:
+            await self.app(scope, receive, send_and_bump)
+        finally:
+            write_scope.reset(reset)
@@ -0,0 +1,144 @@
+"""Fast JSON responses with byte-identical output.
+
+``FastJSONResponse`` is the app's default response class. It encodes with
+orjson when installed (``pip install orjson``) and otherwise with the
+stdlib exactly like Starlette's ``JSONResponse``. orjson and ``json``
+print the same bytes for everything the API returns except floats below
+1e-4 or from 1e16 up (``0.00001`` vs ``1e-05``, ``1e16`` vs ``1e+16``);
+bodies that may contain such a number are re-encoded with the stdlib.
+
+``serialize``/``serialize_many`` turn ORM objects into the dict a
+``response_model`` would produce, via a function generated once per
+schema, without building Pydantic models. They do not validate: use them
+only on hot read routes whose objects come straight from the DB.
+"""
+
+import json
+import re
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Type, Union, get_args, get_origin
+
+from pydantic import BaseModel, TypeAdapter
+from starlette.responses import JSONResponse
+
+try:  # orjson is optional
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+# Floats orjson prints differently from json: 0.0000x, and anything with an
+# exponent. Exponents are found in a copy where number characters are '0'
+# and value separators ':' (one C pass + a literal-prefix search instead of
+# a regex over every byte). Look-alikes inside strings only cost a stdlib
+# re-encode.
+_SMALL_FLOAT = b"0.0000"
+_NUMBER_CHARS = bytes.maketrans(b"123456789.-,[E", b"00000000000::e")
+_EXPONENT = re.compile(rb":0+e")
+
+_datetime_adapter = TypeAdapter(datetime)
+
+
+def _stdlib_dumps(content: Any) -> bytes:
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode like JSONResponse.render, with orjson when it gives the same bytes."""
+    if orjson is None:
+        return _stdlib_dumps(content)
+    try:
+        body = orjson.dumps(content)
+    except TypeError:  # ints over 64 bits, non-str keys
+        return _stdlib_dumps(content)
+    if (
+        _SMALL_FLOAT in body
+        or _EXPONENT.search(body.translate(_NUMBER_CHARS))
+        or body[:1] not in (b"{", b"[", b'"', b"t", b"f", b"n")
+    ):
+        return _stdlib_dumps(content)
+    return body
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _datetime(value: datetime) -> str:
+    if value.tzinfo is None:
+        return value.isoformat()
+    return _datetime_adapter.dump_python(value, mode="json")
+
+
+# Converters applied the way Pydantic coerces these types from attributes
+_SCALARS = {int: "int", float: "float", bool: "bool", str: None, datetime: "_datetime"}
+
+
+def _value_expr(annotation: Any, source: str, namespace: Dict[str, Any]) -> str:
+    """Python expression converting ``source`` according to ``annotation``."""
+    origin = get_origin(annotation)
+    args = get_args(annotation)
+
+    if origin is Union and type(None) in args:
+        inner = [a for a in args if a is not type(None)]
+        if len(inner) != 1:
+            raise TypeError(f"Unsupported field type {annotation!r}")
+        var = f"_v{len(namespace)}"
+        namespace[var] = None
+        return f"(None if ({var} := {source}) is None else {_value_expr(inner[0], var, namespace)})"
+
+    if origin in (list, List) and args:
+        item = f"_i{len(namespace)}"
+        namespace[item] = None
+        return f"[{_value_expr(args[0], item, namespace)} for {item} in {source}]"
+
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        name = f"_s_{annotation.__name__}"
+        namespace[name] = compile_serializer(annotation)
+        return f"{name}({source})"
+
+    if annotation in _SCALARS:
+        converter = _SCALARS[annotation]
+        return f"{converter}({source})" if converter else source
+
+    raise TypeError(f"Unsupported field type {annotation!r}")
+
+
+_serializers: Dict[type, Callable[[Any], Dict[str, Any]]] = {}
+
+
+def compile_serializer(model: Type[BaseModel]) -> Callable[[Any], Dict[str, Any]]:
+    """Generate ``obj -> dict`` equal to ``model.model_validate(obj).model_dump(mode="json")``."""
+    if model in _serializers:
+        return _serializers[model]
+
+    namespace: Dict[str, Any] = {"_datetime": _datetime}
+    items = []
+    for name, field in model.model_fields.items():
+        if field.is_required():
+            source = f"obj.{name}"
+        else:
+            default = f"_d_{name}"
+            namespace[default] = field.get_default(call_default_factory=True)
+            source = f"getattr(obj, {name!r}, {default})"
+        items.append(f"        {name!r}: {_value_expr(field.annotation, source, namespace)},")
+
+    code = "def serialize(obj):\n    return {\n" + "\n".join(items) + "\n    }\n"
+    exec(compile(code, f"<serializer {model.__name__}>", "exec"), namespace)
+    _serializers[model] = namespace["serialize"]
+    return namespace["serialize"]
+
+
+def serialize(model: Type[BaseModel], obj: Any) -> Dict[str, Any]:
+    return compile_serializer(model)(obj)
+
+
+def serialize_many(model: Type[BaseModel], objs: Iterable[Any]) -> List[Dict[str, Any]]:
+    serializer = compile_serializer(model)
+    return [serializer(obj) for obj in objs]
@@ -0,0 +1,33 @@
+from typing import Dict
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+# Multipart boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class MaxBodySizeMiddleware:
+    """Reject oversized uploads from Content-Length before the body is read.
+
+    ``limits`` maps request paths to the maximum body size in bytes. Requests
+    without Content-Length are still bounded by the endpoint's streaming copy.
+    """
+
+    def __init__(self, app: ASGIApp, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http" and scope["method"] in ("POST", "PUT"):
+            limit = self.limits.get(scope["path"])
+            if limit is not None:
+                length = dict(scope["headers"]).get(b"content-length")
+                if length is not None and length.isdigit() and int(length) > limit:
+                    response = JSONResponse(
+                        {"detail": f"File too large (max {(limit - MULTIPART_OVERHEAD) // (1024 * 1024)}MB)"},
+                        status_code=400,
+                    )
+                    await response(scope, receive, send)
+                    return
+        await self.app(scope, receive, send)
@@ -0,0 +1,158 @@
+"""In-memory per-session change counters.
+
+Every mutating request and WebSocket message that commits bumps the
+counter of the requester's session; conditional GETs compare ETags built
+from it (see etag.py) instead of rebuilding the response. Within a
+request the bump happens on DB commit (see WriteScope), so it precedes
+any WebSocket broadcast that makes clients refetch. Counters live in
+process memory, so ETags also carry BOOT_NONCE: after a restart every
+old ETag stops matching. Changes whose session is unknown (joining by
+code, background jobs) bump a global epoch instead.
+"""
+
+import threading
+import uuid
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session as DBSession
+
+BOOT_NONCE = uuid.uuid4().hex[:8]
+
+# Player tokens remembered for token -> session lookups without the DB
+TOKEN_CACHE_SIZE = 10_000
+# Encoded responses kept by SessionResponseCache
+RESPONSE_CACHE_SIZE = 256
+
+
+class SessionVersions:
+    def __init__(self):
+        self._versions: Dict[int, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def get(self, session_id: int) -> Tuple[int, int]:
+        """(global epoch, session version)."""
+        return self._epoch, self._versions.get(session_id, 0)
+
+    def bump(self, session_id: int) -> None:
+        with self._lock:
+            self._versions[session_id] = self._versions.get(session_id, 0) + 1
+
+    def bump_all(self) -> None:
+        with self._lock:
+            self._epoch += 1
+
+
+class TokenSessionCache:
+    """LRU map player token -> session id, filled by get_current_player."""
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE):
+        self.max_size = max_size
+        self._items: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[int]:
+        with self._lock:
+            session_id = self._items.get(token)
+            if session_id is not None:
+                self._items.move_to_end(token)
+            return session_id
+
+    def set(self, token: str, session_id: int) -> None:
+        with self._lock:
+            self._items[token] = session_id
+            self._items.move_to_end(token)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def discard(self, token: str) -> None:
+        with self._lock:
+            self._items.pop(token, None)
+
+
+class SessionResponseCache:
+    """LRU of encoded per-player responses, valid for one session version.
+
+    The key includes the version, so a bump makes old entries unreachable;
+    they fall out of the LRU on their own. Callers must read the key
+    before building the response: a concurrent write then leaves the
+    entry under an already outdated version.
+    """
+
+    def __init__(self, max_size: int = RESPONSE_CACHE_SIZE):
+        self.max_size = max_size
+        self._items: "OrderedDict[Tuple[str, int, int, int], Dict[str, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, player_token: str, session_id: int) -> Tuple[str, int, int, int]:
+        return (player_token, session_id, *session_versions.get(session_id))
+
+    def get(self, key) -> Optional[Dict[str, bytes]]:
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is not None:
+                self._items.move_to_end(key)
+            return entry
+
+    def set(self, key, entry: Dict[str, bytes]) -> None:
+        with self._lock:
+            self._items[key] = entry
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+
+class WriteScope:
+    """Version bump owed by the current mutating request.
+
+    ConditionalGetMiddleware opens one per request; get_current_player
+    fills in the session. The first DB commit with changes bumps it.
+    """
+
+    def __init__(self):
+        self.session_id: Optional[int] = None
+        self.bumped = False
+
+    def bump(self) -> None:
+        if self.session_id is not None:
+            session_versions.bump(self.session_id)
+        else:
+            session_versions.bump_all()
+        self.bumped = True
+
+
+# Mutable holder, so copies of the context (threadpool endpoints) share it
+write_scope: ContextVar[Optional[WriteScope]] = ContextVar("write_scope", default=None)
+
+
+session_versions = SessionVersions()
+token_sessions = TokenSessionCache()
+
+
+@event.listens_for(DBSession, "after_flush")
+def _remember_writes(session: DBSession, flush_context) -> None:
+    from app.models.player import Player
+
+    session.info["versions_dirty"] = True
+    gone = session.info.setdefault("deleted_player_tokens", set())
+    gone.update(obj.token for obj in session.deleted if isinstance(obj, Player))
+
+
+@event.listens_for(DBSession, "after_commit")
+def _bump_on_commit(session: DBSession) -> None:
+    # Deleted players must not get 304s from the token -> session cache
+    for token in session.info.pop("deleted_player_tokens", ()):
+        token_sessions.discard(token)
+    if session.info.pop("versions_dirty", False):
+        scope = write_scope.get()
+        if scope is not None:
+            scope.bump()
+
+
+@event.listens_for(DBSession, "after_rollback")
+def _forget_writes(session: DBSession) -> None:
+    session.info.pop("versions_dirty", None)
+    session.info.pop("deleted_player_tokens", None)
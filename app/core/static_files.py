@@ -0,0 +1,143 @@
+import gzip
+import mimetypes
+import os
+import sys
+from typing import Dict, FrozenSet, Iterable
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from app.core.compression import BR, GZIP, MINIMUM_SIZE, brotli, negotiate_encoding
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Sibling suffix for each precompressed encoding, in order of preference
+PRECOMPRESSED_SUFFIXES = {BR: ".br", GZIP: ".gz"}
+PRECOMPRESSIBLE_EXTENSIONS = (".js", ".mjs", ".css", ".html", ".svg", ".json", ".map", ".txt", ".wasm")
+
+
+def file_index(directory: str) -> FrozenSet[str]:
+    """Relative POSIX paths of every file under ``directory``."""
+    files = set()
+    for root, _, names in os.walk(directory):
+        for name in names:
+            relative = os.path.relpath(os.path.join(root, name), directory)
+            files.add(relative.replace(os.sep, "/"))
+    return frozenset(files)
+
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    if encoding == BR:
+        return brotli.compress(data, quality=11)
+    # mtime=0 keeps the output reproducible between builds
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def precompress(directory: str, minimum_size: int = MINIMUM_SIZE) -> int:
+    """Write ``.gz`` (and ``.br`` with brotli installed) next to compressible files.
+
+    Siblings newer than their source are kept, so running this at build
+    time makes it a no-op at startup. Siblings that would not be smaller
+    are not written. Returns the number of files written.
+    """
+    encodings = [GZIP] + ([BR] if brotli is not None else [])
+    written = 0
+    for relative in sorted(file_index(directory)):
+        if not relative.endswith(PRECOMPRESSIBLE_EXTENSIONS):
+            continue
+        path = os.path.join(directory, relative)
+        stat = os.stat(path)
+        if stat.st_size < minimum_size:
+            continue
+        data = None
+        for encoding in encodings:
+            target = path + PRECOMPRESSED_SUFFIXES[encoding]
+            if os.path.exists(target) and os.stat(target).st_mtime >= stat.st_mtime:
+                continue
+            if data is None:
+                with open(path, "rb") as f:
+                    data = f.read()
+            compressed = _compress(data, encoding)
+            if len(compressed) >= len(data):
+                continue
+            tmp = target + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(compressed)
+            os.replace(tmp, target)
+            written += 1
+    return written
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """StaticFiles that marks files under the given prefixes as immutable.
+
+    Only for content whose URL changes whenever the content does
+    (uuid-named uploads, tile pyramids), so browsers and CDNs never revalidate.
+    """
+
+    def __init__(self, *args, immutable_prefixes: Iterable[str] = ("",), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.immutable_prefixes = tuple(immutable_prefixes)
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        response = await super().get_response(path, scope)
+        if response.status_code in (200, 304) and path.replace(os.sep, "/").startswith(self.immutable_prefixes):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+
+class PrecompressedStaticFiles(ImmutableStaticFiles):
+    """ImmutableStaticFiles serving ``.br``/``.gz`` siblings to clients that accept them.
+
+    Siblings are produced by ``precompress`` (at build time, or here on
+    startup) and indexed once, so a request costs no extra filesystem
+    lookups.
+    """
+
+    def __init__(self, *args, precompress_on_start: bool = True, **kwargs):
+        super().__init__(*args, **kwargs)
+        if precompress_on_start:
+            precompress(self.directory)
+        files = file_index(self.directory)
+        self.variants: Dict[str, Dict[str, str]] = {}
+        for relative in files:
+            for encoding, suffix in PRECOMPRESSED_SUFFIXES.items():
+                if relative + suffix in files:
+                    self.variants.setdefault(relative, {})[encoding] = relative + suffix
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        relative = path.replace(os.sep, "/")
+        variants = self.variants.get(relative)
+        if not variants:
+            return await super().get_response(path, scope)
+
+        request_headers = Headers(scope=scope)
+        encoding = negotiate_encoding(request_headers.get("accept-encoding"), list(variants))
+        if encoding is None:
+            response = await super().get_response(path, scope)
+            response.headers.add_vary_header("Accept-Encoding")
+            return response
+
+        full_path, stat_result = self.lookup_path(variants[encoding])
+        if stat_result is None:
+            return await super().get_response(path, scope)
+        media_type = mimetypes.guess_type(relative)[0] or "text/plain"
+        response = FileResponse(
+            full_path,
+            stat_result=stat_result,
+            media_type=media_type,
+            headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"},
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            response = NotModifiedResponse(response.headers)
+        if relative.startswith(self.immutable_prefixes):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+
+if __name__ == "__main__":
+    # Build step: python -m app.core.static_files frontend/dist/assets
+    for directory in sys.argv[1:]:
+        print(f"{directory}: {precompress(directory)} file(s) precompressed")
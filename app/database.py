@@ -30,6 +30,7 @@ def cleanup_old_sessions(db, days: int = 7) -> int:
     from datetime import datetime, timedelta
     from app.models.session import Session
     from app.websocket.manager import manager
+    from app.core.session_versions import session_versions
     import logging
 
     logger = logging.getLogger(__name__)
@@ -41,6 +42,7 @@ def cleanup_old_sessions(db, days: int = 7) -> int:
         return 0
 
     count = 0
+    deleted = []
     for session in old_sessions:
         # Skip if has active WebSocket connections
         has_active = False
@@ -50,11 +52,14 @@ def cleanup_old_sessions(db, days: int = 7) -> int:
                 break
 
         if not has_active:
+            deleted.append(session.id)
             db.delete(session)
             count += 1
 
     if count > 0:
         db.commit()
+        for session_id in deleted:
+            session_versions.bump(session_id)
         logger.info(f"Cleanup: Deleted {count} old session(s)")
 
     return count
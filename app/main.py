@@ -2,6 +2,7 @@ import asyncio
 import json
 import logging
 import os
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
@@ -11,6 +12,7 @@ from sqlalchemy.orm import Session as DBSession
 
 from app.database import engine, Base, get_db
 from app.api import api_router
+from app.core.fast_json import FastJSONResponse
 from app.websocket.manager import manager
 from app.websocket.handlers import handle_message
 from app.models.player import Player
@@ -41,10 +43,35 @@ try:
 except Exception as e:
     logger.warning(f"Startup cleanup failed: {e}")
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from app.config import get_settings
+    from app.services.blobs import run_sweeper
+    from app.services.encounter import shutdown_pool, warm_pool
+    from app.services.persistence.autosave import run_autosave
+
+    # Periodically delete uploads no map or character refers to
+    tasks = [asyncio.create_task(run_sweeper())]
+    # Periodically snapshot sessions with live sockets to disk
+    if get_settings().autosave_interval_seconds > 0:
+        tasks.append(asyncio.create_task(run_autosave()))
+    # Start the simulator's workers now rather than on the first request
+    asyncio.get_running_loop().run_in_executor(None, warm_pool, get_settings().encounter_sim_workers)
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        shutdown_pool()
+
+
 app = FastAPI(
     title="DnD Lite GM",
     description="Lightweight D&D Game Master assistant",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 # CORS middleware
@@ -56,6 +83,39 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Reject oversized uploads before their body is read
+from app.core.request_limits import MaxBodySizeMiddleware, MULTIPART_OVERHEAD
+from app.api.user_maps import MAX_FILE_SIZE as MAP_BACKGROUND_MAX_SIZE
+from app.services.persistence.streaming import MAX_IMPORT_SIZE
+app.add_middleware(
+    MaxBodySizeMiddleware,
+    limits={
+        "/api/me/maps/upload-background": MAP_BACKGROUND_MAX_SIZE + MULTIPART_OVERHEAD,
+        "/api/session/import/file": MAX_IMPORT_SIZE + MULTIPART_OVERHEAD,
+        "/api/session/validate/file": MAX_IMPORT_SIZE + MULTIPART_OVERHEAD,
+    },
+)
+
+# ETags / 304 for read-heavy session endpoints; writes bump session versions
+from app.core.etag import ConditionalGetMiddleware
+app.add_middleware(
+    ConditionalGetMiddleware,
+    paths={
+        "/api/session",
+        "/api/session/players",
+        "/api/session/snapshot",
+        "/api/session/maps",
+        "/api/session/maps/summary",
+        "/api/characters",
+        "/api/combat",
+        "/api/combat/initiative",
+    },
+)
+
+# Compress API responses; outermost, so it sees the final ETag
+from app.core.compression import CompressionMiddleware
+app.add_middleware(CompressionMiddleware)
+
 # Include API routes
 app.include_router(api_router)
 
@@ -201,11 +261,18 @@ async def websocket_endpoint(websocket: WebSocket, token: str = Query(None)):
 
 
 # Mount uploads directory for user-uploaded files (map backgrounds, etc.)
-from fastapi.staticfiles import StaticFiles
+# Blobs are named by content hash; map backgrounds and tile pyramids are uuid-named.
+# Neither is ever rewritten
+from app.core.static_files import ImmutableStaticFiles, PrecompressedStaticFiles, file_index
 uploads_path = "uploads"
 os.makedirs(os.path.join(uploads_path, "maps"), exist_ok=True)
 os.makedirs(os.path.join(uploads_path, "avatars"), exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=uploads_path), name="uploads")
+os.makedirs(os.path.join(uploads_path, "blobs"), exist_ok=True)
+app.mount(
+    "/uploads",
+    ImmutableStaticFiles(directory=uploads_path, immutable_prefixes=("maps/", "blobs/")),
+    name="uploads",
+)
 
 # Mount static files from frontend/dist if it exists
 static_path = "frontend/dist"
@@ -214,13 +281,16 @@ assets_path = os.path.join(static_path, "assets")
 if os.path.exists(static_path):
     logger.info(f"Static path exists: {os.path.abspath(static_path)}")
 
-    # Mount assets directory
+    # Mount assets directory (file names carry a content hash)
     if os.path.exists(assets_path):
         logger.info(f"Mounting /assets from: {os.path.abspath(assets_path)}")
-        app.mount("/assets", StaticFiles(directory=assets_path, html=False), name="assets")
+        app.mount("/assets", PrecompressedStaticFiles(directory=assets_path, html=False), name="assets")
     else:
         logger.warning(f"Assets directory not found: {os.path.abspath(assets_path)}")
 
+    # The build does not change while the server runs
+    spa_files = file_index(static_path)
+
     @app.exception_handler(StarletteHTTPException)
     async def spa_exception_handler(request: Request, exc: StarletteHTTPException):
         # For API routes and static assets, return errors as-is (don't fallback to SPA)
@@ -234,13 +304,11 @@ if os.path.exists(static_path):
         if exc.status_code == 404:
             # Check if the requested file exists as a static file
             clean_path = request.url.path.lstrip("/")
-            file_path = os.path.join(static_path, clean_path)
-            if clean_path and os.path.isfile(file_path):
-                return FileResponse(file_path)
+            if clean_path in spa_files:
+                return FileResponse(os.path.join(static_path, clean_path))
 
-            index_path = os.path.join(static_path, "index.html")
-            if os.path.isfile(index_path):
-                return FileResponse(index_path)
+            if "index.html" in spa_files:
+                return FileResponse(os.path.join(static_path, "index.html"))
 
         # For all other HTTP errors on non-API routes, return JSON
         return JSONResponse(
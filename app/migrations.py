@@ -84,6 +84,76 @@ MIGRATIONS = [
         "column": "character_id",
         "sql": "ALTER TABLE initiative_rolls ADD COLUMN character_id INTEGER REFERENCES characters(id) ON DELETE CASCADE",
     },
+    {
+        "table": "combats",
+        "column": "event_seq",
+        "sql": "ALTER TABLE combats ADD COLUMN event_seq INTEGER DEFAULT 0",
+    },
+    {
+        "table": "maps",
+        "column": "fog_enabled",
+        "sql": "ALTER TABLE maps ADD COLUMN fog_enabled BOOLEAN DEFAULT 0",
+    },
+    {
+        "table": "maps",
+        "column": "difficult_terrain",
+        "sql": "ALTER TABLE maps ADD COLUMN difficult_terrain JSON",
+    },
+    {
+        "table": "upload_blobs",
+        "column": "variants",
+        "sql": "ALTER TABLE upload_blobs ADD COLUMN variants JSON",
+    },
+    {
+        "table": "players",
+        "column": "updated_at",
+        "sql": "ALTER TABLE players ADD COLUMN updated_at DATETIME",
+    },
+    {
+        "table": "characters",
+        "column": "updated_at",
+        "sql": "ALTER TABLE characters ADD COLUMN updated_at DATETIME",
+    },
+    {
+        "table": "items",
+        "column": "updated_at",
+        "sql": "ALTER TABLE items ADD COLUMN updated_at DATETIME",
+    },
+    {
+        "table": "spells",
+        "column": "updated_at",
+        "sql": "ALTER TABLE spells ADD COLUMN updated_at DATETIME",
+    },
+    {
+        "table": "maps",
+        "column": "updated_at",
+        "sql": "ALTER TABLE maps ADD COLUMN updated_at DATETIME",
+    },
+    {
+        "table": "map_tokens",
+        "column": "updated_at",
+        "sql": "ALTER TABLE map_tokens ADD COLUMN updated_at DATETIME",
+    },
+    {
+        "table": "map_walls",
+        "column": "updated_at",
+        "sql": "ALTER TABLE map_walls ADD COLUMN updated_at DATETIME",
+    },
+    {
+        "table": "combats",
+        "column": "updated_at",
+        "sql": "ALTER TABLE combats ADD COLUMN updated_at DATETIME",
+    },
+    {
+        "table": "combat_participants",
+        "column": "updated_at",
+        "sql": "ALTER TABLE combat_participants ADD COLUMN updated_at DATETIME",
+    },
+    {
+        "table": "session_snapshots",
+        "column": "entity_stamps",
+        "sql": "ALTER TABLE session_snapshots ADD COLUMN entity_stamps JSON",
+    },
 ]
 
 # NOTE: player_id in initiative_rolls should be nullable to support NPC rolls (which use character_id instead).
@@ -1,15 +1,18 @@
 from app.models.session import Session
+from app.models.session_snapshot import SessionSnapshot
 from app.models.player import Player
 from app.models.character import Character
 from app.models.item import Item
 from app.models.spell import Spell
-from app.models.combat import Combat, CombatParticipant, InitiativeRoll
+from app.models.combat import Combat, CombatParticipant, InitiativeRoll, CombatEvent, CombatSnapshot
 from app.models.user import User
 from app.models.user_character import UserCharacter
 from app.models.user_map import UserMap
+from app.models.upload_blob import UploadBlob
 
 __all__ = [
     "Session",
+    "SessionSnapshot",
     "Player",
     "Character",
     "Item",
@@ -17,7 +20,10 @@ __all__ = [
     "Combat",
     "CombatParticipant",
     "InitiativeRoll",
+    "CombatEvent",
+    "CombatSnapshot",
     "User",
     "UserCharacter",
     "UserMap",
+    "UploadBlob",
 ]
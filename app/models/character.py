@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, String, Text, ForeignKey
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -31,6 +33,7 @@ class Character(Base):
     # Appearance & Avatar
     appearance = Column(Text, nullable=True)
     avatar_url = Column(String, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     player = relationship("Player", back_populates="characters")
     items = relationship("Item", back_populates="character", cascade="all, delete-orphan")
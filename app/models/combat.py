@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Boolean, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, Boolean, ForeignKey, DateTime, String, JSON, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -13,6 +13,8 @@ class Combat(Base):
     is_active = Column(Boolean, default=True)
     round_number = Column(Integer, default=1)
     current_turn_id = Column(Integer, ForeignKey("combat_participants.id"), nullable=True)
+    event_seq = Column(Integer, default=0)  # seq of the last journal event
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     session = relationship("Session", back_populates="combats")
     participants = relationship(
@@ -26,6 +28,17 @@ class Combat(Base):
         back_populates="combat",
         cascade="all, delete-orphan"
     )
+    events = relationship(
+        "CombatEvent",
+        back_populates="combat",
+        order_by="CombatEvent.seq",
+        cascade="all, delete-orphan"
+    )
+    snapshots = relationship(
+        "CombatSnapshot",
+        back_populates="combat",
+        cascade="all, delete-orphan"
+    )
 
 
 class CombatParticipant(Base):
@@ -37,6 +50,7 @@ class CombatParticipant(Base):
     initiative = Column(Integer, default=0)
     current_hp = Column(Integer, nullable=False)
     is_active = Column(Boolean, default=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     combat = relationship("Combat", back_populates="participants", foreign_keys=[combat_id])
     character = relationship("Character", back_populates="combat_participations")
@@ -61,3 +75,36 @@ class InitiativeRoll(Base):
     player = relationship("Player")
     character = relationship("Character")
 
+
+class CombatEvent(Base):
+    """Append-only combat journal entry.
+
+    payload describes the change (used to replay state forward),
+    undo holds the previous values needed to revert it.
+    """
+    __tablename__ = "combat_events"
+    __table_args__ = (Index("ix_combat_events_combat_seq", "combat_id", "seq", unique=True),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    combat_id = Column(Integer, ForeignKey("combats.id"), nullable=False)
+    seq = Column(Integer, nullable=False)
+    event_type = Column(String(30), nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+    undo = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    combat = relationship("Combat", back_populates="events")
+
+
+class CombatSnapshot(Base):
+    """Compacted combat state as of journal event `seq`."""
+    __tablename__ = "combat_snapshots"
+    __table_args__ = (Index("ix_combat_snapshots_combat_seq", "combat_id", "seq", unique=True),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    combat_id = Column(Integer, ForeignKey("combats.id"), nullable=False)
+    seq = Column(Integer, nullable=False)
+    state = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    combat = relationship("Combat", back_populates="snapshots")
@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, JSON
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, String, Boolean, ForeignKey, JSON
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -13,5 +15,6 @@ class Item(Base):
     description = Column(String(500), nullable=True)
     effects = Column(JSON, nullable=True)  # {"str_bonus": 2, "ac_bonus": 1}
     is_equipped = Column(Boolean, default=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     character = relationship("Character", back_populates="items")
@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, String, Boolean, Float, ForeignKey, Text
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, String, Boolean, Float, ForeignKey, Text, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
@@ -17,9 +19,14 @@ class Map(Base):
     grid_scale = Column(Integer, default=50) # pixels per grid cell
     is_active = Column(Boolean, default=False)
     source_user_map_id = Column(String(36), nullable=True)
+    fog_enabled = Column(Boolean, default=False)
+    # Difficult terrain cells: [[col, row], ...] (movement costs double)
+    difficult_terrain = Column(JSON, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     session = relationship("Session", back_populates="maps")
     tokens = relationship("MapToken", back_populates="map", cascade="all, delete-orphan")
+    walls = relationship("MapWall", back_populates="map", cascade="all, delete-orphan")
 
 class MapToken(Base):
     __tablename__ = "map_tokens"
@@ -41,6 +48,22 @@ class MapToken(Base):
 
     # Layer: "tokens", "background", "hidden"
     layer = Column(String, default="tokens")
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     map = relationship("Map", back_populates="tokens")
     character = relationship("Character")
+
+
+class MapWall(Base):
+    """Sight-blocking segment (wall, closed door) in map pixels."""
+    __tablename__ = "map_walls"
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    map_id = Column(String(36), ForeignKey("maps.id"), nullable=False, index=True)
+    x1 = Column(Float, nullable=False)
+    y1 = Column(Float, nullable=False)
+    x2 = Column(Float, nullable=False)
+    y2 = Column(Float, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    map = relationship("Map", back_populates="walls")
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime
 from sqlalchemy.orm import relationship
 
@@ -16,6 +18,7 @@ class Player(Base):
     is_ready = Column(Boolean, default=False)
     can_move = Column(Boolean, default=False)
     left_at = Column(DateTime, nullable=True)  # NULL = active, timestamp = left
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     session = relationship("Session", back_populates="players")
     user = relationship("User")
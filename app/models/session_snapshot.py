@@ -0,0 +1,37 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, JSON, String
+from sqlalchemy.orm import relationship
+
+from app.database import Base
+
+
+class SessionSnapshot(Base):
+    """Saved session state: a full export or a delta against the previous snapshot."""
+    __tablename__ = "session_snapshots"
+    __table_args__ = (Index("ix_session_snapshots_session_id_id", "session_id", "id"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(Integer, ForeignKey("sessions.id"), nullable=False)
+    # NULL for a full snapshot, otherwise the snapshot this delta applies to
+    # (no FK: compaction deletes and rebases chains as a whole)
+    base_id = Column(Integer, nullable=True)
+    format_version = Column(String(10), nullable=False)
+    # Full: export document; delta: {"entities": {name: {"version", "upserts", "deleted"}}}
+    payload = Column(JSON, nullable=False)
+    # Content hash of every record at this snapshot: {entity: {record id: hash}};
+    # kept on full snapshots and the latest one, dropped from superseded deltas
+    record_hashes = Column(JSON, nullable=True)
+    # Digest of the updated_at stamps of each entity's rows: {entity: digest};
+    # entities whose digest did not move are not re-exported
+    entity_stamps = Column(JSON, nullable=True)
+    # Hash over record_hashes: equal state_hash means nothing changed
+    state_hash = Column(String(64), nullable=False)
+    changed_records = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    session = relationship("Session", back_populates="snapshots")
+
+    @property
+    def is_full(self) -> bool:
+        return self.base_id is None
@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, String, ForeignKey
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -13,5 +15,6 @@ class Spell(Base):
     level = Column(Integer, default=0)  # 0 = cantrip
     description = Column(String(1000), nullable=True)
     damage_dice = Column(String(20), nullable=True)  # "2d6", "1d10+4"
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     character = relationship("Character", back_populates="spells")
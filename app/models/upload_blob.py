@@ -0,0 +1,21 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, DateTime, JSON
+
+from app.database import Base
+
+
+class UploadBlob(Base):
+    """Content-addressed upload stored as uploads/blobs/{sha[:2]}/{sha}.{ext}."""
+    __tablename__ = "upload_blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    ext = Column(String(10), nullable=False)
+    size = Column(Integer, nullable=False)
+    # Recomputed by the GC sweep: URL columns, snapshots and autosaves pointing at it
+    ref_count = Column(Integer, default=0)
+    # Built WebP variants: [{"width", "height", "url"}, ...], widest first
+    variants = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    # Last upload of this content; unreferenced blobs get a grace period from it
+    last_uploaded_at = Column(DateTime, default=datetime.utcnow)
@@ -4,6 +4,7 @@ from app.schemas.session import (
     SessionJoin,
     SessionJoinResponse,
     SessionState,
+    SessionBootstrapResponse,
 )
 from app.schemas.player import PlayerBase, PlayerResponse
 from app.schemas.character import (
@@ -40,6 +41,7 @@ __all__ = [
     "SessionJoin",
     "SessionJoinResponse",
     "SessionState",
+    "SessionBootstrapResponse",
     "PlayerBase",
     "PlayerResponse",
     "CharacterCreate",
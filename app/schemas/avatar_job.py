@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from typing import Optional
+
+
+class AvatarJobResponse(BaseModel):
+    id: str
+    status: str  # queued | running | done | failed
+    avatar_url: Optional[str] = None
+    error: Optional[str] = None
+
+    class Config:
+        from_attributes = True
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 
 
@@ -57,3 +57,43 @@ class InitiativeRollResponse(BaseModel):
     """Response after rolling initiative."""
     roll: int
     player_name: str
+
+
+# Encounter simulator schemas
+class NpcStatBlock(BaseModel):
+    """Ad-hoc NPC stat block for the encounter simulator."""
+    name: str
+    armor_class: int = Field(default=12, ge=1, le=30)
+    max_hp: int = Field(default=10, ge=1)
+    attack_bonus: int = Field(default=3, ge=-5, le=20)
+    damage_dice: str = "1d6+1"
+    initiative_bonus: int = Field(default=0, ge=-5, le=10)
+
+
+class EncounterSimulationRequest(BaseModel):
+    """Encounter to simulate.
+
+    party_character_ids defaults to all player (non-GM) characters in the session.
+    npc_character_ids are session characters (e.g. GM NPCs) on the enemy side.
+    """
+    party_character_ids: Optional[List[int]] = None
+    npc_character_ids: List[int] = []
+    npcs: List[NpcStatBlock] = []
+    iterations: int = Field(default=10000, ge=100, le=100000)
+    time_budget: float = Field(default=0.8, gt=0, le=5)
+
+
+class CombatantOutcome(BaseModel):
+    name: str
+    side: str
+    character_id: Optional[int] = None
+    death_probability: float
+
+
+class EncounterSimulationResponse(BaseModel):
+    iterations: int
+    win_probability: float
+    draw_probability: float
+    expected_rounds: float
+    budget_exhausted: bool
+    combatants: List[CombatantOutcome]
@@ -1,7 +1,11 @@
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, Field
+from typing import Optional, List, Literal, Dict
 from uuid import UUID
 
+# Upper bounds that keep spatial-index work per request bounded
+MAX_TOKEN_SCALE = 20.0
+MAX_AOE_FEET = 1000.0
+
 class MapTokenBase(BaseModel):
     x: float
     y: float
@@ -14,12 +18,13 @@ class MapTokenBase(BaseModel):
     icon: Optional[str] = None
 
 class MapTokenCreate(MapTokenBase):
+    scale: float = Field(1.0, le=MAX_TOKEN_SCALE)
     character_id: Optional[int] = None
 
 class MapTokenUpdate(BaseModel):
     x: Optional[float] = None
     y: Optional[float] = None
-    scale: Optional[float] = None
+    scale: Optional[float] = Field(default=None, le=MAX_TOKEN_SCALE)
     rotation: Optional[float] = None
     layer: Optional[str] = None
     label: Optional[str] = None
@@ -57,7 +62,100 @@ class MapResponse(MapBase):
     id: str
     session_id: int
     is_active: bool
+    fog_enabled: bool = False
     tokens: List[MapTokenResponse] = []
 
     class Config:
         from_attributes = True
+
+class MapSummaryResponse(MapBase):
+    """Map without its tokens (for map lists)."""
+    id: str
+    session_id: int
+    is_active: bool
+    fog_enabled: bool = False
+    token_count: int = 0
+
+class MapViewportResponse(BaseModel):
+    """Tokens of a map that intersect a rectangle."""
+    map_id: str
+    x: float
+    y: float
+    width: float
+    height: float
+    margin: float
+    tokens: List[MapTokenResponse] = []
+
+class MapWallCreate(BaseModel):
+    """Sight-blocking segment in map pixels."""
+    x1: float
+    y1: float
+    x2: float
+    y2: float
+
+class MapWallResponse(MapWallCreate):
+    id: str
+    map_id: str
+
+    class Config:
+        from_attributes = True
+
+class FogSettings(BaseModel):
+    fog_enabled: bool
+
+class VisibilityResponse(BaseModel):
+    """What a player sees on a map.
+
+    ``visible`` and ``revealed`` are rows x cols bitmaps (one cell per grid
+    square, row-major, 8 cells per byte, base64). ``polygons`` are the
+    line-of-sight polygons of the player's tokens, keyed by token id.
+    """
+    map_id: str
+    player_id: int
+    fog_enabled: bool
+    cell_size: float
+    rows: int
+    cols: int
+    visible: str
+    revealed: str
+    polygons: Dict[str, List[List[float]]] = {}
+
+class TerrainResponse(BaseModel):
+    map_id: str
+    difficult: List[List[int]] = []  # [[col, row], ...]
+
+class TerrainUpdate(BaseModel):
+    """Paint / erase difficult terrain cells ([col, row])."""
+    add: List[List[int]] = []
+    remove: List[List[int]] = []
+
+class PathResponse(BaseModel):
+    """Cheapest path between two cells; cost in feet (5e diagonal rule)."""
+    map_id: str
+    found: bool
+    cost: int = 0
+    cells: List[List[int]] = []    # [[col, row], ...] start to goal
+    points: List[List[float]] = []  # cell centres in map pixels
+
+class ReachableResponse(BaseModel):
+    """Cells a token can reach with its speed: [[col, row, cost_ft], ...]."""
+    map_id: str
+    token_id: str
+    speed: int
+    cells: List[List[int]] = []
+
+class AoeTemplate(BaseModel):
+    """Area-of-effect template. Origin in map pixels, sizes in feet.
+
+    circle: size = radius; rect: x/y = top-left corner, size = width,
+    height defaults to size; cone: size = length, direction in degrees.
+    """
+    shape: Literal["circle", "rect", "cone"]
+    x: float = Field(..., allow_inf_nan=False)
+    y: float = Field(..., allow_inf_nan=False)
+    size: float = Field(..., gt=0, le=MAX_AOE_FEET)
+    height: Optional[float] = Field(default=None, gt=0, le=MAX_AOE_FEET)
+    direction: float = Field(0.0, allow_inf_nan=False)
+
+class AoeResult(BaseModel):
+    token_ids: List[str]
@@ -1,7 +1,7 @@
 """Pydantic схемы для системы сохранения сессий."""
 
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -29,6 +29,15 @@ class SessionExport(BaseModel):
 class ExportRequest(BaseModel):
     """Запрос на экспорт сессии."""
     include_combat: bool = Field(default=True, description="Включить данные о боях")
+    compression: Optional[Literal["none", "gzip", "zstd"]] = Field(
+        default=None,
+        description="Сжать файл выгрузки (.json.gz / .json.zst); "
+                    "по умолчанию — сжатие передачи по Accept-Encoding",
+    )
+    format: Literal["json", "msgpack"] = Field(
+        default="json",
+        description="Формат файла: JSON или бинарный контейнер MessagePack (.msgpack)",
+    )
 
 
 class ExportResponse(BaseModel):
@@ -82,3 +91,51 @@ class ValidationResponse(BaseModel):
     )
     warnings: List[str] = Field(default_factory=list)
     errors: List[str] = Field(default_factory=list)
+
+
+class SnapshotInfo(BaseModel):
+    """Снимок сессии (полный или дельта)."""
+    id: int
+    base_id: Optional[int] = None
+    is_full: bool
+    format_version: str
+    changed_records: int
+    state_hash: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class SnapshotResponse(BaseModel):
+    """Результат создания снимка."""
+    created: bool = Field(..., description="False — с прошлого снимка ничего не изменилось")
+    snapshot: Optional[SnapshotInfo] = None
+
+
+class SnapshotRestoreRequest(BaseModel):
+    """Запрос на восстановление снимка в новую сессию."""
+    new_session_code: Optional[str] = Field(
+        None,
+        description="Опциональный код для новой сессии",
+        min_length=4,
+        max_length=10,
+    )
+
+
+class AutosaveInfo(BaseModel):
+    """Файл автосохранения сессии."""
+    code: str
+    file: str
+    saved_at: datetime
+    size: int
+
+
+class AutosaveRestoreRequest(BaseModel):
+    """Запрос на восстановление последнего автосохранения."""
+    new_session_code: Optional[str] = Field(
+        None,
+        description="Опциональный код для новой сессии",
+        min_length=4,
+        max_length=10,
+    )
@@ -1,6 +1,10 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, List, Optional
+
+from app.schemas.character import CharacterResponse
+from app.schemas.map import MapResponse
+from app.schemas.player import PlayerResponse
 
 
 class SessionCreate(BaseModel):
@@ -49,5 +53,17 @@ class SessionState(BaseModel):
         from_attributes = True
 
 
+class SessionBootstrapResponse(BaseModel):
+    """Everything the game view loads on join/reconnect, in one response."""
+    session: SessionState
+    players: List[PlayerResponse]
+    characters: List[CharacterResponse]
+    maps: List[MapResponse]
+    # Same shape as GET /api/combat
+    combat: Dict[str, Any]
+    # Broadcasts with "seq" up to this value are already reflected
+    event_seq: int
+
+
 class PlayerReadyRequest(BaseModel):
     is_ready: bool
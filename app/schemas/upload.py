@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import List
+
+
+class ImageVariant(BaseModel):
+    width: int
+    height: int
+    url: str
+
+
+class UploadVariantsResponse(BaseModel):
+    url: str
+    size: int
+    # Empty until the background job has built them
+    variants: List[ImageVariant] = []
@@ -1,15 +1,17 @@
 import asyncio
-import os
-import uuid
 
+from sqlalchemy.orm import Session as DBSession
 from yandex_cloud_ml_sdk import YCloudML
 
 from app.config import get_settings
 from app.core.avatar import AVATAR_STYLE_PROMPT
+from app.services import blobs
+from app.services.uploads import run_image_job
+from app.services.variants import AVATAR_WIDTHS, build_variants
 
 
-async def generate_avatar(appearance_description: str) -> str:
-    """Generate a character avatar using YandexART and return the file URL."""
+async def generate_avatar_image(appearance_description: str) -> bytes:
+    """Generate a character avatar using YandexART and return the JPEG bytes."""
     settings = get_settings()
 
     if not settings.yandex_art_folder_id or not settings.yandex_art_api_key:
@@ -34,13 +36,16 @@ async def generate_avatar(appearance_description: str) -> str:
             raise ValueError("Недостаточно средств на аккаунте Yandex Cloud")
         raise
 
-    avatar_dir = os.path.join("uploads", "avatars")
-    os.makedirs(avatar_dir, exist_ok=True)
+    return result.image_bytes
 
-    filename = f"{uuid.uuid4()}.jpeg"
-    filepath = os.path.join(avatar_dir, filename)
 
-    with open(filepath, "wb") as f:
-        f.write(result.image_bytes)
+async def store_avatar(db: DBSession, image_bytes: bytes) -> str:
+    """Put a generated avatar into the blob store and return its URL.
 
-    return f"/uploads/avatars/{filename}"
+    Thumbnails are built before returning, so clients can request them right
+    away; the caller commits.
+    """
+    blob = blobs.store_bytes(db, image_bytes, "jpeg")
+    if blob.variants is None:
+        blob.variants = await run_image_job(build_variants, blob.sha256, blob.ext, AVATAR_WIDTHS)
+    return blobs.blob_url(blob.sha256, blob.ext)
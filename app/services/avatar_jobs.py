@@ -0,0 +1,250 @@
+"""Background queue for avatar generation.
+
+Generating an avatar is a slow, paid YandexART call, so requests only enqueue
+a job and return its id. A fixed number of asyncio workers run the jobs;
+jobs are keyed by a hash of the style prompt and the appearance text, so
+repeated clicks (or two characters with the same description) share one
+generation, and finished results are cached so identical descriptions reuse
+the stored image. When a job finishes its characters get the avatar, session
+characters are broadcast (``character_updated`` and ``avatar_ready``) and the
+job status can be polled.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app.config import get_settings
+from app.core.avatar import AVATAR_STYLE_PROMPT
+from app.core.session_versions import session_versions
+from app.models.character import Character
+from app.models.user_character import UserCharacter
+from app.services import blobs
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# Jobs waiting for a worker; more requests are refused
+MAX_QUEUED = 50
+# Appearance hash -> avatar URL
+CACHE_SIZE = 512
+# Finished jobs kept for status polling
+MAX_FINISHED = 500
+
+# Target kinds: which table the avatar is written to
+TARGET_MODELS = {"character": Character, "user_character": UserCharacter}
+
+
+class AvatarQueueFull(ValueError):
+    pass
+
+
+def avatar_key(appearance: str) -> str:
+    """Dedupe key: what the image depends on (style prompt + appearance)."""
+    text = f"{AVATAR_STYLE_PROMPT}\n{' '.join(appearance.split())}"
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class AvatarJob:
+    id: str
+    key: str
+    appearance: str
+    status: str = QUEUED
+    avatar_url: Optional[str] = None
+    error: Optional[str] = None
+    # (kind, id) of every character waiting for this avatar
+    targets: List[tuple] = field(default_factory=list)
+    created_at: datetime = field(default_factory=datetime.utcnow)
+
+
+async def _default_generator(appearance: str) -> bytes:
+    from app.services.avatar import generate_avatar_image
+    return await generate_avatar_image(appearance)
+
+
+def _default_session():
+    from app.database import SessionLocal
+    return SessionLocal()
+
+
+class AvatarQueue:
+    """Deduplicating avatar job queue with a bounded number of workers."""
+
+    def __init__(
+        self,
+        generator: Optional[Callable[[str], Awaitable[bytes]]] = None,
+        session_factory: Optional[Callable] = None,
+        workers: Optional[int] = None,
+    ):
+        self.generator = generator or _default_generator
+        self.session_factory = session_factory or _default_session
+        self.workers = workers
+        self._jobs: "OrderedDict[str, AvatarJob]" = OrderedDict()
+        self._pending: Dict[str, AvatarJob] = {}
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    # --- lookup ------------------------------------------------------------
+
+    def get(self, job_id: str) -> Optional[AvatarJob]:
+        return self._jobs.get(job_id)
+
+    def cached_url(self, key: str) -> Optional[str]:
+        """Cached avatar URL, unless its blob has been collected since."""
+        url = self._cache.get(key)
+        if url is None:
+            return None
+        digest = blobs.digest_from_url(url)
+        if digest is None or not os.path.exists(blobs.blob_path(digest, url.rsplit(".", 1)[1])):
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return url
+
+    # --- submit ------------------------------------------------------------
+
+    def submit(self, appearance: str, kind: str, target_id: int) -> AvatarJob:
+        """Queue an avatar for a character, joining a pending identical job.
+
+        A cached result comes back as an already finished job; the caller
+        applies it.
+        """
+        key = avatar_key(appearance)
+        target = (kind, target_id)
+
+        url = self.cached_url(key)
+        if url is not None:
+            job = AvatarJob(uuid.uuid4().hex, key, appearance, DONE, avatar_url=url, targets=[target])
+            self._remember(job)
+            return job
+
+        self._ensure_workers()
+        job = self._pending.get(key)
+        if job is not None:
+            if target not in job.targets:
+                job.targets.append(target)
+            return job
+
+        if self._queue.qsize() >= MAX_QUEUED:
+            raise AvatarQueueFull("Too many avatar requests, try again later")
+        job = AvatarJob(uuid.uuid4().hex, key, appearance, targets=[target])
+        self._pending[key] = job
+        self._remember(job)
+        self._queue.put_nowait(job)
+        return job
+
+    async def join(self) -> None:
+        """Wait until every queued job has finished (used by tests)."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    def _remember(self, job: AvatarJob) -> None:
+        self._jobs[job.id] = job
+        while len(self._jobs) > MAX_FINISHED:
+            oldest = next(iter(self._jobs.values()))
+            if oldest.status not in (DONE, FAILED):
+                break
+            self._jobs.popitem(last=False)
+
+    def _ensure_workers(self) -> None:
+        """Start the workers on the running loop (again, if the loop changed)."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._pending.clear()
+        count = max(1, self.workers or get_settings().avatar_workers)
+        self._tasks = [loop.create_task(self._worker()) for _ in range(count)]
+
+    # --- workers -----------------------------------------------------------
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            except Exception:
+                logger.exception(f"Avatar job {job.id} crashed")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: AvatarJob) -> None:
+        from app.services.avatar import store_avatar
+
+        job.status = RUNNING
+        session_characters = []
+        try:
+            image = await self.generator(job.appearance)
+            db = self.session_factory()
+            try:
+                job.avatar_url = await store_avatar(db, image)
+                session_characters = apply_avatar(db, job.avatar_url, job.targets)
+                db.commit()
+                if session_characters:
+                    session_versions.bump_all()
+                session_characters = [_character_payload(c) for c in session_characters]
+            finally:
+                db.close()
+            job.status = DONE
+            self._cache[job.key] = job.avatar_url
+            while len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+        except ValueError as e:
+            job.status, job.error = FAILED, str(e)
+        except Exception as e:
+            logger.exception(f"Avatar job {job.id} failed")
+            job.status, job.error = FAILED, f"Avatar generation failed: {e}"
+        finally:
+            self._pending.pop(job.key, None)
+
+        if job.status == DONE:
+            await notify_session_characters(job, session_characters)
+
+
+def apply_avatar(db, url: str, targets: List[tuple]) -> List[Character]:
+    """Set avatar_url on every target that still exists; returns the session
+    characters among them (the caller commits)."""
+    updated = []
+    for kind, target_id in targets:
+        obj = db.get(TARGET_MODELS[kind], target_id)
+        if obj is not None:
+            obj.avatar_url = url
+            if kind == "character":
+                updated.append(obj)
+    db.flush()
+    return updated
+
+
+def _character_payload(character: Character) -> dict:
+    from app.schemas.character import CharacterResponse
+    return CharacterResponse.model_validate(character).model_dump()
+
+
+async def notify_session_characters(job: AvatarJob, characters: List[dict]) -> None:
+    from app.websocket.manager import manager
+
+    for character in characters:
+        await manager.broadcast_event("character_updated", {"character": character})
+        await manager.broadcast_event("avatar_ready", {
+            "job_id": job.id,
+            "character_id": character["id"],
+            "avatar_url": job.avatar_url,
+        })
+
+
+# Global queue instance
+avatar_queue = AvatarQueue()
@@ -0,0 +1,287 @@
+"""Content-addressed store for uploaded images.
+
+Files are named by the SHA-256 of their content, so the same image uploaded
+by several GMs (or re-uploaded after editing a map) is stored and served
+once. Layout under ``uploads/blobs/``:
+
+    {sha[:2]}/{sha}.{ext}     the original
+    {sha[:2]}/{sha}/          files derived from it (tile pyramid, WebP variants)
+
+Every blob has an UploadBlob row. Nothing tracks references on write:
+a periodic mark-and-sweep counts the URL columns that point at each blob,
+plus the session snapshots and autosave files that mention it (restoring
+one must find its images), stores the count as ``ref_count`` and deletes
+blobs nobody references once their grace period has passed. Autosaves list
+their blobs in a ``.blobs`` sidecar written with them, so a sweep reads
+those instead of the saves; a file without an up-to-date sidecar is
+scanned once, in chunks, and gets one.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import shutil
+import tempfile
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+from sqlalchemy import Text, cast, func
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session as DBSession
+
+from app.config import get_settings
+from app.models.character import Character
+from app.models.map import Map
+from app.models.session_snapshot import SessionSnapshot
+from app.models.upload_blob import UploadBlob
+from app.models.user_character import UserCharacter
+from app.models.user_map import UserMap
+from app.services.uploads import TEMP_SUFFIX, commit_upload, discard
+
+logger = logging.getLogger(__name__)
+
+BLOB_DIR = os.path.join("uploads", "blobs")
+URL_PREFIX = "/uploads/blobs/"
+
+# Columns holding upload URLs; a blob is live while any of them points at it
+REFERENCE_COLUMNS = (
+    UserMap.background_url,
+    Map.background_url,
+    Character.avatar_url,
+    UserCharacter.avatar_url,
+)
+
+_URL_RE = re.compile(r"^/uploads/blobs/[0-9a-f]{2}/([0-9a-f]{64})\.")
+# Blob URLs anywhere in a document (snapshot JSON, msgpack autosave bytes)
+_EMBEDDED_URL_RE = re.compile(r"/uploads/blobs/[0-9a-f]{2}/([0-9a-f]{64})\.")
+_EMBEDDED_URL_BYTES_RE = re.compile(_EMBEDDED_URL_RE.pattern.encode())
+# Overlap between scanned chunks, longer than any blob URL
+_URL_OVERLAP = 128
+
+# Sidecar of a saved file: digests of the blobs it references, one per line
+REFS_SUFFIX = ".blobs"
+SCAN_CHUNK_SIZE = 1024 * 1024
+_NAME_RE = re.compile(r"^([0-9a-f]{64})(\.[a-z0-9]+)?$")
+
+
+def blob_path(digest: str, ext: str) -> str:
+    return os.path.join(BLOB_DIR, digest[:2], f"{digest}.{ext}")
+
+
+def blob_url(digest: str, ext: str) -> str:
+    return f"{URL_PREFIX}{digest[:2]}/{digest}.{ext}"
+
+
+def derived_dir(digest: str) -> str:
+    """Directory for files generated from a blob (removed together with it)."""
+    return os.path.join(BLOB_DIR, digest[:2], digest)
+
+
+def derived_url(digest: str) -> str:
+    return f"{URL_PREFIX}{digest[:2]}/{digest}"
+
+
+def digest_from_url(url: Optional[str]) -> Optional[str]:
+    match = _URL_RE.match(url or "")
+    return match.group(1) if match else None
+
+
+def store_file(db: DBSession, temp_path: str, digest: str, ext: str) -> UploadBlob:
+    """Move a finished temp file into the store (or drop it if the content is
+    already there) and record the blob. The caller commits."""
+    final_path = blob_path(digest, ext)
+    size = os.path.getsize(temp_path)
+    if os.path.exists(final_path):
+        discard(temp_path)
+    else:
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        commit_upload(temp_path, final_path)
+
+    blob = db.get(UploadBlob, digest)
+    if blob is None:
+        # The same content may be stored concurrently: keep whichever row wins
+        inserted = db.execute(
+            insert(UploadBlob).values(sha256=digest, ext=ext, size=size).on_conflict_do_nothing()
+        ).rowcount
+        blob = db.get(UploadBlob, digest)
+        if inserted:
+            return blob
+    blob.last_uploaded_at = datetime.utcnow()
+    db.flush()
+    return blob
+
+
+def store_bytes(db: DBSession, data: bytes, ext: str) -> UploadBlob:
+    """Store in-memory content (e.g. a generated avatar)."""
+    os.makedirs(BLOB_DIR, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=BLOB_DIR, suffix=TEMP_SUFFIX)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+    except BaseException:
+        discard(temp_path)
+        raise
+    return store_file(db, temp_path, hashlib.sha256(data).hexdigest(), ext)
+
+
+def embedded_digests(data: bytes) -> Set[str]:
+    """Digests of the blob URLs found anywhere in ``data``."""
+    return {digest.decode() for digest in _EMBEDDED_URL_BYTES_RE.findall(data)}
+
+
+def _refs_path(path: Path) -> Path:
+    return path.with_name(path.name + REFS_SUFFIX)
+
+
+def write_references(path: Path, digests: Set[str]) -> None:
+    """Write the sidecar of ``path``. Call after writing the file's content:
+    a sidecar older than its file is ignored."""
+    refs = _refs_path(path)
+    tmp = refs.with_name(refs.name + ".tmp")
+    tmp.write_text("".join(f"{digest}\n" for digest in sorted(digests)))
+    os.replace(tmp, refs)
+
+
+def _scan_file(path: Path) -> Set[str]:
+    found: Set[str] = set()
+    tail = b""
+    with open(path, "rb") as f:
+        while chunk := f.read(SCAN_CHUNK_SIZE):
+            data = tail + chunk
+            found |= embedded_digests(data)
+            tail = data[-_URL_OVERLAP:]
+    return found
+
+
+def file_references(path: Path) -> Set[str]:
+    """Blobs referenced by a saved file, from its sidecar when that is up to
+    date, otherwise scanned (and the sidecar written for the next sweep)."""
+    refs = _refs_path(path)
+    try:
+        if refs.stat().st_mtime >= path.stat().st_mtime:
+            return set(refs.read_text().split())
+    except FileNotFoundError:
+        pass
+    digests = _scan_file(path)
+    write_references(path, digests)
+    return digests
+
+
+def count_references(db: DBSession, autosave_dir: Optional[str] = None) -> Dict[str, int]:
+    """Mark phase: number of rows pointing at each blob, one query per column,
+    plus one per snapshot and autosave file mentioning it."""
+    counts: Counter = Counter()
+    for column in REFERENCE_COLUMNS:
+        rows = (
+            db.query(column, func.count())
+            .filter(column.like(f"{URL_PREFIX}%"))
+            .group_by(column)
+            .all()
+        )
+        for url, n in rows:
+            digest = digest_from_url(url)
+            if digest:
+                counts[digest] += n
+
+    payload = cast(SessionSnapshot.payload, Text)
+    for (text,) in db.query(payload).filter(payload.like(f"%{URL_PREFIX}%")).yield_per(100):
+        counts.update(set(_EMBEDDED_URL_RE.findall(text)))
+
+    root = Path(autosave_dir if autosave_dir is not None else get_settings().autosave_dir)
+    if root.is_dir():
+        for path in list(root.rglob("*")):
+            if path.name.endswith(REFS_SUFFIX):
+                # The save was rotated away
+                if not path.with_name(path.name[: -len(REFS_SUFFIX)]).exists():
+                    path.unlink(missing_ok=True)
+            elif path.is_file() and not path.name.endswith(".tmp"):  # .tmp: being written
+                counts.update(file_references(path))
+    return counts
+
+
+def _remove_blob_files(digest: str, ext: str) -> None:
+    discard(blob_path(digest, ext))
+    shutil.rmtree(derived_dir(digest), ignore_errors=True)
+
+
+def _sweep_orphan_files(known: set, cutoff: float) -> int:
+    """Remove stale temp files and files without a row (crash before commit)."""
+    if not os.path.isdir(BLOB_DIR):
+        return 0
+    candidates = [os.path.join(BLOB_DIR, n) for n in os.listdir(BLOB_DIR) if n.endswith(TEMP_SUFFIX)]
+    for shard in os.listdir(BLOB_DIR):
+        shard_dir = os.path.join(BLOB_DIR, shard)
+        if not os.path.isdir(shard_dir):
+            continue
+        for name in os.listdir(shard_dir):
+            match = _NAME_RE.match(name)
+            if name.endswith(TEMP_SUFFIX) or (match and match.group(1) not in known):
+                candidates.append(os.path.join(shard_dir, name))
+
+    removed = 0
+    for path in candidates:
+        if os.path.getmtime(path) >= cutoff:
+            continue
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            discard(path)
+        removed += 1
+    return removed
+
+
+def collect_garbage(
+    db: DBSession,
+    grace: Optional[timedelta] = None,
+    now: Optional[datetime] = None,
+    autosave_dir: Optional[str] = None,
+) -> int:
+    """Refresh ref counts and delete unreferenced blobs older than the grace
+    period. Returns the number of blobs deleted."""
+    if grace is None:
+        grace = timedelta(seconds=get_settings().blob_gc_grace_seconds)
+    now = now or datetime.utcnow()
+    cutoff = now - grace
+
+    counts = count_references(db, autosave_dir)
+    deleted = 0
+    known = set()
+    for blob in db.query(UploadBlob).all():
+        blob.ref_count = counts.get(blob.sha256, 0)
+        if blob.ref_count == 0 and (blob.last_uploaded_at or blob.created_at) < cutoff:
+            _remove_blob_files(blob.sha256, blob.ext)
+            db.delete(blob)
+            deleted += 1
+        else:
+            known.add(blob.sha256)
+    db.commit()
+
+    _sweep_orphan_files(known, cutoff.replace(tzinfo=timezone.utc).timestamp())
+    if deleted:
+        logger.info(f"Blob GC: deleted {deleted} unreferenced upload(s)")
+    return deleted
+
+
+def _collect_once() -> int:
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return collect_garbage(db)
+    finally:
+        db.close()
+
+
+async def run_sweeper(interval: Optional[float] = None) -> None:
+    """Background task: collect garbage every ``interval`` seconds."""
+    interval = interval or get_settings().blob_gc_interval_seconds
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(_collect_once)
+        except Exception:
+            logger.exception("Blob GC failed")
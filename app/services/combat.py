@@ -5,6 +5,12 @@ from app.models.combat import Combat, CombatParticipant
 from app.models.character import Character
 from app.services.dice import DiceService
 from app.services.modifiers import ModifierService
+from app.services.initiative import initiative_indexes
+from app.services.combat_journal import (
+    CombatJournal, participant_state,
+    COMBAT_STARTED, COMBAT_ENDED, PARTICIPANT_ADDED, PARTICIPANT_REMOVED,
+    TURN_CHANGED, DAMAGE, HEALING,
+)
 
 
 class CombatService:
@@ -17,10 +23,14 @@ class CombatService:
             Combat.is_active == True
         ).update({"is_active": False})
 
-        combat = Combat(session_id=session_id, is_active=True, round_number=1)
+        combat = Combat(session_id=session_id, is_active=True, round_number=1, event_seq=0)
         db.add(combat)
+        db.flush()
+        CombatJournal.record(db, combat, COMBAT_STARTED, {"round_number": 1})
         db.commit()
         db.refresh(combat)
+        # Combat ids can be reused by SQLite after deletes
+        initiative_indexes.discard(combat.id)
         return combat
 
     @staticmethod
@@ -43,10 +53,37 @@ class CombatService:
             is_active=True
         )
         db.add(participant)
+        db.flush()
+        CombatJournal.record(db, combat, PARTICIPANT_ADDED, {
+            "participant": participant_state(participant),
+        }, undo={"current_turn_id": combat.current_turn_id})
         db.commit()
         db.refresh(participant)
         return participant
 
+    @staticmethod
+    def remove_participant(
+        db: DBSession,
+        combat: Combat,
+        participant: CombatParticipant
+    ) -> None:
+        """Remove a participant from combat."""
+        undo = {
+            "participant": participant_state(participant),
+            "current_turn_id": combat.current_turn_id,
+        }
+        if combat.current_turn_id == participant.id:
+            combat.current_turn_id = None
+            db.flush()
+        db.delete(participant)
+        db.flush()
+        CombatJournal.record(db, combat, PARTICIPANT_REMOVED, {
+            "participant_id": undo["participant"]["id"],
+            "character_id": undo["participant"]["character_id"],
+        }, undo=undo)
+        db.commit()
+        db.refresh(combat)
+
     @staticmethod
     def get_turn_order(combat: Combat) -> List[CombatParticipant]:
         """Get participants sorted by initiative (highest first)."""
@@ -63,6 +100,11 @@ class CombatService:
         if not turn_order:
             return None
 
+        undo = {
+            "current_turn_id": combat.current_turn_id,
+            "round_number": combat.round_number,
+        }
+
         if combat.current_turn_id is None:
             # Start of combat
             next_participant = turn_order[0]
@@ -82,6 +124,10 @@ class CombatService:
                 next_participant = turn_order[current_idx + 1]
 
         combat.current_turn_id = next_participant.id
+        CombatJournal.record(db, combat, TURN_CHANGED, {
+            "current_turn_id": combat.current_turn_id,
+            "round_number": combat.round_number,
+        }, undo=undo)
         db.commit()
         db.refresh(combat)
         return next_participant
@@ -93,9 +139,11 @@ class CombatService:
         damage: int
     ) -> CombatParticipant:
         """Apply damage to a combat participant."""
+        undo = {"current_hp": participant.current_hp, "is_active": participant.is_active}
         participant.current_hp = max(0, participant.current_hp - damage)
         if participant.current_hp == 0:
             participant.is_active = False
+        CombatService._record_hp_change(db, participant, DAMAGE, damage, undo)
         db.commit()
         db.refresh(participant)
         return participant
@@ -108,17 +156,36 @@ class CombatService:
         max_hp: int
     ) -> CombatParticipant:
         """Apply healing to a combat participant."""
+        undo = {"current_hp": participant.current_hp, "is_active": participant.is_active}
         participant.current_hp = min(max_hp, participant.current_hp + healing)
         if participant.current_hp > 0:
             participant.is_active = True
+        CombatService._record_hp_change(db, participant, HEALING, healing, undo)
         db.commit()
         db.refresh(participant)
         return participant
 
+    @staticmethod
+    def _record_hp_change(
+        db: DBSession,
+        participant: CombatParticipant,
+        event_type: str,
+        amount: int,
+        undo: dict
+    ) -> None:
+        CombatJournal.record(db, participant.combat, event_type, {
+            "participant_id": participant.id,
+            "character_id": participant.character_id,
+            "amount": amount,
+            "current_hp": participant.current_hp,
+            "is_active": participant.is_active,
+        }, undo=undo)
+
     @staticmethod
     def end_combat(db: DBSession, combat: Combat) -> Combat:
         """End the combat."""
         combat.is_active = False
+        CombatJournal.record(db, combat, COMBAT_ENDED, {})
         db.commit()
         db.refresh(combat)
         return combat
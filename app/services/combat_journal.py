@@ -0,0 +1,245 @@
+"""Append-only combat journal with periodic snapshots.
+
+Every change to a combat (turns, damage, healing, initiative rolls,
+participants joining or leaving) is appended as a CombatEvent. Every
+SNAPSHOT_INTERVAL events the full state is compacted into a CombatSnapshot,
+so the current state is always the latest snapshot plus a short tail of
+events. Each event also stores the previous values it overwrote, which makes
+undoing the last action a pop of the journal tail.
+"""
+
+import copy
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session as DBSession
+
+from app.models.combat import (
+    Combat, CombatParticipant, CombatEvent, CombatSnapshot, InitiativeRoll,
+)
+
+SNAPSHOT_INTERVAL = 20
+
+COMBAT_STARTED = "combat_started"
+COMBAT_ENDED = "combat_ended"
+PARTICIPANT_ADDED = "participant_added"
+PARTICIPANT_REMOVED = "participant_removed"
+TURN_CHANGED = "turn_changed"
+DAMAGE = "damage"
+HEALING = "healing"
+INITIATIVE_ROLLED = "initiative_rolled"
+
+UNDOABLE_EVENTS = {
+    PARTICIPANT_ADDED, PARTICIPANT_REMOVED, TURN_CHANGED,
+    DAMAGE, HEALING, INITIATIVE_ROLLED,
+}
+
+
+def participant_state(participant: CombatParticipant) -> Dict[str, Any]:
+    return {
+        "id": participant.id,
+        "character_id": participant.character_id,
+        "initiative": participant.initiative,
+        "current_hp": participant.current_hp,
+        "is_active": participant.is_active,
+    }
+
+
+def roll_state(roll: InitiativeRoll) -> Dict[str, Any]:
+    return {
+        "id": roll.id,
+        "player_id": roll.player_id,
+        "character_id": roll.character_id,
+        "roll": roll.roll,
+    }
+
+
+def event_to_dict(event: CombatEvent) -> Dict[str, Any]:
+    return {
+        "seq": event.seq,
+        "event_type": event.event_type,
+        "payload": event.payload,
+        "created_at": event.created_at.isoformat() + "Z" if event.created_at else None,
+    }
+
+
+def empty_state() -> Dict[str, Any]:
+    return {
+        "is_active": True,
+        "round_number": 1,
+        "current_turn_id": None,
+        "participants": [],
+        "initiative_rolls": [],
+    }
+
+
+class CombatJournal:
+    @staticmethod
+    def state_from_db(combat: Combat) -> Dict[str, Any]:
+        """Build journal state from the live combat rows."""
+        return {
+            "is_active": combat.is_active,
+            "round_number": combat.round_number,
+            "current_turn_id": combat.current_turn_id,
+            "participants": sorted(
+                (participant_state(p) for p in combat.participants),
+                key=lambda p: p["id"],
+            ),
+            "initiative_rolls": sorted(
+                (roll_state(r) for r in combat.initiative_rolls),
+                key=lambda r: r["id"],
+            ),
+        }
+
+    @staticmethod
+    def record(
+        db: DBSession,
+        combat: Combat,
+        event_type: str,
+        payload: Dict[str, Any],
+        undo: Optional[Dict[str, Any]] = None,
+    ) -> CombatEvent:
+        """Append an event to the journal. Caller commits.
+
+        Must be called after the change has been applied (and flushed, for
+        rows whose ids are referenced in payload).
+        """
+        combat.event_seq = (combat.event_seq or 0) + 1
+        event = CombatEvent(
+            combat_id=combat.id,
+            seq=combat.event_seq,
+            event_type=event_type,
+            payload=payload,
+            undo=undo,
+        )
+        db.add(event)
+
+        if combat.event_seq % SNAPSHOT_INTERVAL == 0:
+            db.flush()
+            db.expire(combat, ["participants", "initiative_rolls"])
+            db.add(CombatSnapshot(
+                combat_id=combat.id,
+                seq=combat.event_seq,
+                state=CombatJournal.state_from_db(combat),
+            ))
+        return event
+
+    @staticmethod
+    def apply(state: Dict[str, Any], event_type: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Replay a single event onto a state dict (in place)."""
+        if event_type == COMBAT_STARTED:
+            state["round_number"] = payload.get("round_number", 1)
+        elif event_type == COMBAT_ENDED:
+            state["is_active"] = False
+        elif event_type == PARTICIPANT_ADDED:
+            state["participants"].append(dict(payload["participant"]))
+            state["participants"].sort(key=lambda p: p["id"])
+        elif event_type == PARTICIPANT_REMOVED:
+            pid = payload["participant_id"]
+            state["participants"] = [p for p in state["participants"] if p["id"] != pid]
+            if state["current_turn_id"] == pid:
+                state["current_turn_id"] = None
+        elif event_type == TURN_CHANGED:
+            state["current_turn_id"] = payload["current_turn_id"]
+            state["round_number"] = payload["round_number"]
+        elif event_type in (DAMAGE, HEALING):
+            for p in state["participants"]:
+                if p["id"] == payload["participant_id"]:
+                    p["current_hp"] = payload["current_hp"]
+                    p["is_active"] = payload["is_active"]
+                    break
+        elif event_type == INITIATIVE_ROLLED:
+            state["initiative_rolls"].append(dict(payload["initiative_roll"]))
+            state["initiative_rolls"].sort(key=lambda r: r["id"])
+        return state
+
+    @staticmethod
+    def current_state(db: DBSession, combat: Combat) -> Dict[str, Any]:
+        """Rebuild combat state as latest snapshot + replay of the tail."""
+        snapshot = (
+            db.query(CombatSnapshot)
+            .filter(CombatSnapshot.combat_id == combat.id)
+            .order_by(CombatSnapshot.seq.desc())
+            .first()
+        )
+        if snapshot:
+            state, since = copy.deepcopy(snapshot.state), snapshot.seq
+        else:
+            state, since = empty_state(), 0
+
+        for event in CombatJournal.history(db, combat, after_seq=since):
+            CombatJournal.apply(state, event.event_type, event.payload)
+        return state
+
+    @staticmethod
+    def history(db: DBSession, combat: Combat, after_seq: int = 0, limit: Optional[int] = None) -> List[CombatEvent]:
+        """Events with seq > after_seq in journal order."""
+        query = (
+            db.query(CombatEvent)
+            .filter(CombatEvent.combat_id == combat.id, CombatEvent.seq > after_seq)
+            .order_by(CombatEvent.seq)
+        )
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    @staticmethod
+    def undo_last(db: DBSession, combat: Combat) -> Dict[str, Any]:
+        """Revert the last journal event and pop it off the journal.
+
+        Returns the undone event as a dict.
+
+        Raises ValueError if the journal is empty or the last event
+        cannot be undone (combat start/end).
+        """
+        event = (
+            db.query(CombatEvent)
+            .filter(CombatEvent.combat_id == combat.id, CombatEvent.seq == combat.event_seq)
+            .first()
+        )
+        if event is None:
+            raise ValueError("Nothing to undo")
+        if event.event_type not in UNDOABLE_EVENTS:
+            raise ValueError(f"Cannot undo '{event.event_type}'")
+
+        undo = event.undo or {}
+        payload = event.payload
+        undone = event_to_dict(event)
+
+        if event.event_type == PARTICIPANT_ADDED:
+            participant = db.get(CombatParticipant, payload["participant"]["id"])
+            if participant:
+                if combat.current_turn_id == participant.id:
+                    # The turn came to it later (e.g. an import): give it back
+                    # to whoever had it when the participant joined
+                    previous = undo.get("current_turn_id")
+                    if previous is not None and (previous == participant.id or db.get(CombatParticipant, previous) is None):
+                        previous = None
+                    combat.current_turn_id = previous
+                    db.flush()
+                db.delete(participant)
+        elif event.event_type == PARTICIPANT_REMOVED:
+            db.add(CombatParticipant(combat_id=combat.id, **undo["participant"]))
+            db.flush()
+            combat.current_turn_id = undo["current_turn_id"]
+        elif event.event_type == TURN_CHANGED:
+            combat.current_turn_id = undo["current_turn_id"]
+            combat.round_number = undo["round_number"]
+        elif event.event_type in (DAMAGE, HEALING):
+            participant = db.get(CombatParticipant, payload["participant_id"])
+            if participant:
+                participant.current_hp = undo["current_hp"]
+                participant.is_active = undo["is_active"]
+        elif event.event_type == INITIATIVE_ROLLED:
+            roll = db.get(InitiativeRoll, payload["initiative_roll"]["id"])
+            if roll:
+                db.delete(roll)
+
+        db.query(CombatSnapshot).filter(
+            CombatSnapshot.combat_id == combat.id,
+            CombatSnapshot.seq >= event.seq,
+        ).delete()
+        db.delete(event)
+        combat.event_seq = event.seq - 1
+        db.commit()
+        db.refresh(combat)
+        return undone
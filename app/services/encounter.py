@@ -0,0 +1,324 @@
+"""Monte Carlo encounter simulator.
+
+Estimates how deadly an encounter is before the GM commits to it. Fights are
+simulated on plain stat blocks (no DB access), thousands at a time, with all
+dice rolled as NumPy arrays across the iteration axis. Large estimates are
+split into chunks and spread over a process pool under a time budget: at most
+one chunk per worker is in flight, and a chunk still running at the deadline
+stops itself, so an expired request leaves no work behind in the pool.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core.abilities import calculate_modifier
+from app.models.character import Character
+from app.services.dice import DiceService
+from app.services.modifiers import ModifierService
+
+PARTY = "party"
+ENEMIES = "enemies"
+
+# Fights that are still going after this many rounds count as draws
+MAX_ROUNDS = 50
+CHUNK_SIZE = 2500
+DEFAULT_WEAPON_DIE = "1d6"
+
+
+@dataclass
+class Combatant:
+    """Stat block of a single simulated combatant."""
+    name: str
+    side: str
+    max_hp: int
+    armor_class: int
+    attack_bonus: int
+    damage_dice: str
+    initiative_bonus: int = 0
+    current_hp: Optional[int] = None
+    character_id: Optional[int] = None
+
+
+@dataclass
+class EncounterEstimate:
+    """Aggregated outcome of a batch of simulated fights."""
+    iterations: int
+    win_probability: float
+    draw_probability: float
+    expected_rounds: float
+    death_probability: List[float] = field(default_factory=list)
+    elapsed: float = 0.0
+    budget_exhausted: bool = False
+
+
+def expected_damage(dice_str: str) -> float:
+    """Average result of a dice expression such as "2d6+3"."""
+    count, sides, modifier = DiceService.parse_dice(dice_str)
+    return count * (sides + 1) / 2 + modifier
+
+
+def combatant_from_character(character: Character, side: str) -> Combatant:
+    """Build a stat block from a session character.
+
+    Attack bonus is proficiency + the better of STR/DEX. The damage dice are
+    the strongest of the character's damaging spells and items
+    (``Item.effects["damage_dice"]``); characters without either swing a
+    simple weapon.
+    """
+    ability_mod = max(
+        calculate_modifier(character.strength),
+        calculate_modifier(character.dexterity),
+    )
+
+    candidates = [s.damage_dice for s in character.spells if s.damage_dice]
+    candidates += [
+        i.effects["damage_dice"] for i in character.items
+        if isinstance(i.effects, dict) and i.effects.get("damage_dice")
+    ]
+
+    damage_dice = None
+    best = None
+    for dice in candidates:
+        try:
+            avg = expected_damage(dice)
+        except ValueError:
+            continue
+        if best is None or avg > best:
+            best, damage_dice = avg, dice
+
+    if damage_dice is None:
+        damage_dice = f"{DEFAULT_WEAPON_DIE}{ability_mod:+d}" if ability_mod else DEFAULT_WEAPON_DIE
+
+    return Combatant(
+        name=character.name,
+        side=side,
+        max_hp=character.max_hp,
+        current_hp=character.current_hp,
+        armor_class=character.armor_class or 10,
+        attack_bonus=ModifierService.get_proficiency_bonus(character.level or 1) + ability_mod,
+        damage_dice=damage_dice,
+        initiative_bonus=ModifierService.calculate_initiative_modifier(character),
+        character_id=character.id,
+    )
+
+
+def _pack(combatants: List[Combatant]) -> Dict[str, np.ndarray]:
+    """Convert stat blocks to the flat arrays used by the vectorized core."""
+    dice = [DiceService.parse_dice(c.damage_dice) for c in combatants]
+    return {
+        "hp": np.array(
+            [c.max_hp if c.current_hp is None else c.current_hp for c in combatants],
+            dtype=np.int32,
+        ),
+        "ac": np.array([c.armor_class for c in combatants], dtype=np.int32),
+        "attack": np.array([c.attack_bonus for c in combatants], dtype=np.int32),
+        "init": np.array([c.initiative_bonus for c in combatants], dtype=np.int32),
+        "count": np.array([d[0] for d in dice], dtype=np.int32),
+        "sides": np.array([d[1] for d in dice], dtype=np.int32),
+        "mod": np.array([d[2] for d in dice], dtype=np.int32),
+        "party": np.array([c.side == PARTY for c in combatants], dtype=bool),
+    }
+
+
+def simulate_chunk(
+    spec: Dict[str, np.ndarray],
+    iterations: int,
+    seed: Optional[int] = None,
+    deadline: Optional[float] = None,
+) -> Optional[Dict]:
+    """Simulate ``iterations`` independent fights at once.
+
+    Every combatant attacks a random living enemy on its turn: d20 + attack
+    bonus against AC, natural 20 always hits and doubles the dice, natural 1
+    always misses. A side loses when all of its members are at 0 HP.
+
+    ``deadline`` is a ``time.time()`` value (comparable across processes):
+    once it passes, the chunk is abandoned between rounds and None returned
+    (dropping only the unfinished fights would bias towards short ones).
+    """
+    if deadline is not None and time.time() >= deadline:
+        return None
+    rng = np.random.default_rng(seed)
+    n = len(spec["hp"])
+    rows = np.arange(iterations)
+
+    hp = np.tile(spec["hp"], (iterations, 1))
+    alive = hp > 0
+    is_party = spec["party"]
+
+    # Initiative is re-rolled per fight; random fraction breaks ties
+    initiative = rng.integers(1, 21, size=(iterations, n)) + spec["init"] + rng.random((iterations, n))
+    order = np.argsort(-initiative, axis=1)
+
+    max_dice = int(spec["count"].max()) * 2 if n else 0
+    dice_cols = np.arange(max_dice)
+
+    party_alive = (alive & is_party).any(axis=1)
+    enemies_alive = (alive & ~is_party).any(axis=1)
+    done = ~party_alive | ~enemies_alive
+    rounds = np.zeros(iterations, dtype=np.int32)
+
+    for round_number in range(1, MAX_ROUNDS + 1):
+        if done.all():
+            break
+        if deadline is not None and time.time() >= deadline:
+            return None
+        for rank in range(n):
+            actor = order[:, rank]
+            acting = ~done & alive[rows, actor]
+            if not acting.any():
+                continue
+
+            # Pick a random living enemy
+            enemy_mask = (is_party[None, :] != is_party[actor][:, None]) & alive
+            target = np.argmax(rng.random((iterations, n)) * enemy_mask, axis=1)
+            acting &= enemy_mask.any(axis=1)
+
+            d20 = rng.integers(1, 21, size=iterations)
+            crit = d20 == 20
+            hit = acting & (crit | ((d20 != 1) & (d20 + spec["attack"][actor] >= spec["ac"][target])))
+
+            counts = spec["count"][actor] * np.where(crit, 2, 1)
+            faces = np.floor(rng.random((iterations, max_dice)) * spec["sides"][actor][:, None]) + 1
+            damage = (faces * (dice_cols[None, :] < counts[:, None])).sum(axis=1) + spec["mod"][actor]
+            damage = np.maximum(damage, 0).astype(np.int32)
+
+            hp[rows, target] -= np.where(hit, damage, 0)
+            alive = hp > 0
+
+            party_alive = (alive & is_party).any(axis=1)
+            enemies_alive = (alive & ~is_party).any(axis=1)
+            finished = ~done & (~party_alive | ~enemies_alive)
+            rounds[finished] = round_number
+            done |= finished
+
+    rounds[~done] = MAX_ROUNDS
+    wins = party_alive & ~enemies_alive
+
+    return {
+        "iterations": iterations,
+        "wins": int(wins.sum()),
+        "draws": int((~done).sum()),
+        "rounds": int(rounds.sum()),
+        "deaths": (~alive).sum(axis=0).astype(np.int64),
+    }
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """Lazily create a shared process pool (re-used between requests)."""
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = ProcessPoolExecutor(max_workers=workers)
+        _pool_workers = workers
+    return _pool
+
+
+def _warm_up() -> int:
+    # Importing this module (NumPy, models) is most of a cold worker's start
+    time.sleep(0.05)  # Keep this worker busy so the next job starts another one
+    return os.getpid()
+
+
+def warm_pool(workers: int) -> None:
+    """Start every worker of the pool ahead of the first simulation.
+
+    A cold worker spends longer importing than a typical time budget, so
+    the first request after startup would otherwise get no chunk done.
+    """
+    if workers > 1:
+        pool = _get_pool(workers)
+        wait([pool.submit(_warm_up) for _ in range(workers)])
+
+
+def shutdown_pool() -> None:
+    global _pool, _pool_workers
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+    _pool, _pool_workers = None, 0
+
+
+def simulate_encounter(
+    combatants: List[Combatant],
+    iterations: int = 10000,
+    time_budget: float = 0.8,
+    workers: int = 0,
+    seed: Optional[int] = None,
+) -> EncounterEstimate:
+    """Run a Monte Carlo estimate of the encounter outcome.
+
+    With ``workers`` > 1 the iterations are chunked over a process pool,
+    submitted in a sliding window of one chunk per worker. Chunks that are
+    not finished when ``time_budget`` (seconds) runs out are dropped (and
+    stop themselves) and the estimate is built from the completed ones.
+    """
+    if not any(c.side == PARTY for c in combatants) or not any(c.side == ENEMIES for c in combatants):
+        raise ValueError("Encounter needs at least one combatant on each side")
+
+    started = time.perf_counter()
+    deadline = started + time_budget
+    wall_deadline = time.time() + time_budget
+    spec = _pack(combatants)
+
+    chunks = [CHUNK_SIZE] * (iterations // CHUNK_SIZE)
+    if iterations % CHUNK_SIZE:
+        chunks.append(iterations % CHUNK_SIZE)
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    jobs = [(size, int(s.generate_state(1)[0])) for size, s in zip(chunks, seeds)]
+
+    results = []
+    if workers > 1:
+        pool = _get_pool(workers)
+        queued = iter(jobs)
+        pending = {pool.submit(simulate_chunk, spec, *job, wall_deadline) for job in islice(queued, workers)}
+        while pending:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            finished, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in finished:
+                result = future.result()
+                if result is None:
+                    continue
+                results.append(result)
+                job = next(queued, None)
+                if job is not None:
+                    pending.add(pool.submit(simulate_chunk, spec, *job, wall_deadline))
+        for future in pending:
+            future.cancel()
+    else:
+        for size, chunk_seed in jobs:
+            if results and time.perf_counter() >= deadline:
+                break
+            # The first chunk always runs to completion
+            result = simulate_chunk(spec, size, chunk_seed, wall_deadline if results else None)
+            if result is None:
+                break
+            results.append(result)
+    budget_exhausted = len(results) < len(jobs)
+
+    total = sum(r["iterations"] for r in results)
+    if total == 0:
+        raise TimeoutError("Time budget too small to simulate the encounter")
+
+    deaths = sum(r["deaths"] for r in results)
+    return EncounterEstimate(
+        iterations=total,
+        win_probability=sum(r["wins"] for r in results) / total,
+        draw_probability=sum(r["draws"] for r in results) / total,
+        expected_rounds=sum(r["rounds"] for r in results) / total,
+        death_probability=[float(d) / total for d in deaths],
+        elapsed=time.perf_counter() - started,
+        budget_exhausted=budget_exhausted,
+    )
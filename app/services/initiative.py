@@ -0,0 +1,173 @@
+"""Incrementally maintained initiative order per combat.
+
+The index is built once per combat from two queries and then kept up to date
+on every roll, so opening the initiative modal does not re-query and re-sort
+the whole list. Each insert reports the entry's rank, which is broadcast to
+clients as a positional delta.
+
+Entries live in a plain sorted list: the position is found by binary search in
+O(log n), but ``list.insert`` shifts the tail, so an insert is O(n) overall.
+With n bounded by the party size plus NPCs (tens of entries) the shift is a
+short memmove and cheaper than maintaining a balanced tree.
+"""
+
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session as DBSession
+
+from app.models.character import Character
+from app.models.combat import Combat, InitiativeRoll
+from app.models.player import Player
+from app.schemas.combat import InitiativeEntry
+
+# Sort key: (-roll, is_npc, tie_breaker). Players are tie-broken by player id,
+# NPCs by roll id — the same order a stable sort of the old list produced.
+SortKey = Tuple[int, int, int]
+
+
+class InitiativeIndex:
+    """Sorted initiative entries of a single combat."""
+
+    def __init__(self, combat_id: int, session_id: int):
+        self.combat_id = combat_id
+        self.session_id = session_id
+        self._keys: List[SortKey] = []
+        self._entries: List[InitiativeEntry] = []
+        # Players that have not rolled yet, in player id order
+        self._pending: Dict[int, InitiativeEntry] = {}
+
+    @staticmethod
+    def key_for(entry: InitiativeEntry, tie_breaker: int) -> SortKey:
+        return (-entry.roll, int(entry.is_npc), tie_breaker)
+
+    def add_pending(self, entry: InitiativeEntry) -> None:
+        self._pending[entry.player_id] = entry
+
+    def insert(self, entry: InitiativeEntry, tie_breaker: int) -> int:
+        """Insert a rolled entry and return its rank (0-based)."""
+        key = self.key_for(entry, tie_breaker)
+        rank = bisect_left(self._keys, key)
+        if rank < len(self._keys) and self._keys[rank] == key:
+            return rank  # Already indexed
+        self._keys.insert(rank, key)
+        self._entries.insert(rank, entry)
+        if not entry.is_npc:
+            self._pending.pop(entry.player_id, None)
+        return rank
+
+    def roll_player(self, player_id: int, roll: int) -> Tuple[int, InitiativeEntry]:
+        """Move a pending player entry into the sorted order."""
+        pending = self._pending.get(player_id)
+        if pending is not None:
+            entry = pending.model_copy(update={"roll": roll})
+        else:
+            existing = self.find_player(player_id)
+            if existing is not None:
+                return existing
+            raise KeyError(f"Player {player_id} is not in initiative index")
+        return self.insert(entry, player_id), entry
+
+    def has_player(self, player_id: int) -> bool:
+        return player_id in self._pending or self.find_player(player_id) is not None
+
+    def find_player(self, player_id: int) -> Optional[Tuple[int, InitiativeEntry]]:
+        for rank, entry in enumerate(self._entries):
+            if not entry.is_npc and entry.player_id == player_id:
+                return rank, entry
+        return None
+
+    def entries(self) -> List[InitiativeEntry]:
+        """Rolled entries by rank, then players who have not rolled yet."""
+        return self._entries + list(self._pending.values())
+
+    def __len__(self) -> int:
+        return len(self._entries) + len(self._pending)
+
+
+class InitiativeIndexRegistry:
+    """In-process cache of initiative indexes keyed by combat id."""
+
+    def __init__(self):
+        self._indexes: Dict[int, InitiativeIndex] = {}
+
+    def get(self, db: DBSession, combat: Combat) -> InitiativeIndex:
+        index = self._indexes.get(combat.id)
+        # SQLite reuses ids of deleted combats (e.g. a combat created by import)
+        if index is None or index.session_id != combat.session_id:
+            index = self.build(db, combat)
+            self._indexes[combat.id] = index
+        return index
+
+    @staticmethod
+    def build(db: DBSession, combat: Combat) -> InitiativeIndex:
+        """Build the index with one query for players and one for rolls."""
+        index = InitiativeIndex(combat.id, combat.session_id)
+
+        # First character of each player (lowest id)
+        first_char = (
+            db.query(Character.player_id, func.min(Character.id).label("character_id"))
+            .group_by(Character.player_id)
+            .subquery()
+        )
+        rows = (
+            db.query(Player.id, Player.name, Character.id, Character.name)
+            .outerjoin(first_char, first_char.c.player_id == Player.id)
+            .outerjoin(Character, Character.id == first_char.c.character_id)
+            .filter(Player.session_id == combat.session_id, Player.is_gm == False)
+            .order_by(Player.id)
+            .all()
+        )
+
+        rolls = (
+            db.query(InitiativeRoll.id, InitiativeRoll.player_id, InitiativeRoll.character_id,
+                     InitiativeRoll.roll, Character.name)
+            .outerjoin(Character, Character.id == InitiativeRoll.character_id)
+            .filter(InitiativeRoll.combat_id == combat.id)
+            .all()
+        )
+        player_rolls = {r.player_id: r.roll for r in rolls if r.player_id}
+
+        for player_id, player_name, character_id, character_name in rows:
+            entry = InitiativeEntry(
+                player_id=player_id,
+                player_name=player_name,
+                character_id=character_id,
+                character_name=character_name,
+                roll=player_rolls.get(player_id),
+                is_npc=False,
+            )
+            if entry.roll is None:
+                index.add_pending(entry)
+            else:
+                index.insert(entry, player_id)
+
+        for roll_id, player_id, character_id, roll, character_name in rolls:
+            if not character_id:
+                continue
+            index.insert(InitiativeEntry(
+                player_id=0,  # Sentinel value for NPCs
+                player_name="NPC",
+                character_id=character_id,
+                character_name=character_name,
+                roll=roll,
+                is_npc=True,
+            ), roll_id)
+
+        return index
+
+    def discard(self, combat_id: int) -> None:
+        self._indexes.pop(combat_id, None)
+
+    def invalidate_session(self, session_id: int) -> None:
+        """Drop indexes of a session (players/characters changed)."""
+        for combat_id in [cid for cid, idx in self._indexes.items() if idx.session_id == session_id]:
+            self._indexes.pop(combat_id, None)
+
+    def clear(self) -> None:
+        self._indexes.clear()
+
+
+# Global registry instance
+initiative_indexes = InitiativeIndexRegistry()
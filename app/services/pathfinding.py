@@ -0,0 +1,322 @@
+"""Grid pathfinding and movement cost on maps.
+
+The map is a grid of ``grid_scale`` px cells (5 ft each). Movement follows
+the 5e optional diagonal rule: diagonals alternate 5 / 10 ft, so the search
+state is (cell, parity of diagonals taken). Difficult terrain doubles the
+cost of entering a cell, other tokens block their cell and walls block the
+moves they cross.
+
+The cost grid (terrain, occupancy, wall-blocked moves) is cached per map as
+flat Python sequences for the search loops and updated in place when a
+token moves or terrain is painted; only wall edits recompute the wall part.
+"""
+
+import heapq
+import math
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session as DBSession
+
+from app.models.map import Map, MapToken, MapWall
+from app.services.visibility import segments_cross, walls_array
+
+FEET_PER_CELL = 5
+DIFFICULT_COST = 2
+# Only tokens on this layer occupy cells
+BLOCKING_LAYER = "tokens"
+# Search states expanded per query before giving up (a 200x200 map has 80k);
+# keeps unreachable goals and huge budgets from scanning the whole map
+MAX_SEARCH_STATES = 20_000
+
+# (d_row, d_col); the first four are tested against walls directly,
+# the last four are the reverse of the first four
+DIRECTIONS = [(0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1), (-1, 0), (-1, 1)]
+
+Cell = Tuple[int, int]  # (col, row)
+
+
+class CostGrid:
+    """Movement cost grid of a single map."""
+
+    def __init__(self, map_id: str, width: int, height: int, cell_size: int):
+        self.map_id = map_id
+        self.cell_size = float(cell_size) if cell_size and cell_size > 0 else 50.0
+        self.cols = max(1, math.ceil((width or 1920) / self.cell_size))
+        self.rows = max(1, math.ceil((height or 1080) / self.cell_size))
+        size = self.cols * self.rows
+
+        self.terrain = bytearray([1]) * size
+        self.occupancy = [0] * size
+        self._token_cells: Dict[str, int] = {}
+        # One flag per cell for each of the first four DIRECTIONS
+        self._wall_edges = [bytearray(size) for _ in range(4)]
+
+    def __len__(self) -> int:
+        return self.cols * self.rows
+
+    # --- cells -------------------------------------------------------------
+
+    def index(self, col: int, row: int) -> int:
+        return row * self.cols + col
+
+    def cell(self, idx: int) -> Cell:
+        row, col = divmod(idx, self.cols)
+        return col, row
+
+    def in_bounds(self, col: int, row: int) -> bool:
+        return 0 <= col < self.cols and 0 <= row < self.rows
+
+    def cell_at(self, x: float, y: float) -> int:
+        """Index of the cell containing a map pixel (clamped to the map)."""
+        col = min(max(int((x or 0.0) // self.cell_size), 0), self.cols - 1)
+        row = min(max(int((y or 0.0) // self.cell_size), 0), self.rows - 1)
+        return self.index(col, row)
+
+    def center(self, idx: int) -> Tuple[float, float]:
+        col, row = self.cell(idx)
+        return (col + 0.5) * self.cell_size, (row + 0.5) * self.cell_size
+
+    # --- incremental updates -----------------------------------------------
+
+    def set_terrain(self, cells: Iterable[Cell], cost: int) -> None:
+        for col, row in cells:
+            if self.in_bounds(col, row):
+                self.terrain[self.index(col, row)] = cost
+
+    def difficult_cells(self) -> List[Cell]:
+        return [self.cell(i) for i, cost in enumerate(self.terrain) if cost > 1]
+
+    def place_token(self, token_id: str, x: float, y: float, layer: Optional[str]) -> None:
+        """Add or move a token (only BLOCKING_LAYER tokens occupy cells)."""
+        self.remove_token(token_id)
+        if (layer or BLOCKING_LAYER) != BLOCKING_LAYER:
+            return
+        idx = self.cell_at(x, y)
+        self._token_cells[token_id] = idx
+        self.occupancy[idx] += 1
+
+    def remove_token(self, token_id: str) -> None:
+        idx = self._token_cells.pop(token_id, None)
+        if idx is not None:
+            self.occupancy[idx] -= 1
+
+    def token_cell(self, token_id: str) -> Optional[int]:
+        return self._token_cells.get(token_id)
+
+    def set_walls(self, walls: np.ndarray) -> None:
+        """Recompute which moves between neighbouring cells cross a wall."""
+        cols = np.arange(self.cols)
+        rows = np.arange(self.rows)
+        gc, gr = np.meshgrid(cols, rows)
+        starts = np.column_stack([(gc.ravel() + 0.5) * self.cell_size, (gr.ravel() + 0.5) * self.cell_size])
+        for k, (d_row, d_col) in enumerate(DIRECTIONS[:4]):
+            ends = starts + np.array([d_col * self.cell_size, d_row * self.cell_size])
+            self._wall_edges[k] = bytearray(segments_cross(starts, ends, walls).astype(np.uint8).tobytes())
+
+    # --- search ------------------------------------------------------------
+
+    def _moves(self, idx: int):
+        """(neighbour index, is_diagonal) of every legal move out of a cell."""
+        row, col = divmod(idx, self.cols)
+        cols, rows = self.cols, self.rows
+        edges = self._wall_edges
+        for k, (d_row, d_col) in enumerate(DIRECTIONS):
+            r, c = row + d_row, col + d_col
+            if r < 0 or r >= rows or c < 0 or c >= cols:
+                continue
+            nidx = r * cols + c
+            if k < 4:
+                if edges[k][idx]:
+                    continue
+            elif edges[k - 4][nidx]:
+                continue
+            yield nidx, d_row != 0 and d_col != 0
+
+    def _is_blocked(self, idx: int, own_cell: Optional[int], free: Set[int]) -> bool:
+        occupied = self.occupancy[idx] - (1 if idx == own_cell else 0)
+        return occupied > 0 and idx not in free
+
+    def _heuristic(self, idx: int, goal: int, parity: int) -> int:
+        row, col = divmod(idx, self.cols)
+        g_row, g_col = divmod(goal, self.cols)
+        dx, dy = abs(col - g_col), abs(row - g_row)
+        diagonal = min(dx, dy)
+        return FEET_PER_CELL * (max(dx, dy) + (diagonal + parity) // 2)
+
+    def find_path(
+        self,
+        start: int,
+        goal: int,
+        token_id: Optional[str] = None,
+        free: Optional[Set[int]] = None,
+        budget: Optional[int] = None,
+        max_states: int = MAX_SEARCH_STATES,
+    ) -> Optional[Tuple[List[int], int]]:
+        """A* from start to goal. Returns (cells, cost in feet) or None.
+
+        ``token_id`` is the moving token (it does not block itself); cells in
+        ``free`` are treated as unoccupied. States whose cost plus heuristic
+        exceeds ``budget`` (feet) are not explored, so a goal out of reach
+        fails fast; None is also returned after ``max_states`` expansions.
+        """
+        free = free or set()
+        own_cell = self.token_cell(token_id) if token_id else None
+        if start == goal:
+            return [start], 0
+        if self._is_blocked(goal, own_cell, free):
+            return None
+        limit = math.inf if budget is None else budget
+        if self._heuristic(start, goal, 0) > limit:
+            return None
+
+        terrain = self.terrain
+        best = {(start, 0): 0}
+        came_from: Dict[Tuple[int, int], Tuple[int, int]] = {}
+        heap = [(self._heuristic(start, goal, 0), 0, start, 0)]
+        expanded = 0
+
+        while heap:
+            _, cost, idx, parity = heapq.heappop(heap)
+            if idx == goal:
+                path = [idx]
+                state = (idx, parity)
+                while state in came_from:
+                    state = came_from[state]
+                    path.append(state[0])
+                path.reverse()
+                return path, cost
+            if cost > best[(idx, parity)]:
+                continue
+            expanded += 1
+            if expanded > max_states:
+                return None
+
+            for nidx, diagonal in self._moves(idx):
+                if self._is_blocked(nidx, own_cell, free):
+                    continue
+                step = (10 if parity else 5) if diagonal else 5
+                new_cost = cost + step * terrain[nidx]
+                new_parity = parity ^ 1 if diagonal else parity
+                state = (nidx, new_parity)
+                if new_cost < best.get(state, math.inf):
+                    estimate = new_cost + self._heuristic(nidx, goal, new_parity)
+                    if estimate > limit:
+                        continue
+                    best[state] = new_cost
+                    came_from[state] = (idx, parity)
+                    heapq.heappush(heap, (estimate, new_cost, nidx, new_parity))
+        return None
+
+    def reachable(
+        self,
+        start: int,
+        budget: int,
+        token_id: Optional[str] = None,
+        free: Optional[Set[int]] = None,
+        max_states: int = MAX_SEARCH_STATES,
+    ) -> Dict[int, int]:
+        """Dijkstra flood: cheapest cost (feet) of every cell within budget.
+
+        Occupied cells can be passed through in 5e only by allies, so they are
+        treated as blocked here, like in find_path. A cell's cost is final
+        when it is first popped; after ``max_states`` expansions the flood
+        stops and returns those cells only (the nearest part of the area).
+        """
+        free = free or set()
+        own_cell = self.token_cell(token_id) if token_id else None
+
+        terrain = self.terrain
+        best = {(start, 0): 0}
+        result: Dict[int, int] = {}
+        heap = [(0, start, 0)]
+        expanded = 0
+
+        while heap:
+            cost, idx, parity = heapq.heappop(heap)
+            if cost > best[(idx, parity)]:
+                continue
+            expanded += 1
+            if expanded > max_states:
+                break
+            if idx not in result:
+                result[idx] = cost
+            for nidx, diagonal in self._moves(idx):
+                if self._is_blocked(nidx, own_cell, free):
+                    continue
+                step = (10 if parity else 5) if diagonal else 5
+                new_cost = cost + step * terrain[nidx]
+                if new_cost > budget:
+                    continue
+                new_parity = parity ^ 1 if diagonal else parity
+                state = (nidx, new_parity)
+                if new_cost < best.get(state, math.inf):
+                    best[state] = new_cost
+                    heapq.heappush(heap, (new_cost, nidx, new_parity))
+        return result
+
+
+class CostGridRegistry:
+    """In-process cache of cost grids keyed by map id."""
+
+    def __init__(self):
+        self._grids: Dict[str, CostGrid] = {}
+
+    def get(self, db: DBSession, map_obj: Map) -> CostGrid:
+        grid = self._grids.get(map_obj.id)
+        if grid is None:
+            grid = self.build(db, map_obj)
+            self._grids[map_obj.id] = grid
+        return grid
+
+    @staticmethod
+    def build(db: DBSession, map_obj: Map) -> CostGrid:
+        """Build the cost grid with one query for tokens and one for walls."""
+        grid = CostGrid(map_obj.id, map_obj.width, map_obj.height, map_obj.grid_scale)
+        grid.set_terrain((tuple(c) for c in map_obj.difficult_terrain or []), DIFFICULT_COST)
+
+        tokens = db.query(MapToken.id, MapToken.x, MapToken.y, MapToken.layer).filter(
+            MapToken.map_id == map_obj.id
+        ).all()
+        for token_id, x, y, layer in tokens:
+            grid.place_token(token_id, x, y, layer)
+
+        walls = db.query(MapWall.x1, MapWall.y1, MapWall.x2, MapWall.y2).filter(
+            MapWall.map_id == map_obj.id
+        ).all()
+        grid.set_walls(walls_array(walls))
+        return grid
+
+    def upsert_token(self, token: MapToken) -> None:
+        """Add or move a token (only if its map is already cached)."""
+        grid = self._grids.get(token.map_id)
+        if grid is not None:
+            grid.place_token(token.id, token.x, token.y, token.layer)
+
+    def remove_token(self, map_id: str, token_id: str) -> None:
+        grid = self._grids.get(map_id)
+        if grid is not None:
+            grid.remove_token(token_id)
+
+    def set_terrain(self, map_id: str, cells: Iterable[Cell], cost: int) -> None:
+        grid = self._grids.get(map_id)
+        if grid is not None:
+            grid.set_terrain(cells, cost)
+
+    def reload_walls(self, db: DBSession, map_obj: Map) -> None:
+        grid = self._grids.get(map_obj.id)
+        if grid is not None:
+            walls = db.query(MapWall.x1, MapWall.y1, MapWall.x2, MapWall.y2).filter(
+                MapWall.map_id == map_obj.id
+            ).all()
+            grid.set_walls(walls_array(walls))
+
+    def discard(self, map_id: str) -> None:
+        self._grids.pop(map_id, None)
+
+    def clear(self) -> None:
+        self._grids.clear()
+
+
+# Global registry instance
+cost_grids = CostGridRegistry()
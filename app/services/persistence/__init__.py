@@ -1,12 +1,27 @@
 """Система сохранения и восстановления сессий."""
 
-from app.services.persistence.session_exporter import export_session
+from app.services.persistence.session_exporter import (
+    export_session,
+    export_session_binary,
+    iter_export_binary,
+    iter_export_json,
+)
 from app.services.persistence.session_importer import (
     import_session,
     validate_import_data,
     ImportResult,
     ValidationResult,
 )
+from app.services.persistence.streaming import (
+    import_session_stream,
+    validate_import_stream,
+    ImportStreamError,
+)
+from app.services.persistence.snapshots import (
+    take_snapshot,
+    compact_snapshots,
+    restore_snapshot,
+)
 from app.services.persistence.registry import registry, SaveableRegistry
 from app.services.persistence.types import (
     ExportContext,
@@ -20,10 +35,19 @@ from app.services.persistence.migrations import (
 
 __all__ = [
     "export_session",
+    "export_session_binary",
+    "iter_export_binary",
+    "iter_export_json",
     "import_session",
     "validate_import_data",
     "ImportResult",
     "ValidationResult",
+    "import_session_stream",
+    "validate_import_stream",
+    "ImportStreamError",
+    "take_snapshot",
+    "compact_snapshots",
+    "restore_snapshot",
     "registry",
     "SaveableRegistry",
     "ExportContext",
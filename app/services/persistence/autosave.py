@@ -0,0 +1,225 @@
+"""Фоновое автосохранение активных сессий.
+
+Раз в ``autosave_interval_seconds`` сохраняются сессии, у которых есть
+живые WebSocket-подключения (ConnectionManager). Для каждой делается
+снимок (snapshots.py); если с прошлого снимка ничего не изменилось,
+сессия пропускается. Иначе рядом с базой пишется полный бинарный
+экспорт (binary_format.py) — он переживает падение контейнера и
+потерю ``dnd_lite.db``:
+
+    {autosave_dir}/{u<user_id> | guest}/{code}/{время}-{snapshot_id}.msgpack
+
+Рядом с каждым файлом пишется ``.blobs`` — список загрузок, на которые
+он ссылается (blobs.write_references): сборщик мусора читает его, а не
+сам файл.
+
+Для каждой сессии хранятся последние ``autosave_keep`` файлов. Сессии
+сохраняются в отдельном пуле из ``autosave_workers`` потоков с
+пониженным приоритетом, чтобы не отнимать CPU у игровых запросов.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from sqlalchemy.orm import Session as DBSession
+
+from app.config import get_settings
+from app.models.player import Player
+from app.models.session import Session
+from app.services.blobs import REFS_SUFFIX, embedded_digests, write_references
+from app.services.persistence.binary_format import FILE_EXTENSION, encode_export
+from app.services.persistence.session_exporter import export_session
+from app.services.persistence.snapshots import prune_snapshots, take_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Полных цепочек снимков, остающихся в БД после автосохранения
+KEEP_SNAPSHOT_CHAINS = 2
+# nice для потоков автосохранения (Linux: приоритет задаётся потоку)
+AUTOSAVE_NICE = 10
+# Префикс имени файла — время снимка
+STAMP_FORMAT = "%Y%m%dT%H%M%S"
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+@dataclass
+class AutosaveFile:
+    code: str
+    path: Path
+    saved_at: datetime
+    size: int
+
+
+def _lower_priority() -> None:
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), AUTOSAVE_NICE)
+    except (AttributeError, OSError):
+        pass
+
+
+def autosave_executor() -> ThreadPoolExecutor:
+    """Пул потоков автосохранения (создаётся лениво)."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=max(1, get_settings().autosave_workers),
+            thread_name_prefix="autosave",
+            initializer=_lower_priority,
+        )
+    return _executor
+
+
+def owner_dir(root: Path, user_id: Optional[int]) -> Path:
+    return root / (f"u{user_id}" if user_id is not None else "guest")
+
+
+def active_session_ids(db: DBSession, player_ids: Iterable[int]) -> List[int]:
+    """Сессии игроков с живыми подключениями."""
+    player_ids = list(player_ids)
+    if not player_ids:
+        return []
+    rows = (
+        db.query(Player.session_id)
+        .filter(Player.id.in_(player_ids))
+        .distinct()
+        .order_by(Player.session_id)
+    )
+    return [session_id for (session_id,) in rows]
+
+
+def _rotate(directory: Path, keep: int) -> None:
+    files = sorted(directory.glob(f"*{FILE_EXTENSION}"))
+    for old in files[:-keep] if keep > 0 else []:
+        old.unlink(missing_ok=True)
+        old.with_name(old.name + REFS_SUFFIX).unlink(missing_ok=True)
+
+
+def autosave_session(
+    db: DBSession,
+    session_id: int,
+    root: Path,
+    keep: int,
+) -> Optional[Path]:
+    """Сохранить сессию; None, если с прошлого снимка ничего не изменилось."""
+    session = db.get(Session, session_id)
+    if session is None:
+        return None
+    gm_user_id = (
+        db.query(Player.user_id)
+        .filter(Player.session_id == session_id, Player.is_gm.is_(True))
+        .limit(1)
+        .scalar()
+    )
+
+    # Без изменений снимок не выгружает сессию; полный документ для файла —
+    # только когда есть что сохранять
+    snapshot = take_snapshot(db, session_id)
+    if snapshot is None:
+        return None
+    doc = snapshot.payload if snapshot.is_full else export_session(db, session_id)
+    prune_snapshots(db, session_id, KEEP_SNAPSHOT_CHAINS)
+
+    directory = owner_dir(root, gm_user_id) / session.code
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = snapshot.created_at.strftime(STAMP_FORMAT)
+    path = directory / f"{stamp}-{snapshot.id:08d}{FILE_EXTENSION}"
+    tmp = path.with_name(path.name + ".tmp")
+    data = encode_export(doc)
+    tmp.write_bytes(data)
+    write_references(path, embedded_digests(data))
+    os.replace(tmp, path)
+
+    _rotate(directory, keep)
+    return path
+
+
+def _autosave_once(session_id: int) -> Optional[Path]:
+    from app.database import SessionLocal
+
+    settings = get_settings()
+    db = SessionLocal()
+    try:
+        return autosave_session(db, session_id, Path(settings.autosave_dir), settings.autosave_keep)
+    finally:
+        db.close()
+
+
+def _active_sessions(player_ids: List[int]) -> List[int]:
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return active_session_ids(db, player_ids)
+    finally:
+        db.close()
+
+
+async def autosave_active_sessions(player_ids: Iterable[int]) -> int:
+    """Сохранить все сессии игроков ``player_ids``. Возвращает число записанных файлов."""
+    loop = asyncio.get_running_loop()
+    executor = autosave_executor()
+    session_ids = await loop.run_in_executor(executor, _active_sessions, list(player_ids))
+
+    saved = 0
+    results = await asyncio.gather(
+        *(loop.run_in_executor(executor, _autosave_once, sid) for sid in session_ids),
+        return_exceptions=True,
+    )
+    for session_id, result in zip(session_ids, results):
+        if isinstance(result, BaseException):
+            logger.error("Autosave of session %s failed", session_id, exc_info=result)
+        elif result is not None:
+            saved += 1
+    if saved:
+        logger.info(f"Autosave: saved {saved} of {len(session_ids)} active session(s)")
+    return saved
+
+
+async def run_autosave(interval: Optional[float] = None) -> None:
+    """Фоновая задача: каждые ``interval`` секунд сохранять сессии с живыми сокетами."""
+    from app.websocket.manager import manager
+
+    interval = interval or get_settings().autosave_interval_seconds
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await autosave_active_sessions(set(manager.token_to_player.values()))
+        except Exception:
+            logger.exception("Autosave failed")
+
+
+def list_autosaves(root: Path, user_id: Optional[int], code: Optional[str] = None) -> List[AutosaveFile]:
+    """Автосохранения пользователя (или одной его сессии), новые первыми."""
+    base = owner_dir(root, user_id)
+    if code is not None and not code.isalnum():
+        return []
+    directories = [base / code] if code else [d for d in base.glob("*") if d.is_dir()]
+    files = []
+    for directory in directories:
+        for path in directory.glob(f"*{FILE_EXTENSION}"):
+            try:
+                saved_at = datetime.strptime(path.name.split("-", 1)[0], STAMP_FORMAT)
+            except ValueError:
+                continue
+            files.append(AutosaveFile(
+                code=directory.name,
+                path=path,
+                saved_at=saved_at,
+                size=path.stat().st_size,
+            ))
+    # Имена файлов начинаются с времени снимка
+    files.sort(key=lambda f: f.path.name, reverse=True)
+    return files
+
+
+def latest_autosave(root: Path, user_id: Optional[int], code: str) -> Optional[AutosaveFile]:
+    files = list_autosaves(root, user_id, code)
+    return files[0] if files else None
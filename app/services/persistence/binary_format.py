@@ -0,0 +1,313 @@
+"""Бинарный контейнер сохранения сессии (MessagePack).
+
+Альтернатива JSON с теми же данными. Раскладка файла:
+
+    MAGIC (8 байт) | версия контейнера (u16) | длина заголовка (u32)
+    заголовок (msgpack)                       format_version, exported_at,
+                                              session_info, strings, sections
+    секции сущностей подряд                   записи msgpack одна за другой
+
+``sections`` — индекс: имя, версия сериализатора, поля, число записей,
+смещение и длина секции от начала данных. По нему читатель переходит
+к нужной секции (seek), не разбирая остальные.
+
+Записи секции — массивы значений в порядке ``fields`` (ключи не
+повторяются); запись с другим набором ключей пишется объектом. Строки,
+встречающиеся в экспорте больше одного раза (имена, классы, описания),
+хранятся один раз в таблице ``strings``, а в записях — ссылкой
+ExtType(STRING_REF, индекс u32).
+
+``format_version`` — тот же, что у JSON, и проверяется по migrations.py;
+версия контейнера описывает только раскладку файла.
+
+Заголовок (таблица строк, смещения секций) стоит перед данными, поэтому
+потоковая запись (iter_encode_export) читает записи дважды и копит секции
+во временном файле, а не весь контейнер в памяти.
+"""
+
+import struct
+import tempfile
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import msgpack
+
+from app.services.persistence.migrations import CURRENT_FORMAT_VERSION, is_version_supported
+
+MAGIC = b"DNDLSAV\x00"
+CONTAINER_VERSION = 1
+_PREAMBLE = struct.Struct("<8sHI")
+
+# Код ExtType для ссылки на строку из таблицы
+STRING_REF = 1
+# Короче — не интернируем (ссылка не меньше самой строки)
+MIN_INTERN_LENGTH = 4
+
+MEDIA_TYPE = "application/vnd.msgpack"
+FILE_EXTENSION = ".msgpack"
+
+# Пределы при чтении (недоверенный файл)
+MAX_HEADER_SIZE = 64 * 1024 * 1024
+MAX_RECORD_SIZE = 16 * 1024 * 1024
+READ_CHUNK_SIZE = 64 * 1024
+# Секции при потоковой записи: в памяти до этого размера, дальше — на диске
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+# (имя сущности, версия, записи) — как registry.iter_export
+EntityStream = Iterable[Tuple[str, int, Iterable[Dict[str, Any]]]]
+
+
+class BinaryFormatError(ValueError):
+    pass
+
+
+@dataclass
+class SectionInfo:
+    name: str
+    version: int
+    fields: List[str]
+    count: int
+    offset: int
+    length: int
+
+
+def is_binary_export(head: bytes) -> bool:
+    return head.startswith(MAGIC)
+
+
+# --- запись ----------------------------------------------------------------
+
+
+def _count_strings(value: Any, counter: Counter) -> None:
+    if isinstance(value, str):
+        if len(value) >= MIN_INTERN_LENGTH:
+            counter[value] += 1
+    elif isinstance(value, dict):
+        for v in value.values():
+            _count_strings(v, counter)
+    elif isinstance(value, list):
+        for v in value:
+            _count_strings(v, counter)
+
+
+def _intern(value: Any, table: Dict[str, int]) -> Any:
+    if isinstance(value, str):
+        index = table.get(value)
+        return value if index is None else msgpack.ExtType(STRING_REF, struct.pack("<I", index))
+    if isinstance(value, dict):
+        return {k: _intern(v, table) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_intern(v, table) for v in value]
+    return value
+
+
+def encode_export(doc: Dict[str, Any]) -> bytes:
+    """Закодировать экспорт (словарь формата JSON) в бинарный контейнер."""
+    entities = doc.get("entities", {})
+    return b"".join(iter_encode_export(
+        doc,
+        lambda: ((name, entity.get("version", 1), entity["data"]) for name, entity in entities.items()),
+    ))
+
+
+def iter_encode_export(header: Dict[str, Any], entities: Callable[[], EntityStream]) -> Iterator[bytes]:
+    """Закодировать экспорт порциями, не собирая контейнер в памяти.
+
+    ``header`` — поля шапки (format_version, exported_at, session_info).
+    ``entities()`` вызывается дважды и каждый раз отдаёт сущности заново
+    (например, из курсора): первый проход считает строки для таблицы,
+    второй пишет секции во временный файл (SPOOL_MAX_SIZE в памяти,
+    остальное на диске). Первая порция — после второго прохода; в памяти
+    остаётся счётчик строк, а не документ. Запись, изменившаяся между
+    проходами, просто не попадёт в таблицу строк.
+    """
+    counter: Counter = Counter()
+    for _, _, records in entities():
+        for record in records:
+            _count_strings(record, counter)
+    strings = [s for s, n in counter.items() if n > 1]
+    table = {s: i for i, s in enumerate(strings)}
+    del counter
+
+    packer = msgpack.Packer(use_bin_type=True)
+    sections = []
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as body:
+        for name, version, records in entities():
+            offset = body.tell()
+            fields: Optional[List[str]] = None
+            count = 0
+            for record in records:
+                if fields is None:
+                    fields = list(record)
+                if list(record) == fields:
+                    body.write(packer.pack([_intern(record[f], table) for f in fields]))
+                else:
+                    body.write(packer.pack(_intern(record, table)))
+                count += 1
+            sections.append({
+                "name": name,
+                "version": version,
+                "fields": fields or [],
+                "count": count,
+                "offset": offset,
+                "length": body.tell() - offset,
+            })
+
+        head = packer.pack({
+            "format_version": header.get("format_version", CURRENT_FORMAT_VERSION),
+            "exported_at": header.get("exported_at"),
+            "session_info": header.get("session_info"),
+            "strings": strings,
+            "sections": sections,
+        })
+        yield _PREAMBLE.pack(MAGIC, CONTAINER_VERSION, len(head)) + head
+        body.seek(0)
+        while chunk := body.read(READ_CHUNK_SIZE):
+            yield chunk
+
+
+# --- чтение ----------------------------------------------------------------
+
+
+class BinaryExportReader:
+    """Чтение контейнера из файла с произвольным доступом к секциям."""
+
+    def __init__(self, fileobj: BinaryIO):
+        self._file = fileobj
+        start = fileobj.tell()
+        size = fileobj.seek(0, 2) - start
+        fileobj.seek(start)
+        preamble = fileobj.read(_PREAMBLE.size)
+        if len(preamble) != _PREAMBLE.size:
+            raise BinaryFormatError("Файл слишком короткий")
+        magic, container_version, header_length = _PREAMBLE.unpack(preamble)
+        if magic != MAGIC:
+            raise BinaryFormatError("Не бинарный файл сохранения")
+        if container_version > CONTAINER_VERSION:
+            raise BinaryFormatError(
+                f"Версия контейнера {container_version} новее поддерживаемой ({CONTAINER_VERSION})"
+            )
+        if header_length > MAX_HEADER_SIZE:
+            raise BinaryFormatError("Заголовок бинарного файла слишком большой")
+
+        header_bytes = fileobj.read(header_length)
+        if len(header_bytes) != header_length:
+            raise BinaryFormatError("Заголовок бинарного файла обрезан")
+        try:
+            header = msgpack.unpackb(header_bytes, raw=False, strict_map_key=True)
+        except (ValueError, msgpack.UnpackException) as e:
+            raise BinaryFormatError(f"Повреждённый заголовок: {e}")
+        if not isinstance(header, dict):
+            raise BinaryFormatError("Повреждённый заголовок")
+
+        self.data_start = start + _PREAMBLE.size + header_length
+        self.format_version = header.get("format_version")
+        if not isinstance(self.format_version, str) or not is_version_supported(self.format_version):
+            raise BinaryFormatError(
+                f"Неподдерживаемая версия формата: {self.format_version}. "
+                f"Поддерживаются версии до {CURRENT_FORMAT_VERSION}"
+            )
+        self.exported_at = header.get("exported_at")
+        self.session_info = header.get("session_info")
+        self.strings = header.get("strings") or []
+        if not isinstance(self.strings, list) or not all(isinstance(s, str) for s in self.strings):
+            raise BinaryFormatError("Повреждённая таблица строк")
+
+        raw_sections = header.get("sections") or []
+        if not isinstance(raw_sections, list):
+            raise BinaryFormatError("Повреждённый индекс секций")
+        self.sections: Dict[str, SectionInfo] = {}
+        for raw in raw_sections:
+            try:
+                section = SectionInfo(**raw)
+            except TypeError:
+                raise BinaryFormatError("Повреждённый индекс секций")
+            numbers = (section.version, section.count, section.offset, section.length)
+            if (
+                not isinstance(section.name, str)
+                or not isinstance(section.fields, list)
+                or not all(isinstance(n, int) and n >= 0 for n in numbers)
+            ):
+                raise BinaryFormatError("Повреждённый индекс секций")
+            if section.name in self.sections:
+                raise BinaryFormatError(f"Секция '{section.name}' встречается дважды")
+            if _PREAMBLE.size + header_length + section.offset + section.length > size:
+                raise BinaryFormatError(f"Секция '{section.name}' выходит за пределы файла")
+            self.sections[section.name] = section
+
+    def names(self) -> List[str]:
+        return list(self.sections)
+
+    def _ext_hook(self, code: int, data: bytes) -> Any:
+        if code != STRING_REF or len(data) != 4:
+            raise BinaryFormatError(f"Неизвестный тип расширения {code}")
+        (index,) = struct.unpack("<I", data)
+        if index >= len(self.strings):
+            raise BinaryFormatError("Ссылка на строку вне таблицы")
+        return self.strings[index]
+
+    def read_section(self, name: str) -> Iterator[Dict[str, Any]]:
+        """Записи одной секции (переход к ней по индексу)."""
+        section = self.sections.get(name)
+        if section is None:
+            raise KeyError(name)
+
+        self._file.seek(self.data_start + section.offset)
+        unpacker = msgpack.Unpacker(
+            raw=False,
+            ext_hook=self._ext_hook,
+            max_buffer_size=MAX_RECORD_SIZE,
+            strict_map_key=True,
+        )
+        remaining = section.length
+        produced = 0
+        try:
+            while remaining:
+                chunk = self._file.read(min(READ_CHUNK_SIZE, remaining))
+                if not chunk:
+                    raise BinaryFormatError(f"Секция '{name}' обрезана")
+                remaining -= len(chunk)
+                unpacker.feed(chunk)
+                for item in unpacker:
+                    produced += 1
+                    yield self._record(section, item)
+        except (ValueError, msgpack.UnpackException) as e:
+            if isinstance(e, BinaryFormatError):
+                raise
+            raise BinaryFormatError(f"Повреждённая секция '{name}': {e}")
+        if produced != section.count:
+            raise BinaryFormatError(f"Секция '{name}': ожидалось {section.count} записей")
+
+    @staticmethod
+    def _record(section: SectionInfo, item: Any) -> Any:
+        if isinstance(item, list):
+            if len(item) != len(section.fields):
+                raise BinaryFormatError(f"Секция '{section.name}': неверное число полей")
+            return dict(zip(section.fields, item))
+        return item
+
+    def events(self) -> Iterator[Tuple[str, Optional[str], Any]]:
+        """События в формате JsonStreamReader (секции в порядке индекса)."""
+        yield "header", "format_version", self.format_version
+        yield "header", "exported_at", self.exported_at
+        yield "header", "session_info", self.session_info
+        yield "entities", None, None
+        for name, section in self.sections.items():
+            yield "entity", name, None
+            yield "field", name, ("version", section.version)
+            for record in self.read_section(name):
+                yield "record", name, record
+            yield "end", name, None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Весь экспорт словарём (как JSON-формат)."""
+        return {
+            "format_version": self.format_version,
+            "exported_at": self.exported_at,
+            "session_info": self.session_info,
+            "entities": {
+                name: {"version": section.version, "data": list(self.read_section(name))}
+                for name, section in self.sections.items()
+            },
+        }
@@ -0,0 +1,155 @@
+"""Сжатие потокового экспорта (gzip, опционально zstd)."""
+
+import zlib
+from typing import Iterable, Iterator, Optional
+
+try:  # zstd — опциональная зависимость (pip install zstandard)
+    import zstandard
+except ImportError:  # pragma: no cover - зависит от окружения
+    zstandard = None
+
+GZIP = "gzip"
+ZSTD = "zstd"
+IDENTITY = "identity"
+
+FILE_EXTENSIONS = {GZIP: ".gz", ZSTD: ".zst"}
+MEDIA_TYPES = {GZIP: "application/gzip", ZSTD: "application/zstd"}
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+# Сигнатуры сжатых файлов (для распаковки загруженного импорта)
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+# Предел одной порции распакованных данных (защита от zip-бомб)
+DECOMPRESS_CHUNK_SIZE = 64 * 1024
+
+
+class UnsupportedCompression(ValueError):
+    pass
+
+
+class CorruptCompressedData(ValueError):
+    pass
+
+
+def available_encodings() -> list:
+    """Поддерживаемые кодировки в порядке предпочтения."""
+    return ([ZSTD] if zstandard is not None else []) + [GZIP]
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> str:
+    """Выбрать кодировку по заголовку Accept-Encoding (q=0 — запрет)."""
+    accepted = {}
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+
+    candidates = [
+        enc for enc in available_encodings()
+        if accepted.get(enc, accepted.get("*", 0.0)) > 0
+    ]
+    if not candidates:
+        return IDENTITY
+    # При равном q — в порядке предпочтения сервера
+    return max(candidates, key=lambda enc: accepted.get(enc, accepted.get("*", 0.0)))
+
+
+def check_encoding(encoding: str) -> str:
+    """Проверить явно запрошенную кодировку."""
+    if encoding == ZSTD and zstandard is None:
+        raise UnsupportedCompression("zstd compression is not available on this server")
+    if encoding not in (GZIP, ZSTD, IDENTITY):
+        raise UnsupportedCompression(f"Unknown compression: {encoding}")
+    return encoding
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    """Сжимать поток порций на лету (без буферизации всего документа)."""
+    if encoding == IDENTITY:
+        yield from chunks
+        return
+
+    if encoding == GZIP:
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # 31 — gzip-обёртка
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+        return
+
+    compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _gunzip(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    decompressor = zlib.decompressobj(31)
+    try:
+        for chunk in chunks:
+            data = decompressor.decompress(chunk, DECOMPRESS_CHUNK_SIZE)
+            while data:
+                yield data
+                data = decompressor.decompress(decompressor.unconsumed_tail, DECOMPRESS_CHUNK_SIZE)
+        tail = decompressor.flush()
+    except zlib.error as e:
+        raise CorruptCompressedData(f"Corrupt gzip data: {e}")
+    if tail:
+        yield tail
+    if not decompressor.eof:
+        raise CorruptCompressedData("Truncated gzip data")
+
+
+def _unzstd(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    decompressor = zstandard.ZstdDecompressor().decompressobj()
+    try:
+        for chunk in chunks:
+            data = decompressor.decompress(chunk)
+            if data:
+                yield data
+    except zstandard.ZstdError as e:
+        raise CorruptCompressedData(f"Corrupt zstd data: {e}")
+
+
+def decompress_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Распаковать поток, если он сжат (gzip/zstd определяются по сигнатуре).
+
+    Несжатые данные проходят как есть; gzip отдаётся порциями не больше
+    DECOMPRESS_CHUNK_SIZE, так что размер распакованного потока можно
+    ограничить снаружи, не распаковывая его целиком.
+    """
+    chunks = iter(chunks)
+    head = b""
+    for chunk in chunks:
+        head += chunk
+        if len(head) >= len(ZSTD_MAGIC):
+            break
+
+    def rest() -> Iterator[bytes]:
+        if head:
+            yield head
+        yield from chunks
+
+    if head.startswith(GZIP_MAGIC):
+        yield from _gunzip(rest())
+    elif head.startswith(ZSTD_MAGIC):
+        if zstandard is None:
+            raise UnsupportedCompression("zstd compression is not available on this server")
+        yield from _unzstd(rest())
+    else:
+        yield from rest()
@@ -1,6 +1,8 @@
 """Версионирование и миграция формата экспорта."""
 
-from typing import Dict, Any, Callable, List
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Any, Callable, List, Tuple
 
 # Текущая версия формата экспорта
 CURRENT_FORMAT_VERSION = "1.0"
@@ -26,15 +28,24 @@ def is_version_supported(version_str: str) -> bool:
         return False
 
 
-# Реестр миграций: (from_version, to_version) -> migration_func
+# Реестр миграций документа: (from_version, to_version) -> migration_func
 _migrations: Dict[tuple, Callable[[Dict[str, Any]], Dict[str, Any]]] = {}
 
+# Реестр миграций записей: (from_version, to_version) -> {entity: [record_func]}
+_record_migrations: Dict[tuple, Dict[str, List[Callable[[Dict[str, Any]], Dict[str, Any]]]]] = {}
+
+# Скомпилированные планы: (from_version, to_version) -> MigrationPlan.
+# Сбрасывается при регистрации миграции.
+_plans: Dict[tuple, "MigrationPlan"] = {}
+# Кратчайшие пути: from_version -> {to_version: [версии пути]}
+_paths: Dict[str, Dict[str, List[str]]] = {}
+
 
 def register_migration(
     from_version: str,
     to_version: str
 ) -> Callable:
-    """Декоратор для регистрации функции миграции.
+    """Декоратор для регистрации функции миграции всего документа.
 
     Пример:
         @register_migration("1.0", "1.1")
@@ -44,43 +55,159 @@ def register_migration(
     """
     def decorator(func: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Callable:
         _migrations[(from_version, to_version)] = func
+        _invalidate()
+        return func
+    return decorator
+
+
+def register_record_migration(
+    from_version: str,
+    to_version: str,
+    entity: str,
+) -> Callable:
+    """Декоратор для миграции одной записи сущности.
+
+    Миграции записей соседних шагов сливаются в один проход по списку
+    записей и применяются к потоковому импорту запись за записью.
+    Предпочтительнее register_migration, если шаг не затрагивает
+    структуру документа.
+
+    Пример:
+        @register_record_migration("1.0", "1.1", "characters")
+        def add_armor_class(record: Dict) -> Dict:
+            record.setdefault("armor_class", 10)
+            return record
+    """
+    def decorator(func: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Callable:
+        _record_migrations.setdefault((from_version, to_version), {}).setdefault(entity, []).append(func)
+        _invalidate()
         return func
     return decorator
 
 
+def _invalidate() -> None:
+    _plans.clear()
+    _paths.clear()
+
+
+def _shortest_paths(from_version: str) -> Dict[str, List[str]]:
+    """Кратчайшие пути (по числу шагов) из версии во все достижимые."""
+    if from_version not in _paths:
+        edges: Dict[str, List[str]] = {}
+        for fv, tv in sorted(set(_migrations) | set(_record_migrations)):
+            edges.setdefault(fv, []).append(tv)
+
+        paths = {from_version: [from_version]}
+        queue = deque([from_version])
+        while queue:
+            current = queue.popleft()
+            for nxt in edges.get(current, []):
+                if nxt not in paths:
+                    paths[nxt] = paths[current] + [nxt]
+                    queue.append(nxt)
+        _paths[from_version] = paths
+    return _paths[from_version]
+
+
 def get_migration_path(from_version: str, to_version: str) -> List[str]:
     """Построить путь миграции между версиями.
 
-    Возвращает список версий для последовательной миграции.
+    Возвращает список версий для последовательной миграции (кратчайший
+    по числу шагов; таблица путей строится один раз).
     """
     if from_version == to_version:
         return []
 
-    path = [from_version]
-    current = from_version
+    path = _shortest_paths(from_version).get(to_version)
+    if path is None:
+        raise ValueError(
+            f"No migration path from {from_version} to {to_version}"
+        )
+    return list(path)
+
 
-    while current != to_version:
-        next_version = None
-        for (fv, tv) in _migrations.keys():
-            if fv == current:
-                next_version = tv
-                break
+RecordFuncs = Dict[str, List[Callable[[Dict[str, Any]], Dict[str, Any]]]]
 
-        if next_version is None:
-            raise ValueError(
-                f"No migration path from {from_version} to {to_version}"
-            )
 
-        path.append(next_version)
-        current = next_version
+@dataclass
+class MigrationPlan:
+    """Скомпилированная цепочка миграций между двумя версиями.
 
-    return path
+    ``steps`` — чередование слитых миграций записей (``{entity: [func]}``,
+    все функции подряд идущих шагов) и миграций документа. Миграции
+    записей шага выполняются до миграции документа того же шага.
+    """
+    path: List[str]
+    steps: List[Tuple[str, Any]] = field(default_factory=list)
+
+    @property
+    def record_only(self) -> bool:
+        return all(kind == "records" for kind, _ in self.steps)
+
+    def migrate_record(self, entity: str, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Мигрировать одну запись (для потокового импорта)."""
+        if not self.record_only:
+            doc = {"format_version": self.path[0], "entities": {entity: {"data": [record]}}}
+            return self.apply(doc)["entities"][entity]["data"][0]
+        for _, funcs in self.steps:
+            for func in funcs.get(entity, ()):
+                record = func(record)
+        return record
+
+    def apply(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Мигрировать документ: каждая сущность — один проход на группу шагов."""
+        result = data
+        for kind, step in self.steps:
+            if kind == "document":
+                result = step(result)
+                continue
+            for entity, funcs in step.items():
+                section = result.get("entities", {}).get(entity)
+                if not section or not section.get("data"):
+                    continue
+                migrated = []
+                for record in section["data"]:
+                    for func in funcs:
+                        record = func(record)
+                    migrated.append(record)
+                section["data"] = migrated
+        if self.path:
+            result["format_version"] = self.path[-1]
+        return result
+
+
+def migration_plan(from_version: str, to_version: str = None) -> MigrationPlan:
+    """Скомпилированный план миграции (кэшируется до новой регистрации)."""
+    if to_version is None:
+        to_version = CURRENT_FORMAT_VERSION
+    key = (from_version, to_version)
+    if key in _plans:
+        return _plans[key]
+
+    path = get_migration_path(from_version, to_version)
+    steps: List[Tuple[str, Any]] = []
+    pending: RecordFuncs = {}
+    for from_v, to_v in zip(path, path[1:]):
+        for entity, funcs in _record_migrations.get((from_v, to_v), {}).items():
+            pending.setdefault(entity, []).extend(funcs)
+        doc_func = _migrations.get((from_v, to_v))
+        if doc_func is not None:
+            if pending:
+                steps.append(("records", pending))
+                pending = {}
+            steps.append(("document", doc_func))
+    if pending:
+        steps.append(("records", pending))
+
+    plan = MigrationPlan(path=path, steps=steps)
+    _plans[key] = plan
+    return plan
 
 
 def migrate_data(data: Dict[str, Any], target_version: str = None) -> Dict[str, Any]:
     """Мигрировать данные до целевой версии.
 
-    По умолчанию мигрирует до текущей версии.
+    По умолчанию мигрирует до текущей версии. Записи мигрируются на месте.
     """
     if target_version is None:
         target_version = CURRENT_FORMAT_VERSION
@@ -90,25 +217,12 @@ def migrate_data(data: Dict[str, Any], target_version: str = None) -> Dict[str,
     if current_version == target_version:
         return data
 
-    path = get_migration_path(current_version, target_version)
-
-    result = data
-    for i in range(len(path) - 1):
-        from_v = path[i]
-        to_v = path[i + 1]
-        migration_func = _migrations.get((from_v, to_v))
-        if migration_func:
-            result = migration_func(result)
-            result["format_version"] = to_v
-
-    return result
+    return migration_plan(current_version, target_version).apply(data)
 
 
 # Примеры будущих миграций (пока пустые):
-# @register_migration("1.0", "1.1")
-# def migrate_1_0_to_1_1(data: Dict[str, Any]) -> Dict[str, Any]:
-#     """Пример миграции с 1.0 на 1.1."""
-#     # Добавляем новые поля
-#     for char in data.get("entities", {}).get("characters", {}).get("data", []):
-#         char.setdefault("armor_class", 10)
-#     return data
+# @register_record_migration("1.0", "1.1", "characters")
+# def migrate_characters_1_0_to_1_1(record: Dict[str, Any]) -> Dict[str, Any]:
+#     """Пример миграции с 1.0 на 1.1: новое поле персонажа."""
+#     record.setdefault("armor_class", 10)
+#     return record
@@ -0,0 +1,67 @@
+"""Колоночная упаковка массивов для формата экспорта.
+
+Числа хранятся как base64 от little-endian float64 (без потерь), строки
+с небольшим числом различных значений — словарём: список значений плюс
+base64 массив кодов (uint8, uint16 или uint32 — по размеру словаря).
+"""
+
+import base64
+import binascii
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+FLOAT_DTYPE = np.dtype("<f8")
+
+
+class PackingError(ValueError):
+    pass
+
+
+def _code_dtype(size: int) -> np.dtype:
+    if size <= 1 << 8:
+        return np.dtype("u1")
+    if size <= 1 << 16:
+        return np.dtype("<u2")
+    return np.dtype("<u4")
+
+
+def _decode(data: Any, dtype: np.dtype, count: int) -> np.ndarray:
+    if not isinstance(data, str):
+        raise PackingError("ожидалась base64-строка")
+    try:
+        raw = base64.b64decode(data, validate=True)
+    except (binascii.Error, ValueError):
+        raise PackingError("некорректный base64")
+    if len(raw) != count * dtype.itemsize:
+        raise PackingError(f"ожидалось {count} значений")
+    return np.frombuffer(raw, dtype=dtype)
+
+
+def pack_floats(values: Sequence[float]) -> str:
+    return base64.b64encode(np.asarray(values, dtype=FLOAT_DTYPE).tobytes()).decode("ascii")
+
+
+def unpack_floats(data: Any, count: int) -> List[float]:
+    return _decode(data, FLOAT_DTYPE, count).tolist()
+
+
+def pack_dictionary(values: Sequence[Any]) -> Dict[str, Any]:
+    """Словарное кодирование: {"values": [...], "codes": base64}."""
+    index: Dict[Any, int] = {}
+    codes = [index.setdefault(v, len(index)) for v in values]
+    dtype = _code_dtype(len(index))
+    return {
+        "values": list(index),
+        "codes": base64.b64encode(np.asarray(codes, dtype=dtype).tobytes()).decode("ascii"),
+    }
+
+
+def unpack_dictionary(packed: Any, count: int) -> List[Any]:
+    if not isinstance(packed, dict) or not isinstance(packed.get("values"), list):
+        raise PackingError("ожидался объект {values, codes}")
+    values = packed["values"]
+    codes = _decode(packed.get("codes"), _code_dtype(len(values)), count)
+    if count and int(codes.max()) >= len(values):
+        raise PackingError("код вне словаря")
+    return [values[c] for c in codes.tolist()]
@@ -0,0 +1,99 @@
+"""Планировщик экспорта: снимок графа сессии и параллельная сериализация."""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Collection, Dict, List, Optional
+
+from app.config import get_settings
+from app.services.persistence.types import ExportContext
+
+# Ниже этого числа строк в уровне сериализуем в текущем потоке
+PARALLEL_MIN_ROWS = 2000
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def export_executor() -> ThreadPoolExecutor:
+    """Общий пул потоков для сериализации (создаётся лениво)."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=get_settings().export_workers, thread_name_prefix="export"
+        )
+    return _executor
+
+
+class ExportPlanner:
+    """Загружает граф сессии фиксированным набором запросов и сериализует его.
+
+    Каждый сериализатор описывает свои запросы (``export_queries``):
+    колонки без ORM-объектов, область сессии — подзапросом. Планировщик
+    выполняет их по одному разу в текущей сессии БД (одна транзакция —
+    согласованный снимок) и кладёт строки в ``context.preloaded``; дальше
+    сериализаторы работают только со снимком, без обращений к БД, поэтому
+    независимые сущности одного уровня зависимостей (items и spells) можно
+    сериализовать параллельно (``export_workers`` > 1).
+    """
+
+    def __init__(self, registry):
+        self.registry = registry
+
+    def preload(self, context: ExportContext, names: Optional[Collection[str]] = None) -> int:
+        """Загрузить строки сущностей (по умолчанию всех); возвращает число запросов."""
+        context.preloaded = {}
+        for name in self.registry.get_export_order():
+            if names is not None and name not in names:
+                continue
+            serializer = self.registry.get(name)
+            for key, query in serializer.export_queries(context).items():
+                context.preloaded[key] = context.db.execute(query).all()
+        return len(context.preloaded)
+
+    def levels(self) -> List[List[str]]:
+        """Сущности по уровням зависимостей: внутри уровня они независимы."""
+        order = self.registry.get_export_order()
+        depth: Dict[str, int] = {}
+        for name in order:
+            deps = [d for d in self.registry.get(name).dependencies() if d in depth]
+            depth[name] = 1 + max((depth[d] for d in deps), default=-1)
+
+        levels: List[List[str]] = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+        for name in order:
+            levels[depth[name]].append(name)
+        return levels
+
+    def _level_rows(self, names: List[str], context: ExportContext) -> int:
+        total = 0
+        for name in names:
+            for key in self.registry.get(name).export_queries(context):
+                total += len(context.preloaded.get(key, ()))
+        return total
+
+    def export(
+        self, context: ExportContext, only: Optional[Collection[str]] = None
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Снимок + сериализация; записи по сущностям в порядке экспорта.
+
+        ``only`` — экспортировать только эти сущности (сериализаторы не
+        читают выгрузку друг друга, поэтому зависимости не нужны).
+        """
+        self.preload(context, only)
+        results: Dict[str, List[Dict[str, Any]]] = {}
+
+        for names in self.levels():
+            if only is not None:
+                names = [name for name in names if name in only]
+            serializers = [self.registry.get(name) for name in names]
+            parallel = (
+                get_settings().export_workers > 1
+                and len(names) > 1
+                and self._level_rows(names, context) >= PARALLEL_MIN_ROWS
+            )
+            if parallel:
+                futures = [export_executor().submit(s.export, context) for s in serializers]
+                for name, future in zip(names, futures):
+                    results[name] = future.result()
+            else:
+                for name, serializer in zip(names, serializers):
+                    results[name] = serializer.export(context)
+
+        return {name: results[name] for name in self.registry.get_export_order() if name in results}
@@ -1,6 +1,6 @@
 """Registry для сериализаторов сущностей."""
 
-from typing import Type, Dict, List, Any, Optional
+from typing import Type, Dict, List, Any, Optional, Iterator, Tuple, Collection
 
 from app.services.persistence.serializers.base import Saveable
 from app.services.persistence.types import ExportContext, ImportContext
@@ -91,8 +91,22 @@ class SaveableRegistry:
 
         return result
 
-    def export_all(self, context: ExportContext) -> Dict[str, Any]:
-        """Экспортировать все сущности в словарь.
+    def iter_export(
+        self, context: ExportContext
+    ) -> Iterator[Tuple[str, int, Iterator[Dict[str, Any]]]]:
+        """Потоковый экспорт: (имя сущности, версия, итератор записей).
+
+        Итератор записей нужно исчерпать до перехода к следующей сущности.
+        """
+        self._ensure_initialized()
+        for name in self.get_export_order():
+            serializer = self._serializers[name]
+            yield name, serializer.version(), serializer.iter_export(context)
+
+    def export_all(
+        self, context: ExportContext, only: Optional[Collection[str]] = None
+    ) -> Dict[str, Any]:
+        """Экспортировать все сущности (или только ``only``) в словарь.
 
         Возвращает:
             {
@@ -103,14 +117,15 @@ class SaveableRegistry:
                 ...
             }
         """
+        from app.services.persistence.planner import ExportPlanner
+
         self._ensure_initialized()
         entities: Dict[str, Any] = {}
 
-        for name in self.get_export_order():
-            serializer = self._serializers[name]
-            data = serializer.export(context)
+        # Снимок графа сессии + параллельная сериализация независимых сущностей
+        for name, data in ExportPlanner(self).export(context, only).items():
             entities[name] = {
-                "version": serializer.version(),
+                "version": self._serializers[name].version(),
                 "data": data
             }
             context.set_exported(name, data)
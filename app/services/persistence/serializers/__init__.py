@@ -5,6 +5,7 @@ from app.services.persistence.serializers.character import CharacterSerializer
 from app.services.persistence.serializers.item import ItemSerializer
 from app.services.persistence.serializers.spell import SpellSerializer
 from app.services.persistence.serializers.combat import CombatSerializer
+from app.services.persistence.serializers.map import MapSerializer
 
 __all__ = [
     "PlayerSerializer",
@@ -12,6 +13,7 @@ __all__ = [
     "ItemSerializer",
     "SpellSerializer",
     "CombatSerializer",
+    "MapSerializer",
 ]
 
 
@@ -22,3 +24,4 @@ def register_all(registry):
     registry.register(ItemSerializer)
     registry.register(SpellSerializer)
     registry.register(CombatSerializer)
+    registry.register(MapSerializer)
@@ -1,6 +1,8 @@
 """Базовый протокол для сериализаторов сущностей."""
 
-from typing import Protocol, List, Dict, Any, runtime_checkable
+from typing import Protocol, List, Dict, Any, Iterator, runtime_checkable
+
+from sqlalchemy import Select
 
 from app.services.persistence.types import ExportContext, ImportContext
 
@@ -31,6 +33,26 @@ class Saveable(Protocol):
         """
         ...
 
+    @classmethod
+    def export_queries(cls, context: ExportContext) -> Dict[str, Select]:
+        """Запросы строк сущности (ключ -> select колонок).
+
+        ExportPlanner выполняет их один раз и кладёт результат в
+        context.preloaded; без планировщика строки читаются потоково
+        через context.rows().
+        """
+        ...
+
+    @classmethod
+    def iter_export(cls, context: ExportContext) -> Iterator[Dict[str, Any]]:
+        """Выдавать записи сущности из БД по одной (потоковый экспорт).
+
+        Строки берутся из context.rows(): из снимка планировщика или
+        из БД пачками по EXPORT_BATCH_SIZE, так что память не растёт
+        с размером сессии.
+        """
+        ...
+
     @classmethod
     def export(cls, context: ExportContext) -> List[Dict[str, Any]]:
         """Экспортировать все записи сущности из БД."""
@@ -44,9 +66,20 @@ class Saveable(Protocol):
         """
         ...
 
+    @classmethod
+    def validate_record(cls, index: int, record: Dict[str, Any], context: ImportContext) -> None:
+        """Проверить одну запись (потоковая валидация).
+
+        Ошибки добавляются в context.errors; состояние между записями
+        (увиденные ID, имена) хранится в context.scratch. Записи сущностей
+        проверяются в порядке импорта, поэтому ссылки на родителей уже
+        известны.
+        """
+        ...
+
     @classmethod
     def validate(cls, data: List[Dict[str, Any]], context: ImportContext) -> None:
-        """Валидация данных без импорта.
+        """Валидация данных без импорта (validate_record по каждой записи).
 
         Ошибки добавляются в context.errors.
         """
@@ -1,11 +1,20 @@
 """Сериализатор для Character."""
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
+
+from sqlalchemy import Select, select
 
 from app.models.character import Character
-from app.models.player import Player
+from app.services.persistence.bulk import bulk_insert
 from app.services.persistence.types import ExportContext, ImportContext
 
+# Поля записи экспорта (в этом порядке)
+EXPORT_FIELDS = (
+    "id", "player_id", "name", "class_name", "level",
+    "strength", "dexterity", "constitution", "intelligence", "wisdom", "charisma",
+    "max_hp", "current_hp", "armor_class",
+)
+
 
 class CharacterSerializer:
     """Сериализатор персонажей."""
@@ -22,54 +31,38 @@ class CharacterSerializer:
     def dependencies(cls) -> List[str]:
         return ["players"]
 
+    @classmethod
+    def export_queries(cls, context: ExportContext) -> Dict[str, Select]:
+        # Все персонажи игроков сессии
+        return {
+            "characters": (
+                select(*(getattr(Character, f) for f in EXPORT_FIELDS))
+                .where(Character.player_id.in_(context.player_ids()))
+                .order_by(Character.id)
+            ),
+        }
+
+    @classmethod
+    def iter_export(cls, context: ExportContext) -> Iterator[Dict[str, Any]]:
+        query = cls.export_queries(context)["characters"]
+        for row in context.rows("characters", query):
+            yield dict(row._mapping)
+
     @classmethod
     def export(cls, context: ExportContext) -> List[Dict[str, Any]]:
-        # Получаем всех персонажей через players сессии
-        player_ids = (
-            context.db.query(Player.id)
-            .filter(Player.session_id == context.session_id)
-            .all()
-        )
-        player_ids = [p[0] for p in player_ids]
-
-        characters = (
-            context.db.query(Character)
-            .filter(Character.player_id.in_(player_ids))
-            .all()
-        )
-
-        return [
-            {
-                "id": c.id,
-                "player_id": c.player_id,
-                "name": c.name,
-                "class_name": c.class_name,
-                "level": c.level,
-                "strength": c.strength,
-                "dexterity": c.dexterity,
-                "constitution": c.constitution,
-                "intelligence": c.intelligence,
-                "wisdom": c.wisdom,
-                "charisma": c.charisma,
-                "max_hp": c.max_hp,
-                "current_hp": c.current_hp,
-                "armor_class": c.armor_class,
-            }
-            for c in characters
-        ]
+        return list(cls.iter_export(context))
 
     @classmethod
     def import_(cls, data: List[Dict[str, Any]], context: ImportContext) -> int:
-        count = 0
+        rows = []
 
         for char_data in data:
-            old_id = char_data["id"]
             old_player_id = char_data["player_id"]
 
             # Маппим player_id на новый
             new_player_id = context.id_mapping.get("players", old_player_id)
 
-            character = Character(
+            rows.append(dict(
                 player_id=new_player_id,
                 name=char_data["name"],
                 class_name=char_data.get("class_name"),
@@ -83,37 +76,45 @@ class CharacterSerializer:
                 max_hp=char_data.get("max_hp", 10),
                 current_hp=char_data.get("current_hp", 10),
                 armor_class=char_data.get("armor_class", 10),
-            )
-            context.db.add(character)
-            context.db.flush()
+            ))
 
-            context.id_mapping.set("characters", old_id, character.id)
-            count += 1
-
-        return count
+        new_ids = bulk_insert(context, Character, rows)
+        context.id_mapping.set_many("characters", (c["id"] for c in data), new_ids)
+        return len(new_ids)
 
     @classmethod
-    def validate(cls, data: List[Dict[str, Any]], context: ImportContext) -> None:
-        for i, char_data in enumerate(data):
-            if "name" not in char_data:
-                context.add_error(f"characters[{i}]: отсутствует поле 'name'")
-
-            if "id" not in char_data:
-                context.add_error(f"characters[{i}]: отсутствует поле 'id'")
+    def validate_record(cls, index: int, char_data: Dict[str, Any], context: ImportContext) -> None:
+        i = index
+        if "name" not in char_data:
+            context.add_error(f"characters[{i}]: отсутствует поле 'name'")
+
+        if "id" not in char_data:
+            context.add_error(f"characters[{i}]: отсутствует поле 'id'")
+        elif not context.remember_id("characters", char_data["id"]):
+            context.add_error(f"characters[{i}]: дублирующийся id {char_data['id']}")
+
+        if "player_id" not in char_data:
+            context.add_error(f"characters[{i}]: отсутствует поле 'player_id'")
+        elif not context.knows_id("players", char_data["player_id"]):
+            context.add_error(
+                f"characters[{i}]: неизвестный player_id {char_data['player_id']}"
+            )
 
-            if "player_id" not in char_data:
-                context.add_error(f"characters[{i}]: отсутствует поле 'player_id'")
+        level = char_data.get("level", 1)
+        if not isinstance(level, int) or level < 1 or level > 20:
+            context.add_warning(
+                f"characters[{i}]: level={level} вне диапазона 1-20"
+            )
 
-            level = char_data.get("level", 1)
-            if not isinstance(level, int) or level < 1 or level > 20:
+        for stat in ["strength", "dexterity", "constitution",
+                     "intelligence", "wisdom", "charisma"]:
+            val = char_data.get(stat, 10)
+            if not isinstance(val, int) or val < 1 or val > 30:
                 context.add_warning(
-                    f"characters[{i}]: level={level} вне диапазона 1-20"
+                    f"characters[{i}]: {stat}={val} вне диапазона 1-30"
                 )
 
-            for stat in ["strength", "dexterity", "constitution",
-                         "intelligence", "wisdom", "charisma"]:
-                val = char_data.get(stat, 10)
-                if not isinstance(val, int) or val < 1 or val > 30:
-                    context.add_warning(
-                        f"characters[{i}]: {stat}={val} вне диапазона 1-30"
-                    )
+    @classmethod
+    def validate(cls, data: List[Dict[str, Any]], context: ImportContext) -> None:
+        for i, record in enumerate(data):
+            cls.validate_record(i, record, context)
@@ -1,8 +1,11 @@
 """Сериализатор для Combat и CombatParticipant."""
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
+
+from sqlalchemy import Select, select, update
 
 from app.models.combat import Combat, CombatParticipant
+from app.services.persistence.bulk import bulk_insert
 from app.services.persistence.types import ExportContext, ImportContext
 
 
@@ -22,22 +25,48 @@ class CombatSerializer:
         return ["characters"]
 
     @classmethod
-    def export(cls, context: ExportContext) -> List[Dict[str, Any]]:
+    def export_queries(cls, context: ExportContext) -> Dict[str, Select]:
         if not context.include_combat:
-            return []
+            return {}
+
+        return {
+            "combats": (
+                select(Combat.id, Combat.is_active, Combat.round_number, Combat.current_turn_id)
+                .where(Combat.session_id == context.session_id)
+                .order_by(Combat.id)
+            ),
+            # Участники всех боёв сессии одним запросом
+            "combat_participants": (
+                select(
+                    CombatParticipant.combat_id,
+                    CombatParticipant.id,
+                    CombatParticipant.character_id,
+                    CombatParticipant.initiative,
+                    CombatParticipant.current_hp,
+                    CombatParticipant.is_active,
+                )
+                .join(Combat, CombatParticipant.combat_id == Combat.id)
+                .where(Combat.session_id == context.session_id)
+                .order_by(CombatParticipant.combat_id, CombatParticipant.id)
+            ),
+        }
+
+    @classmethod
+    def iter_export(cls, context: ExportContext) -> Iterator[Dict[str, Any]]:
+        queries = cls.export_queries(context)
+        if not queries:
+            return
 
-        combats = (
-            context.db.query(Combat)
-            .filter(Combat.session_id == context.session_id)
-            .all()
-        )
+        # Участников на сессию немного — группируем их целиком
+        participants: Dict[int, List[Any]] = {}
+        for p in context.rows("combat_participants", queries["combat_participants"]):
+            participants.setdefault(p.combat_id, []).append(p)
 
-        result = []
-        for combat in combats:
+        for combat in context.rows("combats", queries["combats"]):
             participants_data = []
             current_turn_order = None
 
-            for p in combat.participants:
+            for p in participants.get(combat.id, []):
                 participant_data = {
                     "id": p.id,
                     "character_id": p.character_id,
@@ -50,40 +79,40 @@ class CombatSerializer:
                 if combat.current_turn_id == p.id:
                     current_turn_order = len(participants_data) - 1
 
-            result.append({
+            yield {
                 "id": combat.id,
                 "is_active": combat.is_active,
                 "round_number": combat.round_number,
                 "current_turn_order": current_turn_order,
                 "participants": participants_data,
-            })
+            }
 
-        return result
+    @classmethod
+    def export(cls, context: ExportContext) -> List[Dict[str, Any]]:
+        return list(cls.iter_export(context))
 
     @classmethod
     def import_(cls, data: List[Dict[str, Any]], context: ImportContext) -> int:
-        count = 0
-
-        for combat_data in data:
-            old_id = combat_data["id"]
-
-            combat = Combat(
+        combat_ids = bulk_insert(context, Combat, [
+            dict(
                 session_id=context.session_id,
                 is_active=combat_data.get("is_active", False),
                 round_number=combat_data.get("round_number", 1),
                 current_turn_id=None,  # Установим после создания участников
             )
-            context.db.add(combat)
-            context.db.flush()
+            for combat_data in data
+        ])
+        context.id_mapping.set_many("combats", (c["id"] for c in data), combat_ids)
 
-            context.id_mapping.set("combats", old_id, combat.id)
+        # Участники всех боёв одной пачкой
+        participant_rows = []
+        # combat_id -> индекс строки участника, чей сейчас ход
+        current_turn_rows: Dict[int, int] = {}
 
-            # Импортируем участников
-            participants = combat_data.get("participants", [])
+        for combat_data, combat_id in zip(data, combat_ids):
             current_turn_order = combat_data.get("current_turn_order")
-            current_turn_participant_id = None
 
-            for i, p_data in enumerate(participants):
+            for i, p_data in enumerate(combat_data.get("participants", [])):
                 old_char_id = p_data["character_id"]
 
                 if not context.id_mapping.has("characters", old_char_id):
@@ -92,44 +121,57 @@ class CombatSerializer:
                     )
                     continue
 
-                new_char_id = context.id_mapping.get("characters", old_char_id)
+                if current_turn_order is not None and i == current_turn_order:
+                    current_turn_rows[combat_id] = len(participant_rows)
 
-                participant = CombatParticipant(
-                    combat_id=combat.id,
-                    character_id=new_char_id,
+                participant_rows.append(dict(
+                    combat_id=combat_id,
+                    character_id=context.id_mapping.get("characters", old_char_id),
                     initiative=p_data.get("initiative", 0),
                     current_hp=p_data["current_hp"],
                     is_active=p_data.get("is_active", True),
-                )
-                context.db.add(participant)
-                context.db.flush()
+                ))
 
-                if current_turn_order is not None and i == current_turn_order:
-                    current_turn_participant_id = participant.id
+        participant_ids = bulk_insert(context, CombatParticipant, participant_rows)
 
-            # Устанавливаем текущий ход
-            if current_turn_participant_id:
-                combat.current_turn_id = current_turn_participant_id
-                context.db.flush()
+        # Устанавливаем текущий ход
+        if current_turn_rows:
+            context.db.execute(update(Combat), [
+                {"id": combat_id, "current_turn_id": participant_ids[row]}
+                for combat_id, row in current_turn_rows.items()
+            ])
 
-            count += 1
+        return len(combat_ids)
 
-        return count
+    @classmethod
+    def validate_record(cls, index: int, combat_data: Dict[str, Any], context: ImportContext) -> None:
+        i = index
+        if "id" not in combat_data:
+            context.add_error(f"combats[{i}]: отсутствует поле 'id'")
+        elif not context.remember_id("combats", combat_data["id"]):
+            context.add_error(f"combats[{i}]: дублирующийся id {combat_data['id']}")
+
+        participants = combat_data.get("participants", [])
+        if not isinstance(participants, list):
+            context.add_error(f"combats[{i}]: participants должен быть списком")
+            return
+
+        for j, p_data in enumerate(participants):
+            if not isinstance(p_data, dict):
+                context.add_error(f"combats[{i}].participants[{j}]: ожидался объект")
+                continue
+
+            if "character_id" not in p_data:
+                context.add_error(
+                    f"combats[{i}].participants[{j}]: отсутствует character_id"
+                )
+
+            if "current_hp" not in p_data:
+                context.add_error(
+                    f"combats[{i}].participants[{j}]: отсутствует current_hp"
+                )
 
     @classmethod
     def validate(cls, data: List[Dict[str, Any]], context: ImportContext) -> None:
-        for i, combat_data in enumerate(data):
-            if "id" not in combat_data:
-                context.add_error(f"combats[{i}]: отсутствует поле 'id'")
-
-            participants = combat_data.get("participants", [])
-            for j, p_data in enumerate(participants):
-                if "character_id" not in p_data:
-                    context.add_error(
-                        f"combats[{i}].participants[{j}]: отсутствует character_id"
-                    )
-
-                if "current_hp" not in p_data:
-                    context.add_error(
-                        f"combats[{i}].participants[{j}]: отсутствует current_hp"
-                    )
+        for i, record in enumerate(data):
+            cls.validate_record(i, record, context)
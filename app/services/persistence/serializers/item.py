@@ -1,12 +1,16 @@
 """Сериализатор для Item."""
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
+
+from sqlalchemy import Select, select
 
 from app.models.item import Item
-from app.models.character import Character
-from app.models.player import Player
+from app.services.persistence.bulk import bulk_insert
 from app.services.persistence.types import ExportContext, ImportContext
 
+# Поля записи экспорта (в этом порядке)
+EXPORT_FIELDS = ("id", "character_id", "name", "description", "effects", "is_equipped")
+
 
 class ItemSerializer:
     """Сериализатор предметов."""
@@ -23,80 +27,73 @@ class ItemSerializer:
     def dependencies(cls) -> List[str]:
         return ["characters"]
 
+    @classmethod
+    def export_queries(cls, context: ExportContext) -> Dict[str, Select]:
+        # Предметы персонажей сессии
+        return {
+            "items": (
+                select(*(getattr(Item, f) for f in EXPORT_FIELDS))
+                .where(Item.character_id.in_(context.character_ids()))
+                .order_by(Item.id)
+            ),
+        }
+
+    @classmethod
+    def iter_export(cls, context: ExportContext) -> Iterator[Dict[str, Any]]:
+        query = cls.export_queries(context)["items"]
+        for row in context.rows("items", query):
+            yield dict(row._mapping)
+
     @classmethod
     def export(cls, context: ExportContext) -> List[Dict[str, Any]]:
-        # Получаем character_ids через players сессии
-        player_ids = (
-            context.db.query(Player.id)
-            .filter(Player.session_id == context.session_id)
-            .all()
-        )
-        player_ids = [p[0] for p in player_ids]
-
-        character_ids = (
-            context.db.query(Character.id)
-            .filter(Character.player_id.in_(player_ids))
-            .all()
-        )
-        character_ids = [c[0] for c in character_ids]
-
-        items = (
-            context.db.query(Item)
-            .filter(Item.character_id.in_(character_ids))
-            .all()
-        )
-
-        return [
-            {
-                "id": item.id,
-                "character_id": item.character_id,
-                "name": item.name,
-                "description": item.description,
-                "effects": item.effects,
-                "is_equipped": item.is_equipped,
-            }
-            for item in items
-        ]
+        return list(cls.iter_export(context))
 
     @classmethod
     def import_(cls, data: List[Dict[str, Any]], context: ImportContext) -> int:
-        count = 0
+        rows = []
 
         for item_data in data:
-            old_id = item_data["id"]
             old_char_id = item_data["character_id"]
 
             new_char_id = context.id_mapping.get("characters", old_char_id)
 
-            item = Item(
+            rows.append(dict(
                 character_id=new_char_id,
                 name=item_data["name"],
                 description=item_data.get("description"),
                 effects=item_data.get("effects"),
                 is_equipped=item_data.get("is_equipped", False),
-            )
-            context.db.add(item)
-            context.db.flush()
+            ))
 
-            context.id_mapping.set("items", old_id, item.id)
-            count += 1
-
-        return count
+        new_ids = bulk_insert(context, Item, rows)
+        context.id_mapping.set_many("items", (i["id"] for i in data), new_ids)
+        return len(new_ids)
 
     @classmethod
-    def validate(cls, data: List[Dict[str, Any]], context: ImportContext) -> None:
-        for i, item_data in enumerate(data):
-            if "name" not in item_data:
-                context.add_error(f"items[{i}]: отсутствует поле 'name'")
-
-            if "id" not in item_data:
-                context.add_error(f"items[{i}]: отсутствует поле 'id'")
+    def validate_record(cls, index: int, item_data: Dict[str, Any], context: ImportContext) -> None:
+        i = index
+        if "name" not in item_data:
+            context.add_error(f"items[{i}]: отсутствует поле 'name'")
+
+        if "id" not in item_data:
+            context.add_error(f"items[{i}]: отсутствует поле 'id'")
+        elif not context.remember_id("items", item_data["id"]):
+            context.add_error(f"items[{i}]: дублирующийся id {item_data['id']}")
+
+        if "character_id" not in item_data:
+            context.add_error(f"items[{i}]: отсутствует поле 'character_id'")
+        elif not context.knows_id("characters", item_data["character_id"]):
+            context.add_error(
+                f"items[{i}]: неизвестный character_id {item_data['character_id']}"
+            )
 
-            if "character_id" not in item_data:
-                context.add_error(f"items[{i}]: отсутствует поле 'character_id'")
+        effects = item_data.get("effects")
+        if effects is not None and not isinstance(effects, dict):
+            context.add_error(
+                f"items[{i}]: effects должен быть объектом или null"
+            )
 
-            effects = item_data.get("effects")
-            if effects is not None and not isinstance(effects, dict):
-                context.add_error(
-                    f"items[{i}]: effects должен быть объектом или null"
-                )
+    @classmethod
+    def validate(cls, data: List[Dict[str, Any]], context: ImportContext) -> None:
+        for i, record in enumerate(data):
+            cls.validate_record(i, record, context)
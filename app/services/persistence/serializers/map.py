@@ -0,0 +1,229 @@
+"""Сериализатор для Map, MapToken и MapWall."""
+
+import uuid
+from typing import List, Dict, Any, Iterator
+
+from sqlalchemy import Select, select
+
+from app.models.map import Map, MapToken, MapWall
+from app.services.persistence.bulk import insert_rows
+from app.services.persistence.packing import (
+    PackingError,
+    pack_dictionary,
+    pack_floats,
+    unpack_dictionary,
+    unpack_floats,
+)
+from app.services.persistence.types import ExportContext, ImportContext
+
+# Поля карты (в этом порядке)
+MAP_FIELDS = (
+    "id", "name", "background_url", "width", "height", "grid_scale",
+    "is_active", "source_user_map_id", "fog_enabled", "difficult_terrain",
+)
+# Колонки токенов: числа — float64, строки с малым словарём — коды, остальное — списки
+TOKEN_FLOATS = ("x", "y", "scale", "rotation")
+TOKEN_DICTIONARY = ("type", "layer", "color", "icon")
+TOKEN_LISTS = ("character_id", "label")
+# Необязательные колонки (в старых экспортах их нет): id токена — ключ в снимках
+TOKEN_OPTIONAL_LISTS = ("id",)
+WALL_FLOATS = ("x1", "y1", "x2", "y2")
+
+
+def _pack_columns(rows: List[Any], floats, dictionary=(), lists=(), get=getattr) -> Dict[str, Any]:
+    packed: Dict[str, Any] = {"count": len(rows)}
+    for name in floats:
+        packed[name] = pack_floats([get(r, name) or 0.0 for r in rows])
+    for name in dictionary:
+        packed[name] = pack_dictionary([get(r, name) for r in rows])
+    for name in lists:
+        packed[name] = [get(r, name) for r in rows]
+    return packed
+
+
+def _unpack_columns(packed: Any, floats, dictionary=(), lists=(), optional_lists=()) -> List[Dict[str, Any]]:
+    """Колонки -> список строк; PackingError при несогласованных данных."""
+    if not isinstance(packed, dict):
+        raise PackingError("ожидался объект с колонками")
+    count = packed.get("count")
+    if not isinstance(count, int) or isinstance(count, bool) or count < 0:
+        raise PackingError("count должен быть неотрицательным целым")
+    if count == 0:
+        return []
+
+    columns: Dict[str, List[Any]] = {}
+    for name in floats:
+        columns[name] = unpack_floats(packed.get(name), count)
+    for name in dictionary:
+        columns[name] = unpack_dictionary(packed.get(name), count)
+    for name in lists + tuple(n for n in optional_lists if n in packed):
+        values = packed.get(name)
+        if not isinstance(values, list) or len(values) != count:
+            raise PackingError(f"{name}: ожидался список из {count} значений")
+        columns[name] = values
+
+    return [{name: col[i] for name, col in columns.items()} for i in range(count)]
+
+
+def unpack_tokens(packed: Any) -> List[Dict[str, Any]]:
+    return _unpack_columns(packed, TOKEN_FLOATS, TOKEN_DICTIONARY, TOKEN_LISTS, TOKEN_OPTIONAL_LISTS)
+
+
+def pack_tokens(tokens: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Обратное к unpack_tokens: список словарей -> колонки."""
+    lists = TOKEN_LISTS + tuple(n for n in TOKEN_OPTIONAL_LISTS if any(n in t for t in tokens))
+    return _pack_columns(tokens, TOKEN_FLOATS, TOKEN_DICTIONARY, lists, get=lambda t, name: t.get(name))
+
+
+def unpack_walls(packed: Any) -> List[Dict[str, Any]]:
+    return _unpack_columns(packed, WALL_FLOATS)
+
+
+class MapSerializer:
+    """Сериализатор карт сессии вместе с токенами и стенами.
+
+    Токены и стены хранятся колоночно (см. packing.py): координаты,
+    масштаб и поворот — упакованные float64, тип/слой/цвет/иконка —
+    словарные коды. Это в разы компактнее списка объектов и
+    восстанавливается пакетной вставкой.
+    """
+
+    @classmethod
+    def entity_name(cls) -> str:
+        return "maps"
+
+    @classmethod
+    def version(cls) -> int:
+        return 1
+
+    @classmethod
+    def dependencies(cls) -> List[str]:
+        return ["characters"]
+
+    @classmethod
+    def export_queries(cls, context: ExportContext) -> Dict[str, Select]:
+        session_maps = select(Map.id).where(Map.session_id == context.session_id)
+        return {
+            "maps": (
+                select(*(getattr(Map, f) for f in MAP_FIELDS))
+                .where(Map.session_id == context.session_id)
+                .order_by(Map.id)
+            ),
+            "map_tokens": (
+                select(
+                    MapToken.map_id,
+                    *(getattr(MapToken, f) for f in TOKEN_FLOATS + TOKEN_DICTIONARY + TOKEN_LISTS + TOKEN_OPTIONAL_LISTS),
+                )
+                .where(MapToken.map_id.in_(session_maps))
+                .order_by(MapToken.map_id, MapToken.id)
+            ),
+            "map_walls": (
+                select(MapWall.map_id, *(getattr(MapWall, f) for f in WALL_FLOATS))
+                .where(MapWall.map_id.in_(session_maps))
+                .order_by(MapWall.map_id, MapWall.id)
+            ),
+        }
+
+    @classmethod
+    def iter_export(cls, context: ExportContext) -> Iterator[Dict[str, Any]]:
+        queries = cls.export_queries(context)
+
+        # Токены и стены группируем по картам целиком (их на сессию сотни)
+        tokens: Dict[str, List[Any]] = {}
+        for t in context.rows("map_tokens", queries["map_tokens"]):
+            tokens.setdefault(t.map_id, []).append(t)
+        walls: Dict[str, List[Any]] = {}
+        for w in context.rows("map_walls", queries["map_walls"]):
+            walls.setdefault(w.map_id, []).append(w)
+
+        for m in context.rows("maps", queries["maps"]):
+            record = dict(m._mapping)
+            record["tokens"] = _pack_columns(
+                tokens.get(m.id, []), TOKEN_FLOATS, TOKEN_DICTIONARY, TOKEN_LISTS + TOKEN_OPTIONAL_LISTS
+            )
+            record["walls"] = _pack_columns(walls.get(m.id, []), WALL_FLOATS)
+            yield record
+
+    @classmethod
+    def export(cls, context: ExportContext) -> List[Dict[str, Any]]:
+        return list(cls.iter_export(context))
+
+    @classmethod
+    def import_(cls, data: List[Dict[str, Any]], context: ImportContext) -> int:
+        map_rows = []
+        token_rows = []
+        wall_rows = []
+
+        for map_data in data:
+            new_id = str(uuid.uuid4())
+            context.id_mapping.set("maps", map_data["id"], new_id)
+
+            map_rows.append(dict(
+                id=new_id,
+                session_id=context.session_id,
+                name=map_data["name"],
+                background_url=map_data.get("background_url"),
+                width=map_data.get("width", 1920),
+                height=map_data.get("height", 1080),
+                grid_scale=map_data.get("grid_scale", 50),
+                is_active=map_data.get("is_active", False),
+                source_user_map_id=map_data.get("source_user_map_id"),
+                fog_enabled=map_data.get("fog_enabled", False),
+                difficult_terrain=map_data.get("difficult_terrain"),
+            ))
+
+            for token in unpack_tokens(map_data.get("tokens", {"count": 0})):
+                old_char_id = token["character_id"]
+                if old_char_id is not None:
+                    if context.id_mapping.has("characters", old_char_id):
+                        token["character_id"] = context.id_mapping.get("characters", old_char_id)
+                    else:
+                        context.add_warning(
+                            f"Map token references unknown character {old_char_id}"
+                        )
+                        token["character_id"] = None
+                token_rows.append(dict(token, id=str(uuid.uuid4()), map_id=new_id))
+
+            for wall in unpack_walls(map_data.get("walls", {"count": 0})):
+                wall_rows.append(dict(wall, id=str(uuid.uuid4()), map_id=new_id))
+
+        # Карты, затем все токены и стены — пакетами
+        insert_rows(context, Map, map_rows)
+        insert_rows(context, MapToken, token_rows)
+        insert_rows(context, MapWall, wall_rows)
+        return len(map_rows)
+
+    @classmethod
+    def validate_record(cls, index: int, map_data: Dict[str, Any], context: ImportContext) -> None:
+        i = index
+        if "id" not in map_data:
+            context.add_error(f"maps[{i}]: отсутствует поле 'id'")
+        elif not context.remember_id("maps", map_data["id"]):
+            context.add_error(f"maps[{i}]: дублирующийся id {map_data['id']}")
+
+        if "name" not in map_data:
+            context.add_error(f"maps[{i}]: отсутствует поле 'name'")
+
+        try:
+            tokens = unpack_tokens(map_data.get("tokens", {"count": 0}))
+        except PackingError as e:
+            context.add_error(f"maps[{i}].tokens: {e}")
+            tokens = []
+        try:
+            unpack_walls(map_data.get("walls", {"count": 0}))
+        except PackingError as e:
+            context.add_error(f"maps[{i}].walls: {e}")
+
+        for j, token in enumerate(tokens):
+            char_id = token["character_id"]
+            if char_id is not None and not isinstance(char_id, int):
+                context.add_error(f"maps[{i}].tokens[{j}]: character_id должен быть целым или null")
+            for name in TOKEN_DICTIONARY + ("label",):
+                if token[name] is not None and not isinstance(token[name], str):
+                    context.add_error(f"maps[{i}].tokens[{j}]: {name} должен быть строкой или null")
+                    break
+
+    @classmethod
+    def validate(cls, data: List[Dict[str, Any]], context: ImportContext) -> None:
+        for i, record in enumerate(data):
+            cls.validate_record(i, record, context)
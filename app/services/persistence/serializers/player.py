@@ -1,8 +1,12 @@
 """Сериализатор для Player."""
 
-from typing import List, Dict, Any
+import uuid
+from typing import List, Dict, Any, Iterator
+
+from sqlalchemy import Select, select
 
 from app.models.player import Player
+from app.services.persistence.bulk import bulk_insert
 from app.services.persistence.types import ExportContext, ImportContext
 
 
@@ -22,25 +26,33 @@ class PlayerSerializer:
         return []  # Players зависят только от Session, которая создаётся отдельно
 
     @classmethod
-    def export(cls, context: ExportContext) -> List[Dict[str, Any]]:
-        players = (
-            context.db.query(Player)
-            .filter(Player.session_id == context.session_id)
-            .all()
-        )
-
-        return [
-            {
+    def export_queries(cls, context: ExportContext) -> Dict[str, Select]:
+        return {
+            "players": (
+                select(Player.id, Player.name, Player.is_gm)
+                .where(Player.session_id == context.session_id)
+                .order_by(Player.id)
+            ),
+        }
+
+    @classmethod
+    def iter_export(cls, context: ExportContext) -> Iterator[Dict[str, Any]]:
+        query = cls.export_queries(context)["players"]
+        for p in context.rows("players", query):
+            yield {
                 "id": p.id,
                 "name": p.name,
                 "is_gm": p.is_gm,
             }
-            for p in players
-        ]
+
+    @classmethod
+    def export(cls, context: ExportContext) -> List[Dict[str, Any]]:
+        return list(cls.iter_export(context))
 
     @classmethod
     def import_(cls, data: List[Dict[str, Any]], context: ImportContext) -> int:
-        count = 0
+        rows = []
+        old_ids = []
 
         for player_data in data:
             old_id = player_data["id"]
@@ -60,34 +72,37 @@ class PlayerSerializer:
                     context.id_mapping.set("players", old_id, gm.id)
                 continue
 
-            import uuid
-            player = Player(
+            rows.append(dict(
                 session_id=context.session_id,
                 name=player_data["name"],
                 token=str(uuid.uuid4()),
                 is_gm=False,
-            )
-            context.db.add(player)
-            context.db.flush()
+            ))
+            old_ids.append(old_id)
 
-            context.id_mapping.set("players", old_id, player.id)
-            count += 1
+        new_ids = bulk_insert(context, Player, rows)
+        context.id_mapping.set_many("players", old_ids, new_ids)
+        return len(new_ids)
 
-        return count
+    @classmethod
+    def validate_record(cls, index: int, player_data: Dict[str, Any], context: ImportContext) -> None:
+        i = index
+        if "name" not in player_data:
+            context.add_error(f"players[{i}]: отсутствует поле 'name'")
+            return
+
+        if "id" not in player_data:
+            context.add_error(f"players[{i}]: отсутствует поле 'id'")
+        elif not context.remember_id("players", player_data["id"]):
+            context.add_error(f"players[{i}]: дублирующийся id {player_data['id']}")
+
+        names_seen = context.scratch.setdefault("players.names", set())
+        name = player_data["name"]
+        if name in names_seen:
+            context.add_error(f"players[{i}]: дублирующееся имя '{name}'")
+        names_seen.add(name)
 
     @classmethod
     def validate(cls, data: List[Dict[str, Any]], context: ImportContext) -> None:
-        names_seen: set = set()
-
-        for i, player_data in enumerate(data):
-            if "name" not in player_data:
-                context.add_error(f"players[{i}]: отсутствует поле 'name'")
-                continue
-
-            if "id" not in player_data:
-                context.add_error(f"players[{i}]: отсутствует поле 'id'")
-
-            name = player_data["name"]
-            if name in names_seen:
-                context.add_error(f"players[{i}]: дублирующееся имя '{name}'")
-            names_seen.add(name)
+        for i, record in enumerate(data):
+            cls.validate_record(i, record, context)
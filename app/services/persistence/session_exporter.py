@@ -1,20 +1,45 @@
-"""Экспорт сессии в JSON."""
+"""Экспорт сессии в JSON и бинарный контейнер."""
 
+import json
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, Collection, Optional
 
 from sqlalchemy.orm import Session as DBSession
 
 from app.models.session import Session
+from app.services.persistence.binary_format import encode_export, iter_encode_export
 from app.services.persistence.types import ExportContext
 from app.services.persistence.registry import registry
 from app.services.persistence.migrations import CURRENT_FORMAT_VERSION
 
 
+# Размер порции JSON, отдаваемой клиенту при потоковом экспорте
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _get_session(db: DBSession, session_id: int) -> Session:
+    session = db.query(Session).filter(Session.id == session_id).first()
+    if not session:
+        raise ValueError(f"Session {session_id} not found")
+    return session
+
+
+def _header(session: Session) -> Dict[str, Any]:
+    return {
+        "format_version": CURRENT_FORMAT_VERSION,
+        "exported_at": datetime.utcnow().isoformat() + "Z",
+        "session_info": {
+            "code": session.code,
+            "created_at": session.created_at.isoformat() + "Z" if session.created_at else None,
+        },
+    }
+
+
 def export_session(
     db: DBSession,
     session_id: int,
     include_combat: bool = True,
+    only: Optional[Collection[str]] = None,
 ) -> Dict[str, Any]:
     """Экспортировать сессию в словарь для сериализации в JSON.
 
@@ -22,13 +47,12 @@ def export_session(
         db: Сессия базы данных
         session_id: ID сессии для экспорта
         include_combat: Включать ли данные о боях
+        only: Только эти сущности (для дельт снимков); None — все
 
     Returns:
         Словарь с полными данными сессии
     """
-    session = db.query(Session).filter(Session.id == session_id).first()
-    if not session:
-        raise ValueError(f"Session {session_id} not found")
+    session = _get_session(db, session_id)
 
     context = ExportContext(
         db=db,
@@ -37,14 +61,82 @@ def export_session(
     )
 
     # Экспортируем все сущности через registry
-    entities = registry.export_all(context)
+    entities = registry.export_all(context, only)
 
-    return {
-        "format_version": CURRENT_FORMAT_VERSION,
-        "exported_at": datetime.utcnow().isoformat() + "Z",
-        "session_info": {
-            "code": session.code,
-            "created_at": session.created_at.isoformat() + "Z" if session.created_at else None,
-        },
-        "entities": entities,
-    }
+    return {**_header(session), "entities": entities}
+
+
+def export_session_binary(
+    db: DBSession,
+    session_id: int,
+    include_combat: bool = True,
+) -> bytes:
+    """Экспортировать сессию в бинарный контейнер (см. binary_format.py).
+
+    Таблица строк строится по всему экспорту, поэтому документ
+    собирается целиком (через планировщик), а не потоково.
+    """
+    return encode_export(export_session(db, session_id, include_combat))
+
+
+def iter_export_binary(
+    db: DBSession,
+    session_id: int,
+    include_combat: bool = True,
+) -> Iterator[bytes]:
+    """Экспортировать сессию в бинарный контейнер потоково.
+
+    Записи читаются из курсора дважды (таблица строк, затем секции — см.
+    iter_encode_export), поэтому ни документ, ни контейнер целиком в
+    памяти не собираются; цена — второй проход по БД. Отсутствие сессии
+    проверяется до первой порции.
+    """
+    session = _get_session(db, session_id)
+
+    def entities():
+        context = ExportContext(db=db, session_id=session_id, include_combat=include_combat)
+        return registry.iter_export(context)
+
+    return iter_encode_export(_header(session), entities)
+
+
+def iter_export_json(
+    db: DBSession,
+    session_id: int,
+    include_combat: bool = True,
+) -> Iterator[bytes]:
+    """Экспортировать сессию потоково: JSON отдаётся порциями по мере чтения.
+
+    Документ тот же, что у export_session (без отступов), но записи
+    кодируются по одной прямо из курсора, поэтому память не зависит от
+    размера сессии. Отсутствие сессии проверяется до первой порции.
+    """
+    session = _get_session(db, session_id)
+    header = _header(session)
+    context = ExportContext(db=db, session_id=session_id, include_combat=include_combat)
+
+    def parts() -> Iterator[str]:
+        # Шапка без закрывающей скобки, дальше — сущности
+        yield json.dumps(header, ensure_ascii=False)[:-1]
+        yield ', "entities": {'
+        for i, (name, version, records) in enumerate(registry.iter_export(context)):
+            prefix = ", " if i else ""
+            yield f'{prefix}{json.dumps(name)}: {{"version": {version}, "data": ['
+            for j, record in enumerate(records):
+                yield (", " if j else "") + json.dumps(record, ensure_ascii=False)
+            yield "]}"
+        yield "}}"
+
+    def chunks() -> Iterator[bytes]:
+        buffer = []
+        size = 0
+        for part in parts():
+            buffer.append(part)
+            size += len(part)
+            if size >= STREAM_CHUNK_SIZE:
+                yield "".join(buffer).encode("utf-8")
+                buffer, size = [], 0
+        if buffer:
+            yield "".join(buffer).encode("utf-8")
+
+    return chunks()
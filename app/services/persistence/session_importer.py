@@ -1,8 +1,8 @@
 """Импорт сессии из JSON."""
 
 import uuid
-from typing import Dict, Any, Tuple
-from dataclasses import dataclass
+from typing import Dict, Any, Optional, Tuple
+from dataclasses import dataclass, field
 
 from sqlalchemy.orm import Session as DBSession
 
@@ -38,6 +38,8 @@ class ValidationResult:
     entity_counts: Dict[str, int]
     warnings: list[str]
     errors: list[str]
+    # Проверенный документ, уже мигрированный до текущей версии (для импорта)
+    data: Optional[Dict[str, Any]] = field(default=None, repr=False)
 
 
 def validate_import_data(data: Dict[str, Any]) -> ValidationResult:
@@ -121,9 +123,50 @@ def validate_import_data(data: Dict[str, Any]) -> ValidationResult:
         entity_counts=entity_counts,
         warnings=warnings,
         errors=errors,
+        data=data,
     )
 
 
+def create_import_session(
+    db: DBSession,
+    new_session_code: str | None = None,
+) -> Tuple[Session, Player]:
+    """Создать новую сессию и её GM для импорта (без commit)."""
+    if new_session_code is None:
+        import string
+        import random
+        chars = string.ascii_uppercase + string.digits
+        new_session_code = "".join(random.choices(chars, k=6))
+
+    gm_token = str(uuid.uuid4())
+
+    session = Session(
+        code=new_session_code,
+        gm_token=gm_token,
+        is_active=True,
+    )
+    db.add(session)
+    db.flush()
+
+    # Создаём GM игрока
+    gm_player = Player(
+        session_id=session.id,
+        name="Game Master",
+        token=gm_token,
+        is_gm=True,
+    )
+    db.add(gm_player)
+    db.flush()
+
+    return session, gm_player
+
+
+def collect_player_tokens(db: DBSession, session_id: int) -> Dict[str, str]:
+    """Токены игроков новой сессии: имя -> токен."""
+    players = db.query(Player).filter(Player.session_id == session_id).all()
+    return {player.name: player.token for player in players}
+
+
 def import_session(
     db: DBSession,
     data: Dict[str, Any],
@@ -153,37 +196,11 @@ def import_session(
             errors=validation.errors,
         )
 
-    # Мигрируем данные если нужно
-    format_version = data.get("format_version", "1.0")
-    if format_version != CURRENT_FORMAT_VERSION:
-        data = migrate_data(data)
+    # Валидация уже мигрировала документ — второй раз не мигрируем
+    data = validation.data
 
     # Создаём новую сессию
-    if new_session_code is None:
-        import string
-        import random
-        chars = string.ascii_uppercase + string.digits
-        new_session_code = "".join(random.choices(chars, k=6))
-
-    gm_token = str(uuid.uuid4())
-
-    session = Session(
-        code=new_session_code,
-        gm_token=gm_token,
-        is_active=True,
-    )
-    db.add(session)
-    db.flush()
-
-    # Создаём GM игрока
-    gm_player = Player(
-        session_id=session.id,
-        name="Game Master",
-        token=gm_token,
-        is_gm=True,
-    )
-    db.add(gm_player)
-    db.flush()
+    session, gm_player = create_import_session(db, new_session_code)
 
     # Создаём контекст импорта
     context = ImportContext(
@@ -205,18 +222,12 @@ def import_session(
 
     db.commit()
 
-    # Собираем токены игроков
-    player_tokens = {}
-    players = db.query(Player).filter(Player.session_id == session.id).all()
-    for player in players:
-        player_tokens[player.name] = player.token
-
     return ImportResult(
         success=True,
         session_id=session.id,
         session_code=session.code,
-        gm_token=gm_token,
-        player_tokens=player_tokens,
+        gm_token=gm_player.token,
+        player_tokens=collect_player_tokens(db, session.id),
         entity_counts=entity_counts,
         warnings=context.warnings,
         errors=[],
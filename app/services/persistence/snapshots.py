@@ -0,0 +1,457 @@
+"""Инкрементальные снимки сессии.
+
+Снимок — либо полный экспорт, либо дельта относительно предыдущего
+снимка: только новые, изменённые и удалённые записи. Признак изменения
+записи — хэш её содержимого (``record_hashes`` хранятся в полных снимках
+и в последнем), поэтому сохранённая без изменений запись в дельту не
+попадает. Токены карт в снимках — отдельные записи (сущность
+``map_tokens``, ключ — id токена), а не часть записи карты: сдвиг одного
+токена не тянет в дельту карту со всеми её токенами.
+
+Чтобы не выгружать сессию целиком, снимок хранит ``entity_stamps`` —
+дайджест пар (id, updated_at) строк каждой сущности. Следующий снимок
+читает только эти две колонки и выгружает и хэширует лишь сущности,
+дайджест которых сдвинулся; хэши остальных берутся из прошлого снимка.
+Если не сдвинулся ни один, снимок не делается вовсе.
+
+Состояние на снимке = полный снимок + все дельты цепочки по порядку.
+Цепочка ограничена SNAPSHOT_CHAIN_LIMIT: следующий снимок после неё
+снова полный. ``compact_snapshots`` сворачивает цепочку в один полный
+снимок и удаляет более старые.
+"""
+
+import copy
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session as DBSession
+
+from app.database import Base
+from app.models.session_snapshot import SessionSnapshot
+from app.services.persistence.migrations import CURRENT_FORMAT_VERSION
+from app.services.persistence.registry import registry
+from app.services.persistence.serializers.map import pack_tokens, unpack_tokens
+from app.services.persistence.session_exporter import export_session
+from app.services.persistence.session_importer import ImportResult, import_session
+from app.services.persistence.types import ExportContext
+
+# Дельт подряд, после которых снимок снова делается полным
+SNAPSHOT_CHAIN_LIMIT = 20
+# Размер хэша записи в байтах (hex — вдвое длиннее)
+RECORD_HASH_SIZE = 8
+# Токены карт как отдельная сущность снимка
+TOKENS_ENTITY = "map_tokens"
+
+RecordHashes = Dict[str, Dict[str, str]]
+# Записи по сущностям и ключам: {сущность: {ключ записи: запись}}
+KeyedRecords = Dict[str, Dict[str, Dict[str, Any]]]
+
+
+def record_key(record: Dict[str, Any], index: int) -> str:
+    record_id = record.get("id")
+    return str(record_id) if record_id is not None else f"#{index}"
+
+
+def hash_record(record: Dict[str, Any]) -> str:
+    raw = json.dumps(record, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=RECORD_HASH_SIZE).hexdigest()
+
+
+def _explode_tokens(keyed: KeyedRecords, map_id: str, packed: Any) -> None:
+    tokens = keyed.setdefault(TOKENS_ENTITY, {})
+    for i, token in enumerate(unpack_tokens(packed)):
+        # Токены старых экспортов без id — по позиции внутри своей карты
+        key = str(token["id"]) if token.get("id") is not None else f"{map_id}#{i}"
+        tokens[key] = {"map_id": map_id, **token}
+
+
+def _keyed(entities: Dict[str, Any]) -> Tuple[KeyedRecords, Dict[str, int]]:
+    """Сущности экспорта -> записи по ключам и версии сущностей."""
+    keyed: KeyedRecords = {}
+    versions: Dict[str, int] = {}
+    for name, entity in entities.items():
+        records = keyed.setdefault(name, {})
+        versions[name] = entity["version"]
+        if name == "maps":
+            keyed.setdefault(TOKENS_ENTITY, {})
+            versions[TOKENS_ENTITY] = entity["version"]
+        for i, record in enumerate(entity["data"]):
+            if name == "maps" and "tokens" in record:
+                record = dict(record)
+                _explode_tokens(keyed, record["id"], record.pop("tokens"))
+            records[record_key(record, i)] = record
+    return keyed, versions
+
+
+def _unkeyed(keyed: KeyedRecords, versions: Dict[str, int]) -> Dict[str, Any]:
+    """Обратное к _keyed: токены снова упаковываются в записи карт."""
+    by_map: Dict[str, List[Dict[str, Any]]] = {}
+    for token in keyed.get(TOKENS_ENTITY, {}).values():
+        by_map.setdefault(token["map_id"], []).append(
+            {k: v for k, v in token.items() if k != "map_id"}
+        )
+
+    entities: Dict[str, Any] = {}
+    for name, records in keyed.items():
+        if name == TOKENS_ENTITY:
+            continue
+        data = list(records.values())
+        if name == "maps":
+            packed = []
+            for record in data:
+                tokens = by_map.get(record["id"], [])
+                if all(t.get("id") is not None for t in tokens):
+                    # Порядок как в экспорте
+                    tokens.sort(key=lambda t: t["id"])
+                packed.append(dict(record, tokens=pack_tokens(tokens)))
+            data = packed
+        entities[name] = {"version": versions[name], "data": data}
+    return entities
+
+
+def _hash_keyed(keyed: KeyedRecords) -> RecordHashes:
+    return {
+        name: {key: hash_record(record) for key, record in records.items()}
+        for name, records in keyed.items()
+    }
+
+
+def hash_entities(entities: Dict[str, Any]) -> RecordHashes:
+    return _hash_keyed(_keyed(entities)[0])
+
+
+def state_hash(hashes: RecordHashes) -> str:
+    raw = json.dumps(hashes, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _diff_keyed(
+    keyed: KeyedRecords,
+    versions: Dict[str, int],
+    hashes: RecordHashes,
+    base_hashes: RecordHashes,
+    complete: bool,
+) -> Tuple[Dict[str, Any], int]:
+    delta: Dict[str, Any] = {}
+    changed = 0
+    for name, records in keyed.items():
+        current = hashes[name]
+        base = base_hashes.get(name, {})
+        keys = [key for key in records if base.get(key) != current[key]]
+        deleted = [key for key in base if key not in current]
+        if keys or deleted:
+            delta[name] = {
+                "version": versions[name],
+                "upserts": [records[key] for key in keys],
+                # Ключи upserts: у записей без id ключ — позиция в исходном списке
+                "keys": keys,
+                "deleted": deleted,
+            }
+            changed += len(keys) + len(deleted)
+
+    if complete:
+        # Сущность пропала из экспорта целиком
+        for name, base in base_hashes.items():
+            if name not in keyed and base:
+                delta[name] = {"version": 1, "upserts": [], "keys": [], "deleted": list(base)}
+                changed += len(base)
+    return delta, changed
+
+
+def diff_entities(
+    entities: Dict[str, Any],
+    hashes: RecordHashes,
+    base_hashes: RecordHashes,
+    complete: bool = True,
+) -> Tuple[Dict[str, Any], int]:
+    """Дельта между состоянием (entities + их hashes) и base_hashes.
+
+    Возвращает (дельта по сущностям, число изменённых записей).
+    Сущности без изменений в дельту не попадают. ``complete=False`` —
+    в ``entities`` только часть сущностей: отсутствующие не считаются
+    удалёнными.
+    """
+    keyed, versions = _keyed(entities)
+    return _diff_keyed(keyed, versions, hashes, base_hashes, complete)
+
+
+def _apply(keyed: KeyedRecords, versions: Dict[str, int], delta: Dict[str, Any]) -> None:
+    for name, change in delta.items():
+        records = keyed.setdefault(name, {})
+        for key in change["deleted"]:
+            records.pop(key, None)
+        upserts = change["upserts"]
+        # Дельты без keys (старый формат) — ключ по позиции в upserts
+        keys = change.get("keys") or [record_key(r, i) for i, r in enumerate(upserts)]
+        for key, record in zip(keys, upserts):
+            record = copy.deepcopy(record)
+            if name == "maps" and "tokens" in record:
+                # Старый формат: карта вместе со своими токенами
+                tokens = keyed.setdefault(TOKENS_ENTITY, {})
+                for token_key in [k for k, t in tokens.items() if t["map_id"] == record["id"]]:
+                    del tokens[token_key]
+                _explode_tokens(keyed, record["id"], record.pop("tokens"))
+            records[key] = record
+        versions[name] = change["version"]
+        if name == "maps":
+            versions.setdefault(TOKENS_ENTITY, change["version"])
+
+
+def apply_delta(doc: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    """Применить дельту к документу экспорта (документ не изменяется)."""
+    result = copy.deepcopy(doc)
+    keyed, versions = _keyed(result.get("entities", {}))
+    _apply(keyed, versions, delta)
+    result["entities"] = _unkeyed(keyed, versions)
+    return result
+
+
+def entity_stamps(db: DBSession, session_id: int) -> Dict[str, str]:
+    """Дайджест (id, updated_at) строк каждой сущности экспорта сессии.
+
+    Читаются только эти две колонки тех же строк, что выгружает экспорт.
+    """
+    context = ExportContext(db=db, session_id=session_id)
+    stamps: Dict[str, str] = {}
+    for name in registry.get_export_order():
+        digest = hashlib.blake2b(digest_size=16)
+        for key, query in registry.get(name).export_queries(context).items():
+            table = Base.metadata.tables[key]
+            digest.update(key.encode())
+            rows = db.execute(query.with_only_columns(table.c.id, table.c.updated_at))
+            for row_id, updated_at in rows:
+                digest.update(f"\0{row_id}\0{updated_at.isoformat() if updated_at else ''}".encode())
+        stamps[name] = digest.hexdigest()
+    return stamps
+
+
+def latest_snapshot(db: DBSession, session_id: int) -> Optional[SessionSnapshot]:
+    return (
+        db.query(SessionSnapshot)
+        .filter(SessionSnapshot.session_id == session_id)
+        .order_by(SessionSnapshot.id.desc())
+        .first()
+    )
+
+
+def list_snapshots(db: DBSession, session_id: int) -> List[SessionSnapshot]:
+    return (
+        db.query(SessionSnapshot)
+        .filter(SessionSnapshot.session_id == session_id)
+        .order_by(SessionSnapshot.id)
+        .all()
+    )
+
+
+def _chain(db: DBSession, snapshot: SessionSnapshot) -> List[SessionSnapshot]:
+    """Цепочка от полного снимка до данного (одним запросом)."""
+    by_id = {
+        s.id: s
+        for s in db.query(SessionSnapshot).filter(
+            SessionSnapshot.session_id == snapshot.session_id,
+            SessionSnapshot.id <= snapshot.id,
+        )
+    }
+    chain = [snapshot]
+    while chain[-1].base_id is not None:
+        base = by_id.get(chain[-1].base_id)
+        if base is None:
+            raise ValueError(f"Snapshot {chain[-1].id} references missing base {chain[-1].base_id}")
+        chain.append(base)
+    chain.reverse()
+    return chain
+
+
+def materialize(db: DBSession, snapshot: SessionSnapshot) -> Dict[str, Any]:
+    """Полный документ экспорта на момент снимка (база + дельты)."""
+    chain = _chain(db, snapshot)
+    doc = copy.deepcopy(chain[0].payload)
+    if len(chain) > 1:
+        # Токены распаковываются и упаковываются один раз на всю цепочку
+        keyed, versions = _keyed(doc.get("entities", {}))
+        for delta in chain[1:]:
+            _apply(keyed, versions, delta.payload["entities"])
+        doc["entities"] = _unkeyed(keyed, versions)
+    doc["format_version"] = snapshot.format_version
+    doc["exported_at"] = snapshot.created_at.isoformat() + "Z" if snapshot.created_at else None
+    return doc
+
+
+def _deltas_since_full(db: DBSession, session_id: int) -> int:
+    last_full = (
+        db.query(SessionSnapshot.id)
+        .filter(SessionSnapshot.session_id == session_id, SessionSnapshot.base_id.is_(None))
+        .order_by(SessionSnapshot.id.desc())
+        .limit(1)
+        .scalar()
+    )
+    if last_full is None:
+        return 0
+    return (
+        db.query(SessionSnapshot)
+        .filter(SessionSnapshot.session_id == session_id, SessionSnapshot.id > last_full)
+        .count()
+    )
+
+
+def _record_hashes(db: DBSession, snapshot: SessionSnapshot) -> RecordHashes:
+    if snapshot.record_hashes is not None:
+        return snapshot.record_hashes
+    return hash_entities(materialize(db, snapshot)["entities"])
+
+
+def _dirty_entities(stamps: Dict[str, str], base: SessionSnapshot) -> Optional[List[str]]:
+    """Сущности, строки которых менялись после ``base``; None — неизвестно."""
+    if base.entity_stamps is None or base.record_hashes is None:
+        return None
+    return [name for name, stamp in stamps.items() if base.entity_stamps.get(name) != stamp]
+
+
+def export_session_delta(
+    db: DBSession,
+    session_id: int,
+    base: SessionSnapshot,
+) -> Dict[str, Any]:
+    """Экспорт только записей, изменённых после снимка ``base``.
+
+    Если у ``base`` остались штампы (полный или последний снимок),
+    выгружаются только изменившиеся сущности.
+    """
+    dirty = _dirty_entities(entity_stamps(db, session_id), base)
+    doc = export_session(db, session_id, only=dirty)
+    keyed, versions = _keyed(doc["entities"])
+    delta, changed = _diff_keyed(
+        keyed, versions, _hash_keyed(keyed), _record_hashes(db, base), complete=dirty is None
+    )
+    return {
+        "format_version": doc["format_version"],
+        "exported_at": doc["exported_at"],
+        "base_snapshot_id": base.id,
+        "changed_records": changed,
+        "entities": delta,
+    }
+
+
+def take_snapshot(
+    db: DBSession,
+    session_id: int,
+    full: bool = False,
+    doc: Optional[Dict[str, Any]] = None,
+) -> Optional[SessionSnapshot]:
+    """Сохранить снимок сессии; None, если с прошлого снимка ничего не изменилось.
+
+    Пишется дельта к последнему снимку, кроме первого снимка сессии,
+    ``full=True`` и переполненной цепочки — тогда полный экспорт. Для
+    дельты выгружаются только сущности со сдвинувшимися штампами, а если
+    таких нет — экспорта нет вовсе. ``doc`` — уже готовый export_session
+    этой сессии (чтобы не выгружать дважды).
+    """
+    # Штампы — до экспорта: запись между ними попадёт в следующий снимок
+    stamps = entity_stamps(db, session_id)
+    latest = latest_snapshot(db, session_id)
+    dirty = None
+    if latest is not None and not full and doc is None:
+        dirty = _dirty_entities(stamps, latest)
+        if dirty == []:
+            return None
+    make_full = latest is None or full or _deltas_since_full(db, session_id) >= SNAPSHOT_CHAIN_LIMIT
+    if make_full:
+        dirty = None
+    if doc is None:
+        doc = export_session(db, session_id, only=dirty)
+    keyed, versions = _keyed(doc["entities"])
+    hashes = _hash_keyed(keyed)
+    if dirty is not None:
+        hashes = {**latest.record_hashes, **hashes}
+    digest = state_hash(hashes)
+
+    if latest is not None and latest.state_hash == digest and not full:
+        # Строки переписаны без изменений: запомнить штампы, снимок не нужен
+        latest.entity_stamps = stamps
+        db.commit()
+        return None
+
+    if make_full:
+        snapshot = SessionSnapshot(
+            session_id=session_id,
+            base_id=None,
+            payload=doc,
+            changed_records=sum(len(h) for h in hashes.values()),
+        )
+    else:
+        delta, changed = _diff_keyed(
+            keyed, versions, hashes, latest.record_hashes, complete=dirty is None
+        )
+        snapshot = SessionSnapshot(
+            session_id=session_id,
+            base_id=latest.id,
+            payload={"entities": delta},
+            changed_records=changed,
+        )
+    if latest is not None and not latest.is_full:
+        # Хэши и штампы нужны только последнему снимку; у дельт хэши можно восстановить
+        latest.record_hashes = None
+        latest.entity_stamps = None
+
+    snapshot.format_version = CURRENT_FORMAT_VERSION
+    snapshot.record_hashes = hashes
+    snapshot.entity_stamps = stamps
+    snapshot.state_hash = digest
+    snapshot.created_at = datetime.utcnow()
+    db.add(snapshot)
+    db.commit()
+    return snapshot
+
+
+def compact_snapshots(db: DBSession, session_id: int) -> Optional[SessionSnapshot]:
+    """Свернуть последний снимок в полный и удалить все более старые."""
+    latest = latest_snapshot(db, session_id)
+    if latest is None:
+        return None
+    if not latest.is_full:
+        doc = materialize(db, latest)
+        latest.payload = doc
+        latest.base_id = None
+        latest.changed_records = sum(len(h) for h in _record_hashes(db, latest).values())
+    (
+        db.query(SessionSnapshot)
+        .filter(SessionSnapshot.session_id == session_id, SessionSnapshot.id < latest.id)
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return latest
+
+
+def prune_snapshots(db: DBSession, session_id: int, keep_full: int = 2) -> int:
+    """Удалить снимки старше ``keep_full``-го с конца полного снимка.
+
+    Остаются последние ``keep_full`` цепочек целиком. Возвращает число
+    удалённых снимков.
+    """
+    fulls = (
+        db.query(SessionSnapshot.id)
+        .filter(SessionSnapshot.session_id == session_id, SessionSnapshot.base_id.is_(None))
+        .order_by(SessionSnapshot.id.desc())
+        .limit(keep_full)
+        .all()
+    )
+    if len(fulls) < keep_full:
+        return 0
+    removed = (
+        db.query(SessionSnapshot)
+        .filter(SessionSnapshot.session_id == session_id, SessionSnapshot.id < fulls[-1].id)
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return removed
+
+
+def restore_snapshot(
+    db: DBSession,
+    snapshot: SessionSnapshot,
+    new_session_code: Optional[str] = None,
+) -> ImportResult:
+    """Восстановить снимок в новую сессию (обычным импортом)."""
+    return import_session(db, materialize(db, snapshot), new_session_code)
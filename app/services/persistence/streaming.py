@@ -0,0 +1,442 @@
+"""Потоковая валидация и импорт файла сессии.
+
+Файл экспорта разбирается по мере чтения: в памяти держится только
+недочитанный хвост буфера и текущая запись. Каждая запись сразу
+проверяется ``validate_record`` своего сериализатора; первая ошибка
+останавливает разбор (fail fast), так что битый или вредоносный файл
+отклоняется, не дочитываясь до конца. При импорте проверенные записи
+пачками по IMPORT_BATCH_SIZE уходят в пакетный ``import_``.
+
+Ожидаемый порядок — как у экспорта: ``format_version`` до ``entities``,
+сущности в порядке зависимостей.
+
+Бинарный контейнер (binary_format.py) распознаётся по сигнатуре: он
+буферизуется во временный файл и читается по секциям, давая те же
+события, что и JSON.
+"""
+
+import codecs
+import itertools
+import json
+import tempfile
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy.orm import Session as DBSession
+
+from app.services.persistence.binary_format import (
+    MAGIC,
+    BinaryExportReader,
+    BinaryFormatError,
+    is_binary_export,
+)
+from app.services.persistence.migrations import (
+    CURRENT_FORMAT_VERSION,
+    is_version_supported,
+    migration_plan,
+)
+from app.services.persistence.registry import registry
+from app.services.persistence.session_importer import (
+    ImportResult,
+    ValidationResult,
+    collect_player_tokens,
+    create_import_session,
+)
+from app.services.persistence.types import IMPORT_BATCH_SIZE, ImportContext
+
+# Предел размера документа после распаковки
+MAX_IMPORT_SIZE = 100 * 1024 * 1024
+# Предел одной записи (и любого значения шапки)
+MAX_RECORD_SIZE = 1024 * 1024
+# Порция чтения загруженного файла
+READ_CHUNK_SIZE = 64 * 1024
+# Бинарный файл до этого размера буферизуется в памяти, больше — на диске
+SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+
+_WHITESPACE = " \t\n\r"
+_decoder = json.JSONDecoder()
+
+
+class ImportStreamError(ValueError):
+    """Фатальная ошибка разбора или проверки файла импорта."""
+
+
+class JsonStreamReader:
+    """Инкрементальный разбор документа экспорта.
+
+    Структура (объект верхнего уровня, ``entities``, секции сущностей,
+    массивы ``data``) разбирается вручную, а каждое значение внутри —
+    ``JSONDecoder.raw_decode`` над буфером. События:
+
+        ("header", key, value)       поле верхнего уровня, кроме entities
+        ("entities", None, None)     начало секции entities
+        ("entity", name, None)       начало секции сущности
+        ("field", name, (key, value)) поле секции, кроме data (version)
+        ("record", name, record)     запись из data
+        ("end", name, None)          конец секции
+    """
+
+    def __init__(
+        self,
+        chunks: Iterable[bytes],
+        max_size: int = MAX_IMPORT_SIZE,
+        max_value_size: int = MAX_RECORD_SIZE,
+    ):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._read = 0
+        self.max_size = max_size
+        self.max_value_size = max_value_size
+
+    # --- буфер ---------------------------------------------------------------
+
+    def _fill(self) -> bool:
+        """Дочитать порцию; False — поток закончился."""
+        if self._eof:
+            return False
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self._eof = True
+            chunk = b""
+        except ValueError as e:  # повреждённый сжатый поток
+            raise ImportStreamError(str(e))
+
+        self._read += len(chunk)
+        if self._read > self.max_size:
+            raise ImportStreamError(
+                f"Файл импорта больше {self.max_size // (1024 * 1024)} МБ"
+            )
+        try:
+            text = self._utf8.decode(chunk, final=self._eof)
+        except UnicodeDecodeError:
+            raise ImportStreamError("Файл не в кодировке UTF-8")
+        if self._eof and not text:
+            return False
+        self._buf = self._buf[self._pos:] + text
+        self._pos = 0
+        return True
+
+    def _peek(self) -> str:
+        """Следующий значимый символ ('' в конце потока)."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, chars: str) -> str:
+        ch = self._peek()
+        if not ch or ch not in chars:
+            found = repr(ch) if ch else "конец файла"
+            raise ImportStreamError(f"Некорректный JSON: ожидалось {' или '.join(chars)}, найдено {found}")
+        self._pos += 1
+        return ch
+
+    def _value(self) -> Any:
+        """Разобрать одно JSON-значение, дочитывая буфер по необходимости."""
+        self._peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError as e:
+                if self._eof:
+                    raise ImportStreamError(f"Некорректный JSON: {e.msg}")
+                value, end = None, None
+            except RecursionError:
+                raise ImportStreamError("Некорректный JSON: слишком глубокая вложенность")
+
+            # Число на границе буфера могло оборваться — дочитываем
+            if end is not None and (end < len(self._buf) or self._eof):
+                self._pos = end
+                return value
+
+            if len(self._buf) - self._pos > self.max_value_size:
+                raise ImportStreamError(
+                    f"Запись больше {self.max_value_size // 1024} КБ"
+                )
+            self._fill()
+
+    def _key(self) -> str:
+        key = self._value()
+        if not isinstance(key, str):
+            raise ImportStreamError("Некорректный JSON: ключ объекта должен быть строкой")
+        self._expect(":")
+        return key
+
+    def _members(self) -> Iterator[str]:
+        """Ключи объекта по одному; значение читает вызывающий."""
+        self._expect("{")
+        if self._peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            yield self._key()
+            if self._expect(",}") == "}":
+                return
+
+    # --- события -------------------------------------------------------------
+
+    def events(self) -> Iterator[Tuple[str, Optional[str], Any]]:
+        for key in self._members():
+            if key == "entities":
+                if self._peek() != "{":
+                    raise ImportStreamError("Секция 'entities' должна быть объектом")
+                yield "entities", None, None
+                yield from self._entities()
+            else:
+                yield "header", key, self._value()
+
+        if self._peek():
+            raise ImportStreamError("Некорректный JSON: данные после конца документа")
+
+    def _entities(self) -> Iterator[Tuple[str, Optional[str], Any]]:
+        for name in self._members():
+            if self._peek() != "{":
+                raise ImportStreamError(f"Секция '{name}' должна быть объектом")
+            yield "entity", name, None
+            for key in self._members():
+                if key == "data":
+                    yield from self._records(name)
+                else:
+                    yield "field", name, (key, self._value())
+            yield "end", name, None
+
+    def _records(self, name: str) -> Iterator[Tuple[str, Optional[str], Any]]:
+        self._expect("[")
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield "record", name, self._value()
+            if self._expect(",]") == "]":
+                return
+
+
+def read_chunks(fileobj: BinaryIO, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[bytes]:
+    """Читать файл порциями."""
+    return iter(lambda: fileobj.read(chunk_size), b"")
+
+
+def _binary_events(
+    head: bytes,
+    chunks: Iterator[bytes],
+    max_size: int,
+) -> Iterator[Tuple[str, Optional[str], Any]]:
+    """События бинарного контейнера: поток дописывается во временный файл."""
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY) as spool:
+        written = 0
+        try:
+            for chunk in itertools.chain([head], chunks):
+                written += len(chunk)
+                if written > max_size:
+                    raise ImportStreamError(
+                        f"Файл импорта больше {max_size // (1024 * 1024)} МБ"
+                    )
+                spool.write(chunk)
+            spool.seek(0)
+            yield from BinaryExportReader(spool).events()
+        except BinaryFormatError as e:
+            raise ImportStreamError(str(e))
+        except ImportStreamError:
+            raise
+        except ValueError as e:  # повреждённый сжатый поток
+            raise ImportStreamError(str(e))
+
+
+def read_events(
+    chunks: Iterable[bytes],
+    max_size: int = MAX_IMPORT_SIZE,
+) -> Iterator[Tuple[str, Optional[str], Any]]:
+    """События разбора файла импорта: JSON или бинарный контейнер."""
+    chunks = iter(chunks)
+    head = b""
+    try:
+        while len(head) < len(MAGIC):
+            chunk = next(chunks, b"")
+            if not chunk:
+                break
+            head += chunk
+    except ValueError as e:
+        raise ImportStreamError(str(e))
+
+    if is_binary_export(head):
+        return _binary_events(head, chunks, max_size)
+    return JsonStreamReader(itertools.chain([head], chunks), max_size=max_size).events()
+
+
+def _migrate_record(format_version: str, name: str, record: Dict[str, Any]) -> Dict[str, Any]:
+    """Прогнать запись через скомпилированный план миграций формата."""
+    return migration_plan(format_version).migrate_record(name, record)
+
+
+def _check_shape(name: str, index: int, record: Any) -> None:
+    if not isinstance(record, dict):
+        raise ImportStreamError(f"{name}[{index}]: запись должна быть объектом")
+    record_id = record.get("id")
+    if record_id is not None and (not isinstance(record_id, (int, str)) or isinstance(record_id, bool)):
+        raise ImportStreamError(f"{name}[{index}]: id должен быть целым числом или строкой")
+
+
+def process_stream(
+    chunks: Iterable[bytes],
+    context: ImportContext,
+    max_size: int = MAX_IMPORT_SIZE,
+) -> Tuple[str, Dict[str, int]]:
+    """Разобрать, проверить и (если не validation_only) импортировать поток.
+
+    Возвращает (format_version, количество записей по сущностям).
+    Первая ошибка валидации или разбора — ImportStreamError.
+    """
+    format_version: Optional[str] = None
+    has_entities = False
+    counts: Dict[str, int] = {}
+    known = set(registry.all_names())
+
+    serializer = None
+    batch: List[Dict[str, Any]] = []
+    index = 0
+
+    def flush(name: str) -> None:
+        if batch and not context.validation_only:
+            counts[name] = counts.get(name, 0) + serializer.import_(batch, context)
+        batch.clear()
+
+    for kind, name, value in read_events(chunks, max_size):
+        if kind == "header":
+            if name == "format_version":
+                if not isinstance(value, str) or not is_version_supported(value):
+                    raise ImportStreamError(
+                        f"Неподдерживаемая версия формата: {value}. "
+                        f"Поддерживаются версии до {CURRENT_FORMAT_VERSION}"
+                    )
+                format_version = value
+                context.scratch["format_version"] = value
+                if value != CURRENT_FORMAT_VERSION:
+                    try:
+                        migration_plan(value)
+                    except ValueError as e:
+                        raise ImportStreamError(f"Ошибка миграции: {e}")
+
+        elif kind == "entities":
+            if format_version is None:
+                raise ImportStreamError("Поле 'format_version' должно идти до 'entities'")
+            has_entities = True
+
+        elif kind == "entity":
+            if name in counts:
+                raise ImportStreamError(f"Секция '{name}' встречается дважды")
+            counts[name] = 0
+            index = 0
+            if name in known:
+                serializer = registry.get(name)
+            else:
+                serializer = None
+                context.add_warning(f"Неизвестная сущность '{name}' пропущена")
+
+        elif kind == "record":
+            if serializer is None:
+                continue
+            _check_shape(name, index, value)
+            if format_version != CURRENT_FORMAT_VERSION:
+                value = _migrate_record(format_version, name, value)
+            serializer.validate_record(index, value, context)
+            if context.errors:
+                raise ImportStreamError(context.errors[0])
+            index += 1
+            if context.validation_only:
+                counts[name] = index
+                continue
+            batch.append(value)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                flush(name)
+
+        elif kind == "end":
+            if serializer is not None:
+                flush(name)
+            else:
+                counts.pop(name)
+            serializer = None
+
+    if format_version is None:
+        raise ImportStreamError("Отсутствует поле 'format_version'")
+    if not has_entities:
+        raise ImportStreamError("Отсутствует секция 'entities'")
+    if format_version != CURRENT_FORMAT_VERSION:
+        context.add_warning(
+            f"Данные мигрированы с версии {format_version} до {CURRENT_FORMAT_VERSION}"
+        )
+    return format_version, counts
+
+
+def validate_import_stream(
+    chunks: Iterable[bytes],
+    max_size: int = MAX_IMPORT_SIZE,
+) -> ValidationResult:
+    """Потоковая валидация файла импорта без создания записей."""
+    context = ImportContext(db=None, session_id=0, validation_only=True)  # type: ignore
+    try:
+        format_version, counts = process_stream(chunks, context, max_size)
+    except ImportStreamError as e:
+        return ValidationResult(
+            is_valid=False,
+            format_version=context.scratch.get("format_version", "unknown"),
+            entity_counts={},
+            warnings=context.warnings,
+            errors=[str(e)],
+        )
+    return ValidationResult(
+        is_valid=True,
+        format_version=format_version,
+        entity_counts=counts,
+        warnings=context.warnings,
+        errors=[],
+    )
+
+
+def import_session_stream(
+    db: DBSession,
+    chunks: Iterable[bytes],
+    new_session_code: Optional[str] = None,
+    max_size: int = MAX_IMPORT_SIZE,
+) -> ImportResult:
+    """Потоковый импорт: записи проверяются и вставляются по мере чтения.
+
+    Всё выполняется в одной транзакции; при первой ошибке она
+    откатывается и сессия не создаётся.
+    """
+    session, gm_player = create_import_session(db, new_session_code)
+    context = ImportContext(db=db, session_id=session.id)
+    try:
+        _, counts = process_stream(chunks, context, max_size)
+    except ImportStreamError as e:
+        db.rollback()
+        return ImportResult(
+            success=False,
+            session_id=None,
+            session_code=None,
+            gm_token=None,
+            player_tokens={},
+            entity_counts={},
+            warnings=context.warnings,
+            errors=[str(e)],
+        )
+    except BaseException:
+        db.rollback()
+        raise
+
+    db.commit()
+    return ImportResult(
+        success=True,
+        session_id=session.id,
+        session_code=session.code,
+        gm_token=gm_player.token,
+        player_tokens=collect_player_tokens(db, session.id),
+        entity_counts=counts,
+        warnings=context.warnings,
+        errors=[],
+    )
@@ -1,9 +1,15 @@
 """Типы данных для системы сохранения сессий."""
 
 from dataclasses import dataclass, field
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterable, List, Optional
+from sqlalchemy import select
 from sqlalchemy.orm import Session as DBSession
 
+# Строк, загружаемых за раз при потоковом экспорте (yield_per)
+EXPORT_BATCH_SIZE = 500
+# Строк в одном пакетном INSERT ... RETURNING при импорте
+IMPORT_BATCH_SIZE = 500
+
 
 @dataclass
 class IdMapping:
@@ -17,6 +23,12 @@ class IdMapping:
             self._mappings[entity_type] = {}
         self._mappings[entity_type][old_id] = new_id
 
+    def set_many(
+        self, entity_type: str, old_ids: Iterable[int], new_ids: Iterable[int]
+    ) -> None:
+        """Записать маппинг для пачки сущностей (пары old_id -> new_id)."""
+        self._mappings.setdefault(entity_type, {}).update(zip(old_ids, new_ids))
+
     def get(self, entity_type: str, old_id: int) -> int:
         """Получить новый ID по старому."""
         if entity_type not in self._mappings:
@@ -43,6 +55,8 @@ class ExportContext:
     _exported_data: Dict[str, List[Dict[str, Any]]] = field(
         default_factory=dict, repr=False
     )
+    # Строки, заранее загруженные ExportPlanner: ключ запроса -> список строк
+    preloaded: Optional[Dict[str, List[Any]]] = field(default=None, repr=False)
 
     def set_exported(self, entity_type: str, data: List[Dict[str, Any]]) -> None:
         """Сохранить экспортированные данные сущности."""
@@ -52,6 +66,25 @@ class ExportContext:
         """Получить экспортированные данные сущности."""
         return self._exported_data.get(entity_type, [])
 
+    def rows(self, key: str, query) -> Iterable[Any]:
+        """Строки запроса: из снимка планировщика, если он загружен,
+        иначе потоково из БД пачками по EXPORT_BATCH_SIZE."""
+        if self.preloaded is not None and key in self.preloaded:
+            return self.preloaded[key]
+        return self.db.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+
+    def player_ids(self):
+        """Подзапрос ID игроков сессии (для фильтров ``.in_()``)."""
+        from app.models.player import Player
+
+        return select(Player.id).where(Player.session_id == self.session_id)
+
+    def character_ids(self):
+        """Подзапрос ID персонажей сессии (для фильтров ``.in_()``)."""
+        from app.models.character import Character
+
+        return select(Character.id).where(Character.player_id.in_(self.player_ids()))
+
 
 @dataclass
 class ImportContext:
@@ -63,6 +96,8 @@ class ImportContext:
     validation_only: bool = False
     errors: List[str] = field(default_factory=list)
     warnings: List[str] = field(default_factory=list)
+    # Состояние валидации между записями (увиденные ID, имена и т.п.)
+    scratch: Dict[str, Any] = field(default_factory=dict)
 
     def add_error(self, message: str) -> None:
         """Добавить ошибку валидации."""
@@ -72,6 +107,18 @@ class ImportContext:
         """Добавить предупреждение."""
         self.warnings.append(message)
 
+    def remember_id(self, entity_type: str, record_id: Any) -> bool:
+        """Запомнить ID записи; False, если такой уже встречался."""
+        seen = self.scratch.setdefault(f"{entity_type}.ids", set())
+        if record_id in seen:
+            return False
+        seen.add(record_id)
+        return True
+
+    def knows_id(self, entity_type: str, record_id: Any) -> bool:
+        """Встречалась ли запись с таким ID среди уже проверенных."""
+        return record_id in self.scratch.get(f"{entity_type}.ids", ())
+
     def is_valid(self) -> bool:
         """Проверить отсутствие ошибок."""
         return len(self.errors) == 0
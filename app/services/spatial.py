@@ -0,0 +1,227 @@
+"""Per-map spatial index of tokens.
+
+Tokens are stored in a uniform grid hash whose cell size is the map's
+``grid_scale``, so radius / rectangle / cone queries only look at the cells
+the query touches instead of scanning every token on the map. A query
+covering more cells than there are tokens scans the tokens instead, so
+its cost never exceeds a linear scan however large the area. Indexes are
+built lazily from the DB and kept in sync by the token endpoints.
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session as DBSession
+
+from app.models.map import Map, MapToken
+from app.schemas.map import MAX_TOKEN_SCALE
+
+# Token radius at scale 1.0, in map pixels (matches MapToken.vue)
+TOKEN_BASE_RADIUS = 30.0
+FEET_PER_CELL = 5
+# 5e cone: width at the far end equals its length
+CONE_HALF_ANGLE = math.degrees(math.atan(0.5))
+# Extra pixels around a viewport, so tokens just off-screen are preloaded
+DEFAULT_VIEWPORT_MARGIN = 200.0
+# Upper bounds for client-supplied viewports, in map pixels
+MAX_VIEWPORT_SIZE = 16384.0
+MAX_VIEWPORT_MARGIN = 4096.0
+
+Cell = Tuple[int, int]
+
+
+@dataclass
+class IndexedToken:
+    id: str
+    x: float
+    y: float
+    radius: float
+    layer: str
+    cells: Tuple[Cell, ...]
+
+
+def token_radius(scale: Optional[float]) -> float:
+    return TOKEN_BASE_RADIUS * (min(scale, MAX_TOKEN_SCALE) if scale else 1.0)
+
+
+def _segment_distance(px: float, py: float, ax: float, ay: float, bx: float, by: float) -> float:
+    """Distance from point P to segment AB."""
+    dx, dy = bx - ax, by - ay
+    length_sq = dx * dx + dy * dy
+    if length_sq == 0:
+        return math.hypot(px - ax, py - ay)
+    t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length_sq))
+    return math.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+
+class SpatialGrid:
+    """Uniform grid hash of token circles."""
+
+    def __init__(self, cell_size: float):
+        self.cell_size = float(cell_size) if cell_size and cell_size > 0 else 50.0
+        self._cells: Dict[Cell, Set[str]] = {}
+        self._tokens: Dict[str, IndexedToken] = {}
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def __contains__(self, token_id: str) -> bool:
+        return token_id in self._tokens
+
+    def get(self, token_id: str) -> Optional[IndexedToken]:
+        return self._tokens.get(token_id)
+
+    def tokens(self) -> Iterable[IndexedToken]:
+        return self._tokens.values()
+
+    def _cell_range(self, x0: float, y0: float, x1: float, y1: float) -> Iterable[Cell]:
+        size = self.cell_size
+        for cx in range(math.floor(x0 / size), math.floor(x1 / size) + 1):
+            for cy in range(math.floor(y0 / size), math.floor(y1 / size) + 1):
+                yield cx, cy
+
+    def insert(self, token_id: str, x: float, y: float, radius: float, layer: str = "tokens") -> None:
+        if token_id in self._tokens:
+            self.remove(token_id)
+        cells = tuple(self._cell_range(x - radius, y - radius, x + radius, y + radius))
+        for cell in cells:
+            self._cells.setdefault(cell, set()).add(token_id)
+        self._tokens[token_id] = IndexedToken(token_id, x, y, radius, layer or "tokens", cells)
+
+    def remove(self, token_id: str) -> None:
+        token = self._tokens.pop(token_id, None)
+        if token is None:
+            return
+        for cell in token.cells:
+            bucket = self._cells.get(cell)
+            if bucket is not None:
+                bucket.discard(token_id)
+                if not bucket:
+                    del self._cells[cell]
+
+    def _candidates(self, x0: float, y0: float, x1: float, y1: float) -> Iterable[IndexedToken]:
+        if all(math.isfinite(v) for v in (x0, y0, x1, y1)):
+            size = self.cell_size
+            cells = (
+                (math.floor(x1 / size) - math.floor(x0 / size) + 1)
+                * (math.floor(y1 / size) - math.floor(y0 / size) + 1)
+            )
+            if cells <= len(self._tokens):
+                seen: Set[str] = set()
+                for cell in self._cell_range(x0, y0, x1, y1):
+                    for token_id in self._cells.get(cell, ()):
+                        if token_id not in seen:
+                            seen.add(token_id)
+                            yield self._tokens[token_id]
+                return
+
+        # Mostly empty cells: test each token's bounding box instead
+        for t in self._tokens.values():
+            if t.x + t.radius >= x0 and t.x - t.radius <= x1 and t.y + t.radius >= y0 and t.y - t.radius <= y1:
+                yield t
+
+    def query_rect(self, x0: float, y0: float, x1: float, y1: float) -> List[IndexedToken]:
+        """Tokens whose circle intersects the rectangle."""
+        x0, x1 = min(x0, x1), max(x0, x1)
+        y0, y1 = min(y0, y1), max(y0, y1)
+        result = []
+        for t in self._candidates(x0, y0, x1, y1):
+            nearest_x = min(max(t.x, x0), x1)
+            nearest_y = min(max(t.y, y0), y1)
+            if math.hypot(t.x - nearest_x, t.y - nearest_y) <= t.radius:
+                result.append(t)
+        return result
+
+    def query_radius(self, x: float, y: float, radius: float) -> List[IndexedToken]:
+        """Tokens whose circle intersects the circle."""
+        return [
+            t for t in self._candidates(x - radius, y - radius, x + radius, y + radius)
+            if math.hypot(t.x - x, t.y - y) <= radius + t.radius
+        ]
+
+    def query_cone(
+        self,
+        x: float,
+        y: float,
+        direction: float,
+        length: float,
+        half_angle: float = CONE_HALF_ANGLE,
+    ) -> List[IndexedToken]:
+        """Tokens touched by a cone from (x, y).
+
+        ``direction`` is in degrees (0 = +x axis, 90 = +y axis, screen coords).
+        """
+        heading = math.radians(direction)
+        spread = math.radians(half_angle)
+        edges = [
+            (x + length * math.cos(heading + s), y + length * math.sin(heading + s))
+            for s in (-spread, spread)
+        ]
+
+        result = []
+        for t in self._candidates(x - length, y - length, x + length, y + length):
+            dist = math.hypot(t.x - x, t.y - y)
+            if dist > length + t.radius:
+                continue
+            if dist <= t.radius:
+                result.append(t)
+                continue
+            offset = math.atan2(t.y - y, t.x - x) - heading
+            offset = (offset + math.pi) % (2 * math.pi) - math.pi
+            if abs(offset) <= spread:
+                result.append(t)
+            elif any(_segment_distance(t.x, t.y, x, y, ex, ey) <= t.radius for ex, ey in edges):
+                result.append(t)
+        return result
+
+
+class SpatialIndexRegistry:
+    """In-process cache of spatial indexes keyed by map id."""
+
+    def __init__(self):
+        self._indexes: Dict[str, SpatialGrid] = {}
+
+    def get(self, db: DBSession, map_obj: Map) -> SpatialGrid:
+        index = self._indexes.get(map_obj.id)
+        if index is None:
+            index = self.build(db, map_obj)
+            self._indexes[map_obj.id] = index
+        return index
+
+    @staticmethod
+    def build(db: DBSession, map_obj: Map) -> SpatialGrid:
+        index = SpatialGrid(map_obj.grid_scale)
+        rows = (
+            db.query(MapToken.id, MapToken.x, MapToken.y, MapToken.scale, MapToken.layer)
+            .filter(MapToken.map_id == map_obj.id)
+            .all()
+        )
+        for token_id, x, y, scale, layer in rows:
+            index.insert(token_id, x or 0.0, y or 0.0, token_radius(scale), layer)
+        return index
+
+    def upsert(self, token: MapToken) -> None:
+        """Add or move a token (only if its map is already indexed)."""
+        index = self._indexes.get(token.map_id)
+        if index is not None:
+            index.insert(token.id, token.x or 0.0, token.y or 0.0, token_radius(token.scale), token.layer)
+
+    def remove(self, map_id: str, token_id: str) -> None:
+        index = self._indexes.get(map_id)
+        if index is not None:
+            index.remove(token_id)
+
+    def discard(self, map_id: str) -> None:
+        self._indexes.pop(map_id, None)
+
+    def clear(self) -> None:
+        self._indexes.clear()
+
+
+def feet_to_pixels(feet: float, grid_scale: int) -> float:
+    return feet / FEET_PER_CELL * (grid_scale or 50)
+
+
+# Global registry instance
+spatial_indexes = SpatialIndexRegistry()
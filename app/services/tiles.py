@@ -0,0 +1,135 @@
+"""Deep-Zoom style tile pyramids for map backgrounds.
+
+An uploaded background is cut into 256 px WebP tiles at every zoom level
+plus a small preview, so clients can show the preview at once and then load
+only the tiles they look at. Layout under ``uploads/maps/{image_id}/``:
+
+    manifest.json         width, height, tile_size, max_level, format
+    preview.webp          longest side PREVIEW_SIZE px
+    {z}/{x}_{y}.webp      level z is the image scaled by 2 ** (z - max_level)
+
+The pyramid is built in a temporary directory of its own and renamed into
+place, so a directory that exists is always complete and its files never
+change. Two builds of the same content may race: the first rename wins and
+the other build is dropped.
+"""
+
+import json
+import logging
+import math
+import os
+import shutil
+import uuid
+from concurrent.futures import Future
+from typing import Dict, Optional
+
+from PIL import Image
+
+from app.services.uploads import submit_image_job
+
+logger = logging.getLogger(__name__)
+
+TILE_SIZE = 256
+TILE_FORMAT = "webp"
+TILE_QUALITY = 80
+PREVIEW_SIZE = 512
+MANIFEST_NAME = "manifest.json"
+
+
+def max_level(width: int, height: int) -> int:
+    """Deep Zoom level of the full-resolution image (level 0 is 1x1 px)."""
+    return math.ceil(math.log2(max(width, height, 1)))
+
+
+def level_size(width: int, height: int, level: int, top: int) -> tuple:
+    scale = 2 ** (top - level)
+    return max(1, math.ceil(width / scale)), max(1, math.ceil(height / scale))
+
+
+def build_pyramid(source_path: str, out_dir: str) -> Dict:
+    """Cut the image into a tile pyramid under out_dir and return the manifest.
+
+    Levels are produced top-down, each one by halving the previous level, so
+    the full image is decoded only once. If a concurrent build of the same
+    content put out_dir in place first, that pyramid is kept and returned.
+    """
+    tmp_dir = f"{out_dir}.{uuid.uuid4().hex}.tmp"
+    os.makedirs(tmp_dir)
+
+    try:
+        with Image.open(source_path) as src:
+            image = src.convert("RGBA" if "A" in src.getbands() else "RGB")
+        width, height = image.size
+        top = max_level(width, height)
+
+        preview = image.copy()
+        preview.thumbnail((PREVIEW_SIZE, PREVIEW_SIZE))
+        preview.save(os.path.join(tmp_dir, f"preview.{TILE_FORMAT}"), quality=TILE_QUALITY)
+
+        level_image = image
+        for level in range(top, -1, -1):
+            size = level_size(width, height, level, top)
+            if level_image.size != size:
+                level_image = level_image.resize(size, Image.LANCZOS)
+
+            level_dir = os.path.join(tmp_dir, str(level))
+            os.makedirs(level_dir)
+            cols = math.ceil(size[0] / TILE_SIZE)
+            rows = math.ceil(size[1] / TILE_SIZE)
+            for x in range(cols):
+                for y in range(rows):
+                    box = (
+                        x * TILE_SIZE, y * TILE_SIZE,
+                        min((x + 1) * TILE_SIZE, size[0]), min((y + 1) * TILE_SIZE, size[1]),
+                    )
+                    level_image.crop(box).save(
+                        os.path.join(level_dir, f"{x}_{y}.{TILE_FORMAT}"), quality=TILE_QUALITY
+                    )
+
+        manifest = {
+            "width": width,
+            "height": height,
+            "tile_size": TILE_SIZE,
+            "max_level": top,
+            "format": TILE_FORMAT,
+        }
+        with open(os.path.join(tmp_dir, MANIFEST_NAME), "w") as f:
+            json.dump(manifest, f)
+
+        existing = _read_manifest(out_dir)
+        if existing is None:
+            # A directory without a manifest is not a finished pyramid
+            shutil.rmtree(out_dir, ignore_errors=True)
+            try:
+                os.replace(tmp_dir, out_dir)
+                return manifest
+            except OSError:
+                existing = _read_manifest(out_dir)
+                if existing is None:
+                    raise
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return existing
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+
+def _read_manifest(out_dir: str) -> Optional[Dict]:
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _build_logged(source_path: str, out_dir: str) -> Dict:
+    try:
+        return build_pyramid(source_path, out_dir)
+    except Exception:
+        logger.exception(f"Tile pyramid failed for {source_path}")
+        raise
+
+
+def schedule_pyramid(source_path: str, out_dir: str) -> Future:
+    """Build a pyramid in the shared image worker pool."""
+    return submit_image_job(_build_logged, source_path, out_dir)
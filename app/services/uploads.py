@@ -0,0 +1,110 @@
+"""Streaming, size-bounded image uploads.
+
+Uploads are copied in fixed-size chunks to a temporary file next to their
+final location (aborting as soon as the size limit is crossed), validated
+from the image header only, and renamed into place atomically. All Pillow
+work runs in a small shared thread pool whose size caps how many images are
+processed at once, so uploads never block the event loop.
+"""
+
+import asyncio
+import os
+import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional, Set, Tuple
+
+from fastapi import UploadFile
+from PIL import Image
+
+from app.config import get_settings
+
+CHUNK_SIZE = 64 * 1024
+# Refuse decompression bombs before decoding (~ 16k x 16k)
+MAX_IMAGE_PIXELS = 256 * 1024 * 1024
+TEMP_SUFFIX = ".part"
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+class InvalidImage(ValueError):
+    pass
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def image_executor() -> ThreadPoolExecutor:
+    """Lazily create the shared Pillow worker pool (Pillow releases the GIL)."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=max(1, get_settings().image_workers), thread_name_prefix="images"
+        )
+    return _executor
+
+
+def submit_image_job(fn: Callable, *args) -> Future:
+    """Queue a Pillow job in the worker pool (fire and forget)."""
+    return image_executor().submit(fn, *args)
+
+
+async def run_image_job(fn: Callable, *args):
+    """Run a Pillow job in the worker pool and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(image_executor(), fn, *args)
+
+
+async def stream_to_temp(upload: UploadFile, directory: str, max_size: int, hasher=None) -> str:
+    """Copy an upload to a temp file in directory, chunk by chunk.
+
+    Raises UploadTooLarge (and removes the partial file) as soon as more than
+    max_size bytes have been read. If given, ``hasher`` (a hashlib object) is
+    fed every chunk. Returns the temp file path.
+    """
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=TEMP_SUFFIX)
+    try:
+        size = 0
+        with os.fdopen(fd, "wb") as f:
+            while True:
+                chunk = await upload.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLarge(f"File too large (max {max_size // (1024 * 1024)}MB)")
+                if hasher is not None:
+                    hasher.update(chunk)
+                await asyncio.to_thread(f.write, chunk)
+        return temp_path
+    except BaseException:
+        discard(temp_path)
+        raise
+
+
+def probe_image(path: str, allowed_formats: Set[str]) -> Tuple[str, int, int]:
+    """Read format and size from the image header without decoding pixels."""
+    try:
+        with Image.open(path) as img:
+            fmt, (width, height) = img.format, img.size
+    except Exception:
+        raise InvalidImage("File is not a valid image")
+    if fmt not in allowed_formats:
+        raise InvalidImage(f"Unsupported image format: {fmt}")
+    if width * height > MAX_IMAGE_PIXELS:
+        raise InvalidImage("Image dimensions too large")
+    return fmt, width, height
+
+
+def commit_upload(temp_path: str, final_path: str) -> None:
+    """Atomically move a finished upload into place (same filesystem)."""
+    os.replace(temp_path, final_path)
+
+
+def discard(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
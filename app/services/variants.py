@@ -0,0 +1,94 @@
+"""Responsive WebP variants of uploaded images.
+
+Every stored image gets WebP copies at a few target widths (never wider than
+the original) in its blob's derived directory, ``{sha}/w{width}.webp``, so
+clients can pick the smallest one that fits: phones load a 640 px map
+background instead of a 10 MB original, and the player list and map tokens
+load 48-96 px avatar thumbnails. Built variants are recorded on the blob row.
+"""
+
+import logging
+import os
+import uuid
+from typing import Dict, List, Sequence
+
+from PIL import Image
+from sqlalchemy.orm import Session as DBSession
+
+from app.models.upload_blob import UploadBlob
+from app.services import blobs
+from app.services.uploads import submit_image_job
+
+logger = logging.getLogger(__name__)
+
+VARIANT_FORMAT = "webp"
+VARIANT_QUALITY = 80
+MAP_WIDTHS = (640, 1280, 1920)
+# Thumbnails for the player list and map tokens (1x and 2x), plus a card size
+AVATAR_WIDTHS = (48, 96, 256)
+
+
+def variant_name(width: int) -> str:
+    return f"w{width}.{VARIANT_FORMAT}"
+
+
+def plan_variants(digest: str, width: int, height: int, widths: Sequence[int]) -> List[Dict]:
+    """Variants an image of the given size gets: {width, height, url}, widest first."""
+    base = blobs.derived_url(digest)
+    return [
+        {"width": w, "height": max(1, round(height * w / width)), "url": f"{base}/{variant_name(w)}"}
+        for w in sorted(widths, reverse=True)
+        if w < width
+    ]
+
+
+def build_variants(digest: str, ext: str, widths: Sequence[int]) -> List[Dict]:
+    """Write the variants of a stored blob and return them.
+
+    Each variant is scaled down from the previous (wider) one, so the
+    original is decoded only once; files are written under a temp name and
+    renamed, so an existing variant file is always complete.
+    """
+    out_dir = blobs.derived_dir(digest)
+    os.makedirs(out_dir, exist_ok=True)
+
+    with Image.open(blobs.blob_path(digest, ext)) as src:
+        image = src.convert("RGBA" if "A" in src.getbands() else "RGB")
+    planned = plan_variants(digest, image.width, image.height, widths)
+
+    for variant in planned:
+        image = image.resize((variant["width"], variant["height"]), Image.LANCZOS)
+        path = os.path.join(out_dir, variant_name(variant["width"]))
+        # Unique temp name: two jobs for the same content may run at once
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        image.save(temp_path, format="WEBP", quality=VARIANT_QUALITY)
+        os.replace(temp_path, path)
+    return planned
+
+
+def record_variants(db: DBSession, digest: str, variants: List[Dict]) -> None:
+    blob = db.get(UploadBlob, digest)
+    if blob is not None:
+        blob.variants = variants
+        db.commit()
+
+
+def _build_and_record(digest: str, ext: str, widths: Sequence[int]) -> List[Dict]:
+    from app.database import SessionLocal
+
+    try:
+        variants = build_variants(digest, ext, widths)
+        db = SessionLocal()
+        try:
+            record_variants(db, digest, variants)
+        finally:
+            db.close()
+        return variants
+    except Exception:
+        logger.exception(f"Image variants failed for {digest}")
+        raise
+
+
+def schedule_variants(digest: str, ext: str, widths: Sequence[int]):
+    """Build and record variants in the shared image worker pool."""
+    return submit_image_job(_build_and_record, digest, ext, widths)
@@ -0,0 +1,274 @@
+"""Fog of war and line of sight per map.
+
+Walls are stored as segments (MapWall). What a token sees is computed by
+vectorized raycasting with NumPy: the segment from the token to every grid
+cell centre is tested against every wall at once. Each player's view is the
+union of what their character tokens see; the revealed area is a bitmap that
+only grows. Moving a token recomputes that token's view only.
+"""
+
+import base64
+import math
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session as DBSession
+
+from app.models.character import Character
+from app.models.map import Map, MapToken, MapWall
+
+EPS = 1e-9
+# Cell x wall pairs tested per vectorized chunk (bounds memory on huge maps)
+MAX_PAIRS = 2_000_000
+# Rays are cast slightly left and right of every wall corner
+RAY_OFFSET = 1e-4
+
+Point = Tuple[float, float]
+
+
+def walls_array(walls: Iterable[Tuple[float, float, float, float]]) -> np.ndarray:
+    """(W, 4) array of x1, y1, x2, y2."""
+    arr = np.array(list(walls), dtype=np.float64)
+    return arr.reshape(-1, 4)
+
+
+def segments_cross(starts: np.ndarray, ends: np.ndarray, walls: np.ndarray) -> np.ndarray:
+    """For each segment start→end, whether any wall crosses it."""
+    result = np.zeros(len(ends), dtype=bool)
+    if not len(walls) or not len(ends):
+        return result
+
+    ax, ay = walls[:, 0], walls[:, 1]
+    ex, ey = walls[:, 2] - ax, walls[:, 3] - ay
+
+    step = max(1, MAX_PAIRS // len(walls))
+    for start in range(0, len(ends), step):
+        ox = starts[start:start + step, 0][:, None]
+        oy = starts[start:start + step, 1][:, None]
+        dx = ends[start:start + step, 0][:, None] - ox
+        dy = ends[start:start + step, 1][:, None] - oy
+        fx, fy = ax - ox, ay - oy
+        denom = dx * ey - dy * ex
+        parallel = np.abs(denom) < EPS
+        denom = np.where(parallel, 1.0, denom)
+        t = (fx * ey - fy * ex) / denom  # along start→end
+        u = (fx * dy - fy * dx) / denom  # along the wall
+        hit = ~parallel & (t > EPS) & (t < 1 - EPS) & (u >= -EPS) & (u <= 1 + EPS)
+        result[start:start + step] = hit.any(axis=1)
+    return result
+
+
+def blocked(origin: Point, targets: np.ndarray, walls: np.ndarray) -> np.ndarray:
+    """For each target point, whether a wall crosses the segment origin→target."""
+    starts = np.broadcast_to(np.asarray(origin, dtype=np.float64), (len(targets), 2))
+    return segments_cross(starts, targets, walls)
+
+
+def visibility_polygon(origin: Point, walls: np.ndarray, width: float, height: float) -> List[Point]:
+    """Visibility polygon from origin, clipped to the map rectangle.
+
+    Rays are cast at every wall endpoint and map corner (plus a small offset
+    to each side) and stopped at the nearest segment; the hit points sorted by
+    angle form the polygon.
+    """
+    border = np.array([
+        [0, 0, width, 0], [width, 0, width, height],
+        [width, height, 0, height], [0, height, 0, 0],
+    ], dtype=np.float64)
+    segments = np.vstack([walls, border]) if len(walls) else border
+
+    ox, oy = origin
+    corners = np.vstack([segments[:, :2], segments[:, 2:]])
+    base = np.arctan2(corners[:, 1] - oy, corners[:, 0] - ox)
+    angles = np.unique(np.concatenate([base - RAY_OFFSET, base, base + RAY_OFFSET]))
+
+    dx, dy = np.cos(angles)[:, None], np.sin(angles)[:, None]
+    ax, ay = segments[:, 0], segments[:, 1]
+    ex, ey = segments[:, 2] - ax, segments[:, 3] - ay
+    fx, fy = ax - ox, ay - oy
+
+    denom = dx * ey - dy * ex
+    parallel = np.abs(denom) < EPS
+    denom = np.where(parallel, 1.0, denom)
+    t = (fx * ey - fy * ex) / denom
+    u = (fx * dy - fy * dx) / denom
+    valid = ~parallel & (t > EPS) & (u >= -EPS) & (u <= 1 + EPS)
+    nearest = np.where(valid, t, np.inf).min(axis=1)
+
+    keep = np.isfinite(nearest)
+    xs = ox + dx[keep, 0] * nearest[keep]
+    ys = oy + dy[keep, 0] * nearest[keep]
+    return [(round(float(x), 2), round(float(y), 2)) for x, y in zip(xs, ys)]
+
+
+def encode_mask(mask: np.ndarray) -> str:
+    """Row-major bitmap packed 8 cells per byte, base64."""
+    return base64.b64encode(np.packbits(mask, axis=None).tobytes()).decode("ascii")
+
+
+@dataclass
+class Viewer:
+    """Token that gives sight to a player."""
+    player_id: int
+    x: float
+    y: float
+    mask: np.ndarray
+
+
+class MapFog:
+    """Visibility state of a single map."""
+
+    def __init__(self, map_id: str, width: int, height: int, cell_size: int, walls: np.ndarray):
+        self.map_id = map_id
+        self.width = float(width or 1920)
+        self.height = float(height or 1080)
+        self.cell_size = float(cell_size) if cell_size and cell_size > 0 else 50.0
+        self.cols = max(1, math.ceil(self.width / self.cell_size))
+        self.rows = max(1, math.ceil(self.height / self.cell_size))
+        self.walls = walls
+
+        cx = (np.arange(self.cols) + 0.5) * self.cell_size
+        cy = (np.arange(self.rows) + 0.5) * self.cell_size
+        gx, gy = np.meshgrid(cx, cy)
+        self._centers = np.column_stack([gx.ravel(), gy.ravel()])
+
+        self.viewers: Dict[str, Viewer] = {}
+        self.revealed: Dict[int, np.ndarray] = {}
+        self._visible: Dict[int, np.ndarray] = {}
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.rows, self.cols
+
+    def cell_of(self, x: float, y: float) -> Tuple[int, int]:
+        col = min(max(int((x or 0.0) // self.cell_size), 0), self.cols - 1)
+        row = min(max(int((y or 0.0) // self.cell_size), 0), self.rows - 1)
+        return row, col
+
+    def compute_mask(self, x: float, y: float) -> np.ndarray:
+        """Cells whose centre is in line of sight of (x, y)."""
+        mask = ~blocked((x, y), self._centers, self.walls).reshape(self.shape)
+        mask[self.cell_of(x, y)] = True  # A token always sees its own cell
+        return mask
+
+    def update_viewer(self, token_id: str, player_id: int, x: float, y: float) -> None:
+        """Add or move a sight-giving token and reveal what it now sees."""
+        viewer = self.viewers.get(token_id)
+        if viewer and (viewer.player_id, viewer.x, viewer.y) == (player_id, x, y):
+            return
+        if viewer and viewer.player_id != player_id:
+            self._visible.pop(viewer.player_id, None)
+
+        mask = self.compute_mask(x, y)
+        self.viewers[token_id] = Viewer(player_id, x, y, mask)
+        revealed = self.revealed.get(player_id)
+        self.revealed[player_id] = mask.copy() if revealed is None else revealed | mask
+        self._visible.pop(player_id, None)
+
+    def remove_viewer(self, token_id: str) -> Optional[int]:
+        viewer = self.viewers.pop(token_id, None)
+        if viewer is None:
+            return None
+        self._visible.pop(viewer.player_id, None)
+        return viewer.player_id
+
+    def set_walls(self, walls: np.ndarray) -> None:
+        """Replace walls and recompute every viewer (revealed areas are kept)."""
+        self.walls = walls
+        self._visible.clear()
+        for viewer in self.viewers.values():
+            viewer.mask = self.compute_mask(viewer.x, viewer.y)
+            self.revealed[viewer.player_id] = self.revealed.get(viewer.player_id, viewer.mask) | viewer.mask
+
+    def visible(self, player_id: int) -> np.ndarray:
+        """Union of what the player's tokens currently see."""
+        mask = self._visible.get(player_id)
+        if mask is None:
+            mask = np.zeros(self.shape, dtype=bool)
+            for viewer in self.viewers.values():
+                if viewer.player_id == player_id:
+                    mask |= viewer.mask
+            self._visible[player_id] = mask
+        return mask
+
+    def revealed_mask(self, player_id: int) -> np.ndarray:
+        mask = self.revealed.get(player_id)
+        return mask if mask is not None else np.zeros(self.shape, dtype=bool)
+
+    def can_see(self, player_id: int, x: float, y: float, layer: Optional[str] = "tokens") -> bool:
+        """Whether a token at (x, y) is visible to the player.
+
+        Hidden-layer tokens are never visible to players; background tokens
+        stay visible once their cell has been revealed.
+        """
+        if layer == "hidden":
+            return False
+        cell = self.cell_of(x, y)
+        if layer == "background":
+            return bool(self.revealed_mask(player_id)[cell])
+        return bool(self.visible(player_id)[cell])
+
+    def visible_token_ids(self, player_id: int, tokens: Iterable) -> Set[str]:
+        """Ids of the given indexed tokens (id, x, y, layer) the player sees."""
+        return {t.id for t in tokens if self.can_see(player_id, t.x, t.y, t.layer)}
+
+    def polygons(self, player_id: int) -> Dict[str, List[Point]]:
+        return {
+            token_id: visibility_polygon((v.x, v.y), self.walls, self.width, self.height)
+            for token_id, v in self.viewers.items()
+            if v.player_id == player_id
+        }
+
+
+class FogRegistry:
+    """In-process cache of map visibility keyed by map id."""
+
+    def __init__(self):
+        self._fogs: Dict[str, MapFog] = {}
+
+    def get(self, db: DBSession, map_obj: Map) -> MapFog:
+        fog = self._fogs.get(map_obj.id)
+        if fog is None:
+            fog = self.build(db, map_obj)
+            self._fogs[map_obj.id] = fog
+        return fog
+
+    @staticmethod
+    def build(db: DBSession, map_obj: Map) -> MapFog:
+        """Build map visibility from one query for walls and one for tokens."""
+        walls = db.query(MapWall.x1, MapWall.y1, MapWall.x2, MapWall.y2).filter(
+            MapWall.map_id == map_obj.id
+        ).all()
+        fog = MapFog(map_obj.id, map_obj.width, map_obj.height, map_obj.grid_scale, walls_array(walls))
+
+        viewers = (
+            db.query(MapToken.id, MapToken.x, MapToken.y, Character.player_id)
+            .join(Character, Character.id == MapToken.character_id)
+            .filter(MapToken.map_id == map_obj.id)
+            .all()
+        )
+        for token_id, x, y, player_id in viewers:
+            fog.update_viewer(token_id, player_id, x or 0.0, y or 0.0)
+        return fog
+
+    def cached(self, map_id: str) -> Optional[MapFog]:
+        return self._fogs.get(map_id)
+
+    def reload_walls(self, db: DBSession, map_obj: Map) -> None:
+        fog = self._fogs.get(map_obj.id)
+        if fog is not None:
+            walls = db.query(MapWall.x1, MapWall.y1, MapWall.x2, MapWall.y2).filter(
+                MapWall.map_id == map_obj.id
+            ).all()
+            fog.set_walls(walls_array(walls))
+
+    def discard(self, map_id: str) -> None:
+        self._fogs.pop(map_id, None)
+
+    def clear(self) -> None:
+        self._fogs.clear()
+
+
+# Global registry instance
+fog_states = FogRegistry()
@@ -1,11 +1,14 @@
 import logging
+import math
 from typing import Optional
 
 from sqlalchemy.orm import Session as DBSession
 
-from app.websocket.manager import manager
+from app.websocket.manager import manager, Viewport
 from app.services.dice import DiceService
 from app.models.player import Player
+from app.core.session_versions import session_versions
+from app.services.spatial import DEFAULT_VIEWPORT_MARGIN, MAX_VIEWPORT_MARGIN, MAX_VIEWPORT_SIZE
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +30,7 @@ async def handle_message(
         "roll_dice": handle_roll_dice,
         "chat": handle_chat,
         "explicit_leave": handle_explicit_leave,
+        "set_viewport": handle_set_viewport,
     }
 
     handler = handlers.get(msg_type)
@@ -101,9 +105,45 @@ async def handle_explicit_leave(
 
     player.left_at = datetime.utcnow()
     db.commit()
+    session_versions.bump(player.session_id)
     logger.info(f"Player {player.name} explicitly left session")
 
     await manager.send_personal(token, {
         "type": "leave_confirmed",
         "payload": {"message": "You have left the session"}
     })
+
+
+async def handle_set_viewport(
+    db: DBSession,
+    token: str,
+    player: Player,
+    payload: dict
+):
+    """Subscribe to token events of a map region only.
+
+    Payload: {map_id, x, y, width, height, margin?}. Without map_id the
+    viewport is cleared and the client gets every token event again.
+    """
+    map_id = payload.get("map_id")
+    if not map_id:
+        manager.set_viewport(token, None)
+        return
+
+    x = float(payload["x"])
+    y = float(payload["y"])
+    width = float(payload["width"])
+    height = float(payload["height"])
+    margin = float(payload.get("margin", DEFAULT_VIEWPORT_MARGIN))
+    if not all(math.isfinite(v) for v in (x, y, width, height, margin)):
+        raise ValueError("Invalid viewport")
+    if not (0 < width <= MAX_VIEWPORT_SIZE and 0 < height <= MAX_VIEWPORT_SIZE and 0 <= margin <= MAX_VIEWPORT_MARGIN):
+        raise ValueError("Invalid viewport size")
+
+    manager.set_viewport(token, Viewport(
+        map_id=str(map_id),
+        x0=x - margin,
+        y0=y - margin,
+        x1=x + width + margin,
+        y1=y + height + margin,
+    ))
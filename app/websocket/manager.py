@@ -1,6 +1,7 @@
 import asyncio
 import logging
-from typing import Dict, Optional
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
 
 from fastapi import WebSocket
 from starlette.websockets import WebSocketState
@@ -8,6 +9,22 @@ from starlette.websockets import WebSocketState
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class Viewport:
+    """Visible map region of a client, in map pixels (margin included)."""
+    map_id: str
+    x0: float
+    y0: float
+    x1: float
+    y1: float
+
+    def contains(self, x: float, y: float, radius: float = 0.0) -> bool:
+        return (
+            self.x0 - radius <= x <= self.x1 + radius
+            and self.y0 - radius <= y <= self.y1 + radius
+        )
+
+
 class ConnectionManager:
     def __init__(self):
         # Map: player_token -> WebSocket
@@ -18,6 +35,11 @@ class ConnectionManager:
         # Grace period timers for temporary disconnects
         self._grace_timers: Dict[str, asyncio.Task] = {}
         self._grace_period = 300  # 5 minutes in seconds
+        # Map: player_token -> visible map region (set via WS "set_viewport")
+        self.viewports: Dict[str, Viewport] = {}
+        # Sequence number of the last broadcast; sent as "seq" with every
+        # broadcast and in GET /api/session/snapshot
+        self.event_seq = 0
 
     async def connect(self, websocket: WebSocket, token: str, player_id: int):
         """Accept a new WebSocket connection."""
@@ -45,6 +67,7 @@ class ConnectionManager:
             player_id = self.token_to_player.get(token)
             self.active_connections.pop(token, None)
             self.token_to_player.pop(token, None)
+            self.viewports.pop(token, None)
         logger.info(f"Disconnected player {player_id} with token {token[:8]}...")
 
     def get_player_id(self, token: str) -> Optional[int]:
@@ -63,6 +86,7 @@ class ConnectionManager:
         async with self._lock:
             self.active_connections.pop(token, None)
             self.token_to_player.pop(token, None)
+            self.viewports.pop(token, None)
         logger.warning(f"Removed dead connection for token {token[:8]}...")
 
     async def _remove_dead_batch(self, tokens: list):
@@ -73,6 +97,7 @@ class ConnectionManager:
             for token in tokens:
                 self.active_connections.pop(token, None)
                 self.token_to_player.pop(token, None)
+                self.viewports.pop(token, None)
         logger.warning(f"Removed {len(tokens)} dead connection(s)")
 
     async def send_personal(self, token: str, data: dict):
@@ -85,8 +110,27 @@ class ConnectionManager:
                 logger.error(f"Error sending to {token[:8]}...: {e}")
                 await self._remove_dead(token)
 
+    def set_viewport(self, token: str, viewport: Optional[Viewport]):
+        """Set or clear (None) the visible map region of a client."""
+        if viewport is None:
+            self.viewports.pop(token, None)
+        else:
+            self.viewports[token] = viewport
+
     async def broadcast(self, data: dict, exclude_token: Optional[str] = None):
         """Send message to all connected players."""
+        await self.broadcast_filtered(data, None, exclude_token=exclude_token)
+
+    async def broadcast_filtered(
+        self,
+        data: dict,
+        predicate: Optional[Callable[[str], bool]],
+        exclude_token: Optional[str] = None
+    ):
+        """Send message to connected players whose token passes predicate."""
+        self.event_seq += 1
+        data = {**data, "seq": self.event_seq}
+
         # Snapshot connections under lock
         async with self._lock:
             connections = list(self.active_connections.items())
@@ -95,6 +139,8 @@ class ConnectionManager:
         for token, websocket in connections:
             if exclude_token and token == exclude_token:
                 continue
+            if predicate is not None and not predicate(token):
+                continue
             if not self._is_connected(websocket):
                 dead_tokens.append(token)
                 continue
@@ -118,15 +164,97 @@ class ConnectionManager:
             exclude_token=exclude_token
         )
 
+    async def broadcast_token_event(
+        self,
+        event_type: str,
+        payload: dict,
+        map_id: str,
+        points: Iterable[Tuple[float, float]],
+        radius: float = 0.0,
+        exclude_token: Optional[str] = None,
+        audience: Optional[Set[int]] = None
+    ):
+        """Broadcast a token event only to clients that can see it.
+
+        Clients without a viewport get every event. Clients with a viewport
+        get it only if it is on the same map and one of ``points`` (e.g. old
+        and new token position) is inside it. ``audience`` (player ids)
+        further limits recipients, e.g. to players whose fog of war allows it.
+        """
+        points = list(points)
+
+        def visible(token: str) -> bool:
+            if audience is not None and self.token_to_player.get(token) not in audience:
+                return False
+            viewport = self.viewports.get(token)
+            if viewport is None:
+                return True
+            if viewport.map_id != map_id:
+                return False
+            return any(viewport.contains(x, y, radius) for x, y in points)
+
+        await self.broadcast_filtered(
+            {"type": event_type, "payload": payload},
+            visible,
+            exclude_token=exclude_token
+        )
+
+    async def broadcast_token_moved(
+        self,
+        payload: dict,
+        token_payload: dict,
+        map_id: str,
+        old: Tuple[float, float, float],
+        new: Tuple[float, float, float],
+        exclude_token: Optional[str] = None,
+        audience: Optional[Set[int]] = None
+    ):
+        """Broadcast a token change, turned into enter/leave per viewport.
+
+        ``old``/``new`` are (x, y, radius) before and after the change.
+        Clients without a viewport, or that see the token both before and
+        after, get ``token_updated`` with ``payload`` (partial changes).
+        A client whose viewport the token entered has never loaded it and
+        gets ``token_added`` with the full ``token_payload``; one it left
+        gets ``token_removed``.
+        """
+        def states(token: str) -> Tuple[bool, bool]:
+            if audience is not None and self.token_to_player.get(token) not in audience:
+                return False, False
+            viewport = self.viewports.get(token)
+            if viewport is None:
+                return True, True
+            if viewport.map_id != map_id:
+                return False, False
+            return viewport.contains(*old), viewport.contains(*new)
+
+        await self.broadcast_filtered(
+            {"type": "token_updated", "payload": payload},
+            lambda token: states(token) == (True, True),
+            exclude_token=exclude_token
+        )
+        await self.broadcast_filtered(
+            {"type": "token_added", "payload": {"map_id": map_id, "token": token_payload}},
+            lambda token: states(token) == (False, True),
+            exclude_token=exclude_token
+        )
+        await self.broadcast_filtered(
+            {"type": "token_removed", "payload": {"map_id": map_id, "token_id": token_payload["id"]}},
+            lambda token: states(token) == (True, False),
+            exclude_token=exclude_token
+        )
+
     async def _mark_as_left(self, token: str, db):
         """Mark player as left after grace period expires."""
         from app.models.player import Player
+        from app.core.session_versions import session_versions
         from datetime import datetime
 
         player = db.query(Player).filter(Player.token == token).first()
         if player and player.left_at is None:
             player.left_at = datetime.utcnow()
             db.commit()
+            session_versions.bump(player.session_id)
             logger.info(f"Grace period expired for player {player.name}, marked as left")
 
     async def _grace_period_timer(self, token: str):
@@ -5,6 +5,7 @@ import type {
   SessionJoin,
   SessionJoinResponse,
   Session,
+  SessionBootstrap,
   Player,
   Character,
   CharacterCreate,
@@ -18,6 +19,15 @@ import type {
   InitiativeRollResponse,
   InitiativeListResponse,
   GameMap,
+  GameMapSummary,
+  MapViewport,
+  MapWall,
+  MapVisibility,
+  MapPath,
+  MapReachable,
+  MapBackgroundUpload,
+  UploadVariants,
+  AvatarJob,
   MapCreate,
   MapToken,
   MapTokenCreate,
@@ -182,6 +192,11 @@ export const sessionApi = {
     return response.data
   },
 
+  getSnapshot: async (): Promise<SessionBootstrap> => {
+    const response = await api.get<SessionBootstrap>('/session/snapshot')
+    return response.data
+  },
+
   getPlayers: async (): Promise<Player[]> => {
     const response = await api.get<Player[]>('/session/players')
     return response.data
@@ -234,8 +249,9 @@ export const charactersApi = {
     await api.delete(`/characters/${characterId}`)
   },
 
-  generateAvatar: async (characterId: number): Promise<Character> => {
-    const response = await api.post<Character>(`/characters/${characterId}/generate-avatar`)
+  // Queues generation; the character arrives via character_updated / avatar_ready
+  generateAvatar: async (characterId: number): Promise<AvatarJob> => {
+    const response = await api.post<AvatarJob>(`/characters/${characterId}/generate-avatar`)
     return response.data
   }
 }
@@ -342,6 +358,17 @@ export const persistenceApi = {
   validateImport: async (data: any): Promise<any> => {
     const response = await api.post('/session/validate', { data })
     return response.data
+  },
+
+  // Streaming import of an export file (.json / .json.gz / .json.zst), validated server-side
+  importSessionFile: async (file: File, newSessionCode?: string): Promise<any> => {
+    const formData = new FormData()
+    formData.append('file', file)
+    if (newSessionCode) formData.append('new_session_code', newSessionCode)
+    const response = await api.post('/session/import/file', formData, {
+      headers: { 'Content-Type': 'multipart/form-data' }
+    })
+    return response.data
   }
 }
 
@@ -352,11 +379,24 @@ export const mapsApi = {
     return response.data
   },
 
+  summary: async (): Promise<GameMapSummary[]> => {
+    const response = await api.get<GameMapSummary[]>('/session/maps/summary')
+    return response.data
+  },
+
   get: async (mapId: string): Promise<GameMap> => {
     const response = await api.get<GameMap>(`/maps/${mapId}`)
     return response.data
   },
 
+  viewport: async (
+    mapId: string,
+    rect: { x: number; y: number; width: number; height: number; margin?: number }
+  ): Promise<MapViewport> => {
+    const response = await api.get<MapViewport>(`/maps/${mapId}/viewport`, { params: rect })
+    return response.data
+  },
+
   create: async (data: MapCreate): Promise<GameMap> => {
     const response = await api.post<GameMap>('/session/maps', data)
     return response.data
@@ -381,6 +421,60 @@ export const mapsApi = {
     await api.delete(`/tokens/${tokenId}`)
   },
 
+  setFog: async (mapId: string, fogEnabled: boolean): Promise<GameMap> => {
+    const response = await api.put<GameMap>(`/maps/${mapId}/fog`, { fog_enabled: fogEnabled })
+    return response.data
+  },
+
+  listWalls: async (mapId: string): Promise<MapWall[]> => {
+    const response = await api.get<MapWall[]>(`/maps/${mapId}/walls`)
+    return response.data
+  },
+
+  addWall: async (mapId: string, wall: Omit<MapWall, 'id' | 'map_id'>): Promise<MapWall> => {
+    const response = await api.post<MapWall>(`/maps/${mapId}/walls`, wall)
+    return response.data
+  },
+
+  deleteWall: async (wallId: string): Promise<void> => {
+    await api.delete(`/walls/${wallId}`)
+  },
+
+  visibility: async (mapId: string, playerId?: number): Promise<MapVisibility> => {
+    const response = await api.get<MapVisibility>(`/maps/${mapId}/visibility`, {
+      params: playerId !== undefined ? { player_id: playerId } : undefined
+    })
+    return response.data
+  },
+
+  getTerrain: async (mapId: string): Promise<{ map_id: string; difficult: [number, number][] }> => {
+    const response = await api.get(`/maps/${mapId}/terrain`)
+    return response.data
+  },
+
+  updateTerrain: async (
+    mapId: string,
+    changes: { add?: [number, number][]; remove?: [number, number][] }
+  ): Promise<{ map_id: string; difficult: [number, number][] }> => {
+    const response = await api.patch(`/maps/${mapId}/terrain`, changes)
+    return response.data
+  },
+
+  path: async (
+    mapId: string,
+    params: { to_x: number; to_y: number; token_id?: string; from_x?: number; from_y?: number }
+  ): Promise<MapPath> => {
+    const response = await api.get<MapPath>(`/maps/${mapId}/path`, { params })
+    return response.data
+  },
+
+  reachable: async (mapId: string, tokenId: string, speed = 30): Promise<MapReachable> => {
+    const response = await api.get<MapReachable>(`/maps/${mapId}/reachable`, {
+      params: { token_id: tokenId, speed }
+    })
+    return response.data
+  },
+
   saveToLibrary: async (mapId: string): Promise<{ message: string; user_map_id: string }> => {
     const response = await api.post<{ message: string; user_map_id: string }>(`/maps/${mapId}/save-to-library`)
     return response.data
@@ -437,12 +531,30 @@ export const userCharactersApi = {
     await api.delete(`/me/characters/${id}`)
   },
 
-  generateAvatar: async (id: number): Promise<UserCharacter> => {
-    const response = await api.post<UserCharacter>(`/me/characters/${id}/generate-avatar`)
+  generateAvatar: async (id: number): Promise<AvatarJob> => {
+    const response = await api.post<AvatarJob>(`/me/characters/${id}/generate-avatar`)
     return response.data
   }
 }
 
+const AVATAR_POLL_INTERVAL = 2000
+
+export const avatarJobsApi = {
+  get: async (jobId: string): Promise<AvatarJob> => {
+    const response = await api.get<AvatarJob>(`/avatar-jobs/${jobId}`)
+    return response.data
+  },
+
+  /** Poll a job until it is done or failed */
+  wait: async (job: AvatarJob): Promise<AvatarJob> => {
+    while (job.status === 'queued' || job.status === 'running') {
+      await new Promise(resolve => setTimeout(resolve, AVATAR_POLL_INTERVAL))
+      job = await avatarJobsApi.get(job.id)
+    }
+    return job
+  }
+}
+
 // User Maps API
 export const userMapsApi = {
   list: async (): Promise<UserMap[]> => {
@@ -469,10 +581,10 @@ export const userMapsApi = {
     await api.delete(`/me/maps/${id}`)
   },
 
-  uploadBackground: async (file: File): Promise<{ url: string; width: number; height: number }> => {
+  uploadBackground: async (file: File): Promise<MapBackgroundUpload> => {
     const formData = new FormData()
     formData.append('file', file)
-    const response = await api.post<{ url: string; width: number; height: number }>(
+    const response = await api.post<MapBackgroundUpload>(
       '/me/maps/upload-background',
       formData,
       { headers: { 'Content-Type': 'multipart/form-data' } }
@@ -495,5 +607,12 @@ export const userMapsApi = {
   }
 }
 
+export const uploadsApi = {
+  variants: async (digest: string): Promise<UploadVariants> => {
+    const response = await api.get<UploadVariants>(`/uploads/${digest}/variants`)
+    return response.data
+  }
+}
+
 export { api }
 export default api
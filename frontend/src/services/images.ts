@@ -0,0 +1,32 @@
+import type { ImageVariant } from '@/types/models'
+
+// Content-addressed uploads: /uploads/blobs/{sha[:2]}/{sha}.{ext}, files derived
+// from them (tile pyramid, WebP variants) live in /uploads/blobs/{sha[:2]}/{sha}/
+const BLOB_URL = /^(\/uploads\/blobs\/[0-9a-f]{2}\/([0-9a-f]{64}))\.[a-z]+$/
+// Older uuid-named map backgrounds: /uploads/maps/{id}.jpg -> /uploads/maps/{id}/
+const LEGACY_MAP_URL = /^(\/uploads\/maps\/[0-9a-f-]+)\.(jpg|png)$/
+
+export function blobDigest(url: string): string | null {
+  const match = url.match(BLOB_URL)
+  return match ? match[2] : null
+}
+
+/** Low-res preview of an uploaded map background */
+export function previewUrl(url: string): string | null {
+  const blob = url.match(BLOB_URL)
+  if (blob) return `${blob[1]}/tiles/preview.webp`
+  const legacy = url.match(LEGACY_MAP_URL)
+  return legacy ? `${legacy[1]}/preview.webp` : null
+}
+
+/** Avatar thumbnail (48, 96 or 256 px wide); other URLs are returned as is */
+export function thumbnailUrl(url: string, width: 48 | 96 | 256): string {
+  const blob = url.match(BLOB_URL)
+  return blob ? `${blob[1]}/w${width}.webp` : url
+}
+
+/** Narrowest variant at least minWidth wide, or null if the original is needed */
+export function pickVariant(variants: ImageVariant[], minWidth: number): ImageVariant | null {
+  const fitting = variants.filter(v => v.width >= minWidth)
+  return fitting.length ? fitting.reduce((a, b) => (a.width <= b.width ? a : b)) : null
+}
@@ -156,6 +156,19 @@ export const useCombatStore = defineStore('combat', () => {
                 return b.roll - a.roll
             })
         })
+
+        // Positional delta: server sends the rank of the new roll in the sorted list
+        wsService.on('initiative_inserted', (data: {
+            combat_id: number
+            rank: number
+            entry: InitiativeEntry
+        }) => {
+            const list = initiativeList.value.filter(e => data.entry.is_npc
+                ? !(e.is_npc && e.character_id === data.entry.character_id)
+                : !(!e.is_npc && e.player_id === data.entry.player_id))
+            list.splice(data.rank, 0, data.entry)
+            initiativeList.value = list
+        })
     }
 
     function closeInitiativeModal() {
@@ -169,6 +169,25 @@ export const useMapStore = defineStore('map', () => {
             }
         })
 
+        // Own token moved: tokens that came into / went out of sight
+        wsService.on('fog_updated', (data: { map_id: string, tokens: MapToken[], hidden_token_ids: string[] }) => {
+            const map = maps.value.find(m => m.id === data.map_id)
+            if (map) {
+                const hidden = new Set(data.hidden_token_ids)
+                map.tokens = map.tokens.filter(t => !hidden.has(t.id))
+                for (const token of data.tokens) {
+                    if (!map.tokens.find(t => t.id === token.id)) {
+                        map.tokens.push(token)
+                    }
+                }
+            }
+        })
+
+        // Fog toggled or walls changed — visible tokens need a refetch
+        wsService.on('fog_changed', () => {
+            fetchSessionMaps()
+        })
+
         wsService.on('map_created', (data: { map: GameMap }) => {
             if (!maps.value.find(m => m.id === data.map.id)) {
                 maps.value.push(data.map)
@@ -23,6 +23,12 @@ export interface CharacterUpdatedEvent {
   character: Character
 }
 
+export interface AvatarReadyEvent {
+  job_id: string
+  character_id: number
+  avatar_url: string
+}
+
 export interface CharacterDeletedEvent {
   character_id: number
 }
@@ -74,6 +80,7 @@ export type WebSocketEvent =
   | { type: 'player_left'; payload: PlayerLeftEvent }
   | { type: 'character_created'; payload: CharacterCreatedEvent }
   | { type: 'character_updated'; payload: CharacterUpdatedEvent }
+  | { type: 'avatar_ready'; payload: AvatarReadyEvent }
   | { type: 'character_deleted'; payload: CharacterDeletedEvent }
   | { type: 'dice_result'; payload: DiceResultEvent }
   | { type: 'combat_started'; payload: CombatStartedEvent }
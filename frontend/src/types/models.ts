@@ -391,6 +391,106 @@ export interface GameMap {
   height: number
   grid_scale: number
   is_active: boolean
+  fog_enabled?: boolean
+  tokens: MapToken[]
+}
+
+export interface SessionBootstrap {
+  session: Session
+  players: Player[]
+  characters: Character[]
+  maps: GameMap[]
+  combat: Combat | { active: false }
+  // WebSocket messages with seq <= event_seq are already included
+  event_seq: number
+}
+
+export interface MapWall {
+  id: string
+  map_id: string
+  x1: number
+  y1: number
+  x2: number
+  y2: number
+}
+
+export interface AvatarJob {
+  id: string
+  status: 'queued' | 'running' | 'done' | 'failed'
+  avatar_url: string | null
+  error: string | null
+}
+
+export interface ImageVariant {
+  width: number
+  height: number
+  url: string
+}
+
+export interface MapBackgroundUpload {
+  url: string
+  width: number
+  height: number
+  // Deep-Zoom pyramid: {tiles_url}/manifest.json, {tiles_url}/{z}/{x}_{y}.webp
+  tiles_url: string
+  preview_url: string
+  // WebP copies at smaller widths (built in the background), widest first
+  variants: ImageVariant[]
+}
+
+export interface UploadVariants {
+  url: string
+  size: number
+  variants: ImageVariant[]
+}
+
+export interface MapPath {
+  map_id: string
+  found: boolean
+  cost: number  // feet
+  cells: [number, number][]  // [col, row]
+  points: [number, number][]  // cell centres
+}
+
+export interface MapReachable {
+  map_id: string
+  token_id: string
+  speed: number
+  cells: [number, number, number][]  // [col, row, cost_ft]
+}
+
+export interface MapVisibility {
+  map_id: string
+  player_id: number
+  fog_enabled: boolean
+  cell_size: number
+  rows: number
+  cols: number
+  visible: string  // base64 bitmap, row-major, 8 cells per byte
+  revealed: string
+  polygons: Record<string, [number, number][]>
+}
+
+export interface GameMapSummary {
+  id: string
+  session_id: number
+  name: string
+  background_url?: string | null
+  width: number
+  height: number
+  grid_scale: number
+  is_active: boolean
+  fog_enabled?: boolean
+  token_count: number
+}
+
+export interface MapViewport {
+  map_id: string
+  x: number
+  y: number
+  width: number
+  height: number
+  margin: number
   tokens: MapToken[]
 }
 
@@ -0,0 +1,120 @@
+"""Benchmark session import on a synthetic session.
+
+Builds an export with many characters, each carrying items and spells, and
+times ``import_session`` into a fresh SQLite file database.
+
+    python scripts/bench_import.py
+    python scripts/bench_import.py --characters 200 --items 20 --spells 10 --repeat 5
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+import app.models  # noqa: E402,F401  (register every table)
+import app.models.map  # noqa: E402,F401
+from app.database import Base  # noqa: E402
+from app.services.persistence import import_session  # noqa: E402
+from app.services.persistence.migrations import CURRENT_FORMAT_VERSION  # noqa: E402
+
+
+def build_export(characters: int, items: int, spells: int, players: int = 5) -> dict:
+    player_rows = [{"id": 1, "name": "Game Master", "is_gm": True}]
+    player_rows += [{"id": i + 2, "name": f"Player {i}", "is_gm": False} for i in range(players)]
+
+    char_rows, item_rows, spell_rows = [], [], []
+    for c in range(characters):
+        char_id = c + 1
+        char_rows.append({
+            "id": char_id,
+            "player_id": 2 + c % players,
+            "name": f"Hero {c}",
+            "class_name": "fighter",
+            "level": 3,
+            "max_hp": 30,
+            "current_hp": 30,
+        })
+        for i in range(items):
+            item_rows.append({
+                "id": len(item_rows) + 1,
+                "character_id": char_id,
+                "name": f"Item {i}",
+                "description": "A synthetic item",
+                "effects": {"str_bonus": 1} if i % 3 == 0 else None,
+                "is_equipped": i % 2 == 0,
+            })
+        for s in range(spells):
+            spell_rows.append({
+                "id": len(spell_rows) + 1,
+                "character_id": char_id,
+                "name": f"Spell {s}",
+                "level": s % 10,
+                "description": "A synthetic spell",
+                "damage_dice": "2d6",
+            })
+
+    return {
+        "format_version": CURRENT_FORMAT_VERSION,
+        "entities": {
+            "players": {"version": 1, "data": player_rows},
+            "characters": {"version": 1, "data": char_rows},
+            "items": {"version": 1, "data": item_rows},
+            "spells": {"version": 1, "data": spell_rows},
+        },
+    }
+
+
+def run_once(data: dict) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+
+        @event.listens_for(engine, "connect")
+        def _fk_on(dbapi_conn, _record):
+            dbapi_conn.execute("PRAGMA foreign_keys=ON")
+
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+        try:
+            start = time.perf_counter()
+            result = import_session(db, data)
+            elapsed = time.perf_counter() - start
+            if not result.success:
+                raise SystemExit(f"Import failed: {result.errors}")
+            return elapsed
+        finally:
+            db.close()
+            engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--characters", type=int, default=100)
+    parser.add_argument("--items", type=int, default=30, help="items per character")
+    parser.add_argument("--spells", type=int, default=20, help="spells per character")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data = build_export(args.characters, args.items, args.spells)
+    rows = sum(len(e["data"]) for e in data["entities"].values())
+    times = [run_once(data) for _ in range(args.repeat)]
+    best = min(times)
+    print(
+        f"{rows} rows ({args.characters} characters, "
+        f"{args.characters * args.items} items, {args.characters * args.spells} spells)"
+    )
+    print(
+        f"import: best {best * 1000:.0f} ms, median {statistics.median(times) * 1000:.0f} ms, "
+        f"{rows / best:.0f} rows/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
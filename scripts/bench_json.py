@@ -0,0 +1,99 @@
+"""Benchmark JSON encoding of hot list responses.
+
+Compares what FastAPI does for a ``response_model`` route (Pydantic
+validation from attributes + stdlib ``JSONResponse``) with the compiled
+serializers and ``FastJSONResponse`` from ``app.core.fast_json``, on
+transient ORM objects (no database involved).
+
+    python scripts/bench_json.py
+    python scripts/bench_json.py --maps 20 --tokens 200 --characters 200 --repeat 20
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import TypeAdapter  # noqa: E402
+from starlette.responses import JSONResponse  # noqa: E402
+
+import app.models  # noqa: E402,F401  (configure every mapper)
+from app.core.fast_json import FastJSONResponse, orjson, serialize_many  # noqa: E402
+from app.models.character import Character  # noqa: E402
+from app.models.map import Map, MapToken  # noqa: E402
+from app.schemas.character import CharacterResponse  # noqa: E402
+from app.schemas.map import MapResponse  # noqa: E402
+
+
+def build_maps(maps: int, tokens: int) -> List[Map]:
+    result = []
+    for m in range(maps):
+        map_obj = Map(id=f"map-{m}", session_id=1, name=f"Map {m}", width=2000, height=1500,
+                      grid_scale=50, is_active=m == 0, fog_enabled=False)
+        map_obj.tokens = [
+            MapToken(id=f"tok-{m}-{t}", map_id=map_obj.id, type="monster", x=t * 12.5, y=t * 7.25,
+                     scale=1.0, rotation=0.0, layer="tokens", label=f"Goblin {t}", color="#00ff00",
+                     icon=None, character_id=None)
+            for t in range(tokens)
+        ]
+        result.append(map_obj)
+    return result
+
+
+def build_characters(count: int) -> List[Character]:
+    return [
+        Character(id=c + 1, player_id=1, name=f"Hero {c}", class_name="fighter", level=3,
+                  strength=16, dexterity=14, constitution=14, intelligence=10, wisdom=12,
+                  charisma=8, max_hp=30, current_hp=30, armor_class=16, appearance=None,
+                  avatar_url=None)
+        for c in range(count)
+    ]
+
+
+def best_of(repeat: int, fn) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def compare(name: str, model, objs, repeat: int) -> None:
+    adapter = TypeAdapter(List[model])
+
+    def legacy():
+        validated = adapter.validate_python(objs, from_attributes=True)
+        return JSONResponse(adapter.dump_python(validated, mode="json")).body
+
+    def fast():
+        return FastJSONResponse(serialize_many(model, objs)).body
+
+    assert legacy() == fast(), f"{name}: output differs"
+    slow, quick = best_of(repeat, legacy), best_of(repeat, fast)
+    print(
+        f"{name}: response_model + json {slow * 1000:.2f} ms, "
+        f"compiled + {'orjson' if orjson else 'json'} {quick * 1000:.2f} ms "
+        f"({slow / quick:.1f}x, {len(fast()) // 1024} KiB)"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--maps", type=int, default=10)
+    parser.add_argument("--tokens", type=int, default=100, help="tokens per map")
+    parser.add_argument("--characters", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    compare(f"{args.maps} maps x {args.tokens} tokens", MapResponse,
+            build_maps(args.maps, args.tokens), args.repeat)
+    compare(f"{args.characters} characters", CharacterResponse,
+            build_characters(args.characters), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,15 +8,17 @@ from app.database import Base, get_db
 from app.core.auth import create_access_token, hash_password
 # Import ALL models so relationships resolve before create_all
 from app.models.session import Session
+from app.models.session_snapshot import SessionSnapshot  # noqa: F401
 from app.models.player import Player
 from app.models.character import Character
 from app.models.user import User
 from app.models.item import Item  # noqa: F401
 from app.models.spell import Spell  # noqa: F401
-from app.models.combat import Combat, CombatParticipant, InitiativeRoll  # noqa: F401
-from app.models.map import Map, MapToken  # noqa: F401
+from app.models.combat import Combat, CombatParticipant, InitiativeRoll, CombatEvent, CombatSnapshot  # noqa: F401
+from app.models.map import Map, MapToken, MapWall  # noqa: F401
 from app.models.user_character import UserCharacter  # noqa: F401
 from app.models.user_map import UserMap, UserMapToken  # noqa: F401
+from app.models.upload_blob import UploadBlob  # noqa: F401
 
 
 @pytest.fixture(scope="session")
@@ -241,3 +241,47 @@ class TestCharacterAvatar:
         assert data["name"] == "TestNPC"
         assert data["avatar_url"] == avatar_url
         assert data["appearance"] == appearance
+
+    async def test_generate_avatar_queues_job(self, client, db, tmp_path):
+        """Generation runs in the background; the job finishes with avatar_ready."""
+        import io
+        from PIL import Image
+        from sqlalchemy.orm import sessionmaker
+        from app.services.avatar_jobs import avatar_queue
+
+        resp, _, _ = await create_session_with_user(client)
+        headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+        with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock):
+            char = (await client.post("/api/characters", json={
+                "name": "Painted", "class_name": "Bard", "max_hp": 8,
+                "appearance": "a bard with a lute and a green hat",
+            }, headers=headers)).json()
+
+        async def fake_generator(appearance):
+            buf = io.BytesIO()
+            Image.new("RGB", (128, 128), (20, 120, 40)).save(buf, format="JPEG")
+            return buf.getvalue()
+
+        with patch.object(avatar_queue, "generator", fake_generator), \
+                patch.object(avatar_queue, "session_factory", sessionmaker(bind=db.get_bind())), \
+                patch("app.services.blobs.BLOB_DIR", str(tmp_path)), \
+                patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock) as mock_bc:
+            resp = await client.post(f"/api/characters/{char['id']}/generate-avatar", headers=headers)
+            assert resp.status_code == 202
+            job = resp.json()
+            assert job["status"] == "queued"
+            await avatar_queue.join()
+
+            status = (await client.get(f"/api/avatar-jobs/{job['id']}")).json()
+            assert status["status"] == "done"
+            events = {c.args[0]: c.args[1] for c in mock_bc.call_args_list}
+            assert events["avatar_ready"] == {
+                "job_id": job["id"], "character_id": char["id"], "avatar_url": status["avatar_url"],
+            }
+
+            updated = (await client.get(f"/api/characters/{char['id']}", headers=headers)).json()
+            assert updated["avatar_url"] == status["avatar_url"]
+
+    async def test_avatar_job_not_found(self, client):
+        resp = await client.get("/api/avatar-jobs/missing")
+        assert resp.status_code == 404
@@ -362,3 +362,188 @@ class TestNPCInitiative:
         # All rolls should be between 5 and 24 (d20 + 4 modifier)
         for roll in rolls:
             assert 5 <= roll <= 24
+
+
+@pytest.mark.asyncio
+class TestSimulateEncounter:
+    async def test_gm_simulates_against_statblocks(self, client):
+        _, gm_h, _, _, player_char = await _setup_combat_session(client)
+
+        with patch("app.api.combat.get_settings") as mock_settings:
+            mock_settings.return_value.encounter_sim_workers = 0
+            resp = await client.post("/api/combat/simulate", json={
+                "npcs": [{"name": "Goblin", "armor_class": 13, "max_hp": 7,
+                          "attack_bonus": 4, "damage_dice": "1d6+2"}],
+                "iterations": 1000,
+            }, headers=gm_h)
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["iterations"] == 1000
+        assert 0.0 <= data["win_probability"] <= 1.0
+        names = [c["name"] for c in data["combatants"]]
+        assert names == ["PlayerChar", "Goblin"]
+        assert data["combatants"][0]["character_id"] == player_char["id"]
+
+    async def test_session_npc_as_enemy(self, client):
+        session_data, gm_h, _, _, player_char = await _setup_combat_session(client)
+        with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock):
+            npc_resp = await client.post("/api/characters", json={
+                "name": "Orc", "max_hp": 15, "strength": 16,
+            }, headers=gm_h)
+        npc_id = npc_resp.json()["id"]
+
+        with patch("app.api.combat.get_settings") as mock_settings:
+            mock_settings.return_value.encounter_sim_workers = 0
+            resp = await client.post("/api/combat/simulate", json={
+                "party_character_ids": [player_char["id"]],
+                "npc_character_ids": [npc_id],
+                "iterations": 500,
+            }, headers=gm_h)
+        assert resp.status_code == 200
+        sides = {c["name"]: c["side"] for c in resp.json()["combatants"]}
+        assert sides == {"PlayerChar": "party", "Orc": "enemies"}
+
+    async def test_requires_enemies(self, client):
+        _, gm_h, _, _, _ = await _setup_combat_session(client)
+        resp = await client.post("/api/combat/simulate", json={}, headers=gm_h)
+        assert resp.status_code == 400
+
+    async def test_player_cannot_simulate(self, client):
+        _, _, _, player_h, _ = await _setup_combat_session(client)
+        resp = await client.post("/api/combat/simulate", json={
+            "npcs": [{"name": "Goblin"}],
+        }, headers=player_h)
+        assert resp.status_code == 403
+
+
+@pytest.mark.asyncio
+class TestCombatJournalApi:
+    async def test_log_and_undo_damage(self, client):
+        _, gm_h, _, _, player_char = await _setup_combat_session(client)
+
+        with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock):
+            start = await client.post("/api/combat/start", json=[player_char["id"]], headers=gm_h)
+            participant_id = start.json()["participants"][0]["id"]
+            await client.post("/api/combat/action", json={
+                "action_type": "attack", "target_id": participant_id, "damage": 5,
+            }, headers=gm_h)
+
+            log = await client.get("/api/combat/log", headers=gm_h)
+            assert log.status_code == 200
+            types = [e["event_type"] for e in log.json()["events"]]
+            assert types == ["combat_started", "participant_added", "damage"]
+
+            resp = await client.post("/api/combat/undo", headers=gm_h)
+        assert resp.status_code == 200
+        assert resp.json()["participants"][0]["current_hp"] == 15
+
+        log = await client.get("/api/combat/log?after_seq=2", headers=gm_h)
+        assert log.json()["events"] == []
+
+        log = await client.get("/api/combat/log?limit=1", headers=gm_h)
+        assert len(log.json()["events"]) == 1
+        for limit in (-1, 0, 1001):
+            log = await client.get(f"/api/combat/log?limit={limit}", headers=gm_h)
+            assert log.status_code == 422
+
+    async def test_player_cannot_undo(self, client):
+        _, gm_h, _, player_h, _ = await _setup_combat_session(client)
+        with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock):
+            await client.post("/api/combat/start", headers=gm_h)
+        resp = await client.post("/api/combat/undo", headers=player_h)
+        assert resp.status_code == 403
+
+    async def test_remove_participant(self, client):
+        _, gm_h, _, _, player_char = await _setup_combat_session(client)
+        with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock):
+            start = await client.post("/api/combat/start", json=[player_char["id"]], headers=gm_h)
+            participant_id = start.json()["participants"][0]["id"]
+            resp = await client.delete(f"/api/combat/participants/{participant_id}", headers=gm_h)
+        assert resp.status_code == 200
+        assert resp.json()["participants"] == []
+
+
+@pytest.mark.asyncio
+class TestInitiativeIndexApi:
+    async def test_roll_broadcasts_positional_insert(self, client):
+        session_data, gm_h, _, player_h, _ = await _setup_combat_session(client)
+
+        with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock):
+            await client.post("/api/combat/start", headers=gm_h)
+
+        with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock) as mock_broadcast, \
+             patch("app.websocket.manager.manager.send_personal", new_callable=AsyncMock):
+            resp = await client.post("/api/combat/initiative", headers=player_h)
+        assert resp.status_code == 200
+
+        event, payload = mock_broadcast.call_args.args
+        assert event == "initiative_inserted"
+        assert payload["rank"] == 0
+        assert payload["entry"]["player_name"] == "CombatPlayer"
+        assert payload["entry"]["roll"] == resp.json()["roll"]
+
+    async def test_npc_rank_matches_list(self, client):
+        _, gm_h, _, player_h, _ = await _setup_combat_session(client)
+        with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock):
+            gm_npc = await client.post("/api/characters", json={"name": "Orc", "max_hp": 15}, headers=gm_h)
+            await client.post("/api/combat/start", headers=gm_h)
+            with patch("app.websocket.manager.manager.send_personal", new_callable=AsyncMock):
+                await client.post("/api/combat/initiative", headers=player_h)
+
+        with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock) as mock_broadcast:
+            resp = await client.post("/api/combat/initiative/npc",
+                                     params={"character_id": gm_npc.json()["id"]}, headers=gm_h)
+        assert resp.status_code == 200
+        inserted = [c.args[1] for c in mock_broadcast.call_args_list if c.args[0] == "initiative_inserted"]
+        assert len(inserted) == 1
+
+        entries = (await client.get("/api/combat/initiative", headers=gm_h)).json()["entries"]
+        assert entries[inserted[0]["rank"]]["character_name"] == "Orc"
+
+    async def test_stale_index_is_rebuilt_on_roll(self, client):
+        from app.services.initiative import initiative_indexes
+
+        session_data, gm_h, join_data, player_h, _ = await _setup_combat_session(client)
+        with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock):
+            await client.post("/api/combat/start", headers=gm_h)
+        await client.get("/api/combat/initiative", headers=gm_h)
+        # An index built before the player joined does not know them
+        for index in initiative_indexes._indexes.values():
+            index._pending.pop(join_data["player_id"], None)
+
+        with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock), \
+             patch("app.websocket.manager.manager.send_personal", new_callable=AsyncMock):
+            resp = await client.post("/api/combat/initiative", headers=player_h)
+        assert resp.status_code == 200
+
+    async def test_roll_unknown_to_index_is_404(self, client):
+        from app.services.initiative import InitiativeIndex, InitiativeIndexRegistry
+
+        _, gm_h, _, player_h, _ = await _setup_combat_session(client)
+        with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock):
+            await client.post("/api/combat/start", headers=gm_h)
+
+        empty = lambda db, combat: InitiativeIndex(combat.id, combat.session_id)
+        with patch.object(InitiativeIndexRegistry, "build", staticmethod(empty)):
+            resp = await client.post("/api/combat/initiative", headers=player_h)
+        assert resp.status_code == 404
+        # Nothing was recorded, so the player can still roll
+        with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock), \
+             patch("app.websocket.manager.manager.send_personal", new_callable=AsyncMock):
+            resp = await client.post("/api/combat/initiative", headers=player_h)
+        assert resp.status_code == 200
+
+    async def test_new_player_appears_in_list(self, client):
+        session_data, gm_h, _, _, _ = await _setup_combat_session(client)
+        with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock):
+            await client.post("/api/combat/start", headers=gm_h)
+        before = (await client.get("/api/combat/initiative", headers=gm_h)).json()["entries"]
+
+        user3 = await register_user(client, f"late_{session_data['code'][:3]}", "Late Player")
+        with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock):
+            await client.post("/api/session/join", json={"code": session_data["code"], "name": "Latecomer"},
+                              headers={"Authorization": f"Bearer {user3['access_token']}"})
+
+        after = (await client.get("/api/combat/initiative", headers=gm_h)).json()["entries"]
+        assert len(after) == len(before) + 1
+        assert after[-1]["player_name"] == "Latecomer"
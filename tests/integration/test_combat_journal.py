@@ -0,0 +1,130 @@
+import pytest
+
+from app.models.combat import CombatEvent, CombatSnapshot, CombatParticipant
+from app.services.combat import CombatService
+from app.services.combat_journal import CombatJournal, SNAPSHOT_INTERVAL
+
+
+def _combat_with_two(db, create_session_fixture, create_player_fixture, create_character_fixture):
+    session, gm = create_session_fixture()
+    p1 = create_player_fixture(session, name="P1")
+    p2 = create_player_fixture(session, name="P2")
+    c1 = create_character_fixture(p1, name="Fighter", current_hp=20, max_hp=20)
+    c2 = create_character_fixture(p2, name="Rogue", current_hp=15, max_hp=15)
+    combat = CombatService.create_combat(db, session.id)
+    part1 = CombatService.add_participant(db, combat, c1, initiative=18)
+    part2 = CombatService.add_participant(db, combat, c2, initiative=9)
+    return combat, part1, part2
+
+
+class TestRecord:
+    def test_events_appended_in_order(self, db, create_session_fixture, create_player_fixture, create_character_fixture):
+        combat, part1, _ = _combat_with_two(db, create_session_fixture, create_player_fixture, create_character_fixture)
+        CombatService.next_turn(db, combat)
+        CombatService.apply_damage(db, part1, 5)
+
+        events = CombatJournal.history(db, combat)
+        assert [e.event_type for e in events] == [
+            "combat_started", "participant_added", "participant_added", "turn_changed", "damage",
+        ]
+        assert [e.seq for e in events] == [1, 2, 3, 4, 5]
+        assert combat.event_seq == 5
+
+    def test_history_after_seq(self, db, create_session_fixture, create_player_fixture, create_character_fixture):
+        combat, part1, _ = _combat_with_two(db, create_session_fixture, create_player_fixture, create_character_fixture)
+        CombatService.apply_damage(db, part1, 3)
+
+        tail = CombatJournal.history(db, combat, after_seq=3)
+        assert len(tail) == 1
+        assert tail[0].payload["current_hp"] == 17
+
+    def test_snapshot_compaction(self, db, create_session_fixture, create_player_fixture, create_character_fixture):
+        combat, part1, part2 = _combat_with_two(db, create_session_fixture, create_player_fixture, create_character_fixture)
+        for _ in range(SNAPSHOT_INTERVAL):
+            CombatService.next_turn(db, combat)
+        CombatService.apply_damage(db, part2, 4)
+
+        snapshots = db.query(CombatSnapshot).filter(CombatSnapshot.combat_id == combat.id).all()
+        assert [s.seq for s in snapshots] == [SNAPSHOT_INTERVAL]
+
+        db.refresh(combat)
+        assert CombatJournal.current_state(db, combat) == CombatJournal.state_from_db(combat)
+
+
+class TestUndo:
+    def test_undo_damage(self, db, create_session_fixture, create_player_fixture, create_character_fixture):
+        combat, part1, _ = _combat_with_two(db, create_session_fixture, create_player_fixture, create_character_fixture)
+        CombatService.apply_damage(db, part1, 20)
+        assert part1.is_active is False
+
+        undone = CombatJournal.undo_last(db, combat)
+        db.refresh(part1)
+        assert undone["event_type"] == "damage"
+        assert part1.current_hp == 20
+        assert part1.is_active is True
+        assert combat.event_seq == 3
+
+    def test_undo_next_turn_restores_round(self, db, create_session_fixture, create_player_fixture, create_character_fixture):
+        combat, part1, part2 = _combat_with_two(db, create_session_fixture, create_player_fixture, create_character_fixture)
+        CombatService.next_turn(db, combat)
+        CombatService.next_turn(db, combat)
+        CombatService.next_turn(db, combat)  # new round
+        assert combat.round_number == 2
+
+        CombatJournal.undo_last(db, combat)
+        assert combat.round_number == 1
+        assert combat.current_turn_id == part2.id
+
+    def test_undo_participant_removal(self, db, create_session_fixture, create_player_fixture, create_character_fixture):
+        combat, part1, _ = _combat_with_two(db, create_session_fixture, create_player_fixture, create_character_fixture)
+        CombatService.next_turn(db, combat)
+        part1_id = part1.id
+        CombatService.remove_participant(db, combat, part1)
+        assert combat.current_turn_id is None
+
+        CombatJournal.undo_last(db, combat)
+        restored = db.get(CombatParticipant, part1_id)
+        assert restored is not None
+        assert restored.initiative == 18
+        assert combat.current_turn_id == part1_id
+
+    def test_undo_participant_added_clears_its_turn(self, db, create_session_fixture, create_player_fixture, create_character_fixture):
+        combat, part1, part2 = _combat_with_two(db, create_session_fixture, create_player_fixture, create_character_fixture)
+        part2_id = part2.id
+        combat.current_turn_id = part2_id
+        db.commit()
+
+        undone = CombatJournal.undo_last(db, combat)
+        assert undone["event_type"] == "participant_added"
+        assert db.get(CombatParticipant, part2_id) is None
+        assert combat.current_turn_id is None
+
+    def test_undo_participant_added_restores_previous_turn(self, db, create_session_fixture, create_player_fixture, create_character_fixture):
+        combat, part1, part2 = _combat_with_two(db, create_session_fixture, create_player_fixture, create_character_fixture)
+        CombatService.next_turn(db, combat)
+        session, _ = create_session_fixture()
+        p3 = create_player_fixture(session, name="P3")
+        c3 = create_character_fixture(p3, name="Cleric", current_hp=12, max_hp=12)
+        part3 = CombatService.add_participant(db, combat, c3, initiative=5)
+        combat.current_turn_id = part3.id
+        db.commit()
+
+        CombatJournal.undo_last(db, combat)
+        assert combat.current_turn_id == part1.id
+
+    def test_undo_drops_snapshot_past_tail(self, db, create_session_fixture, create_player_fixture, create_character_fixture):
+        combat, part1, _ = _combat_with_two(db, create_session_fixture, create_player_fixture, create_character_fixture)
+        while combat.event_seq < SNAPSHOT_INTERVAL:
+            CombatService.next_turn(db, combat)
+
+        CombatJournal.undo_last(db, combat)
+        assert db.query(CombatSnapshot).filter(CombatSnapshot.combat_id == combat.id).count() == 0
+        db.refresh(combat)
+        assert CombatJournal.current_state(db, combat) == CombatJournal.state_from_db(combat)
+
+    def test_cannot_undo_combat_start(self, db, create_session_fixture):
+        session, gm = create_session_fixture()
+        combat = CombatService.create_combat(db, session.id)
+        with pytest.raises(ValueError):
+            CombatJournal.undo_last(db, combat)
+        assert db.query(CombatEvent).filter(CombatEvent.combat_id == combat.id).count() == 1
@@ -0,0 +1,132 @@
+import pytest
+from unittest.mock import patch, AsyncMock
+
+from tests.integration.test_maps_api import _setup_map_session
+
+
+async def _setup_fog_map(client):
+    """Fogged 400x400 map split by a wall at x=200, with a player token and two monsters."""
+    _, gm_h, join_data, player_h = await _setup_map_session(client)
+
+    with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock):
+        char = (await client.post("/api/characters", json={
+            "name": "Scout", "max_hp": 10,
+        }, headers=player_h)).json()
+        map_id = (await client.post("/api/session/maps", json={
+            "name": "Dungeon", "width": 400, "height": 400, "grid_scale": 50,
+        }, headers=gm_h)).json()["id"]
+        await client.put(f"/api/maps/{map_id}/fog", json={"fog_enabled": True}, headers=gm_h)
+        wall = (await client.post(f"/api/maps/{map_id}/walls", json={
+            "x1": 200, "y1": 0, "x2": 200, "y2": 300,
+        }, headers=gm_h)).json()
+
+        ids = {}
+        for label, x, y, character_id in [("scout", 100, 100, char["id"]), ("near", 120, 150, None),
+                                          ("behind", 300, 100, None)]:
+            resp = await client.post(f"/api/maps/{map_id}/tokens", json={
+                "x": x, "y": y, "type": "monster", "label": label, "character_id": character_id,
+            }, headers=gm_h)
+            ids[label] = resp.json()["id"]
+
+    return gm_h, player_h, join_data, map_id, wall, ids
+
+
+def _token_ids(map_data):
+    return {t["id"] for t in map_data["tokens"]}
+
+
+@pytest.mark.asyncio
+class TestFogOfWar:
+    async def test_player_only_gets_visible_tokens(self, client):
+        gm_h, player_h, _, map_id, _, ids = await _setup_fog_map(client)
+
+        player_map = (await client.get(f"/api/maps/{map_id}", headers=player_h)).json()
+        assert player_map["fog_enabled"] is True
+        assert _token_ids(player_map) == {ids["scout"], ids["near"]}
+
+        gm_map = (await client.get(f"/api/maps/{map_id}", headers=gm_h)).json()
+        assert _token_ids(gm_map) == set(ids.values())
+
+        maps = (await client.get("/api/session/maps", headers=player_h)).json()
+        assert _token_ids(maps[0]) == {ids["scout"], ids["near"]}
+
+    async def test_fog_disabled_shows_everything(self, client):
+        gm_h, player_h, _, map_id, _, ids = await _setup_fog_map(client)
+        with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock):
+            await client.put(f"/api/maps/{map_id}/fog", json={"fog_enabled": False}, headers=gm_h)
+
+        player_map = (await client.get(f"/api/maps/{map_id}", headers=player_h)).json()
+        assert _token_ids(player_map) == set(ids.values())
+
+    async def test_deleting_wall_reveals(self, client):
+        gm_h, player_h, _, map_id, wall, ids = await _setup_fog_map(client)
+        with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock) as mock_bc:
+            resp = await client.delete(f"/api/walls/{wall['id']}", headers=gm_h)
+        assert resp.status_code == 200
+        assert mock_bc.call_args[0][0] == "fog_changed"
+
+        player_map = (await client.get(f"/api/maps/{map_id}", headers=player_h)).json()
+        assert ids["behind"] in _token_ids(player_map)
+
+    async def test_moving_scout_updates_view(self, client):
+        gm_h, player_h, join_data, map_id, _, ids = await _setup_fog_map(client)
+
+        with patch("app.websocket.manager.manager.broadcast_filtered", new_callable=AsyncMock) as mock_send:
+            resp = await client.patch(f"/api/tokens/{ids['scout']}", json={"x": 300, "y": 150}, headers=gm_h)
+        assert resp.status_code == 200
+
+        fog_updates = [c.args[0] for c in mock_send.call_args_list if c.args[0]["type"] == "fog_updated"]
+        assert len(fog_updates) == 1
+        payload = fog_updates[0]["payload"]
+        assert [t["id"] for t in payload["tokens"]] == [ids["behind"]]
+        assert payload["hidden_token_ids"] == [ids["near"]]
+
+        player_map = (await client.get(f"/api/maps/{map_id}", headers=player_h)).json()
+        assert _token_ids(player_map) == {ids["scout"], ids["behind"]}
+
+    async def test_monster_move_broadcast_audience(self, client):
+        gm_h, player_h, _, map_id, _, ids = await _setup_fog_map(client)
+        players = (await client.get("/api/session/players", headers=gm_h)).json()
+        player_id = next(p["id"] for p in players if not p["is_gm"])
+
+        with patch("app.websocket.manager.manager.broadcast_token_event", new_callable=AsyncMock) as mock_bc, \
+                patch("app.websocket.manager.manager.broadcast_token_moved", new_callable=AsyncMock) as mock_moved:
+            await client.patch(f"/api/tokens/{ids['near']}", json={"x": 300, "y": 50}, headers=gm_h)
+
+        calls = {c.args[0]: c.kwargs["audience"] for c in mock_bc.call_args_list}
+        assert player_id not in mock_moved.call_args.kwargs["audience"]
+        assert calls["token_removed"] == {player_id}
+        assert "token_added" not in calls
+
+    async def test_visibility_endpoint(self, client):
+        gm_h, player_h, _, map_id, _, ids = await _setup_fog_map(client)
+
+        resp = await client.get(f"/api/maps/{map_id}/visibility", headers=player_h)
+        assert resp.status_code == 200
+        data = resp.json()
+        assert (data["rows"], data["cols"], data["cell_size"]) == (8, 8, 50)
+        assert list(data["polygons"]) == [ids["scout"]]
+
+        # GM looks through the player's eyes
+        gm_view = (await client.get(f"/api/maps/{map_id}/visibility",
+                                    params={"player_id": data["player_id"]}, headers=gm_h)).json()
+        assert gm_view["visible"] == data["visible"]
+
+    async def test_player_cannot_edit_walls_or_peek(self, client):
+        gm_h, player_h, _, map_id, _, _ = await _setup_fog_map(client)
+
+        resp = await client.post(f"/api/maps/{map_id}/walls", json={
+            "x1": 0, "y1": 0, "x2": 10, "y2": 10,
+        }, headers=player_h)
+        assert resp.status_code == 403
+
+        gm_id = (await client.get(f"/api/maps/{map_id}/visibility", headers=gm_h)).json()["player_id"]
+        resp = await client.get(f"/api/maps/{map_id}/visibility", params={"player_id": gm_id}, headers=player_h)
+        assert resp.status_code == 403
+
+    async def test_zero_length_wall_rejected(self, client):
+        gm_h, _, _, map_id, _, _ = await _setup_fog_map(client)
+        resp = await client.post(f"/api/maps/{map_id}/walls", json={
+            "x1": 5, "y1": 5, "x2": 5, "y2": 5,
+        }, headers=gm_h)
+        assert resp.status_code == 400
@@ -205,3 +205,134 @@ class TestDeleteToken:
         with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock):
             resp = await client.delete(f"/api/tokens/{token_id}", headers=player_h)
         assert resp.status_code == 403
+
+
+@pytest.mark.asyncio
+class TestAoeQuery:
+    async def _map_with_tokens(self, client, gm_h):
+        with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock):
+            map_id = (await client.post("/api/session/maps", json={
+                "name": "AoeMap", "grid_scale": 50,
+            }, headers=gm_h)).json()["id"]
+            ids = {}
+            for label, x, y, layer in [("near", 100, 100, "tokens"), ("far", 1000, 1000, "tokens"),
+                                       ("secret", 120, 100, "hidden")]:
+                resp = await client.post(f"/api/maps/{map_id}/tokens", json={
+                    "x": x, "y": y, "type": "monster", "label": label, "layer": layer,
+                }, headers=gm_h)
+                ids[label] = resp.json()["id"]
+        return map_id, ids
+
+    async def test_circle_hits_nearby_tokens(self, client):
+        _, gm_h, _, _ = await _setup_map_session(client)
+        map_id, ids = await self._map_with_tokens(client, gm_h)
+
+        resp = await client.post(f"/api/maps/{map_id}/aoe", json={
+            "shape": "circle", "x": 100, "y": 100, "size": 20,
+        }, headers=gm_h)
+        assert resp.status_code == 200
+        assert set(resp.json()["token_ids"]) == {ids["near"], ids["secret"]}
+
+    async def test_player_does_not_see_hidden(self, client):
+        _, gm_h, _, player_h = await _setup_map_session(client)
+        map_id, ids = await self._map_with_tokens(client, gm_h)
+
+        resp = await client.post(f"/api/maps/{map_id}/aoe", json={
+            "shape": "circle", "x": 100, "y": 100, "size": 20,
+        }, headers=player_h)
+        assert resp.json()["token_ids"] == [ids["near"]]
+
+    async def test_index_follows_move_and_delete(self, client):
+        _, gm_h, _, _ = await _setup_map_session(client)
+        map_id, ids = await self._map_with_tokens(client, gm_h)
+        rect = {"shape": "rect", "x": 900, "y": 900, "size": 10}
+
+        assert (await client.post(f"/api/maps/{map_id}/aoe", json=rect, headers=gm_h)).json()["token_ids"] == [ids["far"]]
+
+        with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock):
+            await client.patch(f"/api/tokens/{ids['near']}", json={"x": 950, "y": 950}, headers=gm_h)
+            await client.delete(f"/api/tokens/{ids['far']}", headers=gm_h)
+
+        resp = await client.post(f"/api/maps/{map_id}/aoe", json=rect, headers=gm_h)
+        assert resp.json()["token_ids"] == [ids["near"]]
+
+    async def test_oversized_template_rejected(self, client):
+        _, gm_h, _, _ = await _setup_map_session(client)
+        map_id, _ = await self._map_with_tokens(client, gm_h)
+
+        for template in [
+            {"shape": "circle", "x": 0, "y": 0, "size": 1e9},
+            {"shape": "rect", "x": 0, "y": 0, "size": 10, "height": 1e9},
+        ]:
+            resp = await client.post(f"/api/maps/{map_id}/aoe", json=template, headers=gm_h)
+            assert resp.status_code == 422
+
+        with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock):
+            resp = await client.post(f"/api/maps/{map_id}/tokens", json={
+                "x": 0, "y": 0, "scale": 1e6,
+            }, headers=gm_h)
+        assert resp.status_code == 422
+
+
+@pytest.mark.asyncio
+class TestViewportLoading:
+    async def _map_with_tokens(self, client, gm_h):
+        with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock):
+            map_id = (await client.post("/api/session/maps", json={"name": "Big"}, headers=gm_h)).json()["id"]
+            ids = []
+            for x, y in [(100, 100), (420, 100), (3000, 3000)]:
+                resp = await client.post(f"/api/maps/{map_id}/tokens", json={
+                    "x": x, "y": y, "type": "prop",
+                }, headers=gm_h)
+                ids.append(resp.json()["id"])
+        return map_id, ids
+
+    async def test_summary_has_no_tokens(self, client):
+        _, gm_h, _, player_h = await _setup_map_session(client)
+        map_id, _ = await self._map_with_tokens(client, gm_h)
+
+        resp = await client.get("/api/session/maps/summary", headers=player_h)
+        assert resp.status_code == 200
+        data = resp.json()
+        assert len(data) == 1
+        assert data[0]["id"] == map_id
+        assert data[0]["token_count"] == 3
+        assert "tokens" not in data[0]
+
+    async def test_viewport_returns_visible_tokens(self, client):
+        _, gm_h, _, player_h = await _setup_map_session(client)
+        map_id, ids = await self._map_with_tokens(client, gm_h)
+
+        resp = await client.get(f"/api/maps/{map_id}/viewport", params={
+            "x": 0, "y": 0, "width": 200, "height": 200, "margin": 0,
+        }, headers=player_h)
+        assert resp.status_code == 200
+        assert [t["id"] for t in resp.json()["tokens"]] == [ids[0]]
+
+        # Default margin pulls in the neighbouring token
+        resp = await client.get(f"/api/maps/{map_id}/viewport", params={
+            "x": 0, "y": 0, "width": 200, "height": 200,
+        }, headers=player_h)
+        assert sorted(t["id"] for t in resp.json()["tokens"]) == sorted(ids[:2])
+
+    async def test_viewport_validation(self, client):
+        _, gm_h, _, _ = await _setup_map_session(client)
+        map_id, _ = await self._map_with_tokens(client, gm_h)
+
+        resp = await client.get(f"/api/maps/{map_id}/viewport", params={
+            "x": 0, "y": 0, "width": 0, "height": 200,
+        }, headers=gm_h)
+        assert resp.status_code == 422
+
+        for params in [
+            {"x": 0, "y": 0, "width": 1e9, "height": 200},
+            {"x": 0, "y": 0, "width": 200, "height": 200, "margin": 1e9},
+            {"x": "inf", "y": 0, "width": 200, "height": 200},
+        ]:
+            resp = await client.get(f"/api/maps/{map_id}/viewport", params=params, headers=gm_h)
+            assert resp.status_code == 422
+
+        resp = await client.get("/api/maps/nonexistent/viewport", params={
+            "x": 0, "y": 0, "width": 10, "height": 10,
+        }, headers=gm_h)
+        assert resp.status_code == 404
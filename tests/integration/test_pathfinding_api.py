@@ -0,0 +1,116 @@
+import pytest
+from unittest.mock import patch, AsyncMock
+
+from tests.integration.test_maps_api import _setup_map_session
+
+
+async def _setup_grid_map(client):
+    """10x10-cell map with a hero at (0, 0) and an orc at (2, 0)."""
+    _, gm_h, _, player_h = await _setup_map_session(client)
+    with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock):
+        map_id = (await client.post("/api/session/maps", json={
+            "name": "Grid", "width": 500, "height": 500, "grid_scale": 50,
+        }, headers=gm_h)).json()["id"]
+        ids = {}
+        for label, x, y in [("hero", 25, 25), ("orc", 125, 25)]:
+            resp = await client.post(f"/api/maps/{map_id}/tokens", json={
+                "x": x, "y": y, "type": "monster", "label": label,
+            }, headers=gm_h)
+            ids[label] = resp.json()["id"]
+    return gm_h, player_h, map_id, ids
+
+
+@pytest.mark.asyncio
+class TestPathfindingApi:
+    async def test_path_goes_around_token(self, client):
+        _, player_h, map_id, ids = await _setup_grid_map(client)
+
+        resp = await client.get(f"/api/maps/{map_id}/path", params={
+            "token_id": ids["hero"], "to_x": 225, "to_y": 25,
+        }, headers=player_h)
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["found"] is True
+        assert [2, 0] not in data["cells"]
+        assert data["cells"][0] == [0, 0] and data["cells"][-1] == [4, 0]
+        assert data["points"][-1] == [225.0, 25.0]
+        assert data["cost"] == 25  # 5 + 10 (diag) + 5 (diag) + 5
+
+    async def test_path_to_occupied_cell(self, client):
+        _, player_h, map_id, ids = await _setup_grid_map(client)
+        resp = await client.get(f"/api/maps/{map_id}/path", params={
+            "token_id": ids["hero"], "to_x": 125, "to_y": 25,
+        }, headers=player_h)
+        assert resp.json()["found"] is False
+
+    @pytest.mark.parametrize("params", [
+        {"to_x": "nan", "to_y": 25},
+        {"to_x": 225, "to_y": "inf"},
+        {"to_x": 225, "to_y": 25, "from_x": "-inf", "from_y": 25},
+        {"to_x": 225, "to_y": 25, "from_x": 25, "from_y": "nan"},
+    ])
+    async def test_non_finite_coordinates_rejected(self, client, params):
+        _, player_h, map_id, ids = await _setup_grid_map(client)
+        if "from_x" not in params:
+            params = {**params, "token_id": ids["hero"]}
+        resp = await client.get(f"/api/maps/{map_id}/path", params=params, headers=player_h)
+        assert resp.status_code == 422
+
+    async def test_path_needs_origin(self, client):
+        _, player_h, map_id, _ = await _setup_grid_map(client)
+        resp = await client.get(f"/api/maps/{map_id}/path", params={"to_x": 1, "to_y": 1}, headers=player_h)
+        assert resp.status_code == 400
+
+    async def test_cost_grid_follows_token_moves(self, client):
+        gm_h, player_h, map_id, ids = await _setup_grid_map(client)
+        params = {"token_id": ids["hero"], "to_x": 125, "to_y": 25}
+        await client.get(f"/api/maps/{map_id}/path", params=params, headers=player_h)
+
+        with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock):
+            await client.patch(f"/api/tokens/{ids['orc']}", json={"x": 425, "y": 425}, headers=gm_h)
+
+        data = (await client.get(f"/api/maps/{map_id}/path", params=params, headers=player_h)).json()
+        assert data["found"] is True
+        assert data["cost"] == 10
+
+    async def test_reachable(self, client):
+        _, player_h, map_id, ids = await _setup_grid_map(client)
+        resp = await client.get(f"/api/maps/{map_id}/reachable", params={
+            "token_id": ids["hero"], "speed": 10,
+        }, headers=player_h)
+        assert resp.status_code == 200
+        cells = {(c, r): cost for c, r, cost in resp.json()["cells"]}
+        assert cells[(0, 0)] == 0
+        assert cells[(1, 1)] == 5
+        assert (2, 2) not in cells  # 5 + 10 ft
+        assert (2, 0) not in cells  # the orc
+        assert max(cells.values()) <= 10
+
+    async def test_terrain_paint_and_cost(self, client):
+        gm_h, player_h, map_id, ids = await _setup_grid_map(client)
+        with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock) as mock_bc:
+            resp = await client.patch(f"/api/maps/{map_id}/terrain", json={
+                "add": [[0, 1], [1, 1]],
+            }, headers=gm_h)
+        assert resp.status_code == 200
+        assert resp.json()["difficult"] == [[0, 1], [1, 1]]
+        assert mock_bc.call_args[0][0] == "terrain_updated"
+
+        resp = await client.get(f"/api/maps/{map_id}/path", params={
+            "token_id": ids["hero"], "to_x": 25, "to_y": 75,
+        }, headers=player_h)
+        assert resp.json()["cost"] == 10
+
+        with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock):
+            resp = await client.patch(f"/api/maps/{map_id}/terrain", json={
+                "remove": [[0, 1]],
+            }, headers=gm_h)
+        assert resp.json()["difficult"] == [[1, 1]]
+        assert (await client.get(f"/api/maps/{map_id}/terrain", headers=player_h)).json()["difficult"] == [[1, 1]]
+
+    async def test_terrain_validation(self, client):
+        gm_h, player_h, map_id, _ = await _setup_grid_map(client)
+        resp = await client.patch(f"/api/maps/{map_id}/terrain", json={"add": [[10, 0]]}, headers=gm_h)
+        assert resp.status_code == 400
+        resp = await client.patch(f"/api/maps/{map_id}/terrain", json={"add": [[0, 0]]}, headers=player_h)
+        assert resp.status_code == 403
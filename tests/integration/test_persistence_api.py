@@ -125,3 +125,203 @@ class TestRoundTrip:
 
         # Verify the imported session has data
         assert import_data["entity_counts"] is not None
+
+
+@pytest.mark.asyncio
+class TestStreamingExport:
+    async def _gm_with_character(self, client):
+        resp, _, _ = await create_session_with_user(client)
+        gm_h = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+        with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock):
+            await client.post("/api/characters", json={
+                "name": "Стример", "class_name": "Bard", "max_hp": 9,
+            }, headers=gm_h)
+        return gm_h
+
+    async def test_download_matches_export(self, client):
+        gm_h = await self._gm_with_character(client)
+        expected = (await client.post("/api/session/export", headers=gm_h)).json()["data"]
+
+        resp = await client.post("/api/session/export/download",
+                                 headers={**gm_h, "Accept-Encoding": "identity"})
+        assert resp.status_code == 200
+        assert "content-encoding" not in resp.headers
+        data = resp.json()
+        data.pop("exported_at"), expected.pop("exported_at")
+        assert data == expected
+        assert data["entities"]["characters"]["data"][0]["name"] == "Стример"
+
+    async def test_transport_gzip_negotiated(self, client):
+        gm_h = await self._gm_with_character(client)
+        resp = await client.post("/api/session/export/download",
+                                 headers={**gm_h, "Accept-Encoding": "gzip"})
+        assert resp.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in resp.headers["vary"]
+        # httpx decodes Content-Encoding transparently
+        assert "entities" in resp.json()
+
+    async def test_explicit_gzip_file(self, client):
+        import gzip
+        import json
+
+        gm_h = await self._gm_with_character(client)
+        resp = await client.post("/api/session/export/download",
+                                 json={"compression": "gzip"}, headers=gm_h)
+        assert resp.headers["content-type"] == "application/gzip"
+        assert resp.headers["content-disposition"].endswith('.json.gz"')
+        assert "content-encoding" not in resp.headers
+        assert "players" in json.loads(gzip.decompress(resp.content))["entities"]
+
+    async def test_zstd_unavailable_is_rejected(self, client):
+        gm_h = await self._gm_with_character(client)
+        with patch("app.services.persistence.compression.zstandard", None):
+            resp = await client.post("/api/session/export/download",
+                                     json={"compression": "zstd"}, headers=gm_h)
+        assert resp.status_code == 400
+
+
+@pytest.mark.asyncio
+class TestFileImport:
+    async def _gzip_export(self, client):
+        gm_h = await TestStreamingExport()._gm_with_character(client)
+        resp = await client.post("/api/session/export/download",
+                                 json={"compression": "gzip"}, headers=gm_h)
+        return resp.content
+
+    async def test_import_gzip_file(self, client, db):
+        from app.models.character import Character
+        from app.models.player import Player
+
+        content = await self._gzip_export(client)
+        resp = await client.post(
+            "/api/session/import/file",
+            files={"file": ("session.json.gz", content, "application/gzip")},
+            data={"new_session_code": "FILE01"},
+        )
+        data = resp.json()
+        assert data["success"] is True, data
+        assert data["session_code"] == "FILE01"
+        assert data["entity_counts"]["characters"] == 1
+
+        chars = (
+            db.query(Character).join(Player)
+            .filter(Player.session_id == data["session_id"]).all()
+        )
+        assert [c.name for c in chars] == ["Стример"]
+
+    async def test_msgpack_download_and_import(self, client):
+        gm_h = await TestStreamingExport()._gm_with_character(client)
+        resp = await client.post("/api/session/export/download",
+                                 json={"format": "msgpack", "compression": "gzip"}, headers=gm_h)
+        assert resp.headers["content-disposition"].endswith('.msgpack.gz"')
+
+        resp = await client.post(
+            "/api/session/import/file",
+            files={"file": ("session.msgpack.gz", resp.content, "application/gzip")},
+        )
+        data = resp.json()
+        assert data["success"] is True, data
+        assert data["entity_counts"]["characters"] == 1
+
+    async def test_validate_file(self, client):
+        import gzip
+
+        content = gzip.decompress(await self._gzip_export(client))
+        resp = await client.post(
+            "/api/session/validate/file",
+            files={"file": ("session.json", content, "application/json")},
+        )
+        assert resp.json()["is_valid"] is True
+
+        resp = await client.post(
+            "/api/session/validate/file",
+            files={"file": ("session.json", content[: len(content) // 2], "application/json")},
+        )
+        data = resp.json()
+        assert data["is_valid"] is False
+        assert data["errors"]
+
+    async def test_invalid_file_is_not_imported(self, client):
+        resp = await client.post(
+            "/api/session/import/file",
+            files={"file": ("session.json", b'{"format_version": "1.0", "entities": {"players": '
+                                             b'{"data": [{"id": 1, "is_gm": false}]}}}', "application/json")},
+        )
+        data = resp.json()
+        assert data["success"] is False
+        assert data["errors"] == ["players[0]: отсутствует поле 'name'"]
+
+
+@pytest.mark.asyncio
+class TestSnapshotsApi:
+    async def test_snapshot_delta_and_restore(self, client):
+        gm_h = await TestStreamingExport()._gm_with_character(client)
+
+        first = (await client.post("/api/session/snapshots", headers=gm_h)).json()
+        assert first["created"] is True
+        assert first["snapshot"]["is_full"] is True
+        unchanged = (await client.post("/api/session/snapshots", headers=gm_h)).json()
+        assert unchanged == {"created": False, "snapshot": None}
+
+        with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock):
+            await client.post("/api/characters", json={
+                "name": "Второй", "class_name": "Rogue", "max_hp": 7,
+            }, headers=gm_h)
+        snap_id = first["snapshot"]["id"]
+        delta = (await client.get(f"/api/session/snapshots/{snap_id}/delta", headers=gm_h)).json()
+        assert [c["name"] for c in delta["entities"]["characters"]["upserts"]] == ["Второй"]
+
+        second = (await client.post("/api/session/snapshots", headers=gm_h)).json()["snapshot"]
+        assert second["base_id"] == snap_id
+        listed = (await client.get("/api/session/snapshots", headers=gm_h)).json()
+        assert [s["id"] for s in listed] == [snap_id, second["id"]]
+
+        resp = await client.post(f"/api/session/snapshots/{second['id']}/restore",
+                                 json={"new_session_code": "REST01"}, headers=gm_h)
+        data = resp.json()
+        assert data["success"] is True, data
+        assert data["entity_counts"]["characters"] == 2
+
+        compacted = (await client.post("/api/session/snapshots/compact", headers=gm_h)).json()
+        assert compacted["snapshot"]["id"] == second["id"]
+        assert compacted["snapshot"]["is_full"] is True
+
+    async def test_unknown_snapshot(self, client):
+        gm_h = await TestStreamingExport()._gm_with_character(client)
+        resp = await client.post("/api/session/snapshots/999999/restore", headers=gm_h)
+        assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+class TestAutosaveApi:
+    async def test_restore_latest_after_session_is_gone(self, client, db, tmp_path):
+        from types import SimpleNamespace
+
+        from app.models.player import Player
+        from app.models.session import Session
+        from app.services.persistence.autosave import autosave_session
+
+        resp, user_h, _ = await create_session_with_user(client)
+        code = resp.json()["code"]
+        session = db.query(Session).filter(Session.code == code).one()
+        autosave_session(db, session.id, tmp_path, keep=3)
+        gm_user_id = db.query(Player.user_id).filter(Player.token == session.gm_token).scalar()
+        db.delete(session)
+        db.flush()
+
+        settings = SimpleNamespace(autosave_dir=str(tmp_path))
+        with patch("app.api.persistence.get_settings", return_value=settings):
+            listed = (await client.get("/api/session/autosaves", headers=user_h)).json()
+            assert [a["code"] for a in listed] == [code]
+
+            resp = await client.post(f"/api/session/autosaves/{code}/restore-latest",
+                                     json={"new_session_code": "AUTO01"}, headers=user_h)
+            data = resp.json()
+            assert data["success"] is True, data
+            assert data["session_code"] == "AUTO01"
+
+            missing = await client.post("/api/session/autosaves/NOPE42/restore-latest", headers=user_h)
+            assert missing.status_code == 404
+
+        restored_gm = db.query(Player).filter(Player.token == data["gm_token"]).one()
+        assert restored_gm.user_id == gm_user_id is not None
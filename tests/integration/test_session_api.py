@@ -344,6 +344,23 @@ class TestDeleteSession:
         players = db.query(Player).filter(Player.session_id == session_id).all()
         assert len(players) == 0
 
+    async def test_delete_drops_initiative_index(self, client, db):
+        from app.models.session import Session
+        from app.services.initiative import initiative_indexes
+
+        resp, _, _ = await create_session_with_user(client)
+        session_data = resp.json()
+        gm_headers = {"Authorization": f"Bearer {session_data['access_token']}"}
+        with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock):
+            await client.post("/api/combat/start", headers=gm_headers)
+        await client.get("/api/combat/initiative", headers=gm_headers)
+        session_id = db.query(Session).filter(Session.code == session_data["code"]).one().id
+        assert any(i.session_id == session_id for i in initiative_indexes._indexes.values())
+
+        with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock):
+            assert (await client.delete("/api/session", headers=gm_headers)).status_code == 200
+        assert not any(i.session_id == session_id for i in initiative_indexes._indexes.values())
+
     async def test_player_cannot_delete_session(self, client):
         """Non-GM cannot delete session"""
         # Create session
@@ -362,3 +379,231 @@ class TestDeleteSession:
         # Try delete as player → expect 403
         delete_resp = await client.delete("/api/session", headers=player_token_header)
         assert delete_resp.status_code == 403
+
+
+@pytest.mark.asyncio
+class TestConditionalGet:
+    async def _gm(self, client):
+        resp, _, _ = await create_session_with_user(client)
+        return {"Authorization": f"Bearer {resp.json()['access_token']}"}, resp.json()["code"]
+
+    async def test_first_request_has_no_etag_then_304(self, client):
+        headers, _ = await self._gm(client)
+
+        first = await client.get("/api/session/players", headers=headers)
+        assert first.status_code == 200
+        # Сессия токена ещё неизвестна middleware
+        assert "etag" not in first.headers
+
+        second = await client.get("/api/session/players", headers=headers)
+        etag = second.headers["etag"]
+        assert second.headers["cache-control"] == "private, no-cache"
+
+        cached = await client.get("/api/session/players", headers={**headers, "If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.headers["etag"] == etag
+        assert cached.content == b""
+
+    async def test_304_skips_database(self, client, db):
+        from sqlalchemy import event
+
+        headers, _ = await self._gm(client)
+        await client.get("/api/characters", headers=headers)
+        etag = (await client.get("/api/characters", headers=headers)).headers["etag"]
+
+        statements = []
+        engine = db.get_bind().engine
+        listener = lambda *args: statements.append(args[2])
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            cached = await client.get("/api/characters", headers={**headers, "If-None-Match": f'W/{etag}, "x"'})
+            assert cached.status_code == 304
+            assert statements == []
+
+            await client.get("/api/characters", headers=headers)
+            assert statements
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+    async def test_mutation_changes_etag(self, client):
+        headers, _ = await self._gm(client)
+        await client.get("/api/characters", headers=headers)
+        etag = (await client.get("/api/characters", headers=headers)).headers["etag"]
+
+        with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock):
+            await client.post("/api/characters", json={"name": "Hero", "max_hp": 10}, headers=headers)
+
+        fresh = await client.get("/api/characters", headers={**headers, "If-None-Match": etag})
+        assert fresh.status_code == 200
+        assert fresh.headers["etag"] != etag
+        assert [c["name"] for c in fresh.json()] == ["Hero"]
+
+    async def test_join_invalidates_players(self, client):
+        headers, code = await self._gm(client)
+        await client.get("/api/session/players", headers=headers)
+        etag = (await client.get("/api/session/players", headers=headers)).headers["etag"]
+
+        user = await register_user(client, "etag_player", "Player")
+        with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock):
+            await client.post("/api/session/join", json={"code": code, "name": "P"},
+                              headers={"Authorization": f"Bearer {user['access_token']}"})
+
+        fresh = await client.get("/api/session/players", headers={**headers, "If-None-Match": etag})
+        assert fresh.status_code == 200
+        assert len(fresh.json()) == 2
+
+    async def test_etag_is_per_player_and_path(self, client):
+        headers, code = await self._gm(client)
+        user = await register_user(client, "etag_other", "Player")
+        with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock):
+            join = await client.post("/api/session/join", json={"code": code, "name": "P"},
+                                     headers={"Authorization": f"Bearer {user['access_token']}"})
+        other = {"Authorization": f"Bearer {join.json()['access_token']}"}
+
+        for h in (headers, other):
+            await client.get("/api/session/players", headers=h)
+        gm_etag = (await client.get("/api/session/players", headers=headers)).headers["etag"]
+        other_resp = await client.get("/api/session/players", headers={**other, "If-None-Match": gm_etag})
+        assert other_resp.status_code == 200
+        assert other_resp.headers["etag"] != gm_etag
+
+        combat = await client.get("/api/combat", headers={**headers, "If-None-Match": gm_etag})
+        assert combat.status_code == 200
+
+    async def test_version_bumped_before_broadcast(self, client):
+        headers, _ = await self._gm(client)
+        await client.get("/api/characters", headers=headers)
+        etag = (await client.get("/api/characters", headers=headers)).headers["etag"]
+
+        # A client refetching on the broadcast must not get a stale 304
+        refetched = []
+
+        async def refetch(*args, **kwargs):
+            refetched.append(await client.get("/api/characters", headers={**headers, "If-None-Match": etag}))
+
+        with patch("app.websocket.manager.manager.broadcast_event", side_effect=refetch):
+            await client.post("/api/characters", json={"name": "Hero", "max_hp": 10}, headers=headers)
+
+        assert refetched[0].status_code == 200
+        assert [c["name"] for c in refetched[0].json()] == ["Hero"]
+
+    async def test_no_304_for_deleted_player(self, client, db):
+        from app.models.session import Session
+
+        headers, code = await self._gm(client)
+        await client.get("/api/session/players", headers=headers)
+        etag = (await client.get("/api/session/players", headers=headers)).headers["etag"]
+
+        # Deleted outside a request (like cleanup_old_sessions): no version bump
+        db.delete(db.query(Session).filter(Session.code == code).one())
+        db.commit()
+
+        resp = await client.get("/api/session/players", headers={**headers, "If-None-Match": etag})
+        assert resp.status_code == 401
+
+
+@pytest.mark.asyncio
+class TestSessionSnapshot:
+    async def _populate(self, client, headers, n):
+        with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock), \
+             patch("app.websocket.manager.manager.broadcast_token_event", new_callable=AsyncMock):
+            for i in range(n):
+                char = await client.post("/api/characters", json={"name": f"Hero{i}", "max_hp": 10}, headers=headers)
+                map_id = (await client.post("/api/session/maps", json={"name": f"Map{i}"}, headers=headers)).json()["id"]
+                await client.post(f"/api/maps/{map_id}/tokens", json={
+                    "x": 10, "y": 10, "label": "T", "character_id": char.json()["id"],
+                }, headers=headers)
+            await client.post("/api/combat/start", headers=headers)
+
+    async def _count_queries(self, db, coro):
+        from sqlalchemy import event
+
+        statements = []
+        engine = db.get_bind().engine
+        listener = lambda *args: statements.append(args[2])
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            resp = await coro
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        return resp, len(statements)
+
+    async def test_matches_individual_endpoints(self, client):
+        resp, _, _ = await create_session_with_user(client)
+        headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+        await self._populate(client, headers, 2)
+
+        snapshot = await client.get("/api/session/snapshot", headers=headers)
+        assert snapshot.status_code == 200
+        data = snapshot.json()
+        assert data["session"] == (await client.get("/api/session", headers=headers)).json()
+        assert data["players"] == (await client.get("/api/session/players", headers=headers)).json()
+        assert data["characters"] == (await client.get("/api/characters", headers=headers)).json()
+        assert data["maps"] == (await client.get("/api/session/maps", headers=headers)).json()
+        assert data["combat"] == (await client.get("/api/combat", headers=headers)).json()
+        assert len(data["maps"][0]["tokens"]) == 1
+
+    async def test_fixed_number_of_queries(self, client, db):
+        counts = []
+        for n in (1, 4):
+            resp = await client.post("/api/users/register", json={
+                "username": f"snap{n}", "display_name": "GM", "password": "secret123", "role": "gm",
+            })
+            user_headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+            session = await client.post("/api/session", headers=user_headers)
+            headers = {"Authorization": f"Bearer {session.json()['access_token']}"}
+            await self._populate(client, headers, n)
+            await client.get("/api/characters", headers=headers)  # warm token cache
+
+            _, count = await self._count_queries(db, client.get("/api/session/snapshot", headers=headers))
+            counts.append(count)
+        assert counts[0] == counts[1]
+
+    async def test_cached_until_session_changes(self, client, db):
+        resp, _, _ = await create_session_with_user(client)
+        headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+        first = await client.get("/api/session/snapshot", headers=headers)
+
+        cached, count = await self._count_queries(db, client.get("/api/session/snapshot", headers=headers))
+        assert cached.content == first.content
+        # Только поиск игрока в get_current_player
+        assert count == 1
+
+        with patch("app.websocket.manager.manager.broadcast_event", new_callable=AsyncMock):
+            await client.post("/api/characters", json={"name": "Late", "max_hp": 5}, headers=headers)
+        fresh = await client.get("/api/session/snapshot", headers=headers)
+        assert [c["name"] for c in fresh.json()["characters"]] == ["Late"]
+
+    async def test_gzip_and_event_seq(self, client):
+        from app.websocket.manager import manager
+
+        resp, _, _ = await create_session_with_user(client)
+        headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+        await manager.broadcast_event("test_event", {})
+
+        plain = await client.get("/api/session/snapshot", headers={**headers, "Accept-Encoding": "identity"})
+        assert "content-encoding" not in plain.headers
+        assert plain.json()["event_seq"] == manager.event_seq
+
+        zipped = await client.get("/api/session/snapshot", headers={**headers, "Accept-Encoding": "gzip"})
+        assert zipped.headers["content-encoding"] == "gzip"
+        assert zipped.json() == plain.json()
+
+    async def test_cached_body_gets_current_event_seq(self, client, db):
+        from app.websocket.manager import manager
+
+        resp, _, _ = await create_session_with_user(client)
+        headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+        first = (await client.get("/api/session/snapshot", headers=headers)).json()
+
+        # Events of other sessions move the global seq, not this session's version
+        await manager.broadcast_event("other_session_event", {})
+        for encoding in ("identity", "gzip"):
+            cached, count = await self._count_queries(db, client.get(
+                "/api/session/snapshot", headers={**headers, "Accept-Encoding": encoding},
+            ))
+            assert count == 1
+            data = cached.json()
+            assert data["event_seq"] == manager.event_seq == first["event_seq"] + 1
+            assert {k: v for k, v in data.items() if k != "event_seq"} == \
+                {k: v for k, v in first.items() if k != "event_seq"}
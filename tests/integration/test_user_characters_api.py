@@ -132,3 +132,44 @@ class TestDeleteUserCharacter:
 
         resp = await client.get(f"/api/me/characters/{char_id}", headers=h)
         assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+class TestGenerateUserCharacterAvatar:
+    async def test_same_description_reuses_cached_avatar(self, client, db, tmp_path):
+        import io
+        from unittest.mock import patch
+        from PIL import Image
+        from sqlalchemy.orm import sessionmaker
+        from app.services.avatar_jobs import avatar_queue
+
+        h, _ = await _register_and_get_headers(client, "avatar_user")
+        appearance = "an orc smith with a burnt leather apron"
+        ids = []
+        for name in ("Smith", "Twin"):
+            resp = await client.post("/api/me/characters", json={
+                "name": name, "max_hp": 10, "current_hp": 10, "appearance": appearance,
+            }, headers=h)
+            ids.append(resp.json()["id"])
+
+        calls = []
+
+        async def fake_generator(text):
+            calls.append(text)
+            buf = io.BytesIO()
+            Image.new("RGB", (64, 64), (120, 60, 10)).save(buf, format="JPEG")
+            return buf.getvalue()
+
+        with patch.object(avatar_queue, "generator", fake_generator), \
+                patch.object(avatar_queue, "session_factory", sessionmaker(bind=db.get_bind())), \
+                patch("app.services.blobs.BLOB_DIR", str(tmp_path)):
+            first = (await client.post(f"/api/me/characters/{ids[0]}/generate-avatar", headers=h)).json()
+            await avatar_queue.join()
+            second = await client.post(f"/api/me/characters/{ids[1]}/generate-avatar", headers=h)
+
+        assert second.status_code == 202
+        assert second.json()["status"] == "done"
+        assert len(calls) == 1
+        twin = (await client.get(f"/api/me/characters/{ids[1]}", headers=h)).json()
+        url = (await client.get(f"/api/avatar-jobs/{first['id']}")).json()["avatar_url"]
+        assert twin["avatar_url"] == url == second.json()["avatar_url"]
@@ -86,3 +86,140 @@ class TestUserMapTokenCRUD:
 
         resp = await client.delete(f"/api/me/maps/tokens/{token_id}", headers=h)
         assert resp.status_code == 204
+
+
+@pytest.mark.asyncio
+class TestBackgroundUpload:
+    async def test_upload_builds_tile_pyramid(self, client, tmp_path):
+        import hashlib
+        import io
+        import os
+        from unittest.mock import patch, MagicMock
+        from PIL import Image
+        from app.services import tiles
+
+        h, _ = await _register_and_get_headers(client, "tiler")
+        buf = io.BytesIO()
+        Image.new("RGB", (700, 400), (10, 20, 30)).save(buf, format="PNG")
+
+        futures = []
+
+        def schedule(source, out_dir):
+            future = tiles.schedule_pyramid(source, out_dir)
+            futures.append(future)
+            return future
+
+        with patch("app.services.blobs.BLOB_DIR", str(tmp_path)), \
+                patch("app.api.user_maps.schedule_pyramid", schedule), \
+                patch("app.api.user_maps.schedule_variants", MagicMock()):
+            resp = await client.post(
+                "/api/me/maps/upload-background",
+                files={"file": ("bg.png", buf.getvalue(), "image/png")},
+                headers=h,
+            )
+        assert resp.status_code == 200
+        data = resp.json()
+        assert (data["width"], data["height"]) == (700, 400)
+        digest = hashlib.sha256(buf.getvalue()).hexdigest()
+        assert data["url"] == f"/uploads/blobs/{digest[:2]}/{digest}.png"
+        assert data["tiles_url"] == f"/uploads/blobs/{digest[:2]}/{digest}/tiles"
+        assert data["preview_url"] == f"/uploads/blobs/{digest[:2]}/{digest}/tiles/preview.webp"
+
+        manifest = futures[0].result(timeout=30)
+        assert manifest["max_level"] == 10
+        assert os.path.isfile(tmp_path / digest[:2] / digest / "tiles" / "10" / "2_1.webp")
+
+        # Same content again: stored once, pyramid not rebuilt
+        with patch("app.services.blobs.BLOB_DIR", str(tmp_path)), \
+                patch("app.api.user_maps.schedule_pyramid", schedule), \
+                patch("app.api.user_maps.schedule_variants", MagicMock()):
+            again = await client.post(
+                "/api/me/maps/upload-background",
+                files={"file": ("copy.png", buf.getvalue(), "image/png")},
+                headers=h,
+            )
+        assert again.json()["url"] == data["url"]
+        assert len(futures) == 1
+        assert sorted(os.listdir(tmp_path / digest[:2])) == [digest, f"{digest}.png"]
+
+    async def _post(self, client, h, tmp_path, data, content_type="image/png"):
+        from unittest.mock import patch, MagicMock
+        with patch("app.services.blobs.BLOB_DIR", str(tmp_path)), \
+                patch("app.api.user_maps.schedule_pyramid", MagicMock()), \
+                patch("app.api.user_maps.schedule_variants", MagicMock()):
+            return await client.post(
+                "/api/me/maps/upload-background",
+                files={"file": ("bg", data, content_type)},
+                headers=h,
+            )
+
+    async def test_extension_follows_real_format(self, client, tmp_path):
+        import io
+        from PIL import Image
+
+        h, _ = await _register_and_get_headers(client, "tiler2")
+        buf = io.BytesIO()
+        Image.new("RGB", (10, 10)).save(buf, format="PNG")
+
+        resp = await self._post(client, h, tmp_path, buf.getvalue(), "image/jpeg")
+        assert resp.status_code == 200
+        assert resp.json()["url"].endswith(".png")
+
+    async def test_invalid_image_rejected_without_leftovers(self, client, tmp_path):
+        import os
+
+        h, _ = await _register_and_get_headers(client, "tiler3")
+        resp = await self._post(client, h, tmp_path, b"definitely not a png")
+        assert resp.status_code == 400
+        assert os.listdir(tmp_path) == []
+
+    async def test_too_large_rejected(self, client, tmp_path):
+        import os
+        from unittest.mock import patch
+
+        h, _ = await _register_and_get_headers(client, "tiler4")
+        with patch("app.api.user_maps.MAX_FILE_SIZE", 1024):
+            resp = await self._post(client, h, tmp_path, b"\x89PNG" + b"0" * 4096)
+        assert resp.status_code == 400
+        assert "too large" in resp.json()["detail"]
+        assert os.listdir(tmp_path) == []
+
+    async def test_variants_planned_built_and_listed(self, client, db, tmp_path):
+        import io
+        import os
+        from unittest.mock import patch, MagicMock
+        from PIL import Image
+        from app.services import variants
+
+        h, _ = await _register_and_get_headers(client, "tiler5")
+        buf = io.BytesIO()
+        Image.new("RGB", (1600, 900), (90, 20, 30)).save(buf, format="JPEG")
+
+        schedule = MagicMock()
+        with patch("app.services.blobs.BLOB_DIR", str(tmp_path)), \
+                patch("app.api.user_maps.schedule_pyramid", MagicMock()), \
+                patch("app.api.user_maps.schedule_variants", schedule):
+            resp = await client.post(
+                "/api/me/maps/upload-background",
+                files={"file": ("bg.jpg", buf.getvalue(), "image/jpeg")},
+                headers=h,
+            )
+            digest, ext, widths = schedule.call_args.args
+            assert ext == "jpg"
+            planned = resp.json()["variants"]
+            assert [(v["width"], v["height"]) for v in planned] == [(1280, 720), (640, 360)]
+
+            # Nothing recorded until the background job has run
+            listed = await client.get(f"/api/uploads/{digest}/variants")
+            assert listed.json()["variants"] == []
+
+            variants.record_variants(db, digest, variants.build_variants(digest, ext, widths))
+            listed = await client.get(f"/api/uploads/{digest}/variants")
+
+        assert listed.status_code == 200
+        assert listed.json()["variants"] == planned
+        assert os.path.isfile(tmp_path / digest[:2] / digest / "w640.webp")
+
+    async def test_variants_unknown_upload(self, client):
+        resp = await client.get(f"/api/uploads/{'0' * 64}/variants")
+        assert resp.status_code == 404
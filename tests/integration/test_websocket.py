@@ -204,3 +204,116 @@ class TestWebSocketExplicitLeave:
             data = ws.receive_json()
             assert data["type"] == "leave_confirmed"
             assert data["payload"]["message"] == "You have left the session"
+
+
+class TestWebSocketViewport:
+    def test_set_and_clear_viewport(self, ws_client):
+        from app.websocket.manager import manager
+        client, db = ws_client
+        _, _, token = _setup_ws_player(db)
+
+        with client.websocket_connect(f"/ws?token={token}") as ws:
+            ws.send_json({
+                "type": "set_viewport",
+                "payload": {"map_id": "m1", "x": 0, "y": 0, "width": 800, "height": 600, "margin": 0}
+            })
+            # Round-trip a chat message so the viewport message is processed
+            ws.send_json({"type": "chat", "payload": {"message": "sync"}})
+            ws.receive_json()
+            viewport = manager.viewports[token]
+            assert (viewport.map_id, viewport.x1, viewport.y1) == ("m1", 800, 600)
+
+            ws.send_json({"type": "set_viewport", "payload": {}})
+            ws.send_json({"type": "chat", "payload": {"message": "sync"}})
+            ws.receive_json()
+            assert token not in manager.viewports
+
+    def test_invalid_viewport(self, ws_client):
+        client, db = ws_client
+        _, _, token = _setup_ws_player(db)
+
+        with client.websocket_connect(f"/ws?token={token}") as ws:
+            ws.send_json({
+                "type": "set_viewport",
+                "payload": {"map_id": "m1", "x": 0, "y": 0, "width": -1, "height": 600}
+            })
+            assert ws.receive_json()["type"] == "error"
+
+            ws.send_json({
+                "type": "set_viewport",
+                "payload": {"map_id": "m1", "x": 0, "y": 0, "width": 1e12, "height": 1e12}
+            })
+            assert ws.receive_json()["type"] == "error"
+
+
+@pytest.mark.asyncio
+class TestViewportBroadcast:
+    async def test_token_events_follow_viewports(self):
+        from unittest.mock import AsyncMock
+        from starlette.websockets import WebSocketState
+        from app.websocket.manager import ConnectionManager, Viewport
+
+        manager = ConnectionManager()
+        sockets = {}
+        for token in ("all", "here", "elsewhere", "other-map"):
+            ws = MagicMock()
+            ws.client_state = WebSocketState.CONNECTED
+            ws.send_json = AsyncMock()
+            sockets[token] = ws
+            manager.active_connections[token] = ws
+
+        manager.set_viewport("here", Viewport("m1", 0, 0, 100, 100))
+        manager.set_viewport("elsewhere", Viewport("m1", 1000, 1000, 1100, 1100))
+        manager.set_viewport("other-map", Viewport("m2", 0, 0, 100, 100))
+
+        # Move from (50, 50) into the far viewport: both m1 viewports see it
+        await manager.broadcast_token_event(
+            "token_updated", {"token_id": "t"}, map_id="m1",
+            points=[(50, 50), (1050, 1050)],
+        )
+        assert sockets["all"].send_json.await_count == 1
+        assert sockets["here"].send_json.await_count == 1
+        assert sockets["elsewhere"].send_json.await_count == 1
+        assert sockets["other-map"].send_json.await_count == 0
+
+        # Token radius reaches into the viewport
+        await manager.broadcast_token_event(
+            "token_added", {"token_id": "u"}, map_id="m1",
+            points=[(120, 50)], radius=30,
+        )
+        assert sockets["here"].send_json.await_count == 2
+        assert sockets["elsewhere"].send_json.await_count == 1
+
+    async def test_token_move_enters_and_leaves_viewports(self):
+        from unittest.mock import AsyncMock
+        from starlette.websockets import WebSocketState
+        from app.websocket.manager import ConnectionManager, Viewport
+
+        manager = ConnectionManager()
+        sockets = {}
+        for token in ("all", "here", "elsewhere", "other-map"):
+            ws = MagicMock()
+            ws.client_state = WebSocketState.CONNECTED
+            ws.send_json = AsyncMock()
+            sockets[token] = ws
+            manager.active_connections[token] = ws
+
+        manager.set_viewport("here", Viewport("m1", 0, 0, 100, 100))
+        manager.set_viewport("elsewhere", Viewport("m1", 1000, 1000, 1100, 1100))
+        manager.set_viewport("other-map", Viewport("m2", 0, 0, 100, 100))
+
+        token = {"id": "t", "map_id": "m1", "x": 1050, "y": 1050, "label": "Orc"}
+        await manager.broadcast_token_moved(
+            {"map_id": "m1", "token_id": "t", "changes": {"x": 1050, "y": 1050}},
+            token, map_id="m1", old=(50, 50, 10), new=(1050, 1050, 10),
+        )
+
+        def sent(name):
+            return [call.args[0] for call in sockets[name].send_json.await_args_list]
+
+        assert [m["type"] for m in sent("all")] == ["token_updated"]
+        assert [m["type"] for m in sent("here")] == ["token_removed"]
+        assert sent("here")[0]["payload"] == {"map_id": "m1", "token_id": "t"}
+        assert [m["type"] for m in sent("elsewhere")] == ["token_added"]
+        assert sent("elsewhere")[0]["payload"]["token"] == token
+        assert sent("other-map") == []
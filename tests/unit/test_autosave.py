@@ -0,0 +1,113 @@
+import asyncio
+
+from app.models.character import Character
+from app.models.player import Player
+from app.models.session_snapshot import SessionSnapshot
+from app.services.persistence import import_session, import_session_stream
+from app.services.persistence.autosave import (
+    active_session_ids,
+    autosave_active_sessions,
+    autosave_session,
+    latest_autosave,
+    list_autosaves,
+)
+from app.services.persistence.snapshots import prune_snapshots, take_snapshot
+from app.services.persistence.streaming import read_chunks
+from tests.unit.test_export_planner import _session_data
+
+
+def _session(db):
+    return import_session(db, _session_data(characters=2)).session_id
+
+
+def _touch(db, session_id, hp):
+    hero = (
+        db.query(Character).join(Player)
+        .filter(Player.session_id == session_id).order_by(Character.id).first()
+    )
+    hero.current_hp = hp
+    db.flush()
+
+
+def _code(db, session_id):
+    from app.models.session import Session
+    return db.get(Session, session_id).code
+
+
+class TestAutosaveSession:
+    def test_writes_file_and_skips_unchanged(self, db, tmp_path):
+        session_id = _session(db)
+
+        path = autosave_session(db, session_id, tmp_path, keep=5)
+        assert path.parent == tmp_path / "guest" / _code(db, session_id)
+        assert path.read_bytes().startswith(b"DNDLSAV")
+        assert autosave_session(db, session_id, tmp_path, keep=5) is None
+
+        _touch(db, session_id, 3)
+        assert autosave_session(db, session_id, tmp_path, keep=5) is not None
+        assert len(list(path.parent.glob("*.msgpack"))) == 2
+        assert len(list(path.parent.glob("*.msgpack.blobs"))) == 2
+
+    def test_rotation_keeps_newest(self, db, tmp_path):
+        session_id = _session(db)
+        paths = []
+        for hp in range(5):
+            _touch(db, session_id, hp)
+            paths.append(autosave_session(db, session_id, tmp_path, keep=2))
+
+        assert sorted(paths[0].parent.glob("*.msgpack")) == paths[-2:]
+        # Sidecars go with their saves
+        assert sorted(paths[0].parent.glob("*.blobs")) == [p.with_name(p.name + ".blobs") for p in paths[-2:]]
+        latest = latest_autosave(tmp_path, None, _code(db, session_id))
+        assert latest.path == paths[-1]
+
+    def test_file_restores(self, db, tmp_path):
+        session_id = _session(db)
+        _touch(db, session_id, 1)
+        path = autosave_session(db, session_id, tmp_path, keep=5)
+
+        with open(path, "rb") as f:
+            result = import_session_stream(db, read_chunks(f))
+        assert result.success is True, result.errors
+        assert result.entity_counts["characters"] == 2
+
+    def test_list_rejects_path_in_code(self, db, tmp_path):
+        autosave_session(db, _session(db), tmp_path, keep=5)
+        assert list_autosaves(tmp_path, None, "../guest") == []
+        assert len(list_autosaves(tmp_path, None)) == 1
+
+
+class TestSnapshotRetention:
+    def test_prune_keeps_last_chains(self, db):
+        session_id = _session(db)
+        for hp in range(3):
+            _touch(db, session_id, hp)
+            take_snapshot(db, session_id, full=hp != 1)
+        # full, delta, full
+        assert prune_snapshots(db, session_id, keep_full=1) == 2
+        remaining = db.query(SessionSnapshot).filter(SessionSnapshot.session_id == session_id).all()
+        assert [s.is_full for s in remaining] == [True]
+
+
+class TestAutosaveActiveSessions:
+    def test_only_sessions_of_connected_players(self, db):
+        first, second = _session(db), _session(db)
+        player = db.query(Player).filter(Player.session_id == second).first()
+        assert active_session_ids(db, [player.id]) == [second]
+        assert active_session_ids(db, []) == []
+
+    def test_saves_each_session_once(self, db, tmp_path, monkeypatch):
+        session_ids = [_session(db), _session(db)]
+        players = [db.query(Player).filter(Player.session_id == s).first().id for s in session_ids]
+
+        monkeypatch.setattr(
+            "app.services.persistence.autosave._active_sessions",
+            lambda ids: active_session_ids(db, ids),
+        )
+        monkeypatch.setattr(
+            "app.services.persistence.autosave._autosave_once",
+            lambda sid: autosave_session(db, sid, tmp_path, keep=5),
+        )
+        assert asyncio.run(autosave_active_sessions(players)) == 2
+        # Без изменений — ничего не пишется
+        assert asyncio.run(autosave_active_sessions(players)) == 0
@@ -0,0 +1,120 @@
+import asyncio
+import io
+import os
+
+import pytest
+from PIL import Image
+from sqlalchemy.orm import sessionmaker
+
+from app.models.user_character import UserCharacter
+from app.services import blobs
+from app.services.avatar_jobs import DONE, FAILED, AvatarQueue, avatar_key
+
+
+def _jpeg(color) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (300, 300), color).save(buf, format="JPEG")
+    return buf.getvalue()
+
+
+class FakeGenerator:
+    """Stands in for YandexART: records calls and concurrency."""
+
+    def __init__(self):
+        self.calls = []
+        self.running = 0
+        self.max_running = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self, appearance: str) -> bytes:
+        self.calls.append(appearance)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await self.release.wait()
+            if "cursed" in appearance:
+                raise ValueError("Недостаточно средств на аккаунте Yandex Cloud")
+            return _jpeg((len(self.calls) * 20 % 255, 40, 90))
+        finally:
+            self.running -= 1
+
+
+@pytest.fixture()
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(blobs, "BLOB_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture()
+def queue(db, store):
+    return AvatarQueue(FakeGenerator(), sessionmaker(bind=db.get_bind()), workers=2)
+
+
+@pytest.fixture()
+def characters(db, create_user_fixture):
+    user = create_user_fixture()
+    chars = [UserCharacter(user_id=user.id, name=f"Hero{i}", appearance="elf") for i in range(2)]
+    db.add_all(chars)
+    db.commit()
+    return chars
+
+
+def test_key_ignores_whitespace_only():
+    assert avatar_key("tall  elf\n") == avatar_key("tall elf")
+    assert avatar_key("tall elf") != avatar_key("short elf")
+
+
+async def test_identical_requests_share_one_generation(db, queue, characters):
+    a, b = characters
+    first = queue.submit("tall elf", "user_character", a.id)
+    again = queue.submit("tall elf", "user_character", a.id)
+    other = queue.submit("tall  elf", "user_character", b.id)
+    assert first is again is other
+    assert first.targets == [("user_character", a.id), ("user_character", b.id)]
+
+    queue.generator.release.set()
+    await queue.join()
+
+    assert queue.generator.calls == ["tall elf"]
+    assert first.status == DONE and first.avatar_url.startswith("/uploads/blobs/")
+    db.expire_all()
+    assert a.avatar_url == b.avatar_url == first.avatar_url
+    digest = blobs.digest_from_url(first.avatar_url)
+    assert os.path.isfile(os.path.join(blobs.derived_dir(digest), "w96.webp"))
+
+
+async def test_cached_result_is_reused(queue, characters):
+    job = queue.submit("tall elf", "user_character", characters[0].id)
+    queue.generator.release.set()
+    await queue.join()
+
+    cached = queue.submit("tall elf", "user_character", characters[1].id)
+    assert cached.id != job.id
+    assert (cached.status, cached.avatar_url) == (DONE, job.avatar_url)
+    assert len(queue.generator.calls) == 1
+
+    # Blob collected since: generate again
+    os.remove(blobs.blob_path(blobs.digest_from_url(job.avatar_url), "jpeg"))
+    assert queue.submit("tall elf", "user_character", characters[1].id).status != DONE
+
+
+async def test_workers_are_bounded(queue, characters):
+    jobs = [queue.submit(f"elf {i}", "user_character", characters[0].id) for i in range(5)]
+    await asyncio.sleep(0.01)
+    assert queue.generator.running == 2
+
+    queue.generator.release.set()
+    await queue.join()
+    assert queue.generator.max_running == 2
+    assert all(job.status == DONE for job in jobs)
+
+
+async def test_failure_is_reported_and_not_cached(queue, characters):
+    queue.generator.release.set()
+    job = queue.submit("cursed elf", "user_character", characters[0].id)
+    await queue.join()
+
+    assert job.status == FAILED
+    assert "Yandex Cloud" in job.error
+    assert queue.get(job.id) is job
+    assert queue.submit("cursed elf", "user_character", characters[0].id) is not job
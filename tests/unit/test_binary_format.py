@@ -0,0 +1,192 @@
+import gzip
+import io
+import struct
+
+import msgpack
+import pytest
+
+from app.services.persistence import (
+    export_session, import_session, import_session_stream, iter_export_binary, validate_import_stream,
+)
+from app.services.persistence import binary_format
+from app.services.persistence.binary_format import (
+    MAGIC,
+    BinaryExportReader,
+    BinaryFormatError,
+    encode_export,
+    is_binary_export,
+)
+from app.services.persistence.compression import decompress_stream
+from app.services.persistence.migrations import CURRENT_FORMAT_VERSION
+
+
+def _doc():
+    description = "Длинное описание, которое повторяется у нескольких предметов. " * 4
+    return {
+        "format_version": CURRENT_FORMAT_VERSION,
+        "exported_at": "2026-10-19T00:00:00Z",
+        "session_info": {"code": "ABC123", "created_at": None},
+        "entities": {
+            "players": {"version": 1, "data": [
+                {"id": 1, "name": "GM", "is_gm": True},
+                {"id": 2, "name": "Alice", "is_gm": False},
+            ]},
+            "characters": {"version": 1, "data": [
+                {"id": 10, "player_id": 2, "name": "Hero", "class_name": "Wizard", "max_hp": 25},
+                {"id": 11, "player_id": 2, "name": "Sidekick", "class_name": "Wizard", "max_hp": 12.5},
+            ]},
+            "items": {"version": 1, "data": [
+                {"id": 100 + i, "character_id": 10, "name": "Potion", "description": description,
+                 "effects": {"heal": [1, 2], "tag": "Wizard"}}
+                for i in range(5)
+            ] + [
+                # Запись с другим набором ключей
+                {"id": 200, "character_id": 11, "name": "Note"},
+            ]},
+            "spells": {"version": 1, "data": []},
+        },
+    }
+
+
+def _reader(raw):
+    return BinaryExportReader(io.BytesIO(raw))
+
+
+class TestBinaryFormat:
+    def test_round_trip_equals_json_document(self):
+        doc = _doc()
+        raw = encode_export(doc)
+        assert is_binary_export(raw)
+        assert _reader(raw).to_dict() == doc
+
+    def test_repeated_strings_are_interned(self):
+        doc = _doc()
+        raw = encode_export(doc)
+        reader = _reader(raw)
+
+        description = doc["entities"]["items"]["data"][0]["description"]
+        assert description in reader.strings
+        assert "Wizard" in reader.strings
+        # Описание хранится один раз
+        assert raw.count(description.encode("utf-8")) == 1
+
+    def test_smaller_than_json(self):
+        import json
+
+        doc = _doc()
+        assert len(encode_export(doc)) < len(json.dumps(doc, ensure_ascii=False).encode("utf-8"))
+
+    def test_seek_to_section_without_reading_others(self):
+        raw = bytearray(encode_export(_doc()))
+        reader = _reader(bytes(raw))
+        characters = reader.sections["characters"]
+
+        # Порча другой секции не мешает читать нужную
+        items = reader.sections["items"]
+        start = reader.data_start + items.offset
+        raw[start:start + items.length] = b"\xc1" * items.length
+        reader = _reader(bytes(raw))
+
+        assert reader.names() == ["players", "characters", "items", "spells"]
+        assert [c["name"] for c in reader.read_section("characters")] == ["Hero", "Sidekick"]
+        assert characters.count == 2
+        with pytest.raises(BinaryFormatError):
+            list(reader.read_section("items"))
+
+    def test_events_match_json_reader_shape(self):
+        events = list(_reader(encode_export(_doc())).events())
+        assert events[:4] == [
+            ("header", "format_version", CURRENT_FORMAT_VERSION),
+            ("header", "exported_at", "2026-10-19T00:00:00Z"),
+            ("header", "session_info", {"code": "ABC123", "created_at": None}),
+            ("entities", None, None),
+        ]
+        assert ("field", "items", ("version", 1)) in events
+        assert sum(1 for kind, name, _ in events if kind == "record" and name == "items") == 6
+
+    def test_bad_magic(self):
+        with pytest.raises(BinaryFormatError):
+            _reader(b"NOTASAVE" + b"\x00" * 16)
+
+    def test_newer_container_version(self):
+        raw = bytearray(encode_export(_doc()))
+        raw[len(MAGIC):len(MAGIC) + 2] = struct.pack("<H", 99)
+        with pytest.raises(BinaryFormatError, match="контейнера"):
+            _reader(bytes(raw))
+
+    def test_unsupported_format_version(self):
+        doc = _doc()
+        doc["format_version"] = "99.0"
+        with pytest.raises(BinaryFormatError, match="Неподдерживаемая версия"):
+            _reader(encode_export(doc))
+
+    def test_section_beyond_file(self):
+        with pytest.raises(BinaryFormatError, match="за пределы"):
+            _reader(encode_export(_doc())[:-10])
+
+    def test_unknown_string_reference(self):
+        body = msgpack.packb([msgpack.ExtType(1, struct.pack("<I", 5))])
+        header = msgpack.packb({
+            "format_version": CURRENT_FORMAT_VERSION,
+            "strings": [],
+            "sections": [{"name": "players", "version": 1, "fields": ["name"],
+                          "count": 1, "offset": 0, "length": len(body)}],
+        })
+        raw = MAGIC + struct.pack("<HI", 1, len(header)) + header + body
+        with pytest.raises(BinaryFormatError, match="вне таблицы"):
+            list(_reader(raw).read_section("players"))
+
+
+class TestBinaryImport:
+    def test_streaming_import_matches_json(self, db):
+        doc = _doc()
+        raw = encode_export(doc)
+        chunks = [raw[i:i + 5] for i in range(0, len(raw), 5)]
+
+        validation = validate_import_stream(chunks)
+        assert validation.is_valid is True, validation.errors
+        assert validation.entity_counts == {"players": 2, "characters": 2, "items": 6, "spells": 0}
+
+        result = import_session_stream(db, decompress_stream([gzip.compress(raw)]))
+        assert result.success is True, result.errors
+        assert result.entity_counts == import_session(db, doc).entity_counts
+
+    def test_export_round_trip(self, db):
+        first = import_session(db, _doc())
+        exported = export_session(db, first.session_id)
+
+        result = import_session_stream(db, [encode_export(exported)])
+        assert result.success is True, result.errors
+        again = export_session(db, result.session_id)
+        strip = lambda rows: [{k: v for k, v in r.items() if not k.endswith("id")} for r in rows]  # noqa: E731
+        for name in ("characters", "items"):
+            assert strip(again["entities"][name]["data"]) == strip(exported["entities"][name]["data"])
+
+    def test_streaming_export_matches_encode(self, db, monkeypatch):
+        session_id = import_session(db, _doc()).session_id
+        # Маленькие порции и сброс секций на диск
+        monkeypatch.setattr(binary_format, "READ_CHUNK_SIZE", 64)
+        monkeypatch.setattr(binary_format, "SPOOL_MAX_SIZE", 128)
+
+        chunks = list(iter_export_binary(db, session_id))
+        assert len(chunks) > 2
+        streamed = _reader(b"".join(chunks)).to_dict()
+        expected = _reader(encode_export(export_session(db, session_id))).to_dict()
+        streamed["exported_at"] = expected["exported_at"]
+        assert streamed == expected
+
+    def test_streaming_export_unknown_session(self, db):
+        with pytest.raises(ValueError):
+            iter_export_binary(db, 999999)
+
+    def test_corrupt_binary_rejected(self):
+        raw = encode_export(_doc())
+        result = validate_import_stream([raw[: len(raw) // 2]])
+        assert result.is_valid is False
+        assert result.errors
+
+    def test_size_limit(self):
+        raw = encode_export(_doc())
+        result = validate_import_stream([raw], max_size=len(raw) - 1)
+        assert result.is_valid is False
+        assert "больше" in result.errors[0]
@@ -0,0 +1,138 @@
+import hashlib
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.session_snapshot import SessionSnapshot
+from app.models.upload_blob import UploadBlob
+from app.models.user import User
+from app.models.user_map import UserMap
+from app.services import blobs
+
+
+@pytest.fixture()
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(blobs, "BLOB_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _user_map(db, url):
+    user = User(username=f"u{os.urandom(4).hex()}", display_name="u", hashed_password="x")
+    db.add(user)
+    db.flush()
+    db.add(UserMap(user_id=user.id, name="m", background_url=url))
+    db.flush()
+
+
+class TestStore:
+    def test_same_content_stored_once(self, db, store):
+        a = blobs.store_bytes(db, b"image", "png")
+        b = blobs.store_bytes(db, b"image", "png")
+        digest = hashlib.sha256(b"image").hexdigest()
+
+        assert a is b and a.sha256 == digest
+        assert os.listdir(store / digest[:2]) == [f"{digest}.png"]
+        assert [n for n in os.listdir(store) if n.endswith(".part")] == []
+        assert blobs.digest_from_url(blobs.blob_url(digest, "png")) == digest
+
+    def test_concurrent_insert_reuses_row(self, db, store, monkeypatch):
+        digest = hashlib.sha256(b"race").hexdigest()
+        db.add(UploadBlob(sha256=digest, ext="png", size=4))
+        db.flush()
+        db.expunge_all()
+
+        # Both requests saw no row; the other one inserted first
+        real_get = db.get
+        calls = []
+
+        def racing_get(model, key, **kwargs):
+            calls.append(key)
+            return None if len(calls) == 1 else real_get(model, key, **kwargs)
+
+        monkeypatch.setattr(db, "get", racing_get)
+        blob = blobs.store_bytes(db, b"race", "png")
+        monkeypatch.undo()
+
+        assert blob.sha256 == digest
+        assert db.query(UploadBlob).filter(UploadBlob.sha256 == digest).count() == 1
+
+    def test_digest_from_foreign_url(self):
+        assert blobs.digest_from_url("/uploads/maps/abc.png") is None
+        assert blobs.digest_from_url(None) is None
+
+
+class TestCollectGarbage:
+    def test_sweeps_only_unreferenced_blobs_past_grace(self, db, store):
+        kept = blobs.store_bytes(db, b"kept", "png")
+        dropped = blobs.store_bytes(db, b"dropped", "png")
+        fresh = blobs.store_bytes(db, b"fresh", "png")
+        _user_map(db, blobs.blob_url(kept.sha256, "png"))
+        _user_map(db, blobs.blob_url(kept.sha256, "png"))
+        os.makedirs(blobs.derived_dir(dropped.sha256))
+
+        old = datetime.utcnow() - timedelta(days=1)
+        kept.last_uploaded_at = dropped.last_uploaded_at = old
+        db.flush()
+
+        assert blobs.collect_garbage(db, grace=timedelta(hours=1)) == 1
+
+        assert db.get(UploadBlob, kept.sha256).ref_count == 2
+        assert db.get(UploadBlob, dropped.sha256) is None
+        assert db.get(UploadBlob, fresh.sha256) is not None
+        assert not os.path.exists(blobs.blob_path(dropped.sha256, "png"))
+        assert not os.path.exists(blobs.derived_dir(dropped.sha256))
+        assert os.path.exists(blobs.blob_path(kept.sha256, "png"))
+
+    def test_snapshots_and_autosaves_keep_blobs(self, db, store, tmp_path_factory, create_session_fixture):
+        in_snapshot = blobs.store_bytes(db, b"snapshot", "png")
+        in_autosave = blobs.store_bytes(db, b"autosave", "webp")
+        in_snapshot.last_uploaded_at = in_autosave.last_uploaded_at = datetime.utcnow() - timedelta(days=1)
+        session, _ = create_session_fixture()
+        db.add(SessionSnapshot(
+            session_id=session.id, format_version="1", state_hash="x",
+            payload={"entities": {"maps": {"data": [{"background_url": blobs.blob_url(in_snapshot.sha256, "png")}]}}},
+        ))
+        db.flush()
+        root = tmp_path_factory.mktemp("autosaves")
+        autosaves = root / "guest" / "ABC123"
+        autosaves.mkdir(parents=True)
+        url = blobs.blob_url(in_autosave.sha256, "webp").encode()
+        (autosaves / "save.msgpack").write_bytes(b"\x00\xa0" + url + b"\x91")
+
+        assert blobs.collect_garbage(db, grace=timedelta(hours=1), autosave_dir=str(root)) == 0
+        assert db.get(UploadBlob, in_snapshot.sha256).ref_count == 1
+        assert db.get(UploadBlob, in_autosave.sha256).ref_count == 1
+        # A save without a sidecar was scanned once and got one
+        assert (autosaves / "save.msgpack.blobs").read_text() == f"{in_autosave.sha256}\n"
+
+    def test_autosave_sidecars(self, db, store, tmp_path_factory, monkeypatch):
+        blob = blobs.store_bytes(db, b"sidecar", "png")
+        blob.last_uploaded_at = datetime.utcnow() - timedelta(days=1)
+        db.flush()
+        root = tmp_path_factory.mktemp("autosaves")
+        url = blobs.blob_url(blob.sha256, "png").encode()
+        save = root / "save.msgpack"
+        save.write_bytes(b"x" * 100 + url + b"y" * 100)
+        monkeypatch.setattr(blobs, "SCAN_CHUNK_SIZE", 120)  # the URL spans two chunks
+        assert blobs.file_references(save) == {blob.sha256}
+
+        # Up-to-date sidecar: the save itself is not read
+        monkeypatch.setattr(blobs, "_scan_file", lambda path: pytest.fail("scanned"))
+        assert blobs.count_references(db, str(root))[blob.sha256] == 1
+
+        # Sidecar of a rotated-away save is dropped, and the blob with it
+        save.unlink()
+        assert blobs.collect_garbage(db, grace=timedelta(hours=1), autosave_dir=str(root)) == 1
+        assert list(root.iterdir()) == []
+
+    def test_removes_stale_orphan_files(self, db, store):
+        digest = "ab" * 32
+        orphan = store / digest[:2] / f"{digest}.png"
+        orphan.parent.mkdir()
+        orphan.write_bytes(b"x")
+        temp = store / "leftover.part"
+        temp.write_bytes(b"x")
+
+        blobs.collect_garbage(db, grace=timedelta(hours=1), now=datetime.utcnow() + timedelta(days=1))
+        assert not orphan.exists() and not temp.exists()
@@ -0,0 +1,127 @@
+from unittest.mock import patch
+
+from app.models.character import Character
+from app.models.combat import Combat, CombatParticipant
+from app.models.item import Item
+from app.models.player import Player
+from app.models.spell import Spell
+from app.services.persistence import IdMapping, ImportContext, export_session, import_session
+from app.services.persistence.bulk import bulk_insert
+from app.services.persistence.migrations import CURRENT_FORMAT_VERSION
+
+
+def _export_data(characters=3, items=4, spells=2):
+    chars = [
+        {"id": 10 + c, "player_id": 2, "name": f"Hero {c}", "max_hp": 20, "current_hp": 15}
+        for c in range(characters)
+    ]
+    item_rows = [
+        {"id": 100 + len(chars) * i + c, "character_id": 10 + c, "name": f"Item {i}",
+         "effects": {"ac_bonus": i}, "is_equipped": i == 0}
+        for c in range(characters) for i in range(items)
+    ]
+    spell_rows = [
+        {"id": 500 + len(chars) * s + c, "character_id": 10 + c, "name": f"Spell {s}", "level": s}
+        for c in range(characters) for s in range(spells)
+    ]
+    return {
+        "format_version": CURRENT_FORMAT_VERSION,
+        "entities": {
+            "players": {"version": 1, "data": [
+                {"id": 1, "name": "GM", "is_gm": True},
+                {"id": 2, "name": "Alice", "is_gm": False},
+            ]},
+            "characters": {"version": 1, "data": chars},
+            "items": {"version": 1, "data": item_rows},
+            "spells": {"version": 1, "data": spell_rows},
+            "combats": {"version": 1, "data": [{
+                "id": 7,
+                "is_active": True,
+                "round_number": 3,
+                "current_turn_order": 1,
+                "participants": [
+                    {"character_id": 10, "initiative": 18, "current_hp": 15},
+                    {"character_id": 11, "initiative": 12, "current_hp": 9},
+                    {"character_id": 999, "initiative": 5, "current_hp": 1},
+                ],
+            }]},
+        },
+    }
+
+
+class TestBulkInsert:
+    def test_returns_ids_in_row_order_across_batches(self, db, create_session_fixture):
+        session, _ = create_session_fixture()
+        player = Player(session_id=session.id, name="P", token="bulk-token")
+        db.add(player)
+        db.flush()
+        context = ImportContext(db=db, session_id=session.id)
+
+        rows = [{"player_id": player.id, "name": f"C{i}"} for i in range(7)]
+        with patch("app.services.persistence.bulk.IMPORT_BATCH_SIZE", 3):
+            ids = bulk_insert(context, Character, rows)
+
+        assert len(ids) == 7
+        names = {c.id: c.name for c in db.query(Character).filter(Character.id.in_(ids))}
+        assert [names[i] for i in ids] == [f"C{i}" for i in range(7)]
+
+    def test_empty_rows(self, db):
+        assert bulk_insert(ImportContext(db=db, session_id=0), Character, []) == []
+
+
+class TestIdMapping:
+    def test_set_many(self):
+        mapping = IdMapping()
+        mapping.set("items", 1, 100)
+        mapping.set_many("items", [2, 3], [200, 300])
+        assert mapping.get("items", 1) == 100
+        assert mapping.get("items", 3) == 300
+
+
+class TestBulkImportSession:
+    def test_rows_and_foreign_keys(self, db):
+        result = import_session(db, _export_data())
+        assert result.success is True
+        assert result.entity_counts == {
+            "players": 1, "characters": 3, "items": 12, "spells": 6, "combats": 1,
+        }
+
+        chars = (
+            db.query(Character).join(Player)
+            .filter(Player.session_id == result.session_id)
+            .order_by(Character.id).all()
+        )
+        assert [c.name for c in chars] == ["Hero 0", "Hero 1", "Hero 2"]
+        assert all(c.player.name == "Alice" for c in chars)
+        for c in chars:
+            assert sorted(i.name for i in c.items) == ["Item 0", "Item 1", "Item 2", "Item 3"]
+            assert len(c.spells) == 2
+        equipped = db.query(Item).filter(Item.character_id == chars[0].id, Item.is_equipped).one()
+        assert equipped.effects == {"ac_bonus": 0}
+        assert db.query(Spell).filter(Spell.character_id == chars[2].id, Spell.level == 1).count() == 1
+
+    def test_combat_participants_and_current_turn(self, db):
+        result = import_session(db, _export_data())
+
+        combat = db.query(Combat).filter(Combat.session_id == result.session_id).one()
+        assert combat.round_number == 3
+        participants = (
+            db.query(CombatParticipant)
+            .filter(CombatParticipant.combat_id == combat.id)
+            .order_by(CombatParticipant.id).all()
+        )
+        assert [p.initiative for p in participants] == [18, 12]
+        assert combat.current_turn_id == participants[1].id
+        assert any("unknown character 999" in w for w in result.warnings)
+
+    def test_round_trip(self, db):
+        first = import_session(db, _export_data())
+        exported = export_session(db, first.session_id)
+
+        second = import_session(db, exported)
+        assert second.success is True
+        assert second.entity_counts == {**first.entity_counts, "maps": 0}
+        again = export_session(db, second.session_id)
+        for name in ("items", "spells"):
+            strip = lambda rows: [{k: v for k, v in r.items() if k not in ("id", "character_id")} for r in rows]  # noqa: E731
+            assert strip(again["entities"][name]["data"]) == strip(exported["entities"][name]["data"])
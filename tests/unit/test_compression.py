@@ -0,0 +1,139 @@
+import gzip
+import os
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+from starlette.testclient import TestClient
+
+from app.core import compression
+from app.core.compression import CompressionMiddleware, deflate_raw, gzip_prefixed, negotiate_encoding
+from app.core.static_files import IMMUTABLE_CACHE_CONTROL, PrecompressedStaticFiles, file_index, precompress
+
+BIG = {"items": ["goblin"] * 500}
+
+
+def _client(monkeypatch) -> TestClient:
+    # Deterministic regardless of whether brotli is installed
+    monkeypatch.setattr(compression, "brotli", None)
+
+    async def big(request):
+        return JSONResponse(BIG, headers={"ETag": '"v1"'})
+
+    async def small(request):
+        return JSONResponse({"ok": True})
+
+    async def encoded(request):
+        return Response(gzip.compress(b"{}" * 1000), media_type="application/json",
+                        headers={"Content-Encoding": "gzip"})
+
+    async def binary(request):
+        return Response(b"\0" * 5000, media_type="application/vnd.msgpack")
+
+    async def stream(request):
+        async def chunks():
+            for _ in range(100):
+                yield b'{"line":"' + b"x" * 50 + b'"}\n'
+        return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+    app = Starlette(routes=[
+        Route("/api/big", big), Route("/api/small", small), Route("/api/encoded", encoded),
+        Route("/api/binary", binary), Route("/api/stream", stream),
+        Route("/other", big),
+    ])
+    return TestClient(CompressionMiddleware(app))
+
+
+class TestNegotiateEncoding:
+    def test_preference_and_q(self):
+        assert negotiate_encoding("gzip, br", ["br", "gzip"]) == "br"
+        assert negotiate_encoding("gzip;q=0, *", ["gzip"]) is None
+        assert negotiate_encoding("*", ["gzip"]) == "gzip"
+        assert negotiate_encoding("identity", ["br", "gzip"]) is None
+        assert negotiate_encoding(None) is None
+
+
+class TestGzipPrefixed:
+    def test_joined_streams_decompress(self):
+        body = b'"players":[' + b'{"name":"Alice","hp":10},' * 500 + b'{}]}'
+        deflated = deflate_raw(body)
+        for prefix in (b'{"event_seq":0,', b'{"event_seq":123456,', b""):
+            assert gzip.decompress(gzip_prefixed(prefix, body, deflated)) == prefix + body
+
+
+class TestCompressionMiddleware:
+    def test_compresses_large_api_json(self, monkeypatch):
+        resp = _client(monkeypatch).get("/api/big", headers={"Accept-Encoding": "gzip"})
+        assert resp.headers["content-encoding"] == "gzip"
+        assert resp.headers["vary"] == "Accept-Encoding"
+        assert resp.headers["etag"] == 'W/"v1"'
+        assert int(resp.headers["content-length"]) < len(resp.content)
+        assert resp.json() == BIG
+
+    def test_skips(self, monkeypatch):
+        client = _client(monkeypatch)
+        headers = {"Accept-Encoding": "gzip"}
+        assert "content-encoding" not in client.get("/api/small", headers=headers).headers
+        assert "content-encoding" not in client.get("/api/binary", headers=headers).headers
+        assert "content-encoding" not in client.get("/other", headers=headers).headers
+        plain = client.get("/api/big", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in plain.headers
+        assert plain.headers["etag"] == '"v1"'
+
+    def test_already_encoded_untouched(self, monkeypatch):
+        resp = _client(monkeypatch).get("/api/encoded", headers={"Accept-Encoding": "gzip"})
+        assert resp.headers["content-encoding"] == "gzip"
+        # Decoded once by the client — not compressed twice
+        assert resp.content == b"{}" * 1000
+
+    def test_streaming(self, monkeypatch):
+        resp = _client(monkeypatch).get("/api/stream", headers={"Accept-Encoding": "gzip"})
+        assert resp.headers["content-encoding"] == "gzip"
+        assert "content-length" not in resp.headers
+        assert resp.text.count("\n") == 100
+
+
+class TestPrecompressedStaticFiles:
+    def _assets(self, tmp_path):
+        (tmp_path / "index-abc123.js").write_text("console.log('dnd');\n" * 200)
+        (tmp_path / "tiny-abc123.css").write_text("a{}")
+        (tmp_path / "logo-abc123.png").write_bytes(os.urandom(4000))
+        return tmp_path
+
+    def test_precompress_writes_siblings_once(self, tmp_path):
+        assets = self._assets(tmp_path)
+        assert precompress(str(assets)) == 1 + (compression.brotli is not None)
+        assert gzip.decompress((assets / "index-abc123.js.gz").read_bytes()) == (assets / "index-abc123.js").read_bytes()
+        assert not (assets / "tiny-abc123.css.gz").exists()
+        assert precompress(str(assets)) == 0
+
+    def test_serves_sibling(self, tmp_path):
+        assets = self._assets(tmp_path)
+        client = TestClient(Starlette(routes=[Mount("/assets", PrecompressedStaticFiles(directory=str(assets)))]))
+
+        resp = client.get("/assets/index-abc123.js", headers={"Accept-Encoding": "gzip"})
+        assert resp.headers["content-encoding"] == "gzip"
+        assert resp.headers["content-type"].startswith("text/javascript")
+        assert resp.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+        assert resp.text == (assets / "index-abc123.js").read_text()
+
+        cached = client.get("/assets/index-abc123.js", headers={
+            "Accept-Encoding": "gzip", "If-None-Match": resp.headers["etag"],
+        })
+        assert cached.status_code == 304
+
+        plain = client.get("/assets/index-abc123.js", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in plain.headers
+        assert plain.headers["vary"] == "Accept-Encoding"
+
+        png = client.get("/assets/logo-abc123.png", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in png.headers
+        assert png.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+
+
+class TestFileIndex:
+    def test_relative_posix_paths(self, tmp_path):
+        (tmp_path / "assets").mkdir()
+        (tmp_path / "assets" / "a.js").write_text("x")
+        (tmp_path / "index.html").write_text("x")
+        assert file_index(str(tmp_path)) == {"assets/a.js", "index.html"}
@@ -0,0 +1,98 @@
+import time
+
+import pytest
+
+from app.services.encounter import (
+    Combatant, PARTY, ENEMIES, _pack, expected_damage, simulate_chunk, simulate_encounter, warm_pool,
+)
+
+
+def _hero(**kwargs):
+    defaults = dict(name="Hero", side=PARTY, max_hp=30, armor_class=16,
+                    attack_bonus=6, damage_dice="1d8+3", initiative_bonus=2)
+    defaults.update(kwargs)
+    return Combatant(**defaults)
+
+
+def _goblin(**kwargs):
+    defaults = dict(name="Goblin", side=ENEMIES, max_hp=7, armor_class=13,
+                    attack_bonus=4, damage_dice="1d6+2", initiative_bonus=2)
+    defaults.update(kwargs)
+    return Combatant(**defaults)
+
+
+class TestExpectedDamage:
+    @pytest.mark.parametrize("dice,expected", [
+        ("1d6", 3.5),
+        ("2d6+3", 10.0),
+        ("1d8-1", 3.5),
+    ])
+    def test_average(self, dice, expected):
+        assert expected_damage(dice) == expected
+
+
+class TestSimulateEncounter:
+    def test_probabilities_in_range(self):
+        result = simulate_encounter([_hero(), _goblin(), _goblin(name="Goblin 2")],
+                                    iterations=2000, seed=1)
+        assert result.iterations == 2000
+        assert 0.0 <= result.win_probability <= 1.0
+        assert result.expected_rounds >= 1
+        assert len(result.death_probability) == 3
+
+    def test_overwhelming_party_wins(self):
+        party = [_hero(name=f"Hero {i}", max_hp=100, attack_bonus=15, damage_dice="2d12+10")
+                 for i in range(4)]
+        result = simulate_encounter(party + [_goblin()], iterations=1000, seed=2)
+        assert result.win_probability == 1.0
+        assert result.death_probability[-1] == 1.0
+        assert all(p == 0.0 for p in result.death_probability[:4])
+
+    def test_hopeless_fight_loses(self):
+        dragon = _goblin(name="Dragon", max_hp=300, armor_class=22, attack_bonus=15,
+                         damage_dice="4d10+8")
+        result = simulate_encounter([_hero(max_hp=10), dragon], iterations=1000, seed=3)
+        assert result.win_probability < 0.01
+        assert result.death_probability[0] > 0.99
+
+    def test_downed_combatant_stays_down(self):
+        result = simulate_encounter([_hero(current_hp=0), _hero(name="B"), _goblin()],
+                                    iterations=500, seed=4)
+        assert result.death_probability[0] == 1.0
+
+    def test_seed_is_reproducible(self):
+        combatants = [_hero(), _goblin(), _goblin(name="Goblin 2")]
+        a = simulate_encounter(combatants, iterations=3000, seed=7)
+        b = simulate_encounter(combatants, iterations=3000, seed=7)
+        assert a.win_probability == b.win_probability
+        assert a.death_probability == b.death_probability
+
+    def test_requires_both_sides(self):
+        with pytest.raises(ValueError):
+            simulate_encounter([_hero()], iterations=100)
+
+    def test_invalid_dice_rejected(self):
+        with pytest.raises(ValueError):
+            simulate_encounter([_hero(), _goblin(damage_dice="banana")], iterations=100)
+
+    def test_process_pool_under_budget(self):
+        combatants = [_hero(), _hero(name="Cleric"), _goblin(), _goblin(name="Goblin 2")]
+        result = simulate_encounter(combatants, iterations=10000, time_budget=5.0, workers=2, seed=5)
+        assert result.iterations == 10000
+        assert not result.budget_exhausted
+
+    def test_chunk_stops_at_deadline(self):
+        # Evenly matched tanks: fights last many rounds
+        spec = _pack([_hero(max_hp=500, armor_class=25), _goblin(max_hp=500, armor_class=25)])
+        assert simulate_chunk(spec, 100, seed=1, deadline=time.time() - 1) is None
+
+        started = time.perf_counter()
+        assert simulate_chunk(spec, 200000, seed=1, deadline=time.time() + 0.05) is None
+        assert time.perf_counter() - started < 1.0
+
+    def test_warm_pool_then_short_budget(self):
+        warm_pool(2)
+        combatants = [_hero(), _goblin()]
+        result = simulate_encounter(combatants, iterations=100000, time_budget=0.3, workers=2, seed=5)
+        assert 0 < result.iterations < 100000
+        assert result.budget_exhausted
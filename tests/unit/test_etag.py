@@ -0,0 +1,51 @@
+from app.core.auth import create_access_token, create_refresh_token, player_token_from_jwt
+from app.core.etag import etag_matches, make_etag
+from app.core.session_versions import SessionVersions, TokenSessionCache, session_versions
+
+
+class TestSessionVersions:
+    def test_bump_is_per_session(self):
+        versions = SessionVersions()
+        versions.bump(1)
+        versions.bump(1)
+        assert versions.get(1) == (0, 2)
+        assert versions.get(2) == (0, 0)
+
+        versions.bump_all()
+        assert versions.get(2) == (1, 0)
+
+    def test_etag_changes_with_version(self):
+        etag = make_etag(99, "tok", "/api/combat", b"")
+        assert make_etag(99, "tok", "/api/combat", b"") == etag
+        assert make_etag(99, "tok", "/api/combat", b"x=1") != etag
+        assert make_etag(99, "other", "/api/combat", b"") != etag
+
+        session_versions.bump(99)
+        assert make_etag(99, "tok", "/api/combat", b"") != etag
+
+
+class TestTokenSessionCache:
+    def test_evicts_least_recently_used(self):
+        cache = TokenSessionCache(max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+
+class TestIfNoneMatch:
+    def test_matching(self):
+        assert etag_matches('"a"', '"a"')
+        assert etag_matches('"x", W/"a"', '"a"')
+        assert etag_matches("*", '"a"')
+        assert not etag_matches('"b"', '"a"')
+
+
+class TestPlayerTokenFromJwt:
+    def test_only_player_access_tokens(self):
+        assert player_token_from_jwt(create_access_token({"sub": "abc"})) == "abc"
+        assert player_token_from_jwt(create_access_token({"sub": "user:1"})) is None
+        assert player_token_from_jwt(create_refresh_token({"sub": "abc"})) is None
+        assert player_token_from_jwt("garbage") is None
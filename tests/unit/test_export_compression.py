@@ -0,0 +1,42 @@
+import gzip
+from unittest.mock import patch
+
+import pytest
+
+from app.services.persistence import compression
+from app.services.persistence.compression import (
+    GZIP, IDENTITY, ZSTD, compress_stream, negotiate_encoding,
+)
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, IDENTITY),
+    ("", IDENTITY),
+    ("gzip, deflate", GZIP),
+    ("br;q=1.0, gzip;q=0.5", GZIP),
+    ("gzip;q=0", IDENTITY),
+    ("*", GZIP),
+    ("*, gzip;q=0", IDENTITY),
+])
+def test_negotiate_without_zstd(header, expected):
+    with patch.object(compression, "zstandard", None):
+        assert negotiate_encoding(header) == expected
+
+
+def test_negotiate_prefers_zstd_when_available():
+    with patch.object(compression, "zstandard", object()):
+        assert negotiate_encoding("gzip, zstd") == ZSTD
+        assert negotiate_encoding("gzip, zstd;q=0.5") == GZIP
+
+
+def test_gzip_stream_round_trip():
+    chunks = [b"{" + b"x" * 100_000, b"y" * 50_000 + b"}"]
+    compressed = b"".join(compress_stream(iter(chunks), GZIP))
+    assert gzip.decompress(compressed) == b"".join(chunks)
+    assert len(compressed) < 1000
+
+
+def test_zstd_stream_round_trip():
+    zstandard = pytest.importorskip("zstandard")
+    compressed = b"".join(compress_stream(iter([b"abc" * 1000]), ZSTD))
+    assert zstandard.ZstdDecompressor().decompressobj().decompress(compressed) == b"abc" * 1000
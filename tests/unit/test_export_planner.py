@@ -0,0 +1,112 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from sqlalchemy import event
+
+from app.services.persistence import ExportContext, export_session, import_session, registry
+from app.services.persistence.migrations import CURRENT_FORMAT_VERSION
+from app.services.persistence.planner import ExportPlanner
+
+
+def _session_data(characters=3, combats=1):
+    return {
+        "format_version": CURRENT_FORMAT_VERSION,
+        "entities": {
+            "players": {"version": 1, "data": [
+                {"id": 1, "name": "GM", "is_gm": True},
+                {"id": 2, "name": "Alice", "is_gm": False},
+            ]},
+            "characters": {"version": 1, "data": [
+                {"id": 10 + c, "player_id": 2, "name": f"Hero {c}"} for c in range(characters)
+            ]},
+            "items": {"version": 1, "data": [
+                {"id": 100 + c, "character_id": 10 + c, "name": "Sword", "effects": {"str_bonus": c}}
+                for c in range(characters)
+            ]},
+            "spells": {"version": 1, "data": [
+                {"id": 200 + c, "character_id": 10 + c, "name": "Bolt", "level": 1}
+                for c in range(characters)
+            ]},
+            "combats": {"version": 1, "data": [
+                {
+                    "id": 300 + i,
+                    "round_number": 2,
+                    "current_turn_order": 1,
+                    "participants": [
+                        {"character_id": 10 + c, "initiative": 20 - c, "current_hp": 5}
+                        for c in range(characters)
+                    ],
+                }
+                for i in range(combats)
+            ]},
+        },
+    }
+
+
+def _count_queries(db):
+    statements = []
+
+    def before(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    conn = db.connection()
+    event.listen(conn, "before_cursor_execute", before)
+    return statements, lambda: event.remove(conn, "before_cursor_execute", before)
+
+
+class TestExportPlanner:
+    def test_fixed_number_of_queries(self, db):
+        small = import_session(db, _session_data(characters=2, combats=1)).session_id
+        large = import_session(db, _session_data(characters=20, combats=6)).session_id
+
+        counts = []
+        for session_id in (small, large):
+            statements, stop = _count_queries(db)
+            export_session(db, session_id)
+            stop()
+            counts.append(len(statements))
+
+        assert counts[0] == counts[1]
+        # Сессия + players, characters, items, spells, combats, participants,
+        # maps, map_tokens, map_walls
+        assert counts[0] == 10
+
+    def test_levels_group_independent_entities(self):
+        levels = ExportPlanner(registry).levels()
+        assert levels[0] == ["players"]
+        assert levels[1] == ["characters"]
+        assert sorted(levels[2]) == ["combats", "items", "maps", "spells"]
+
+    def test_snapshot_matches_streaming(self, db):
+        session_id = import_session(db, _session_data()).session_id
+
+        planned = registry.export_all(ExportContext(db=db, session_id=session_id))
+        streamed = {
+            name: list(records)
+            for name, _, records in registry.iter_export(ExportContext(db=db, session_id=session_id))
+        }
+        assert {name: e["data"] for name, e in planned.items()} == streamed
+        assert list(planned) == registry.get_export_order()
+
+        combat = planned["combats"]["data"][0]
+        assert combat["current_turn_order"] == 1
+        assert [p["initiative"] for p in combat["participants"]] == [20, 19, 18]
+        assert planned["items"]["data"][2]["effects"] == {"str_bonus": 2}
+
+    def test_parallel_serialization_same_result(self, db):
+        session_id = import_session(db, _session_data(characters=5)).session_id
+        serial = export_session(db, session_id)["entities"]
+
+        settings = SimpleNamespace(export_workers=2)
+        with patch("app.services.persistence.planner.get_settings", return_value=settings), \
+                patch("app.services.persistence.planner.PARALLEL_MIN_ROWS", 0), \
+                patch("app.services.persistence.planner._executor", None):
+            parallel = export_session(db, session_id)["entities"]
+
+        assert parallel == serial
+
+    def test_without_combat(self, db):
+        session_id = import_session(db, _session_data()).session_id
+        entities = export_session(db, session_id, include_combat=False)["entities"]
+        assert entities["combats"]["data"] == []
@@ -0,0 +1,112 @@
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import pytest
+from pydantic import BaseModel, TypeAdapter
+from starlette.responses import JSONResponse
+
+from app.core import fast_json
+from app.core.fast_json import FastJSONResponse, compile_serializer, dumps, serialize_many
+from app.models.map import Map
+from app.models.user_map import UserMap, UserMapToken
+from app.schemas.character import CharacterResponse
+from app.schemas.map import MapResponse, MapTokenResponse
+from app.schemas.user_map import UserMapResponse
+from tests.unit.test_map_serializer import session_with_map  # noqa: F401
+
+
+def _legacy_body(model, objs) -> bytes:
+    """What FastAPI returned before: response_model validation + JSONResponse."""
+    content = TypeAdapter(List[model]).dump_python(
+        TypeAdapter(List[model]).validate_python(objs, from_attributes=True), mode="json"
+    )
+    return JSONResponse(content).body
+
+
+CONTENT = [
+    {"name": "Гоблин ☠", "control": "\x00\x1f\x7f ", "quote": '"\\/'},
+    {"floats": [0.0, -0.0, 0.1, 1 / 3, 125.5, 1e15, 1e16, 1e-4, 1e-5, -2.5e-7, 1.7976931348623157e308]},
+    {"ints": [0, -1, 2**63 - 1, 2**64, -(2**63)], "flags": [True, False, None]},
+    {"text_like_number": "1e5 and 0.00001"},
+    [],
+    {},
+    1e20,
+]
+
+
+class TestDumps:
+    @pytest.mark.parametrize("content", CONTENT)
+    def test_same_bytes_as_json_response(self, content):
+        assert dumps(content) == JSONResponse(content).body
+        assert FastJSONResponse(content).body == JSONResponse(content).body
+
+    @pytest.mark.parametrize("content", CONTENT)
+    def test_without_orjson(self, content, monkeypatch):
+        monkeypatch.setattr(fast_json, "orjson", None)
+        assert dumps(content) == JSONResponse(content).body
+
+
+class Inner(BaseModel):
+    value: float
+
+
+class Outer(BaseModel):
+    id: int
+    when: datetime
+    label: Optional[str] = None
+    maybe: Optional[Inner] = None
+    items: List[Inner] = []
+
+
+class TestCompiledSerializer:
+    def test_matches_model_dump(self):
+        objs = [
+            Outer(id=1, when=datetime(2026, 1, 2, 3, 4, 5, 6000), items=[Inner(value=1)]),
+            Outer(id=2, when=datetime(2026, 1, 2, tzinfo=timezone.utc), label="x", maybe=Inner(value=0.5)),
+        ]
+        assert serialize_many(Outer, objs) == [o.model_dump(mode="json") for o in objs]
+
+    def test_missing_attribute_uses_default(self):
+        class Obj:
+            id = 1
+            when = datetime(2026, 1, 1)
+
+        assert compile_serializer(Outer)(Obj()) == Outer(id=1, when=datetime(2026, 1, 1)).model_dump(mode="json")
+
+    def test_compiled_once(self):
+        assert compile_serializer(MapTokenResponse) is compile_serializer(MapTokenResponse)
+
+    def test_unsupported_type(self):
+        class Bad(BaseModel):
+            data: dict
+
+        with pytest.raises(TypeError):
+            compile_serializer(Bad)
+
+
+class TestSnapshots:
+    def test_maps_and_tokens(self, db, session_with_map):
+        maps = db.query(Map).filter(Map.session_id == session_with_map.id).all()
+        assert dumps(serialize_many(MapResponse, maps)) == _legacy_body(MapResponse, maps)
+        tokens = maps[0].tokens
+        assert dumps(serialize_many(MapTokenResponse, tokens)) == _legacy_body(MapTokenResponse, tokens)
+
+    def test_characters(self, db, create_session_fixture, create_player_fixture, create_character_fixture):
+        session, _ = create_session_fixture()
+        player = create_player_fixture(session)
+        chars = [
+            create_character_fixture(player),
+            create_character_fixture(player, name="Мира", class_name=None, appearance="рыжая", armor_class=17),
+        ]
+        assert dumps(serialize_many(CharacterResponse, chars)) == _legacy_body(CharacterResponse, chars)
+
+    def test_user_maps(self, db, create_user_fixture):
+        user = create_user_fixture()
+        user_map = UserMap(user_id=user.id, name="Crypt", width=1000, height=800, grid_scale=40)
+        db.add(user_map)
+        db.flush()
+        db.add(UserMapToken(user_map_id=user_map.id, type="npc", x=1.5, y=2.0, scale=1.0,
+                            rotation=0.0, color="#fff", layer="tokens"))
+        db.flush()
+        db.refresh(user_map)
+        assert dumps(serialize_many(UserMapResponse, [user_map])) == _legacy_body(UserMapResponse, [user_map])
@@ -0,0 +1,66 @@
+from app.models.combat import Combat
+from app.schemas.combat import InitiativeEntry
+from app.services.initiative import InitiativeIndex, InitiativeIndexRegistry
+
+
+def _player(pid, roll=None):
+    return InitiativeEntry(player_id=pid, player_name=f"P{pid}", roll=roll, is_npc=False)
+
+
+def _npc(cid, roll):
+    return InitiativeEntry(player_id=0, player_name="NPC", character_id=cid,
+                           character_name=f"NPC{cid}", roll=roll, is_npc=True)
+
+
+class TestInitiativeIndex:
+    def test_pending_players_listed_after_rolled(self):
+        index = InitiativeIndex(combat_id=1, session_id=1)
+        index.add_pending(_player(1))
+        index.add_pending(_player(2))
+        index.insert(_npc(10, 12), tie_breaker=1)
+
+        entries = index.entries()
+        assert [e.roll for e in entries] == [12, None, None]
+        assert len(index) == 3
+
+    def test_roll_player_returns_rank(self):
+        index = InitiativeIndex(combat_id=1, session_id=1)
+        for pid in (1, 2, 3):
+            index.add_pending(_player(pid))
+
+        assert index.roll_player(2, 10)[0] == 0
+        assert index.roll_player(1, 15)[0] == 0
+        rank, entry = index.roll_player(3, 12)
+        assert rank == 1
+        assert entry.roll == 12
+        assert [e.player_id for e in index.entries()] == [1, 3, 2]
+
+    def test_ties_players_before_npcs(self):
+        index = InitiativeIndex(combat_id=1, session_id=1)
+        index.insert(_npc(10, 14), tie_breaker=1)
+        index.add_pending(_player(5))
+        assert index.roll_player(5, 14)[0] == 0
+        assert index.insert(_npc(11, 14), tie_breaker=2) == 2
+
+    def test_insert_is_idempotent(self):
+        index = InitiativeIndex(combat_id=1, session_id=1)
+        entry = _npc(10, 8)
+        assert index.insert(entry, tie_breaker=3) == 0
+        assert index.insert(entry, tie_breaker=3) == 0
+        assert len(index) == 1
+
+
+class TestInitiativeIndexRegistry:
+    def test_index_of_other_session_is_rebuilt(self, monkeypatch):
+        built = []
+        monkeypatch.setattr(InitiativeIndexRegistry, "build", staticmethod(
+            lambda db, combat: built.append(combat.session_id) or InitiativeIndex(combat.id, combat.session_id)
+        ))
+        registry = InitiativeIndexRegistry()
+        first = registry.get(None, Combat(id=1, session_id=1))
+        assert registry.get(None, Combat(id=1, session_id=1)) is first
+
+        # Same combat id, reused by another session
+        second = registry.get(None, Combat(id=1, session_id=2))
+        assert second is not first and second.session_id == 2
+        assert built == [1, 2]
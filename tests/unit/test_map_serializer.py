@@ -0,0 +1,150 @@
+import json
+
+import pytest
+
+from app.models.character import Character
+from app.models.map import Map, MapToken, MapWall
+from app.models.player import Player
+from app.services.persistence import ImportContext, export_session, import_session, validate_import_data
+from app.services.persistence.packing import (
+    PackingError,
+    pack_dictionary,
+    pack_floats,
+    unpack_dictionary,
+    unpack_floats,
+)
+from app.services.persistence.serializers.map import MapSerializer
+
+
+class TestPacking:
+    def test_floats_round_trip_exactly(self):
+        values = [0.0, 25.5, 1234.56789, -3.0, 1e-9]
+        assert unpack_floats(pack_floats(values), len(values)) == values
+
+    def test_dictionary_round_trip(self):
+        values = ["monster", None, "prop", "monster", None]
+        packed = pack_dictionary(values)
+        assert packed["values"] == ["monster", None, "prop"]
+        assert unpack_dictionary(packed, 5) == values
+
+    def test_wide_dictionary_uses_wider_codes(self):
+        values = [f"c{i}" for i in range(300)]
+        assert unpack_dictionary(pack_dictionary(values), 300) == values
+
+    @pytest.mark.parametrize("packed,count", [
+        ("not base64!", 1),
+        (pack_floats([1.0, 2.0]), 3),
+        (123, 1),
+    ])
+    def test_bad_float_columns(self, packed, count):
+        with pytest.raises(PackingError):
+            unpack_floats(packed, count)
+
+    def test_code_out_of_range(self):
+        packed = pack_dictionary(["a", "b"])
+        packed["values"] = ["a"]
+        with pytest.raises(PackingError):
+            unpack_dictionary(packed, 2)
+
+
+@pytest.fixture()
+def session_with_map(db, create_session_fixture, create_player_fixture, create_character_fixture):
+    session, _ = create_session_fixture()
+    player = create_player_fixture(session)
+    hero = create_character_fixture(player)
+
+    map_obj = Map(
+        session_id=session.id, name="Dungeon", background_url="/uploads/blobs/ab/x.png",
+        width=2000, height=1500, grid_scale=50, is_active=True,
+        difficult_terrain=[[1, 2], [3, 4]],
+    )
+    db.add(map_obj)
+    db.flush()
+    db.add_all([
+        MapToken(map_id=map_obj.id, character_id=hero.id, type="character",
+                 x=125.0, y=75.5, scale=1.0, rotation=0.0, color="#ff0000"),
+        MapToken(map_id=map_obj.id, type="monster", x=300.25, y=410.0, scale=2.0,
+                 rotation=90.0, label="Goblin", color="#00ff00", icon="skull", layer="hidden"),
+        MapToken(map_id=map_obj.id, type="prop", x=10.0, y=20.0, label="Chest", icon="chest"),
+        MapWall(map_id=map_obj.id, x1=0.0, y1=0.0, x2=100.0, y2=0.0),
+    ])
+    db.flush()
+    return session
+
+
+def _tokens(db, map_id):
+    return sorted(
+        (t.type, t.x, t.y, t.scale, t.rotation, t.label, t.color, t.icon, t.layer, t.character_id)
+        for t in db.query(MapToken).filter(MapToken.map_id == map_id)
+    )
+
+
+class TestMapSerializer:
+    def test_export_is_columnar(self, db, session_with_map):
+        record = export_session(db, session_with_map.id)["entities"]["maps"]["data"][0]
+
+        assert record["name"] == "Dungeon"
+        assert record["difficult_terrain"] == [[1, 2], [3, 4]]
+        tokens = record["tokens"]
+        assert tokens["count"] == 3
+        assert isinstance(tokens["x"], str)
+        assert set(tokens["type"]["values"]) == {"character", "monster", "prop"}
+        assert record["walls"]["count"] == 1
+        json.dumps(record)
+
+    def test_round_trip(self, db, session_with_map):
+        exported = export_session(db, session_with_map.id)
+        old_map = db.query(Map).filter(Map.session_id == session_with_map.id).one()
+        old_hero = db.query(Character).join(Player).filter(Player.session_id == session_with_map.id).one()
+
+        result = import_session(db, exported)
+        assert result.success is True
+        assert result.entity_counts["maps"] == 1
+
+        new_map = db.query(Map).filter(Map.session_id == result.session_id).one()
+        new_hero = db.query(Character).join(Player).filter(Player.session_id == result.session_id).one()
+        assert new_map.id != old_map.id
+        assert (new_map.name, new_map.width, new_map.is_active) == ("Dungeon", 2000, True)
+
+        expected = [
+            t[:-1] + ((new_hero.id,) if t[-1] == old_hero.id else (t[-1],))
+            for t in _tokens(db, old_map.id)
+        ]
+        assert _tokens(db, new_map.id) == sorted(expected)
+        wall = db.query(MapWall).filter(MapWall.map_id == new_map.id).one()
+        assert (wall.x1, wall.y1, wall.x2, wall.y2) == (0.0, 0.0, 100.0, 0.0)
+
+    def test_unknown_character_token_kept_unlinked(self, db, session_with_map):
+        exported = export_session(db, session_with_map.id)
+        exported["entities"]["characters"]["data"] = []
+        exported["entities"]["items"]["data"] = []
+        exported["entities"]["spells"]["data"] = []
+
+        result = import_session(db, exported)
+        assert result.success is True
+        new_map = db.query(Map).filter(Map.session_id == result.session_id).one()
+        assert all(t[-1] is None for t in _tokens(db, new_map.id))
+        assert any("Map token references unknown character" in w for w in result.warnings)
+
+    def test_validation_reports_broken_columns(self, db, session_with_map):
+        exported = export_session(db, session_with_map.id)
+        exported["entities"]["maps"]["data"][0]["tokens"]["x"] = pack_floats([1.0])
+
+        result = validate_import_data(exported)
+        assert result.is_valid is False
+        assert result.errors == ["maps[0].tokens: ожидалось 3 значений"]
+
+    def test_validate_record_checks_types(self):
+        context = ImportContext(db=None, session_id=0, validation_only=True)
+        MapSerializer.validate_record(0, {
+            "id": "m1",
+            "name": "M",
+            "tokens": {
+                "count": 1,
+                **{k: pack_floats([0.0]) for k in ("x", "y", "scale", "rotation")},
+                **{k: pack_dictionary([None]) for k in ("type", "layer", "color", "icon")},
+                "character_id": ["5"],
+                "label": [None],
+            },
+        }, context)
+        assert context.errors == ["maps[0].tokens[0]: character_id должен быть целым или null"]
@@ -0,0 +1,126 @@
+import pytest
+
+from app.services.persistence import import_session, session_importer, streaming, validate_import_stream
+from app.services.persistence import migrations
+from app.services.persistence.migrations import (
+    get_migration_path,
+    migrate_data,
+    migration_plan,
+    register_migration,
+    register_record_migration,
+)
+from tests.unit.test_streaming_import import _chunks
+
+
+@pytest.fixture()
+def registry(monkeypatch):
+    """Пустой реестр миграций и текущая версия 1.2 на время теста."""
+    monkeypatch.setattr(migrations, "_migrations", {})
+    monkeypatch.setattr(migrations, "_record_migrations", {})
+    monkeypatch.setattr(migrations, "_plans", {})
+    monkeypatch.setattr(migrations, "_paths", {})
+    for module in (migrations, session_importer, streaming):
+        monkeypatch.setattr(module, "CURRENT_FORMAT_VERSION", "1.2")
+    calls = []
+
+    @register_record_migration("1.0", "1.1", "characters")
+    def add_armor(record):
+        calls.append(("armor", record["id"]))
+        record.setdefault("armor_class", 12)
+        return record
+
+    @register_record_migration("1.1", "1.2", "characters")
+    def rename_hp(record):
+        calls.append(("hp", record["id"]))
+        record["max_hp"] = record.pop("hp", record.get("max_hp", 10))
+        return record
+
+    return calls
+
+
+def _doc(version="1.0"):
+    return {
+        "format_version": version,
+        "entities": {
+            "players": {"version": 1, "data": [
+                {"id": 1, "name": "GM", "is_gm": True},
+                {"id": 2, "name": "Alice", "is_gm": False},
+            ]},
+            "characters": {"version": 1, "data": [
+                {"id": 10, "player_id": 2, "name": "Hero", "hp": 30},
+                {"id": 11, "player_id": 2, "name": "Sidekick", "hp": 8, "armor_class": 15},
+            ]},
+        },
+    }
+
+
+class TestMigrationPlan:
+    def test_record_steps_fused_into_one_pass(self, registry):
+        plan = migration_plan("1.0", "1.2")
+        assert plan.path == ["1.0", "1.1", "1.2"]
+        assert plan.record_only
+        assert len(plan.steps) == 1
+
+        data = migrate_data(_doc())
+        assert data["format_version"] == "1.2"
+        chars = data["entities"]["characters"]["data"]
+        assert [(c["armor_class"], c["max_hp"]) for c in chars] == [(12, 30), (15, 8)]
+        # Обе функции применены к записи подряд, одним проходом
+        assert registry == [("armor", 10), ("hp", 10), ("armor", 11), ("hp", 11)]
+
+    def test_plan_is_cached_until_registration(self, registry):
+        plan = migration_plan("1.0", "1.2")
+        assert migration_plan("1.0", "1.2") is plan
+
+        @register_migration("1.1", "1.2")
+        def touch(data):
+            data["touched"] = True
+            return data
+
+        rebuilt = migration_plan("1.0", "1.2")
+        assert rebuilt is not plan
+        # Записи шага 1.1 -> 1.2 мигрируются до документа того же шага
+        assert [kind for kind, _ in rebuilt.steps] == ["records", "document"]
+        assert not rebuilt.record_only
+
+    def test_document_step_after_records_of_same_hop(self, registry):
+        @register_migration("1.0", "1.1")
+        def check(data):
+            assert all("armor_class" in c for c in data["entities"]["characters"]["data"])
+            data["checked"] = True
+            return data
+
+        assert migrate_data(_doc())["checked"] is True
+
+    def test_shortest_path(self, registry):
+        @register_migration("1.0", "1.2")
+        def jump(data):
+            return data
+
+        assert get_migration_path("1.0", "1.2") == ["1.0", "1.2"]
+        assert get_migration_path("1.1", "1.2") == ["1.1", "1.2"]
+        with pytest.raises(ValueError):
+            get_migration_path("1.2", "1.0")
+
+    def test_migrate_single_record(self, registry):
+        record = migration_plan("1.1").migrate_record("characters", {"id": 5, "hp": 3})
+        assert record == {"id": 5, "max_hp": 3}
+        assert migration_plan("1.1").migrate_record("items", {"id": 1}) == {"id": 1}
+
+
+class TestImportMigratesOnce:
+    def test_dict_import(self, db, registry):
+        result = import_session(db, _doc())
+        assert result.success is True, result.errors
+        # Валидация и импорт используют один мигрированный документ
+        assert registry.count(("armor", 10)) == 1
+
+    def test_streaming(self, registry):
+        result = validate_import_stream(_chunks(_doc()))
+        assert result.is_valid is True, result.errors
+        assert registry == [("armor", 10), ("hp", 10), ("armor", 11), ("hp", 11)]
+
+    def test_streaming_without_path(self, registry):
+        result = validate_import_stream(_chunks(_doc("1.0.1")))
+        assert result.is_valid is False
+        assert result.errors[0].startswith("Ошибка миграции")
@@ -0,0 +1,115 @@
+import numpy as np
+
+from app.services.pathfinding import CostGrid, DIFFICULT_COST
+from app.services.visibility import walls_array
+
+
+def _grid(cols=10, rows=10):
+    return CostGrid("m", cols * 50, rows * 50, 50)
+
+
+class TestFindPath:
+    def test_straight_line(self):
+        grid = _grid()
+        path, cost = grid.find_path(grid.index(0, 0), grid.index(4, 0))
+        assert cost == 20
+        assert [grid.cell(i) for i in path] == [(0, 0), (1, 0), (2, 0), (3, 0), (4, 0)]
+
+    def test_diagonals_alternate_5_10(self):
+        grid = _grid()
+        _, cost = grid.find_path(grid.index(0, 0), grid.index(4, 4))
+        assert cost == 5 + 10 + 5 + 10
+        _, cost = grid.find_path(grid.index(0, 0), grid.index(3, 3))
+        assert cost == 5 + 10 + 5
+
+    def test_difficult_terrain_is_avoided_or_doubled(self):
+        grid = _grid(5, 1)
+        grid.set_terrain([(2, 0)], DIFFICULT_COST)
+        _, cost = grid.find_path(grid.index(0, 0), grid.index(4, 0))
+        assert cost == 25
+
+        # With room to go around, the detour is cheaper than 10 ft
+        grid = _grid(5, 3)
+        grid.set_terrain([(2, 1)], DIFFICULT_COST)
+        path, cost = grid.find_path(grid.index(0, 1), grid.index(4, 1))
+        assert grid.index(2, 1) not in path
+        assert cost == 25
+
+    def test_tokens_block_but_not_themselves(self):
+        grid = _grid(5, 1)
+        grid.place_token("mover", 25, 25, "tokens")
+        grid.place_token("wall-of-flesh", 125, 25, "tokens")
+        assert grid.find_path(grid.index(0, 0), grid.index(4, 0), token_id="mover") is None
+        # Unseen tokens can be treated as free
+        free = {grid.index(2, 0)}
+        assert grid.find_path(grid.index(0, 0), grid.index(4, 0), token_id="mover", free=free)[1] == 20
+        # Background props do not block
+        grid.place_token("wall-of-flesh", 125, 25, "background")
+        assert grid.find_path(grid.index(0, 0), grid.index(4, 0), token_id="mover")[1] == 20
+
+    def test_walls_block_moves(self):
+        grid = _grid(4, 4)
+        # Wall between columns 1 and 2, rows 0-2
+        grid.set_walls(walls_array([(100, 0, 100, 150)]))
+        path, cost = grid.find_path(grid.index(0, 0), grid.index(3, 0))
+        cells = [grid.cell(i) for i in path]
+        assert any(row == 3 for _, row in cells)
+        assert cost > 15
+
+    def test_matches_reachable_costs(self):
+        rng = np.random.default_rng(3)
+        grid = _grid(15, 15)
+        grid.set_terrain([tuple(c) for c in rng.integers(0, 15, size=(40, 2))], DIFFICULT_COST)
+        start = grid.index(7, 7)
+        costs = grid.reachable(start, 1000)
+        for idx in rng.choice(len(grid), size=20, replace=False):
+            result = grid.find_path(start, int(idx))
+            assert result[1] == costs[int(idx)]
+
+
+    def test_budget_limits_search(self):
+        grid = _grid()
+        start, goal = grid.index(0, 0), grid.index(6, 0)
+        assert grid.find_path(start, goal, budget=29) is None
+        assert grid.find_path(start, goal, budget=30)[1] == 30
+
+    def test_state_cap_gives_up(self):
+        grid = _grid(60, 60)
+        for i, (dx, dy) in enumerate([(-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1)]):
+            grid.place_token(f"t{i}", (50 + dx) * 50 + 25, (50 + dy) * 50 + 25, "tokens")
+        start, enclosed = grid.index(0, 0), grid.index(50, 50)
+        assert grid.find_path(start, enclosed, max_states=500) is None
+        assert grid.find_path(start, grid.index(5, 5), max_states=500) is not None
+
+
+class TestReachable:
+    def test_speed_30_open_field(self):
+        grid = _grid(20, 20)
+        start = grid.index(10, 10)
+        costs = grid.reachable(start, 30)
+        assert costs[start] == 0
+        assert costs[grid.index(16, 10)] == 30
+        assert grid.index(17, 10) not in costs
+        # 4 diagonals = 5+10+5+10
+        assert costs[grid.index(14, 14)] == 30
+
+    def test_state_cap_keeps_exact_costs(self):
+        grid = _grid(20, 20)
+        start = grid.index(10, 10)
+        full = grid.reachable(start, 1000)
+        partial = grid.reachable(start, 1000, max_states=50)
+        assert start in partial and len(partial) < len(full)
+        assert all(full[idx] == cost for idx, cost in partial.items())
+        # The flood expands cheapest first: nothing left out is nearer
+        assert max(partial.values()) <= min(cost for idx, cost in full.items() if idx not in partial)
+
+    def test_incremental_token_move(self):
+        grid = _grid(5, 1)
+        grid.place_token("a", 125, 25, "tokens")
+        assert grid.index(4, 0) not in grid.reachable(grid.index(0, 0), 100)
+        grid.place_token("a", 225, 25, "tokens")
+        costs = grid.reachable(grid.index(0, 0), 100)
+        assert costs[grid.index(3, 0)] == 15
+        assert grid.index(4, 0) not in costs
+        grid.remove_token("a")
+        assert grid.reachable(grid.index(0, 0), 100)[grid.index(4, 0)] == 20
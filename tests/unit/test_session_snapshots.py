@@ -0,0 +1,226 @@
+from unittest.mock import patch
+
+from app.models.character import Character
+from app.models.item import Item
+from app.models.map import Map, MapToken
+from app.models.player import Player
+from app.models.session_snapshot import SessionSnapshot
+from app.services.persistence import export_session, import_session
+from app.services.persistence.snapshots import (
+    apply_delta,
+    compact_snapshots,
+    diff_entities,
+    export_session_delta,
+    hash_entities,
+    list_snapshots,
+    materialize,
+    restore_snapshot,
+    take_snapshot,
+)
+from tests.unit.test_export_planner import _session_data
+
+
+def _strip(doc):
+    """Сущности без id (после импорта id новые)."""
+    return {
+        name: [{k: v for k, v in r.items() if not k.endswith("id")} for r in entity["data"]]
+        for name, entity in doc["entities"].items()
+    }
+
+
+def _session(db):
+    return import_session(db, _session_data(characters=3)).session_id
+
+
+def _hero(db, session_id, name="Hero 0"):
+    return (
+        db.query(Character).join(Player)
+        .filter(Player.session_id == session_id, Character.name == name).one()
+    )
+
+
+class TestDiff:
+    def test_upserts_and_deletes(self):
+        base = {"items": {"version": 1, "data": [{"id": 1, "name": "A"}, {"id": 2, "name": "B"}]}}
+        current = {"items": {"version": 1, "data": [{"id": 2, "name": "B2"}, {"id": 3, "name": "C"}]}}
+
+        delta, changed = diff_entities(current, hash_entities(current), hash_entities(base))
+        assert delta == {"items": {
+            "version": 1,
+            "upserts": [{"id": 2, "name": "B2"}, {"id": 3, "name": "C"}],
+            "keys": ["2", "3"],
+            "deleted": ["1"],
+        }}
+        assert changed == 3
+        assert apply_delta({"entities": base}, delta)["entities"] == current
+
+    def test_records_without_id_keep_their_position(self):
+        base = {"notes": {"version": 1, "data": [{"text": "A"}, {"text": "B"}, {"text": "C"}]}}
+        current = {"notes": {"version": 1, "data": [{"text": "A"}, {"text": "B"}, {"text": "C2"}]}}
+
+        delta, _ = diff_entities(current, hash_entities(current), hash_entities(base))
+        assert delta["notes"]["keys"] == ["#2"]
+        assert apply_delta({"entities": base}, delta)["entities"] == current
+
+    def test_unchanged_entities_omitted(self):
+        entities = {"spells": {"version": 1, "data": [{"id": 1, "name": "Bolt"}]}}
+        hashes = hash_entities(entities)
+        assert diff_entities(entities, hashes, hashes) == ({}, 0)
+
+
+class TestSnapshots:
+    def test_first_snapshot_is_full_then_unchanged_skipped(self, db):
+        session_id = _session(db)
+
+        first = take_snapshot(db, session_id)
+        assert first.is_full
+        assert first.changed_records == sum(len(h) for h in first.record_hashes.values())
+        assert take_snapshot(db, session_id) is None
+
+    def test_delta_contains_only_changes(self, db):
+        session_id = _session(db)
+        take_snapshot(db, session_id)
+
+        hero = _hero(db, session_id)
+        hero.current_hp = 1
+        db.query(Item).filter(Item.character_id == _hero(db, session_id, "Hero 2").id).delete()
+        db.flush()
+
+        delta = take_snapshot(db, session_id)
+        assert not delta.is_full
+        entities = delta.payload["entities"]
+        assert set(entities) == {"characters", "items"}
+        assert [c["current_hp"] for c in entities["characters"]["upserts"]] == [1]
+        assert entities["items"]["upserts"] == []
+        assert len(entities["items"]["deleted"]) == 1
+        assert delta.changed_records == 2
+
+    def test_materialize_equals_export(self, db):
+        session_id = _session(db)
+        take_snapshot(db, session_id)
+        for hp in (5, 6, 7):
+            _hero(db, session_id).current_hp = hp
+            db.flush()
+            last = take_snapshot(db, session_id)
+
+        assert _strip(materialize(db, last)) == _strip(export_session(db, session_id))
+        snapshots = list_snapshots(db, session_id)
+        assert len(snapshots) == 4
+        # Хэши остаются у полного и последнего снимков
+        assert [s.record_hashes is not None for s in snapshots] == [True, False, False, True]
+
+        _hero(db, session_id).current_hp = 8
+        db.flush()
+        delta = export_session_delta(db, session_id, snapshots[1])
+        assert [c["current_hp"] for c in delta["entities"]["characters"]["upserts"]] == [8]
+
+    def test_restore_applies_base_and_deltas(self, db):
+        session_id = _session(db)
+        take_snapshot(db, session_id)
+        _hero(db, session_id).name = "Renamed"
+        db.flush()
+        snapshot = take_snapshot(db, session_id)
+
+        result = restore_snapshot(db, snapshot, "SNAP01")
+        assert result.success is True
+        assert result.session_code == "SNAP01"
+        names = sorted(
+            c.name for c in db.query(Character).join(Player)
+            .filter(Player.session_id == result.session_id)
+        )
+        assert names == ["Hero 1", "Hero 2", "Renamed"]
+
+    def test_chain_limit_forces_full(self, db):
+        session_id = _session(db)
+        with patch("app.services.persistence.snapshots.SNAPSHOT_CHAIN_LIMIT", 2):
+            kinds = []
+            for hp in range(4):
+                _hero(db, session_id).current_hp = hp
+                db.flush()
+                kinds.append(take_snapshot(db, session_id).is_full)
+        assert kinds == [True, False, False, True]
+
+    def test_compact(self, db):
+        session_id = _session(db)
+        take_snapshot(db, session_id)
+        _hero(db, session_id).current_hp = 3
+        db.flush()
+        take_snapshot(db, session_id)
+        expected = _strip(export_session(db, session_id))
+
+        compacted = compact_snapshots(db, session_id)
+        assert compacted.is_full
+        assert [s.id for s in list_snapshots(db, session_id)] == [compacted.id]
+        assert _strip(materialize(db, compacted)) == expected
+        # Следующая дельта строится от свёрнутого снимка
+        _hero(db, session_id).current_hp = 4
+        db.flush()
+        assert take_snapshot(db, session_id).base_id == compacted.id
+
+    def test_delta_export_since_snapshot(self, db):
+        session_id = _session(db)
+        base = take_snapshot(db, session_id)
+        _hero(db, session_id, "Hero 1").level = 5
+        db.flush()
+
+        delta = export_session_delta(db, session_id, base)
+        assert delta["base_snapshot_id"] == base.id
+        assert list(delta["entities"]) == ["characters"]
+        assert delta["entities"]["characters"]["upserts"][0]["level"] == 5
+
+    def test_unchanged_session_is_not_exported(self, db):
+        session_id = _session(db)
+        take_snapshot(db, session_id)
+
+        with patch("app.services.persistence.snapshots.export_session") as export:
+            assert take_snapshot(db, session_id) is None
+        export.assert_not_called()
+
+    def test_only_changed_entities_exported(self, db):
+        from app.services.persistence import snapshots
+
+        session_id = _session(db)
+        take_snapshot(db, session_id)
+        _hero(db, session_id).current_hp = 2
+        db.flush()
+
+        with patch.object(snapshots, "export_session", wraps=snapshots.export_session) as export:
+            delta = take_snapshot(db, session_id)
+        assert export.call_args.kwargs["only"] == ["characters"]
+        assert list(delta.payload["entities"]) == ["characters"]
+        assert _strip(materialize(db, delta)) == _strip(export_session(db, session_id))
+
+    def test_token_move_is_one_token_record(self, db):
+        session_id = _session(db)
+        game_map = Map(session_id=session_id, name="Cave")
+        db.add(game_map)
+        db.flush()
+        tokens = [MapToken(map_id=game_map.id, x=i * 50.0, y=0.0, label=f"T{i}") for i in range(5)]
+        db.add_all(tokens)
+        db.flush()
+        take_snapshot(db, session_id)
+
+        tokens[3].x = 999.0
+        db.flush()
+        delta = take_snapshot(db, session_id)
+        entities = delta.payload["entities"]
+        assert list(entities) == ["map_tokens"]
+        assert entities["map_tokens"]["keys"] == [tokens[3].id]
+        assert entities["map_tokens"]["upserts"][0]["x"] == 999.0
+        assert delta.changed_records == 1
+        assert _strip(materialize(db, delta)) == _strip(export_session(db, session_id))
+
+        db.delete(tokens[0])
+        db.flush()
+        delta = take_snapshot(db, session_id)
+        assert delta.payload["entities"]["map_tokens"]["deleted"] == [tokens[0].id]
+        assert _strip(materialize(db, delta)) == _strip(export_session(db, session_id))
+
+    def test_snapshots_deleted_with_session(self, db):
+        from app.models.session import Session
+
+        session_id = import_session(db, _session_data(combats=0)).session_id
+        take_snapshot(db, session_id)
+        db.delete(db.get(Session, session_id))
+        db.flush()
+        assert db.query(SessionSnapshot).filter(SessionSnapshot.session_id == session_id).count() == 0
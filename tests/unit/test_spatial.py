@@ -0,0 +1,78 @@
+import random
+
+import pytest
+
+from app.services.spatial import SpatialGrid, feet_to_pixels
+
+
+def _ids(tokens):
+    return sorted(t.id for t in tokens)
+
+
+class TestSpatialGrid:
+    def test_radius_query(self):
+        grid = SpatialGrid(50)
+        grid.insert("a", 100, 100, 30)
+        grid.insert("b", 400, 100, 30)
+        assert _ids(grid.query_radius(100, 100, 10)) == ["a"]
+        # Edge of token circle counts as a hit
+        assert _ids(grid.query_radius(200, 100, 70)) == ["a"]
+        assert _ids(grid.query_radius(250, 100, 200)) == ["a", "b"]
+
+    def test_rect_query(self):
+        grid = SpatialGrid(50)
+        grid.insert("inside", 120, 120, 10)
+        grid.insert("touching", 215, 100, 20)
+        grid.insert("outside", 300, 300, 10)
+        assert _ids(grid.query_rect(100, 100, 200, 200)) == ["inside", "touching"]
+
+    def test_cone_query(self):
+        grid = SpatialGrid(50)
+        grid.insert("ahead", 200, 0, 5)
+        grid.insert("behind", -200, 0, 5)
+        grid.insert("wide", 100, 100, 5)  # 45 deg off axis, outside a 5e cone
+        grid.insert("edge", 200, 100, 5)  # on the cone edge (atan(0.5))
+        assert _ids(grid.query_cone(0, 0, 0, 300)) == ["ahead", "edge"]
+        assert _ids(grid.query_cone(0, 0, 180, 300)) == ["behind"]
+
+    def test_move_and_remove_keep_cells_in_sync(self):
+        grid = SpatialGrid(50)
+        grid.insert("t", 10, 10, 5)
+        grid.insert("t", 500, 500, 5)
+        assert grid.query_radius(10, 10, 20) == []
+        assert _ids(grid.query_radius(500, 500, 1)) == ["t"]
+        grid.remove("t")
+        assert len(grid) == 0
+        assert grid.query_radius(500, 500, 100) == []
+
+    def test_huge_query_scans_tokens_not_cells(self):
+        grid = SpatialGrid(50)
+        grid.insert("a", 100, 100, 30)
+        grid.insert("b", 4000, 4000, 30)
+        # 8000 x 8000 cells; would take seconds cell by cell
+        assert _ids(grid.query_rect(-2e5, -2e5, 2e5, 2e5)) == ["a", "b"]
+        assert _ids(grid.query_radius(0, 0, 1e9)) == ["a", "b"]
+        assert _ids(grid.query_cone(0, 0, 45, 1e7)) == ["a", "b"]
+        assert grid.query_rect(-1e9, -1e9, -1e8, -1e8) == []
+        assert _ids(grid.query_rect(float("-inf"), 0, float("inf"), 200)) == ["a"]
+
+    def test_matches_linear_scan(self):
+        rng = random.Random(0)
+        grid = SpatialGrid(50)
+        tokens = {}
+        for i in range(500):
+            x, y, r = rng.uniform(0, 5000), rng.uniform(0, 5000), rng.uniform(10, 60)
+            grid.insert(str(i), x, y, r)
+            tokens[str(i)] = (x, y, r)
+
+        cx, cy, radius = 2500, 2500, 400
+        expected = sorted(
+            tid for tid, (x, y, r) in tokens.items()
+            if ((x - cx) ** 2 + (y - cy) ** 2) ** 0.5 <= radius + r
+        )
+        assert _ids(grid.query_radius(cx, cy, radius)) == expected
+
+
+@pytest.mark.parametrize("feet,scale,expected", [(5, 50, 50), (20, 50, 200), (15, 70, 210)])
+def test_feet_to_pixels(feet, scale, expected):
+    assert feet_to_pixels(feet, scale) == expected
@@ -0,0 +1,247 @@
+import gzip
+import json
+
+import pytest
+
+from app.models.character import Character
+from app.models.item import Item
+from app.models.player import Player
+from app.services.persistence import (
+    ImportContext,
+    export_session,
+    import_session,
+    import_session_stream,
+    validate_import_stream,
+)
+from app.services.persistence.compression import CorruptCompressedData, decompress_stream
+from app.services.persistence.migrations import CURRENT_FORMAT_VERSION
+from app.services.persistence.streaming import ImportStreamError, JsonStreamReader, process_stream
+
+
+def _doc(**entities):
+    base = {
+        "players": {"version": 1, "data": [
+            {"id": 1, "name": "GM", "is_gm": True},
+            {"id": 2, "name": "Alice", "is_gm": False},
+        ]},
+        "characters": {"version": 1, "data": [
+            {"id": 10, "player_id": 2, "name": "Hero", "level": 3, "max_hp": 25},
+        ]},
+        "items": {"version": 1, "data": [
+            {"id": 100, "character_id": 10, "name": "Sword", "effects": {"str_bonus": 1}},
+            {"id": 101, "character_id": 10, "name": "Shield", "effects": None, "is_equipped": True},
+        ]},
+    }
+    base.update(entities)
+    return {
+        "format_version": CURRENT_FORMAT_VERSION,
+        "exported_at": "2026-10-19T00:00:00Z",
+        "session_info": {"code": "ABC123"},
+        "entities": base,
+    }
+
+
+def _chunks(doc, size=7, indent=None):
+    raw = json.dumps(doc, ensure_ascii=False, indent=indent).encode("utf-8")
+    return [raw[i:i + size] for i in range(0, len(raw), size)]
+
+
+def _validate(chunks, **kw):
+    return validate_import_stream(chunks, **kw)
+
+
+class TestJsonStreamReader:
+    @pytest.mark.parametrize("size", [1, 2, 5, 64, 10_000])
+    def test_events_independent_of_chunk_boundaries(self, size):
+        doc = _doc()
+        doc["entities"]["items"]["data"][0]["name"] = "Меч 12345"
+        events = list(JsonStreamReader(_chunks(doc, size, indent=2)).events())
+
+        records = [(name, value) for kind, name, value in events if kind == "record"]
+        assert [r["id"] for _, r in records] == [1, 2, 10, 100, 101]
+        assert records[3][1]["name"] == "Меч 12345"
+        assert ("header", "format_version", CURRENT_FORMAT_VERSION) in events
+        assert ("field", "players", ("version", 1)) in events
+        assert [e[1] for e in events if e[0] == "end"] == ["players", "characters", "items"]
+
+    def test_number_split_at_chunk_boundary(self):
+        raw = b'{"format_version": "1.0", "n": 123456789}'
+        chunks = [raw[:len(raw) - 5], raw[len(raw) - 5:]]
+        events = list(JsonStreamReader(chunks).events())
+        assert ("header", "n", 123456789) in events
+
+    @pytest.mark.parametrize("raw", [
+        b'{"format_version": "1.0", "entities": {"players": {"data": [{"id": 1}',
+        b'{"format_version": "1.0"} trailing',
+        b'[1, 2]',
+        b'{"format_version": "1.0", "entities": []}',
+    ])
+    def test_malformed_documents(self, raw):
+        with pytest.raises(ImportStreamError):
+            list(JsonStreamReader([raw]).events())
+
+    def test_size_limits(self):
+        doc = _doc()
+        with pytest.raises(ImportStreamError, match="больше"):
+            list(JsonStreamReader(_chunks(doc, 64), max_size=100).events())
+
+        big = {"format_version": "1.0", "blob": "x" * 5000}
+        with pytest.raises(ImportStreamError, match="Запись больше"):
+            list(JsonStreamReader(_chunks(big, 512), max_value_size=1024).events())
+
+    def test_deep_nesting_rejected(self):
+        raw = b'{"format_version": "1.0", "x": ' + b"[" * 100_000 + b"]" * 100_000 + b"}"
+        with pytest.raises(ImportStreamError):
+            list(JsonStreamReader([raw], max_value_size=10 * 1024 * 1024).events())
+
+    def test_invalid_utf8(self):
+        with pytest.raises(ImportStreamError, match="UTF-8"):
+            list(JsonStreamReader([b'{"format_version": "\xff"}']).events())
+
+
+class TestStreamingValidation:
+    def test_valid_document(self):
+        result = _validate(_chunks(_doc()))
+        assert result.is_valid is True
+        assert result.entity_counts == {"players": 2, "characters": 1, "items": 2}
+
+    def test_fails_fast_on_first_error(self):
+        doc = _doc()
+        doc["entities"]["items"]["data"][0].pop("name")
+
+        consumed = []
+
+        def tracking(chunks):
+            for chunk in chunks:
+                consumed.append(chunk)
+                yield chunk
+
+        # Много записей после ошибочной — они не должны читаться
+        doc["entities"]["spells"] = {"version": 1, "data": [
+            {"id": i, "character_id": 10, "name": f"S{i}"} for i in range(2000)
+        ]}
+        chunks = _chunks(doc, 256)
+        result = _validate(tracking(chunks))
+
+        assert result.is_valid is False
+        assert result.errors == ["items[0]: отсутствует поле 'name'"]
+        assert len(consumed) < len(chunks) / 10
+
+    def test_unknown_parent_reference(self):
+        doc = _doc()
+        doc["entities"]["items"]["data"][1]["character_id"] = 999
+        result = _validate(_chunks(doc))
+        assert result.errors == ["items[1]: неизвестный character_id 999"]
+
+    def test_duplicate_ids(self):
+        doc = _doc()
+        doc["entities"]["items"]["data"][1]["id"] = 100
+        result = _validate(_chunks(doc))
+        assert result.errors == ["items[1]: дублирующийся id 100"]
+
+    def test_record_must_be_object_with_int_id(self):
+        doc = _doc()
+        doc["entities"]["items"]["data"].append("oops")
+        assert "запись должна быть объектом" in _validate(_chunks(doc)).errors[0]
+
+        doc = _doc()
+        doc["entities"]["items"]["data"][0]["id"] = [1]
+        assert "id должен быть целым числом" in _validate(_chunks(doc)).errors[0]
+
+    def test_unsupported_version(self):
+        doc = _doc()
+        doc["format_version"] = "99.0"
+        result = _validate(_chunks(doc))
+        assert result.is_valid is False
+        assert "Неподдерживаемая версия" in result.errors[0]
+
+    def test_format_version_must_precede_entities(self):
+        doc = _doc()
+        doc = {"entities": doc["entities"], "format_version": CURRENT_FORMAT_VERSION}
+        result = _validate(_chunks(doc))
+        assert "format_version" in result.errors[0]
+
+    def test_unknown_entity_skipped_with_warning(self):
+        result = _validate(_chunks(_doc(dragons={"version": 1, "data": [{"id": 1}]})))
+        assert result.is_valid is True
+        assert "dragons" not in result.entity_counts
+        assert any("dragons" in w for w in result.warnings)
+
+    def test_gzip_input(self):
+        raw = gzip.compress(json.dumps(_doc()).encode())
+        chunks = [raw[i:i + 50] for i in range(0, len(raw), 50)]
+        assert _validate(decompress_stream(chunks)).is_valid is True
+
+    def test_gzip_bomb_bounded(self):
+        bomb = gzip.compress(b" " * (20 * 1024 * 1024))
+        result = _validate(decompress_stream([bomb]), max_size=1024 * 1024)
+        assert result.is_valid is False
+        assert "больше" in result.errors[0]
+
+
+class TestDecompressStream:
+    def test_plain_passthrough(self):
+        assert b"".join(decompress_stream([b"{", b'"a": 1}'])) == b'{"a": 1}'
+
+    def test_truncated_gzip(self):
+        raw = gzip.compress(b"x" * 1000)
+        with pytest.raises(CorruptCompressedData):
+            b"".join(decompress_stream([raw[:-10]]))
+
+
+class TestStreamingImport:
+    def test_imports_like_dict_path(self, db):
+        result = import_session_stream(db, _chunks(_doc(), 13))
+        assert result.success is True
+        assert result.entity_counts == {"players": 1, "characters": 1, "items": 2}
+        assert set(result.player_tokens) == {"Game Master", "Alice"}
+
+        hero = (
+            db.query(Character).join(Player)
+            .filter(Player.session_id == result.session_id).one()
+        )
+        assert hero.player.name == "Alice"
+        assert sorted(i.name for i in hero.items) == ["Shield", "Sword"]
+
+    def test_round_trip_of_export(self, db):
+        first = import_session(db, _doc())
+        exported = export_session(db, first.session_id)
+        result = import_session_stream(db, _chunks(exported, 100))
+        assert result.success is True
+        assert result.entity_counts == import_session(db, exported).entity_counts
+
+    def test_error_rolls_back(self, db):
+        before = db.query(Item).count()
+        players_before = db.query(Player).count()
+        doc = _doc()
+        doc["entities"]["items"]["data"][1]["character_id"] = 999
+
+        result = import_session_stream(db, _chunks(doc))
+        assert result.success is False
+        assert result.session_id is None
+        assert db.query(Item).count() == before
+        assert db.query(Player).count() == players_before
+
+    def test_batches_flushed_incrementally(self, db, monkeypatch):
+        monkeypatch.setattr("app.services.persistence.streaming.IMPORT_BATCH_SIZE", 2)
+        doc = _doc()
+        doc["entities"]["items"]["data"] = [
+            {"id": 100 + i, "character_id": 10, "name": f"I{i}"} for i in range(5)
+        ]
+        context = ImportContext(db=db, session_id=0)
+
+        calls = []
+        from app.services.persistence.serializers.item import ItemSerializer
+        original = ItemSerializer.import_.__func__
+
+        def spy(cls, data, ctx):
+            calls.append(len(data))
+            return original(cls, data, ctx)
+
+        monkeypatch.setattr(ItemSerializer, "import_", classmethod(spy))
+        from app.services.persistence.session_importer import create_import_session
+        session, _ = create_import_session(db)
+        context.session_id = session.id
+        _, counts = process_stream(_chunks(doc), context)
+        assert calls == [2, 2, 1]
+        assert counts["items"] == 5
@@ -0,0 +1,90 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+
+from app.core.static_files import ImmutableStaticFiles, IMMUTABLE_CACHE_CONTROL
+from app.services.tiles import TILE_SIZE, build_pyramid, level_size, max_level
+
+
+def _image(tmp_path, size=(600, 300), mode="RGB"):
+    path = tmp_path / "bg.png"
+    Image.new(mode, size, (200, 50, 50)).save(path)
+    return str(path)
+
+
+class TestPyramid:
+    def test_levels_and_tiles(self, tmp_path):
+        out = tmp_path / "pyramid"
+        manifest = build_pyramid(_image(tmp_path), str(out))
+
+        assert manifest == {
+            "width": 600, "height": 300, "tile_size": TILE_SIZE,
+            "max_level": 10, "format": "webp",
+        }
+        assert json.loads((out / "manifest.json").read_text()) == manifest
+
+        # Full resolution: 3 x 2 tiles, edge tiles are cropped
+        top = sorted(os.listdir(out / "10"))
+        assert top == ["0_0.webp", "0_1.webp", "1_0.webp", "1_1.webp", "2_0.webp", "2_1.webp"]
+        with Image.open(out / "10" / "2_1.webp") as tile:
+            assert tile.size == (600 - 2 * TILE_SIZE, 300 - TILE_SIZE)
+
+        # Level 0 is a single pixel
+        with Image.open(out / "0" / "0_0.webp") as tile:
+            assert tile.size == (1, 1)
+
+        with Image.open(out / "preview.webp") as preview:
+            assert max(preview.size) <= 512
+
+        assert [p.name for p in tmp_path.iterdir() if p.name.endswith(".tmp")] == []
+
+    def test_existing_pyramid_is_kept(self, tmp_path):
+        out = tmp_path / "pyramid"
+        first = build_pyramid(_image(tmp_path, (300, 300), "RGBA"), str(out))
+        (out / "marker.txt").write_text("x")
+        assert build_pyramid(_image(tmp_path, (300, 300)), str(out)) == first
+        assert (out / "marker.txt").exists()
+
+    def test_unfinished_directory_is_replaced(self, tmp_path):
+        out = tmp_path / "pyramid"
+        out.mkdir()
+        (out / "stale.txt").write_text("x")
+        build_pyramid(_image(tmp_path, (300, 300)), str(out))
+        assert not (out / "stale.txt").exists()
+        assert (out / "manifest.json").exists()
+
+    def test_concurrent_builds_of_same_content(self, tmp_path):
+        source, out = _image(tmp_path, (1200, 900)), str(tmp_path / "pyramid")
+        with ThreadPoolExecutor(4) as pool:
+            manifests = list(pool.map(lambda _: build_pyramid(source, out), range(4)))
+
+        assert all(m == manifests[0] for m in manifests)
+        assert json.loads((tmp_path / "pyramid" / "manifest.json").read_text()) == manifests[0]
+        assert [p.name for p in tmp_path.iterdir() if p.name.endswith(".tmp")] == []
+
+    def test_level_size(self):
+        top = max_level(1000, 500)
+        assert top == 10
+        assert level_size(1000, 500, top, top) == (1000, 500)
+        assert level_size(1000, 500, top - 1, top) == (500, 250)
+        assert level_size(1000, 500, 0, top) == (1, 1)
+
+
+class TestImmutableStaticFiles:
+    def test_cache_headers(self, tmp_path):
+        (tmp_path / "maps").mkdir()
+        (tmp_path / "maps" / "tile.webp").write_bytes(b"tile")
+        (tmp_path / "avatar.jpg").write_bytes(b"avatar")
+        app = Starlette(routes=[Mount("/uploads", ImmutableStaticFiles(
+            directory=str(tmp_path), immutable_prefixes=("maps/",)
+        ))])
+        client = TestClient(app)
+
+        assert client.get("/uploads/maps/tile.webp").headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+        assert "cache-control" not in client.get("/uploads/avatar.jpg").headers
+        assert client.get("/uploads/maps/missing.webp").status_code == 404
@@ -0,0 +1,76 @@
+import asyncio
+import io
+import os
+
+import pytest
+from fastapi import UploadFile
+from PIL import Image
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.core.request_limits import MaxBodySizeMiddleware
+from app.services.uploads import (
+    CHUNK_SIZE, InvalidImage, UploadTooLarge, probe_image, stream_to_temp,
+)
+
+
+def _upload(data: bytes) -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename="bg.png")
+
+
+class TestStreamToTemp:
+    def test_copies_in_chunks(self, tmp_path):
+        data = os.urandom(CHUNK_SIZE * 3 + 17)
+        path = asyncio.run(stream_to_temp(_upload(data), str(tmp_path), len(data)))
+        assert os.path.dirname(path) == str(tmp_path)
+        with open(path, "rb") as f:
+            assert f.read() == data
+
+    def test_aborts_early_and_cleans_up(self, tmp_path):
+        upload = _upload(b"x" * (CHUNK_SIZE * 10))
+        with pytest.raises(UploadTooLarge):
+            asyncio.run(stream_to_temp(upload, str(tmp_path), CHUNK_SIZE * 2))
+        assert os.listdir(tmp_path) == []
+        # Stopped right after crossing the limit instead of reading everything
+        assert upload.file.tell() == CHUNK_SIZE * 3
+
+
+class TestProbeImage:
+    def _png(self, tmp_path, size=(40, 20)):
+        path = tmp_path / "img.png"
+        Image.new("RGB", size).save(path)
+        return str(path)
+
+    def test_reads_header(self, tmp_path):
+        assert probe_image(self._png(tmp_path), {"PNG"}) == ("PNG", 40, 20)
+
+    def test_rejects_format(self, tmp_path):
+        with pytest.raises(InvalidImage):
+            probe_image(self._png(tmp_path), {"JPEG"})
+
+    def test_rejects_garbage(self, tmp_path):
+        path = tmp_path / "fake.png"
+        path.write_bytes(b"not an image")
+        with pytest.raises(InvalidImage):
+            probe_image(str(path), {"PNG"})
+
+    def test_rejects_huge_dimensions(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("app.services.uploads.MAX_IMAGE_PIXELS", 100)
+        with pytest.raises(InvalidImage):
+            probe_image(self._png(tmp_path), {"PNG"})
+
+
+class TestMaxBodySizeMiddleware:
+    def test_rejects_by_content_length(self):
+        async def upload(request):
+            return PlainTextResponse(str(len(await request.body())))
+
+        app = Starlette(routes=[Route("/upload", upload, methods=["POST"])])
+        client = TestClient(MaxBodySizeMiddleware(app, limits={"/upload": 10}))
+
+        assert client.post("/upload", content=b"x" * 10).text == "10"
+        resp = client.post("/upload", content=b"x" * 11)
+        assert resp.status_code == 400
+        assert "too large" in resp.json()["detail"]
@@ -0,0 +1,34 @@
+import os
+
+import pytest
+from PIL import Image
+
+from app.services import blobs
+from app.services.variants import AVATAR_WIDTHS, build_variants, plan_variants
+
+
+@pytest.fixture()
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(blobs, "BLOB_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_plan_skips_widths_not_smaller_than_original():
+    planned = plan_variants("ab" * 32, 1000, 500, (640, 1280, 1920))
+    assert planned == [{"width": 640, "height": 320, "url": f"/uploads/blobs/ab/{'ab' * 32}/w640.webp"}]
+    assert plan_variants("ab" * 32, 32, 32, AVATAR_WIDTHS) == []
+
+
+def test_build_writes_webp_variants(db, store):
+    image = Image.new("RGBA", (1024, 1024), (10, 200, 10, 128))
+    path = store / "avatar.png"
+    image.save(path)
+    blob = blobs.store_bytes(db, path.read_bytes(), "png")
+
+    built = build_variants(blob.sha256, "png", AVATAR_WIDTHS)
+
+    assert [v["width"] for v in built] == [256, 96, 48]
+    out_dir = blobs.derived_dir(blob.sha256)
+    assert sorted(os.listdir(out_dir)) == ["w256.webp", "w48.webp", "w96.webp"]
+    with Image.open(os.path.join(out_dir, "w48.webp")) as thumb:
+        assert (thumb.format, thumb.size, thumb.mode) == ("WEBP", (48, 48), "RGBA")
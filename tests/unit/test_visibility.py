@@ -0,0 +1,88 @@
+import base64
+
+import numpy as np
+
+from app.services.visibility import (
+    MapFog, blocked, encode_mask, visibility_polygon, walls_array,
+)
+
+# Vertical wall at x=200 from y=0 to y=300
+WALL = walls_array([(200, 0, 200, 300)])
+
+
+class TestBlocked:
+    def test_wall_between_blocks(self):
+        targets = np.array([[300.0, 100.0], [150.0, 100.0], [250.0, 450.0]])
+        assert blocked((100, 100), targets, WALL).tolist() == [True, False, False]
+
+    def test_no_walls(self):
+        targets = np.array([[300.0, 100.0]])
+        assert blocked((100, 100), targets, walls_array([])).tolist() == [False]
+
+    def test_matches_chunked(self, monkeypatch):
+        rng = np.random.default_rng(0)
+        walls = walls_array(rng.uniform(0, 1000, size=(30, 4)))
+        targets = rng.uniform(0, 1000, size=(500, 2))
+        full = blocked((500, 500), targets, walls)
+        monkeypatch.setattr("app.services.visibility.MAX_PAIRS", 100)
+        assert (blocked((500, 500), targets, walls) == full).all()
+
+
+class TestVisibilityPolygon:
+    def test_open_map_is_map_rectangle(self):
+        points = visibility_polygon((50, 50), walls_array([]), 100, 100)
+        assert {(0.0, 0.0), (100.0, 0.0), (100.0, 100.0), (0.0, 100.0)} <= set(points)
+
+    def test_wall_cuts_polygon(self):
+        points = visibility_polygon((100, 100), WALL, 400, 400)
+        # Nothing behind the wall is in the polygon above y=300
+        assert all(x <= 200.01 for x, y in points if y < 290)
+
+
+class TestMapFog:
+    def _fog(self):
+        # 8 x 8 cells of 50px, wall splits the map at x=200 down to y=300
+        return MapFog("m", 400, 400, 50, WALL)
+
+    def test_viewer_sees_own_side(self):
+        fog = self._fog()
+        fog.update_viewer("t1", 1, 100, 100)
+        assert fog.can_see(1, 120, 120)
+        assert not fog.can_see(1, 300, 100)
+        # Below the wall end the far side is visible
+        assert fog.can_see(1, 220, 390)
+        # Other players see nothing
+        assert not fog.can_see(2, 120, 120)
+
+    def test_revealed_grows_and_visible_follows(self):
+        fog = self._fog()
+        fog.update_viewer("t1", 1, 100, 100)
+        fog.update_viewer("t1", 1, 300, 100)
+        assert fog.can_see(1, 300, 50)
+        assert not fog.can_see(1, 50, 50)
+        # Previously seen area stays revealed for background tokens
+        assert fog.can_see(1, 50, 50, "background")
+
+    def test_hidden_layer_never_visible(self):
+        fog = self._fog()
+        fog.update_viewer("t1", 1, 100, 100)
+        assert not fog.can_see(1, 100, 100, "hidden")
+
+    def test_set_walls_recomputes(self):
+        fog = self._fog()
+        fog.update_viewer("t1", 1, 100, 100)
+        fog.set_walls(walls_array([]))
+        assert fog.can_see(1, 300, 100)
+
+    def test_remove_viewer(self):
+        fog = self._fog()
+        fog.update_viewer("t1", 1, 100, 100)
+        assert fog.remove_viewer("t1") == 1
+        assert not fog.visible(1).any()
+        assert fog.revealed_mask(1).any()
+
+    def test_encode_mask(self):
+        mask = np.zeros((2, 5), dtype=bool)
+        mask[0, 0] = mask[1, 4] = True
+        bits = np.unpackbits(np.frombuffer(base64.b64decode(encode_mask(mask)), dtype=np.uint8))
+        assert bits[:10].astype(bool).tolist() == mask.ravel().tolist()